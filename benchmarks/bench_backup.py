@@ -0,0 +1,86 @@
+"""
+Benchmark backup online: membuat snapshot database berukuran besar sambil sebuah thread lain terus
+menambah booking, lalu melaporkan throughput backup dan latensi booking selama backup berjalan.
+
+Contoh:
+    python benchmarks/bench_backup.py --bookings 300000
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.backup_service import BackupService
+from services.booking_service import BookingService
+
+
+def seed(db_manager, bookings):
+    conn = db_manager.get_connection()
+    conn.execute("INSERT INTO Doctors (Name, Specialty) VALUES ('dr. Uji', 'Umum')")
+    conn.executemany("INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked) VALUES (1, '2025-01-01', ?, '23:59', 1)",
+                     ((f"{i:07d}",) for i in range(bookings)))
+    conn.executemany("INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime) "
+                     "VALUES (?, 1, ?, '0812', '2025-01-01', '09:00')",
+                     ((i + 1, f"Pasien {i}") for i in range(bookings)))
+    today = date.today().isoformat()
+    conn.executemany("INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime) VALUES (1, ?, ?, '23:59')",
+                     ((today, f"{i:05d}") for i in range(5000)))
+    conn.commit()
+    conn.close()
+    return today
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=300000)
+    parser.add_argument("--pages-per-step", type=int, default=256)
+    parser.add_argument("--wal", action="store_true", help="Aktifkan journal_mode=WAL sebelum backup")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(os.path.join(tmp, "bench.db"))
+        db_manager.create_tables()
+        today = seed(db_manager, args.bookings)
+        if args.wal:
+            conn = db_manager.get_connection()
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.close()
+
+        booking_service = BookingService(db_manager)
+        backup_service = BackupService(db_manager, backup_dir=os.path.join(tmp, "backups"),
+                                       pages_per_step=args.pages_per_step)
+        latencies = []
+        done = threading.Event()
+
+        def book_continuously():
+            schedule_id = args.bookings + 1
+            while not done.is_set():
+                t0 = time.perf_counter()
+                booking_service.add_booking(schedule_id, 1, "Pasien Baru", "0812", today, "09:00")
+                latencies.append((time.perf_counter() - t0) * 1000)
+                schedule_id += 1
+                time.sleep(0.005)
+
+        writer = threading.Thread(target=book_continuously)
+        writer.start()
+        stats = backup_service.run_backup()
+        done.set()
+        writer.join()
+
+    print(f"snapshot {stats['size_bytes'] / 2**20:.1f} MiB in {stats['copy_seconds']:.2f}s "
+          f"({stats['throughput_mb_s']:.1f} MB/s), restarts={stats['restarts']}, integrity={stats['integrity']}")
+    print(f"bookings during backup: {len(latencies)}, median {statistics.median(latencies):.2f} ms, "
+          f"max {max(latencies):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark operasi massal vs perulangan operasi tunggal:
+add_bookings vs N x add_booking, dan cancel_bookings vs N x cancel_booking.
+
+Contoh:
+    python benchmarks/bench_bulk.py --items 200
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.booking_service import BookingService
+
+
+def prepare(tmp, name, items):
+    db_manager = DatabaseManager(os.path.join(tmp, f"{name}.db"))
+    db_manager.create_tables()
+    conn = db_manager.get_connection()
+    conn.execute("INSERT INTO Doctors (Name, Specialty) VALUES ('dr. Uji', 'Umum')")
+    today = date.today().isoformat()
+    conn.executemany("INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime) VALUES (1, ?, ?, '23:59')",
+                     [(today, f"{i:05d}") for i in range(items)])
+    conn.commit()
+    conn.close()
+    service = BookingService(db_manager)
+    booking_items = [{"schedule_id": i + 1, "doctor_id": 1, "patient_name": f"Pasien {i}", "patient_phone": "0812",
+                      "booking_date": today, "waktu_booking": f"{i:05d}"} for i in range(items)]
+    return service, booking_items, today
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    fn()
+    elapsed = (time.perf_counter() - t0) * 1000
+    print(f"{label:>28}: {elapsed:9.1f} ms")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service, items, today = prepare(tmp, "singles", args.items)
+        single_add = timed(f"{args.items} x add_booking", lambda: [
+            service.add_booking(i["schedule_id"], i["doctor_id"], i["patient_name"], i["patient_phone"],
+                                i["booking_date"], i["waktu_booking"]) for i in items])
+        single_cancel = timed(f"{args.items} x cancel_booking",
+                              lambda: [service.cancel_booking(booking_id) for booking_id in range(1, args.items + 1)])
+
+        service, items, today = prepare(tmp, "bulk", args.items)
+        bulk_add = timed("add_bookings", lambda: service.add_bookings(items))
+        bulk_cancel = timed("cancel_bookings", lambda: service.cancel_bookings(1, today, today))
+
+    print(f"speedup add: {single_add / bulk_add:.1f}x   cancel: {single_cancel / bulk_cancel:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
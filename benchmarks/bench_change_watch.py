@@ -0,0 +1,125 @@
+"""
+Benchmark deteksi perubahan antar meja: ChangeWatcher vs memuat ulang tampilan secara berkala.
+
+Database file berisi snapshot seed (--size) dipakai oleh dua "meja". Yang diukur:
+    idle       : biaya satu interval tanpa perubahan
+                 reload   - query yang dijalankan populate_booking_table + populate_doctor_cards
+                 sequence - get_change_sequence lewat koneksi baru (seperti mode server)
+                 watcher  - ChangeWatcher.poll (PRAGMA data_version pada koneksi tetap)
+    change     : satu booking dari meja lain, lalu meja ini memperbarui datanya
+                 reload   - query penuh seperti di atas
+                 watcher  - poll + get_changes (hanya baris yang berubah) + ketersediaan dokter terkait
+    write cost : latensi add_booking dengan dan tanpa trigger ChangeLog
+
+Contoh:
+    python benchmarks/bench_change_watch.py --size medium --rounds 200
+"""
+import argparse
+import logging
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.booking_service import BookingService
+from services.change_watcher import ChangeWatcher
+from services.seed_snapshots import ensure_snapshot
+
+
+def full_reload(service, today):
+    """Query yang sama dengan populate_booking_table + populate_doctor_cards (tanpa widget)."""
+    bookings = service.get_all_bookings()
+    for doctor in service.get_all_doctors_with_specialty():
+        service.get_doctor_schedules(doctor.doctor_id, today, include_booked=False)
+    return len(bookings)
+
+
+def timed(function, rounds):
+    latencies = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def describe(latencies):
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return f"p50 {statistics.median(ordered) * 1000:8.3f} ms  p95 {pick(0.95):8.3f} ms"
+
+
+def book_slots(service, start):
+    """Generator booking satu per satu di slot kosong berikutnya (meja lain), hari demi hari mulai start."""
+    day = start
+    while True:
+        for slot in service.get_available_schedules(day.isoformat()):
+            yield lambda slot=slot: service.add_booking(slot.schedule_id, slot.doctor_id, "Meja Lain", "0812999",
+                                                        slot.date, slot.start_time, slot_index=slot.slot_index)
+        day += timedelta(days=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="medium")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    today = date.today().isoformat()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "desk.db")
+        shutil.copy(ensure_snapshot(args.size), path)
+        other_desk = BookingService(DatabaseManager(path))
+        this_desk = BookingService(DatabaseManager(path))
+        watcher = ChangeWatcher(this_desk, lambda changes: None, db_manager=DatabaseManager(path))
+        watcher.poll()
+        rows = full_reload(this_desk, today)
+        print(f"{args.size}: {rows} active bookings in view, "
+              f"{len(this_desk.get_all_doctors_with_specialty())} doctor cards")
+
+        print("idle (no change):")
+        print(f"  {'reload':>8}: {describe(timed(lambda: full_reload(this_desk, today), max(10, args.rounds // 10)))}")
+        print(f"  {'sequence':>8}: {describe(timed(this_desk.get_change_sequence, args.rounds))}")
+        print(f"  {'watcher':>8}: {describe(timed(watcher.poll, args.rounds))}")
+
+        print("one booking from another desk:")
+        bookings = book_slots(other_desk, date.today())
+        reload_latencies, watcher_latencies = [], []
+        for _ in range(max(10, args.rounds // 10)):
+            next(bookings)()
+            reload_latencies.extend(timed(lambda: full_reload(this_desk, today), 1))
+            watcher.poll() # Perubahan ini sudah dimuat oleh reload di atas
+        for _ in range(args.rounds):
+            next(bookings)()
+            t0 = time.perf_counter()
+            changes = watcher.poll()
+            for doctor_id in changes.doctor_ids:
+                this_desk.get_doctor_schedules(doctor_id, today, include_booked=False)
+            watcher_latencies.append(time.perf_counter() - t0)
+        print(f"  {'reload':>8}: {describe(reload_latencies)}")
+        print(f"  {'watcher':>8}: {describe(watcher_latencies)}; {watcher.metrics()}")
+        watcher.close()
+
+        print("add_booking write cost:")
+        for variant in ("with ChangeLog", "without ChangeLog"):
+            if variant == "without ChangeLog":
+                conn = sqlite3.connect(path)
+                for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                                            "AND name LIKE 'trg_changelog_%'").fetchall():
+                    conn.execute(f"DROP TRIGGER {name}")
+                conn.commit()
+                conn.close()
+            latencies = [timed(book, 1)[0] for _, book in zip(range(args.rounds // 2), bookings)]
+            print(f"  {variant:>17}: {describe(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
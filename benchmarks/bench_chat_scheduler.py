@@ -0,0 +1,128 @@
+"""
+Benchmark antrean chatbot dengan model tiruan (tanpa jaringan).
+
+Pesan datang dengan jeda acak (sebagian beruntun, seperti pengguna yang mengetik susulan),
+model lokal punya latensi tetap dan melempar error 429/503 dengan peluang tertentu.
+Dibandingkan:
+    - perilaku lama: pesan diabaikan jika jawaban sebelumnya belum datang, error langsung tampil;
+    - ChatRequestScheduler: antre, gabung pesan susulan, batas per menit, retry dengan backoff.
+
+Contoh:
+    python benchmarks/bench_chat_scheduler.py --messages 60 --error-rate 0.3
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.chat_scheduler import ChatRequestScheduler, FakeChatModel
+
+
+def arrival_gaps(count, seed):
+    rng = random.Random(seed)
+    # 30% pesan adalah susulan cepat (< 0.2 detik), sisanya jeda 0.2-1.0 detik
+    return [rng.uniform(0.02, 0.2) if rng.random() < 0.3 else rng.uniform(0.2, 1.0) for _ in range(count)]
+
+
+def run_old_behaviour(gaps, latency, error_rate):
+    model = FakeChatModel(latency=latency, error_rate=error_rate, seed=7)
+    busy = threading.Event()
+    results = {"answered": 0, "errors": 0, "dropped": 0}
+    threads = []
+
+    def call(prompt):
+        try:
+            model.send(prompt, [])
+            results["answered"] += 1
+        except Exception:
+            results["errors"] += 1
+        finally:
+            busy.clear()
+
+    for i, gap in enumerate(gaps):
+        time.sleep(gap)
+        if busy.is_set():
+            results["dropped"] += 1
+            continue
+        busy.set()
+        thread = threading.Thread(target=call, args=(f"pesan {i}",))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def run_scheduler(gaps, latency, error_rate, rpm):
+    model = FakeChatModel(latency=latency, error_rate=error_rate, seed=7)
+    scheduler = ChatRequestScheduler(model, requests_per_minute=rpm, base_delay=0.1, max_delay=2.0,
+                                     deadline_seconds=30, coalesce_seconds=0.15)
+    answered_messages = []
+    failed_messages = []
+    done = threading.Event()
+    pending = set()
+    lock = threading.Lock()
+
+    def finish(request_id):
+        with lock:
+            pending.discard(request_id)
+            if not pending and submitting_done.is_set():
+                done.set()
+
+    def on_result(request_id, text, history):
+        answered_messages.append(text.count("\n") + 1)
+        finish(request_id)
+
+    def on_error(request_id, message, error):
+        failed_messages.append(request_id)
+        finish(request_id)
+
+    submitting_done = threading.Event()
+    started = time.perf_counter()
+    for i, gap in enumerate(gaps):
+        time.sleep(gap)
+        with lock:
+            pending.add(scheduler.submit(f"pesan {i}", on_result, on_error))
+    with lock:
+        submitting_done.set()
+        if not pending:
+            done.set()
+    done.wait(120)
+    elapsed = time.perf_counter() - started
+    metrics = scheduler.metrics()
+    scheduler.close()
+    return metrics, sum(answered_messages), len(failed_messages), model.calls, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.4, help="Latensi model tiruan (detik)")
+    parser.add_argument("--error-rate", type=float, default=0.3)
+    parser.add_argument("--rpm", type=int, default=120, help="Batas permintaan per menit")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.ERROR + 10)
+
+    gaps = arrival_gaps(args.messages, seed=1)
+
+    old = run_old_behaviour(gaps, args.latency, args.error_rate)
+    print(f"old behaviour: {args.messages} messages -> answered {old['answered']}, "
+          f"errors shown {old['errors']}, dropped {old['dropped']}")
+
+    metrics, answered, failed, calls, elapsed = run_scheduler(gaps, args.latency, args.error_rate, args.rpm)
+    print(f"scheduler:     {args.messages} messages -> answered {answered} "
+          f"in {metrics['completed']} requests ({metrics['coalesced']} coalesced), failed requests {failed}")
+    print(f"  model calls {calls}, retries {metrics['retries']}, rate-limit waits {metrics['rate_limit_waits']}, "
+          f"max queue depth {metrics['max_queue_depth']}, total {elapsed:.1f}s")
+    if metrics.get("latency_p50_ms") is not None:
+        print(f"  latency (submit -> answer): p50 {metrics['latency_p50_ms']:.0f} ms, "
+              f"p95 {metrics['latency_p95_ms']:.0f} ms, max {metrics['latency_max_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark audit konsistensi Schedules vs Bookings pada database berukuran jutaan baris.
+
+Database diisi shift 15 menit dan booking (sebagian dibatalkan), lalu dirusak dengan sengaja:
+IsBooked dibalik, bit Occupancy dihapus/ditambah, booking ganda pada slot yang sama, booking
+tanpa jadwal, dan booking yang dokternya berbeda dengan jadwalnya. Yang diukur: waktu audit
+penuh, audit + perbaikan, audit ulang setelah perbaikan, dan audit bertahap per rentang tanggal.
+Jumlah temuan dibandingkan dengan jumlah kerusakan yang disuntikkan.
+
+Contoh:
+    python benchmarks/bench_consistency.py --doctors 100 --days 730 --corrupt 500
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.consistency_service import ConsistencyService, FINDING_KINDS
+
+SHIFTS = [("08:00", "12:00"), ("13:00", "17:00")]
+SLOT_MINUTES = 15
+SLOTS_PER_SHIFT = 4 * 60 // SLOT_MINUTES
+FULL_MASK = (1 << SLOTS_PER_SHIFT) - 1
+
+
+def slot_time(start, index):
+    hours, minutes = map(int, start.split(":"))
+    total = hours * 60 + minutes + index * SLOT_MINUTES
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+def seed(db_manager, doctors, days, booked_ratio):
+    rng = random.Random(1)
+    start = date(2025, 1, 1)
+    conn = db_manager.get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO Doctors (Name, Specialty) VALUES (?, 'Umum')",
+                       [(f"dr. Dokter {i}",) for i in range(doctors)])
+    schedules, bookings = [], []
+    for doctor_id in range(1, doctors + 1):
+        for day in range(days):
+            day_str = (start + timedelta(days=day)).isoformat()
+            for shift_start, shift_end in SHIFTS:
+                schedule_id = len(schedules) + 1
+                occupancy = 0
+                for index in range(SLOTS_PER_SHIFT):
+                    if rng.random() < booked_ratio:
+                        occupancy |= 1 << index
+                        status = rng.choice(("Confirmed", "Confirmed", "Completed", "NoShow"))
+                    elif rng.random() < 0.1:
+                        status = "Cancelled" # Riwayat pembatalan tidak memegang slot
+                    else:
+                        continue
+                    bookings.append((schedule_id, doctor_id, f"Pasien {len(bookings)}", "0812", day_str,
+                                     slot_time(shift_start, index), status, index))
+                schedules.append((doctor_id, day_str, shift_start, shift_end, int(occupancy == FULL_MASK),
+                                  SLOT_MINUTES, SLOTS_PER_SHIFT, occupancy))
+    cursor.executemany(
+        "INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked, SlotMinutes, SlotTotal, Occupancy) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", schedules)
+    cursor.executemany(
+        "INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, Status, SlotIndex) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", bookings)
+    conn.commit()
+    conn.close()
+    return len(schedules), len(bookings)
+
+
+def corrupt(db_path, schedules, count):
+    """Menyuntikkan count kerusakan per jenis pada jadwal yang berbeda-beda; mengembalikan jumlah yang diharapkan."""
+    rng = random.Random(2)
+    targets = rng.sample(range(1, schedules + 1), count * 4)
+    flip, drop_bit, double, mismatch = (targets[i * count:(i + 1) * count] for i in range(4))
+    # Koneksi tanpa PRAGMA foreign_keys, seperti edit manual dengan tool luar
+    conn = sqlite3.connect(db_path)
+    conn.executemany("UPDATE Schedules SET IsBooked = 1 - IsBooked WHERE ScheduleID = ?", [(s,) for s in flip])
+    conn.executemany("UPDATE Schedules SET Occupancy = Occupancy + 1 - 2 * (Occupancy & 1) WHERE ScheduleID = ?", [(s,) for s in drop_bit])
+    # Booking ganda berstatus Completed pada slot 0 yang sudah terisi (lolos dari unique index,
+    # yang hanya berlaku untuk Confirmed)
+    doubled = conn.executemany("""
+        INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, Status, SlotIndex)
+        SELECT ScheduleID, DoctorID, 'Pasien Ganda', '0813', Date, StartTime, 'Completed', 0
+        FROM Schedules WHERE ScheduleID = ? AND Occupancy & 1
+    """, [(s,) for s in double]).rowcount
+    mismatched = conn.executemany("""
+        UPDATE Bookings SET DoctorID = DoctorID + 1
+        WHERE BookingID = (SELECT MIN(BookingID) FROM Bookings WHERE ScheduleID = ? AND Status != 'Cancelled')
+    """, [(s,) for s in mismatch]).rowcount
+    conn.executemany("""
+        INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, Status, SlotIndex)
+        VALUES (?, 1, 'Pasien Yatim', '0814', '2025-01-01', '08:00', 'Confirmed', 0)
+    """, [(schedules + 1000 + i,) for i in range(count)])
+    conn.commit()
+    conn.close()
+    return {"flag_mismatch": 2 * count, "double_booked": doubled, "orphan_booking": count,
+            "booking_schedule_mismatch": mismatched}
+
+
+def describe(report):
+    findings = ", ".join(f"{kind}={report['findings'][kind]}" for kind in FINDING_KINDS if report["findings"][kind])
+    return f"{report['elapsed_seconds']:.2f} s; {findings or 'no findings'}; repaired={report['repaired']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, default=100)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--booked-ratio", type=float, default=0.85)
+    parser.add_argument("--corrupt", type=int, default=500, help="jumlah kerusakan per jenis")
+    parser.add_argument("--chunk-days", type=int, default=31)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "audit.db")
+        db_manager = DatabaseManager(path)
+        db_manager.create_tables()
+        t0 = time.perf_counter()
+        schedules, bookings = seed(db_manager, args.doctors, args.days, args.booked_ratio)
+        print(f"seeded {schedules} schedules and {bookings} bookings in {time.perf_counter() - t0:.1f} s "
+              f"({os.path.getsize(path) / 1024 / 1024:.0f} MiB)")
+        expected = corrupt(path, schedules, args.corrupt)
+        print(f"injected: {expected}")
+
+        service = ConsistencyService(db_manager, chunk_days=args.chunk_days, pause_seconds=0)
+        print(f"initial audit       : {describe(service.audit())}")
+        print(f"audit + repair      : {describe(service.audit(repair=True))}")
+        print(f"audit after repair  : {describe(service.audit())}")
+        report = service.run_incremental()
+        print(f"incremental ({report['chunks']} chunks of {args.chunk_days} days): {describe(report)}")
+
+
+if __name__ == "__main__":
+    main()
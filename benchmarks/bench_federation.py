@@ -0,0 +1,137 @@
+"""
+Benchmark federasi cabang: query gabungan ke beberapa file database cabang (shard).
+
+Setiap cabang diisi dokter, shift 15 menit dan booking. Query gabungan (direktori dokter,
+slot kosong satu hari, pencarian FTS dan daftar booking terbaru) dijalankan sekali dengan
+satu worker (berurutan, seperti melakukan loop per cabang) dan sekali dengan thread pool
+satu worker per cabang. Benchmark juga memeriksa bahwa booking baru hanya tertulis di cabang
+pemiliknya.
+
+Contoh:
+    python benchmarks/bench_federation.py --branches 10 --bookings 30000
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.federation import FederatedBookingService
+
+SHIFTS = [("08:00", "12:00"), ("13:00", "17:00")]
+SLOT_MINUTES = 15
+SLOTS_PER_SHIFT = 4 * 60 // SLOT_MINUTES
+SPECIALTIES = ["Umum", "Gigi", "Anak", "Kulit", "Mata"]
+FIRST_NAMES = ["Budi", "Siti", "Agus", "Dewi", "Rina", "Joko", "Tono", "Sari", "Andi", "Wati"]
+
+
+def slot_time(start, index):
+    hours, minutes = map(int, start.split(":"))
+    total = hours * 60 + minutes + index * SLOT_MINUTES
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+def seed(db_manager, branch_no, doctors, days, bookings):
+    rng = random.Random(branch_no)
+    start = date.today()
+    conn = db_manager.get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO Doctors (Name, Specialty) VALUES (?, ?)",
+                       [(f"dr. Cabang{branch_no} Dokter {i}", SPECIALTIES[i % len(SPECIALTIES)])
+                        for i in range(doctors)])
+    shifts = []
+    for doctor_id in range(1, doctors + 1):
+        for day in range(days):
+            day_str = (start + timedelta(days=day)).isoformat()
+            for shift_start, shift_end in SHIFTS:
+                shifts.append([doctor_id, day_str, shift_start, shift_end, 0, SLOT_MINUTES, SLOTS_PER_SHIFT, 0])
+    rows = []
+    for _ in range(bookings):
+        schedule_id = rng.randrange(len(shifts))
+        shift = shifts[schedule_id]
+        free = [i for i in range(SLOTS_PER_SHIFT) if not shift[7] >> i & 1]
+        if not free:
+            continue
+        index = rng.choice(free)
+        shift[7] |= 1 << index
+        name = f"{rng.choice(FIRST_NAMES)} {rng.randrange(10000)}"
+        rows.append((schedule_id + 1, shift[0], name, f"0812{rng.randrange(10**7):07d}", shift[1],
+                     slot_time(shift[2], index), index))
+    for shift in shifts:
+        shift[4] = int(shift[7] == (1 << SLOTS_PER_SHIFT) - 1)
+    cursor.executemany(
+        "INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked, SlotMinutes, SlotTotal, Occupancy) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", shifts)
+    cursor.executemany(
+        "INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, Status, SlotIndex) "
+        "VALUES (?, ?, ?, ?, ?, ?, 'Confirmed', ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def timed(call, repeat):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = call()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--branches", type=int, default=10)
+    parser.add_argument("--doctors", type=int, default=20, help="dokter per cabang")
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--bookings", type=int, default=30000, help="booking per cabang")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        databases = {f"cabang-{i}": os.path.join(tmp, f"cabang_{i}.db") for i in range(args.branches)}
+        t0 = time.perf_counter()
+        federation = FederatedBookingService(databases)
+        federation.create_tables()
+        for branch_no, branch in enumerate(federation.branches):
+            seed(federation.db_managers[branch], branch_no, args.doctors, args.days, args.bookings)
+        print(f"seeded {args.branches} branches x {args.bookings} bookings in {time.perf_counter() - t0:.1f} s")
+        sequential = FederatedBookingService(databases, max_workers=1)
+
+        day = (date.today() + timedelta(days=args.days // 2)).isoformat()
+        queries = [
+            ("get_all_doctors", lambda f: f.get_all_doctors(limit=args.limit)),
+            ("get_available_schedules", lambda f: f.get_available_schedules(day, limit=args.limit)),
+            ("get_available_schedules Gigi", lambda f: f.get_available_schedules(day, "Gigi", limit=args.limit)),
+            ("search_bookings 'budi'", lambda f: f.search_bookings("budi", limit=args.limit)),
+            ("get_all_bookings", lambda f: f.get_all_bookings(limit=args.limit)),
+        ]
+        print(f"{'query':<30} {'rows':>5} {'sequential':>12} {'pool':>12} {'speedup':>8}")
+        for label, query in queries:
+            seq_ms, seq_rows = timed(lambda: query(sequential), args.repeat)
+            pool_ms, pool_rows = timed(lambda: query(federation), args.repeat)
+            assert seq_rows == pool_rows, label
+            print(f"{label:<30} {len(pool_rows):>5} {seq_ms:>9.2f} ms {pool_ms:>9.2f} ms {seq_ms / pool_ms:>7.2f}x")
+
+        slot = federation.get_available_schedules(day, limit=1)[0]
+        before = {branch: len(federation.branch(branch).search_bookings("Routing", limit=10))
+                  for branch in federation.branches}
+        success, message = federation.add_booking(slot.branch, slot.schedule_id, slot.doctor_id,
+                                                  "Routing Test", "0899", slot.date, slot.start_time)
+        after = {branch: len(federation.branch(branch).search_bookings("Routing", limit=10))
+                 for branch in federation.branches}
+        changed = [branch for branch in federation.branches if after[branch] != before[branch]]
+        print(f"write routing: add_booking on {slot.branch} -> {success} ({message}); branches changed: {changed}")
+        sequential.close()
+        federation.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark latensi add_booking dengan dan tanpa jurnal audit booking.
+
+Setiap varian memakai salinan database yang sama dan membuat --bookings booking satu per satu
+(satu transaksi per booking, seperti dari meja pendaftaran):
+    none   : tanpa jurnal
+    sync   : INSERT jurnal + commit sendiri setelah setiap booking (cara naif)
+    queued : JournalService (antrean + thread penulis dengan group commit)
+Yang dilaporkan: latensi p50/p95/p99 per booking, lalu untuk varian queued jumlah transaksi
+jurnal, batch terbesar, dan waktu flush sampai semua event tersimpan.
+
+Contoh:
+    python benchmarks/bench_journal.py --bookings 3000
+"""
+import argparse
+import logging
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.booking_service import BookingService
+from services.journal_service import JournalService, INSERT_JOURNAL_SQL
+
+SLOT_MINUTES = 15
+SLOTS_PER_SHIFT = 8 * 60 // SLOT_MINUTES
+
+
+class SynchronousJournal(JournalService):
+    """Pembanding: setiap event langsung ditulis dengan transaksi sendiri di thread booking."""
+
+    def record_many(self, event, rows, details=None):
+        conn = self.db_manager.get_connection()
+        try:
+            with conn:
+                conn.executemany(INSERT_JOURNAL_SQL, [
+                    ("2026-01-05 09:00:00", event, *row, self.actor, None) for row in rows])
+        finally:
+            conn.close()
+        return True
+
+
+def slot_time(index):
+    total = 8 * 60 + index * SLOT_MINUTES
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+def seed(db_manager, bookings):
+    shifts = -(-bookings // SLOTS_PER_SHIFT)
+    conn = db_manager.get_connection()
+    conn.execute("INSERT INTO Doctors (Name, Specialty) VALUES ('dr. Dokter', 'Umum')")
+    conn.executemany(
+        "INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked, SlotMinutes, SlotTotal, Occupancy) "
+        "VALUES (1, date('2026-01-05', '+' || ? || ' days'), '08:00', '16:00', 0, ?, ?, 0)",
+        [(day, SLOT_MINUTES, SLOTS_PER_SHIFT) for day in range(shifts)])
+    conn.commit()
+    schedules = conn.execute("SELECT ScheduleID, Date FROM Schedules ORDER BY ScheduleID").fetchall()
+    conn.close()
+    return [(schedule_id, day, index) for schedule_id, day in schedules for index in range(SLOTS_PER_SHIFT)][:bookings]
+
+
+def run(path, slots, journal):
+    service = BookingService(DatabaseManager(path), journal=journal)
+    latencies = []
+    for n, (schedule_id, day, index) in enumerate(slots):
+        t0 = time.perf_counter()
+        ok, message = service.add_booking(schedule_id, 1, f"Pasien {n}", f"08{n:010d}", day, slot_time(index),
+                                          slot_index=index)
+        latencies.append(time.perf_counter() - t0)
+        if not ok:
+            raise RuntimeError(message)
+    return latencies
+
+
+def describe(latencies):
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return (f"p50 {statistics.median(ordered) * 1000:6.2f} ms  p95 {pick(0.95):6.2f} ms  "
+            f"p99 {pick(0.99):6.2f} ms  total {sum(ordered):5.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=3000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.db")
+        db_manager = DatabaseManager(template)
+        db_manager.create_tables()
+        slots = seed(db_manager, args.bookings)
+
+        for variant in ("none", "sync", "queued"):
+            path = os.path.join(tmp, f"{variant}.db")
+            shutil.copy(template, path)
+            journal = None
+            if variant == "sync":
+                journal = SynchronousJournal(DatabaseManager(path), actor="bench")
+            elif variant == "queued":
+                journal = JournalService(DatabaseManager(path), actor="bench", batch_size=args.batch_size)
+                journal.start()
+            latencies = run(path, slots, journal)
+            line = f"{variant:>6}: {describe(latencies)}"
+            if variant == "queued":
+                t0 = time.perf_counter()
+                journal.close()
+                stats = journal.metrics()
+                line += (f"; {stats['written']} events in {stats['batches']} commits "
+                         f"(max batch {stats['max_batch']}), close+flush {(time.perf_counter() - t0) * 1000:.0f} ms")
+            rows = sqlite3.connect(path).execute("SELECT COUNT(*) FROM BookingJournal").fetchone()[0]
+            print(f"{line}; journal rows={rows}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark jawaban lokal MediBot (tanpa Gemini).
+
+Mengukur latensi LocalAnswerEngine.answer per intent (termasuk query ke database) dan
+menampilkan pertanyaan mana yang dijawab lokal dan mana yang diteruskan ke Gemini
+pada ambang keyakinan yang dipilih.
+
+Contoh:
+    python benchmarks/bench_local_answers.py --repeat 2000 --threshold 0.7
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.booking_service import BookingService
+from services.local_answers import LocalAnswerEngine
+
+SAMPLE_MESSAGES = [
+    "daftar dokter",
+    "Dokter yang tersedia siapa saja?",
+    "ada dokter gigi?",
+    "daftar dokter anak",
+    "saya sakit kepala dan demam",
+    "alamat klinik di mana?",
+    "jam buka klinik hari sabtu",
+    "kamu bisa apa?",
+    # Pertanyaan bebas: seharusnya diteruskan ke Gemini
+    "anak saya demam sejak kemarin, obat apa yang sebaiknya diminum?",
+    "apakah klinik awan menerima BPJS?",
+    "bagaimana cara merawat gigi berlubang supaya tidak makin parah?",
+    "terima kasih",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(os.path.join(tmp, "bench.db"))
+        db_manager.create_tables()
+        service = BookingService(db_manager)
+        service.insert_initial_data()
+        engine = LocalAnswerEngine(service, confidence_threshold=args.threshold)
+
+        print(f"{'message':<66} {'route':<7} {'intent':<22} {'conf':>5}")
+        per_intent = {}
+        for message in SAMPLE_MESSAGES:
+            intent, confidence, _ = engine.classify(message)
+            answer = engine.answer(message)
+            route = "local" if answer else "gemini"
+            print(f"{message[:65]:<66} {route:<7} {str(intent):<22} {confidence:5.2f}")
+            if answer:
+                timings = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    engine.answer(message)
+                    timings.append((time.perf_counter() - t0) * 1000)
+                per_intent.setdefault(answer.intent, []).extend(timings)
+
+        print()
+        for intent, timings in sorted(per_intent.items()):
+            timings.sort()
+            print(f"{intent:<22} median {statistics.median(timings):.3f} ms, "
+                  f"p99 {timings[max(0, int(len(timings) * 0.99) - 1)]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark registri pasien: migrasi (dedup booking lama ke Patients) dan latensi saran autocomplete.
+
+Database dibuat dengan skema lama (Bookings tanpa PatientID, tanpa tabel Patients) berisi --patients
+pasien dengan rata-rata --bookings-per-patient booking; nomor telepon ditulis dalam format acak
+('0812..', '+62 812-..', '62812..') agar dedup lewat PhoneKey benar-benar diuji.
+Lalu create_tables menjalankan migrasi, dan setiap ketikan simulasi (awalan nama/telepon yang
+bertambah satu huruf, termasuk backspace) diukur untuk:
+    scan   : cara lama, SELECT DISTINCT nama dari Bookings dengan LIKE (full scan)
+    index  : BookingService.search_patients (range scan di index Patients)
+    lookup : PatientLookup (search_patients + LRU per awalan)
+
+Contoh:
+    python benchmarks/bench_patients.py --patients 200000
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.booking_service import BookingService, PATIENT_SUGGESTION_LIMIT
+from services.patient_lookup import PatientLookup
+from services.seed_snapshots import FIRST_NAMES, LAST_NAMES
+
+
+def phone_formats(rng, number):
+    """Nomor yang sama dalam beberapa format penulisan."""
+    return rng.choice([f"0{number}", f"+62 {number[:3]}-{number[3:7]}-{number[7:]}", f"62{number}"])
+
+
+def build_legacy(path, patients, per_patient, seed=7):
+    """Database skema lama: Bookings tanpa PatientID dan tanpa tabel Patients."""
+    rng = random.Random(seed)
+    db_manager = DatabaseManager(path)
+    db_manager.create_tables()
+    conn = sqlite3.connect(path)
+    conn.execute("DROP INDEX idx_bookings_patient")
+    conn.execute("DROP TABLE Patients")
+    conn.execute("ALTER TABLE Bookings DROP COLUMN PatientID")
+    conn.execute("INSERT INTO Doctors (Name, Specialty) VALUES ('dr. Dokter', 'Umum')")
+    conn.execute("INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked, SlotMinutes, SlotTotal, Occupancy) "
+                 "VALUES (1, '2025-01-06', '08:00', '16:00', 0, 15, 32, 0)")
+    people = [(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {n}", f"8{rng.randrange(10**9, 10**10)}")
+              for n in range(patients)]
+    rows = []
+    for _ in range(patients * per_patient):
+        name, number = rng.choice(people)
+        day = f"2025-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}"
+        rows.append((name, phone_formats(rng, number), day))
+    # Booking lama yang sudah selesai, jadi tidak bentrok dengan index slot aktif
+    conn.executemany("INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, "
+                     "Status, SlotIndex, CreatedAt) VALUES (1, 1, ?, ?, ?, '08:00', 'Completed', 0, ? || ' 07:00:00')",
+                     [(name, phone, day, day) for name, phone, day in rows])
+    conn.commit()
+    conn.close()
+    return people, len(rows)
+
+
+def keystrokes(rng, people, sessions):
+    """Rangkaian teks input seperti saat mengetik: awalan tumbuh satu huruf, sesekali backspace."""
+    texts = []
+    for _ in range(sessions):
+        name, number = rng.choice(people)
+        target = name if rng.random() < 0.6 else f"08{number[1:]}"
+        typed = ""
+        for char in target[:8]:
+            typed += char
+            texts.append(typed)
+            if rng.random() < 0.15:
+                texts.extend([typed[:-1], typed])
+    return texts
+
+
+def scan_suggest(conn, text):
+    return conn.execute("SELECT DISTINCT PatientName FROM Bookings WHERE PatientName LIKE ? OR PatientPhone LIKE ? "
+                        "LIMIT ?", (text + "%", text + "%", PATIENT_SUGGESTION_LIMIT)).fetchall()
+
+
+def describe(latencies):
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return f"p50 {statistics.median(ordered) * 1000:7.3f} ms  p95 {pick(0.95):7.3f} ms  max {ordered[-1] * 1000:7.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=200000)
+    parser.add_argument("--bookings-per-patient", type=int, default=2)
+    parser.add_argument("--sessions", type=int, default=200, help="jumlah sesi mengetik yang disimulasikan")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "legacy.db")
+        t0 = time.perf_counter()
+        people, bookings = build_legacy(path, args.patients, args.bookings_per_patient)
+        print(f"legacy database: {bookings} bookings for {len(people)} people in {time.perf_counter() - t0:.1f} s")
+
+        db_manager = DatabaseManager(path)
+        t0 = time.perf_counter()
+        db_manager.create_tables()
+        conn = sqlite3.connect(path)
+        registered, unlinked = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM Patients), (SELECT COUNT(*) FROM Bookings WHERE PatientID IS NULL)").fetchone()
+        print(f"migration: {registered} patients, {unlinked} unlinked bookings in {time.perf_counter() - t0:.2f} s")
+
+        texts = keystrokes(random.Random(11), people, args.sessions)
+        service = BookingService(db_manager)
+        lookup = PatientLookup(service)
+        variants = {
+            "scan": lambda text: scan_suggest(conn, text),
+            "index": lambda text: service.search_patients(text) if len(text) >= lookup.min_chars else [],
+            "lookup": lookup.suggest,
+        }
+        for variant, suggest in variants.items():
+            sample = texts if variant != "scan" else texts[:200]
+            latencies = []
+            for text in sample:
+                t0 = time.perf_counter()
+                suggest(text)
+                latencies.append(time.perf_counter() - t0)
+            line = f"{variant:>6}: {describe(latencies)} over {len(sample)} keystrokes"
+            if variant == "lookup":
+                line += f"; cache hits {lookup.hits}, queries {lookup.misses}"
+            print(line)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
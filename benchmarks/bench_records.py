@@ -0,0 +1,67 @@
+"""
+Benchmark memori dan waktu fetch untuk bentuk baris hasil get_all_bookings:
+tuple sqlite3, dict, record namedtuple (services.records), dan class __slots__ biasa.
+
+Contoh:
+    python benchmarks/bench_records.py --rows 1000000
+"""
+import argparse
+import gc
+import os
+import sqlite3
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.records import BookingRecord, ROW_FACTORIES
+
+
+class SlottedBooking:
+    __slots__ = BookingRecord._fields
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+
+def build_database(rows):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE Bookings (BookingID INTEGER PRIMARY KEY, PatientName TEXT, PatientPhone TEXT, "
+                 "DoctorName TEXT, Specialty TEXT, BookingDate TEXT, BookingTime TEXT, Status TEXT)")
+    conn.executemany("INSERT INTO Bookings VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                     ((i, f"Pasien {i}", f"0812{i:08d}", f"dr. Dokter {i % 50}", "Umum",
+                       f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", "09:00", "Confirmed") for i in range(rows)))
+    return conn
+
+
+def measure(conn, label, row_factory):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    cursor = conn.cursor()
+    cursor.row_factory = row_factory
+    rows = cursor.execute("SELECT * FROM Bookings").fetchall()
+    elapsed = time.perf_counter() - t0
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>16}: {current / len(rows):6.1f} bytes/row   {current / 2**20:7.1f} MiB total   fetch {elapsed:.2f}s")
+    del rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    conn = build_database(args.rows)
+    print(f"rows={args.rows} (ukuran termasuk string kolom)")
+    measure(conn, "tuple", ROW_FACTORIES["tuple"](BookingRecord))
+    measure(conn, "dict", ROW_FACTORIES["dict"](BookingRecord))
+    measure(conn, "record", ROW_FACTORIES["record"](BookingRecord))
+    measure(conn, "__slots__ class", lambda cursor, row: SlottedBooking(*row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark pengingat janji temu: 100k pengingat dari booking sampai terkirim.
+
+Database diisi booking yang semuanya berada dalam jendela pengingat H-1, lalu ReminderService
+dijalankan dengan LoopbackReminderSender untuk beberapa ukuran batch. Yang diukur: waktu
+menurunkan pengingat dari Bookings ke heap, throughput tulis outbox + kirim, dan hasil
+putaran kedua (harus 0 pengingat baru dan 0 kiriman ganda). Terakhir thread background
+dijalankan dan ditunggu sampai semua pengingat terkirim.
+
+Contoh:
+    python benchmarks/bench_reminders.py --reminders 100000 --batch-sizes 10,100,1000
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, date, time as dt_time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.reminder_service import ReminderService, LoopbackReminderSender
+
+SHIFT_START, SHIFT_END = "08:00", "17:00"
+SLOT_MINUTES = 15
+SLOTS_PER_SHIFT = 9 * 60 // SLOT_MINUTES
+
+
+def slot_time(index):
+    total = 8 * 60 + index * SLOT_MINUTES
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+def seed(db_manager, reminders, day):
+    """Booking besok untuk banyak dokter (satu shift penuh per dokter) -> semua pengingat H-1 jatuh tempo hari ini."""
+    doctors = -(-reminders // SLOTS_PER_SHIFT)
+    conn = db_manager.get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO Doctors (Name, Specialty) VALUES (?, 'Umum')",
+                       [(f"dr. Dokter {i}",) for i in range(doctors)])
+    cursor.executemany(
+        "INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked, SlotMinutes, SlotTotal, Occupancy) "
+        "VALUES (?, ?, ?, ?, 1, ?, ?, ?)",
+        [(doctor_id, day, SHIFT_START, SHIFT_END, SLOT_MINUTES, SLOTS_PER_SHIFT, (1 << SLOTS_PER_SHIFT) - 1)
+         for doctor_id in range(1, doctors + 1)])
+    rows = []
+    for n in range(reminders):
+        doctor_id, index = divmod(n, SLOTS_PER_SHIFT)
+        rows.append((doctor_id + 1, doctor_id + 1, f"Pasien {n}", f"08{n:010d}", day, slot_time(index), index))
+    cursor.executemany(
+        "INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, Status, SlotIndex) "
+        "VALUES (?, ?, ?, ?, ?, ?, 'Confirmed', ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reminders", type=int, default=100000)
+    parser.add_argument("--batch-sizes", default="10,100,1000")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    today = date(2026, 1, 5)
+    tomorrow = date(2026, 1, 6).isoformat()
+    # Semua janji temu besok 08:00-17:00; pada 18:00 hari ini semua pengingat H-1 sudah jatuh tempo
+    now = datetime.combine(today, dt_time(18, 0))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.db")
+        db_manager = DatabaseManager(template)
+        db_manager.create_tables()
+        t0 = time.perf_counter()
+        seed(db_manager, args.reminders, tomorrow)
+        print(f"seeded {args.reminders} bookings in {time.perf_counter() - t0:.1f} s")
+
+        for batch_size in [int(size) for size in args.batch_sizes.split(",")]:
+            path = os.path.join(tmp, f"batch_{batch_size}.db")
+            shutil.copy(template, path)
+            sender = LoopbackReminderSender()
+            service = ReminderService(DatabaseManager(path), sender, batch_size=batch_size, clock=lambda: now)
+
+            t0 = time.perf_counter()
+            loaded = service.load_upcoming()
+            load_seconds = time.perf_counter() - t0
+            stats = service.run_once(reload=False)
+            again = service.run_once()
+            total = stats["elapsed_seconds"]
+            print(f"batch {batch_size:>5}: derive {loaded} reminders in {load_seconds * 1000:.0f} ms; "
+                  f"outbox+send {stats['sent']} in {total:.2f} s ({stats['sent'] / total:,.0f}/s); "
+                  f"second run loaded={again['loaded']} written={again['written']} sent={again['sent']}; "
+                  f"delivered={len(sender.delivered)} duplicates={sender.duplicates}")
+
+        path = os.path.join(tmp, "threaded.db")
+        shutil.copy(template, path)
+        sender = LoopbackReminderSender()
+        service = ReminderService(DatabaseManager(path), sender, batch_size=1000, clock=lambda: now)
+        t0 = time.perf_counter()
+        service.start()
+        while service.metrics()["sent"] < args.reminders and time.perf_counter() - t0 < 300:
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - t0
+        service.close(timeout=5)
+        print(f"background thread: {service.metrics()['sent']} reminders sent in {elapsed:.2f} s "
+              f"({args.reminders / elapsed:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark pencarian booking FTS5 (BookingService.search_bookings).
+
+Contoh:
+    python benchmarks/bench_search.py --bookings 1000000
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.booking_service import BookingService
+
+FIRST_NAMES = ["Budi", "Siti", "Agus", "Dewi", "Rina", "Joko", "Ani", "Eko", "Putri", "Rudi", "Wati", "Hadi"]
+LAST_NAMES = ["Santoso", "Wijaya", "Lestari", "Saputra", "Hidayat", "Kusuma", "Pratama", "Nugroho", "Sari"]
+
+
+def seed(db_manager, n_bookings):
+    conn = db_manager.get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO Doctors (Name, Specialty) VALUES (?, ?)",
+                       [(f"dr. {FIRST_NAMES[i % 12]}{chr(97 + i // 12)} {LAST_NAMES[i % 9]}", ["Umum", "Gigi", "Anak"][i % 3])
+                        for i in range(50)])
+    rng = random.Random(42)
+    batch = 50000
+    for start in range(0, n_bookings, batch):
+        count = min(batch, n_bookings - start)
+        schedules = [(1 + (start + i) % 50, f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", "09:00", "12:00", 1)
+                     for i in range(count)]
+        cursor.executemany("INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked) VALUES (?, ?, ?, ?, ?)",
+                           schedules)
+        first_id = cursor.execute("SELECT MAX(ScheduleID) FROM Schedules").fetchone()[0] - count + 1
+        bookings = []
+        for i in range(count):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.randint(1, 9999)}"
+            phone = f"08{rng.randint(10, 99)}-{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
+            doctor_id, date = schedules[i][0], schedules[i][1]
+            bookings.append((first_id + i, doctor_id, name, phone, date, "09:00"))
+        cursor.executemany("INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime) "
+                           "VALUES (?, ?, ?, ?, ?, ?)", bookings)
+        conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(os.path.join(tmp, "bench.db"))
+        db_manager.create_tables()
+        started = time.perf_counter()
+        seed(db_manager, args.bookings)
+        print(f"Seeded {args.bookings} bookings in {time.perf_counter() - started:.1f}s")
+
+        service = BookingService(db_manager)
+        rng = random.Random(7)
+        queries = {
+            "name prefix": lambda: rng.choice(FIRST_NAMES)[:3].lower(),
+            "full name": lambda: f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "phone prefix": lambda: f"08{rng.randint(10, 99)}-{rng.randint(100, 999)}",
+            "doctor": lambda: f"dr {rng.choice(FIRST_NAMES)}{chr(97 + rng.randint(0, 3))}",
+        }
+        for label, make_query in queries.items():
+            timings = []
+            for _ in range(args.queries):
+                query = make_query()
+                t0 = time.perf_counter()
+                service.search_bookings(query, limit=50)
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{label:>13}: median {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
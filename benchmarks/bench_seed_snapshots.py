@@ -0,0 +1,90 @@
+"""
+Benchmark menyiapkan database seed untuk test: file + INSERT vs ':memory:' + snapshot.
+
+Setiap "test case" memakai database baru yang berisi data seed, lalu menjalankan beban kecil
+seperti test BookingService (cari jadwal kosong, beberapa booking, pembatalan, daftar booking).
+Varian yang dibandingkan per ukuran seed:
+    file-build   : file SQLite baru, create_tables + build_seed (cara lama: seeding tiap test)
+    memory-build : database ':memory:' baru, create_tables + build_seed
+    memory-load  : database ':memory:' baru, snapshot dari cache dimuat dengan backup API
+Waktu membangun snapshot pertama kali (sekali per hari/skema) dilaporkan terpisah.
+
+Contoh:
+    python benchmarks/bench_seed_snapshots.py --sizes small,medium --cases 20
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager, MEMORY_DATABASE
+from services.booking_service import BookingService
+from services.seed_snapshots import build_seed, ensure_snapshot, load_seed
+
+
+def workload(db_manager):
+    """Beban satu test case: 10 booking, 1 pembatalan, lalu membaca daftar booking."""
+    service = BookingService(db_manager)
+    schedules = service.get_available_schedules(date.today().isoformat(), limit=10)
+    for n, slot in enumerate(schedules):
+        ok, message = service.add_booking(slot.schedule_id, slot.doctor_id, f"Pasien Test {n}", "0812000",
+                                          slot.date, slot.start_time, slot_index=slot.slot_index)
+        if not ok:
+            raise RuntimeError(message)
+    bookings = service.get_all_bookings(limit=50)
+    service.cancel_booking(bookings[0].booking_id)
+    return len(service.get_all_bookings(start_date=date.today().isoformat(), limit=200))
+
+
+def run_case(variant, size, tmp, n):
+    started = time.perf_counter()
+    if variant == "file-build":
+        path = os.path.join(tmp, f"case-{size}-{n}.db")
+        db_manager = DatabaseManager(path)
+        db_manager.create_tables()
+        build_seed(db_manager, size)
+    elif variant == "memory-build":
+        db_manager = DatabaseManager(MEMORY_DATABASE)
+        db_manager.create_tables()
+        build_seed(db_manager, size)
+    else:
+        db_manager = DatabaseManager(MEMORY_DATABASE)
+        load_seed(db_manager, size)
+    prepared = time.perf_counter()
+    workload(db_manager)
+    finished = time.perf_counter()
+    db_manager.close_connection()
+    if variant == "file-build":
+        os.remove(path)
+    return prepared - started, finished - prepared
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="small,medium")
+    parser.add_argument("--cases", type=int, default=10, help="jumlah test case per varian")
+    parser.add_argument("--variants", default="file-build,memory-build,memory-load")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes.split(","):
+            t0 = time.perf_counter()
+            path = ensure_snapshot(size)
+            print(f"{size}: snapshot ready in {time.perf_counter() - t0:.2f} s "
+                  f"({os.path.getsize(path) / 1024 / 1024:.1f} MiB, cached at {path})")
+            for variant in args.variants.split(","):
+                timings = [run_case(variant, size, tmp, n) for n in range(args.cases)]
+                prepare = sum(t[0] for t in timings) / len(timings)
+                work = sum(t[1] for t in timings) / len(timings)
+                print(f"  {variant:>12}: prepare {prepare * 1000:8.1f} ms  workload {work * 1000:7.1f} ms  "
+                      f"per case; {args.cases} cases in {sum(sum(t) for t in timings):.2f} s")
+
+
+if __name__ == "__main__":
+    main()
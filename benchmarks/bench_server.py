@@ -0,0 +1,123 @@
+"""
+Load test server booking lokal: beberapa client (thread) memanggil BookingServer secara bersamaan
+lewat RemoteBookingService, lalu melaporkan requests/detik dan latensi p50/p99.
+
+Contoh:
+    python benchmarks/bench_server.py --clients 8 --seconds 10 --write-ratio 0.1
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.booking_client import RemoteBookingService, UNAVAILABLE_MESSAGE
+from services.booking_server import BookingServer
+
+
+def seed(db_manager, doctors=20, slots_per_doctor=200):
+    conn = db_manager.get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO Doctors (Name, Specialty) VALUES (?, ?)",
+                       [(f"dr. Dokter {i}", ["Umum", "Gigi", "Anak"][i % 3]) for i in range(doctors)])
+    today = date.today().isoformat()
+    cursor.executemany(
+        "INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked) VALUES (?, ?, ?, ?, 0)",
+        [(d, today, f"{8 + s // 60:02d}:{s % 60:02d}", "23:59") for d in range(1, doctors + 1) for s in range(slots_per_doctor)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def start_server(db_manager, readers):
+    server = BookingServer(db_manager, port=0, reader_threads=readers)
+    server.prepare_database()
+    ready = threading.Event()
+    loop = asyncio.new_event_loop()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return server, loop
+
+
+def client_loop(url, deadline, write_ratio, doctors, latencies, errors, seed_value):
+    rng = random.Random(seed_value)
+    service = RemoteBookingService(url)
+    today = date.today().isoformat()
+    while time.perf_counter() < deadline:
+        doctor_id = rng.randint(1, doctors)
+        t0 = time.perf_counter()
+        try:
+            if rng.random() < write_ratio:
+                schedules = service.get_doctor_schedules(doctor_id, today)
+                if schedules:
+                    schedule = rng.choice(schedules)
+                    _, message = service.add_booking(schedule[0], doctor_id, "Pasien Uji", "0812", today, schedule[3])
+                    if message == UNAVAILABLE_MESSAGE:
+                        errors.append(1)
+            elif rng.random() < 0.5:
+                service.get_doctor_schedules(doctor_id, today)
+            else:
+                service.get_all_doctors_with_specialty()
+        except Exception:
+            errors.append(1)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(os.path.join(tmp, "bench.db"))
+        db_manager.create_tables()
+        seed(db_manager)
+        server, loop = start_server(db_manager, args.readers)
+        url = f"http://127.0.0.1:{server.port}"
+
+        latencies, errors = [], []
+        deadline = time.perf_counter() + args.seconds
+        threads = [threading.Thread(target=client_loop,
+                                    args=(url, deadline, args.write_ratio, 20, latencies, errors, i))
+                   for i in range(args.clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        time.sleep(0.2) # Beri waktu server memproses koneksi client yang ditutup
+        loop.call_soon_threadsafe(loop.stop)
+        server.close()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    print(f"clients={args.clients} readers={args.readers} write_ratio={args.write_ratio}")
+    print(f"requests={len(latencies)} errors={len(errors)} throughput={len(latencies) / elapsed:.0f} req/s")
+    print(f"latency p50={p50:.2f} ms p99={p99:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
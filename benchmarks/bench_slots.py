@@ -0,0 +1,142 @@
+"""
+Benchmark jadwal 15 menit: satu baris per slot (skema lama) vs satu baris per shift + bitmap Occupancy.
+
+Kedua database berisi jadwal yang sama (dua shift 4 jam per dokter per hari, dibagi slot 15 menit)
+dan sebagian slot sudah dibooking. Yang dibandingkan: ukuran tabel Schedules beserta indeksnya
+(dbstat), latensi get_doctor_schedules (slot kosong satu dokter satu hari), dan latensi add_booking.
+
+Contoh:
+    python benchmarks/bench_slots.py --doctors 50 --days 365
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.booking_service import BookingService
+
+SHIFTS = [("08:00", "12:00"), ("13:00", "17:00")]
+SLOT_MINUTES = 15
+SLOTS_PER_SHIFT = 4 * 60 // SLOT_MINUTES
+
+
+def slot_time(start, index):
+    hours, minutes = map(int, start.split(":"))
+    total = hours * 60 + minutes + index * SLOT_MINUTES
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+def seed(db_manager, doctors, days, per_slot, booked_ratio):
+    rng = random.Random(1)
+    start = date.today()
+    conn = db_manager.get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO Doctors (Name, Specialty) VALUES (?, ?)",
+                       [(f"dr. Dokter {i}", "Umum") for i in range(doctors)])
+    rows = []
+    bookings = []
+    for doctor_id in range(1, doctors + 1):
+        for day in range(days):
+            day_str = (start + timedelta(days=day)).isoformat()
+            for shift_start, shift_end in SHIFTS:
+                booked = [i for i in range(SLOTS_PER_SHIFT) if rng.random() < booked_ratio]
+                if per_slot:
+                    for i in range(SLOTS_PER_SHIFT):
+                        rows.append((doctor_id, day_str, slot_time(shift_start, i), slot_time(shift_start, i + 1),
+                                     int(i in booked), 0, 0, 0))
+                        if i in booked:
+                            bookings.append((len(rows), doctor_id, day_str, slot_time(shift_start, i), None))
+                else:
+                    occupancy = sum(1 << i for i in booked)
+                    rows.append((doctor_id, day_str, shift_start, shift_end,
+                                 int(len(booked) == SLOTS_PER_SHIFT), SLOT_MINUTES, SLOTS_PER_SHIFT, occupancy))
+                    bookings += [(len(rows), doctor_id, day_str, slot_time(shift_start, i), i) for i in booked]
+    cursor.executemany(
+        "INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked, SlotMinutes, SlotTotal, Occupancy) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    cursor.executemany(
+        "INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, Status, SlotIndex) "
+        "VALUES (?, ?, 'Pasien', '0812', ?, ?, 'Confirmed', ?)", bookings)
+    conn.commit()
+    conn.close()
+    return len(rows), len(bookings)
+
+
+def schedules_size(db_manager):
+    conn = db_manager.get_connection()
+    try:
+        cursor = conn.execute("""
+            SELECT SUM(pgsize) FROM dbstat
+            WHERE name IN ('Schedules', 'idx_schedules_doctor_date', 'idx_schedules_date')
+        """)
+        return cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def measure(service, doctors, days, queries, bookings):
+    rng = random.Random(2)
+    start = date.today()
+    query_times = []
+    free_counts = []
+    for _ in range(queries):
+        doctor_id = rng.randint(1, doctors)
+        day = (start + timedelta(days=rng.randrange(days))).isoformat()
+        t0 = time.perf_counter()
+        free = service.get_doctor_schedules(doctor_id, day)
+        query_times.append((time.perf_counter() - t0) * 1000)
+        free_counts.append(len(free))
+
+    booking_times = []
+    made = 0
+    while made < bookings:
+        doctor_id = rng.randint(1, doctors)
+        day = (start + timedelta(days=rng.randrange(days))).isoformat()
+        free = service.get_doctor_schedules(doctor_id, day)
+        if not free:
+            continue
+        slot = rng.choice(free)
+        t0 = time.perf_counter()
+        success, _ = service.add_booking(slot.schedule_id, doctor_id, "Pasien Baru", "0813", day, slot.start_time)
+        booking_times.append((time.perf_counter() - t0) * 1000)
+        made += success
+    return query_times, statistics.mean(free_counts), booking_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--booked-ratio", type=float, default=0.4)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--bookings", type=int, default=500)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, per_slot in (("row per slot", True), ("shift + bitmap", False)):
+            db_manager = DatabaseManager(os.path.join(tmp, f"{'slot' if per_slot else 'shift'}.db"))
+            db_manager.create_tables()
+            service = BookingService(db_manager)
+            rows, booked = seed(db_manager, args.doctors, args.days, per_slot, args.booked_ratio)
+            size = schedules_size(db_manager)
+            query_times, free_avg, booking_times = measure(service, args.doctors, args.days, args.queries, args.bookings)
+            query_times.sort()
+            booking_times.sort()
+            print(f"{label:<15} Schedules rows {rows:>8}, table+index {size / 1024 / 1024:6.1f} MiB, "
+                  f"{booked} booked slots")
+            print(f"{'':<15} free slots/query {free_avg:.1f}; get_doctor_schedules median "
+                  f"{statistics.median(query_times):.3f} ms, p99 {query_times[int(len(query_times) * 0.99) - 1]:.3f} ms; "
+                  f"add_booking median {statistics.median(booking_times):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
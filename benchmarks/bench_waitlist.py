@@ -0,0 +1,97 @@
+"""
+Benchmark pengisian ulang jadwal dari daftar tunggu saat booking dibatalkan.
+
+Mengisi ribuan entri Waitlist untuk beberapa dokter/spesialisasi, lalu mengukur latensi
+cancel_booking (termasuk pencarian kandidat dan booking ulang dalam transaksi yang sama)
+serta menampilkan query plan untuk memastikan tidak ada table scan.
+
+Contoh:
+    python benchmarks/bench_waitlist.py --waiting 20000 --cancellations 500
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.booking_service import BookingService
+
+
+def seed(db_manager, service, waiting, cancellations, days=30):
+    rng = random.Random(1)
+    start = date.today()
+    conn = db_manager.get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO Doctors (Name, Specialty) VALUES (?, ?)",
+                       [(f"dr. Dokter {i}", ["Umum", "Gigi", "Anak"][i % 3]) for i in range(10)])
+    cursor.executemany(
+        "INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked) VALUES (?, ?, ?, ?, 0)",
+        [(d, (start + timedelta(days=day)).isoformat(), f"{8 + s:02d}:00", f"{9 + s:02d}:00")
+         for d in range(1, 11) for day in range(days) for s in range(8)]
+    )
+    entries = []
+    for i in range(waiting):
+        date_from = start + timedelta(days=rng.randint(0, days - 1))
+        doctor_id = rng.randint(1, 10) if rng.random() < 0.6 else None
+        specialty = None if doctor_id else rng.choice(["Umum", "Gigi", "Anak"])
+        entries.append((f"Pasien {i}", "0812", doctor_id, specialty, date_from.isoformat(),
+                        (date_from + timedelta(days=rng.randint(0, 5))).isoformat(),
+                        rng.randint(0, 3), f"2025-01-01 00:{i // 60 % 60:02d}:{i % 60:02d}"))
+    cursor.executemany(
+        "INSERT INTO Waitlist (PatientName, PatientPhone, DoctorID, Specialty, DateFrom, DateTo, Priority, CreatedAt) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", entries)
+    conn.commit()
+
+    cursor.execute("SELECT ScheduleID, DoctorID, Date, StartTime FROM Schedules ORDER BY RANDOM() LIMIT ?", (cancellations,))
+    slots = cursor.fetchall()
+    conn.close()
+    for schedule_id, doctor_id, day, start_time in slots:
+        service.add_booking(schedule_id, doctor_id, "Pasien Awal", "0813", day, start_time)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--waiting", type=int, default=20000)
+    parser.add_argument("--cancellations", type=int, default=500)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(os.path.join(tmp, "bench.db"))
+        db_manager.create_tables()
+        service = BookingService(db_manager)
+        seed(db_manager, service, args.waiting, args.cancellations)
+
+        conn = db_manager.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("EXPLAIN QUERY PLAN SELECT 1 FROM Waitlist INDEXED BY idx_waitlist_doctor "
+                       "WHERE Status = 'Waiting' AND DoctorID = 1 AND DateFrom <= '2030-01-01' AND DateTo >= '2000-01-01' "
+                       "ORDER BY Priority DESC, CreatedAt LIMIT 1")
+        print("Query plan (doctor lookup):", [row[3] for row in cursor.fetchall()])
+        cursor.execute("SELECT BookingID FROM Bookings WHERE Status = 'Confirmed'")
+        booking_ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+
+        timings = []
+        refilled = 0
+        for booking_id in booking_ids:
+            t0 = time.perf_counter()
+            success, message = service.cancel_booking(booking_id)
+            timings.append((time.perf_counter() - t0) * 1000)
+            refilled += "daftar tunggu" in message
+
+    timings.sort()
+    print(f"waiting={args.waiting} cancellations={len(timings)} refilled={refilled}")
+    print(f"cancel+refill latency: median {statistics.median(timings):.2f} ms, "
+          f"p99 {timings[max(0, int(len(timings) * 0.99) - 1)]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,144 @@
+import itertools
+import os
 import sqlite3
 import logging
+import time
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
+ARCHIVE_SCHEMA = "archive"
+
+# Interval (instruksi VM SQLite) pengecekan query_timeout; cukup kecil agar query berhenti dalam hitungan milidetik
+QUERY_TIMEOUT_CHECK_STEPS = 10000
+
+# db_name khusus: database di memori (shared cache) untuk test dan demo, tanpa file di disk
+MEMORY_DATABASE = ":memory:"
+
+# Ekspresi SQL untuk menyisakan digit nomor telepon (menghapus spasi, '-', '+', '.', '(' dan ')')
+PHONE_DIGITS_SQL = ("replace(replace(replace(replace(replace(replace("
+                    "{column}, ' ', ''), '-', ''), '+', ''), '.', ''), '(', ''), ')', '')")
+_PHONE_SEPARATORS = str.maketrans("", "", " -+.()")
+
+# ChangeLog hanya menyimpan perubahan terbaru; dipangkas otomatis setiap CHANGE_LOG_PRUNE_EVERY baris.
+# Pengamat (ChangeWatcher) yang tertinggal lebih jauh dari CHANGE_LOG_RETAIN memuat ulang tampilan penuh.
+CHANGE_LOG_RETAIN = 10000
+CHANGE_LOG_PRUNE_EVERY = 1000
+# Tabel yang diamati -> (kolom kunci, kolom yang perubahannya terlihat di tampilan)
+CHANGE_LOG_TABLES = {
+    "Bookings": ("BookingID", "ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, Status"),
+    "Schedules": ("ScheduleID", "DoctorID, Date, StartTime, EndTime, IsBooked, IsBlocked, Occupancy"),
+    "Doctors": ("DoctorID", "Name, Specialty"),
+}
+
+# Kunci unik pasien: digit nomor telepon dengan awalan kode negara 62 diganti 0 ('+62 812-..' = '0812..').
+# phone_key() dan PHONE_KEY_SQL harus selalu menghasilkan nilai yang sama.
+PHONE_KEY_SQL = ("(SELECT CASE WHEN d GLOB '62*' AND length(d) > 4 THEN '0' || substr(d, 3) ELSE d END "
+                 "FROM (SELECT " + PHONE_DIGITS_SQL + " AS d))")
+
+
+def phone_key(phone):
+    """Versi Python dari PHONE_KEY_SQL; string kosong jika nomor telepon kosong."""
+    digits = (phone or "").translate(_PHONE_SEPARATORS)
+    return "0" + digits[2:] if digits.startswith("62") and len(digits) > 4 else digits
+
+
+def phone_prefix_key(text):
+    """
+    phone_key untuk awalan yang sedang diketik (autocomplete): '+62' yang ditulis eksplisit
+    langsung diganti 0 walau digitnya belum lebih dari 4 ('+62 81' = '081').
+    """
+    key = phone_key(text)
+    if (text or "").lstrip().startswith("+") and key.startswith("62"):
+        return "0" + key[2:]
+    return key
+
+
+BOOKINGS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        BookingID INTEGER PRIMARY KEY AUTOINCREMENT,
+        ScheduleID INTEGER NOT NULL, -- Unik per slot hanya untuk booking aktif (lihat ux_bookings_active_slot)
+        DoctorID INTEGER NOT NULL,
+        PatientName TEXT NOT NULL,
+        PatientPhone TEXT,
+        BookingDate TEXT NOT NULL, -- Format YYYY-MM-DD
+        BookingTime TEXT NOT NULL, -- Format HH:MM (dari StartTime jadwal)
+        Status TEXT DEFAULT 'Confirmed', -- 'Confirmed', 'Cancelled', 'Completed', 'NoShow'
+        SlotIndex INTEGER, -- Slot pertama yang dipakai dalam shift; NULL = booking satu shift penuh
+        SlotCount INTEGER DEFAULT 1, -- Jumlah slot berurutan yang dipakai
+        CreatedAt TEXT, -- Format YYYY-MM-DD HH:MM:SS
+        StatusUpdatedAt TEXT, -- Waktu perubahan status terakhir
+        PatientID INTEGER, -- Pasien terdaftar (Patients); NULL jika nomor telepon kosong
+        FOREIGN KEY (ScheduleID) REFERENCES Schedules (ScheduleID)
+            ON DELETE CASCADE ON UPDATE CASCADE,
+        FOREIGN KEY (DoctorID) REFERENCES Doctors (DoctorID)
+            ON DELETE CASCADE ON UPDATE CASCADE
+    )
+"""
+
 class DatabaseManager:
-    def __init__(self, db_name="klinik_awan.db"):
+    _memory_ids = itertools.count(1)
+
+    def __init__(self, db_name="klinik_awan.db", archive_db_name=None, timeout=5.0, query_timeout=None):
+        """
+        db_name=':memory:' membuat database di memori yang dipakai bersama oleh semua koneksi dari
+        get_connection (URI shared cache). Satu koneksi jangkar tetap terbuka selama DatabaseManager
+        hidup, karena database memori hilang saat koneksi terakhirnya ditutup. Setiap DatabaseManager
+        in-memory punya database sendiri. Shared cache memakai kunci per tabel tanpa busy timeout,
+        jadi mode ini ditujukan untuk test dan demo dengan satu penulis pada satu waktu.
+        timeout: detik menunggu kunci database sebelum 'database is locked' (busy timeout sqlite3).
+        query_timeout (opsional): batas detik sejak koneksi dibuka; query yang masih berjalan setelahnya
+        dihentikan dengan OperationalError 'interrupted'.
+        """
         self.db_name = db_name
+        self.archive_db_name = archive_db_name
+        self.timeout = timeout
+        self.query_timeout = query_timeout
         self.conn = None
+        self.in_memory = db_name == MEMORY_DATABASE
+        self._anchor = None
+        if self.in_memory:
+            self._uri = f"file:klinik_awan_memory_{os.getpid()}_{next(self._memory_ids)}?mode=memory&cache=shared"
+            self._anchor = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
 
-    def get_connection(self):
-        """Mendapatkan koneksi database."""
+    def get_connection(self, attach_archive=False):
+        """
+        Mendapatkan koneksi database.
+        Jika attach_archive=True dan file arsip sudah ada, database arsip di-ATTACH
+        dengan nama skema 'archive' sehingga query bisa melakukan UNION ke data lama.
+        """
         try:
-            self.conn = sqlite3.connect(self.db_name)
-            self.conn.execute("PRAGMA foreign_keys = ON") # Mengaktifkan foreign key enforcement
-            return self.conn
+            # Variabel lokal: get_connection bisa dipanggil bersamaan dari beberapa thread
+            # (server booking, tugas background), jadi self.conn tidak boleh dipakai sebagai nilai kembali.
+            if self.in_memory:
+                conn = sqlite3.connect(self._uri, uri=True, timeout=self.timeout)
+            else:
+                conn = sqlite3.connect(self.db_name, timeout=self.timeout)
+            if self.query_timeout:
+                deadline = time.monotonic() + self.query_timeout
+                conn.set_progress_handler(lambda: time.monotonic() > deadline, QUERY_TIMEOUT_CHECK_STEPS)
+            conn.execute("PRAGMA foreign_keys = ON") # Mengaktifkan foreign key enforcement
+            if attach_archive and self.has_archive():
+                conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (self.archive_db_name,))
+            self.conn = conn
+            return conn
         except sqlite3.Error as e:
             logging.error(f"Error connecting to database: {e}")
             return None
 
+    def has_archive(self):
+        """Mengecek apakah database arsip dikonfigurasi dan filenya sudah ada."""
+        return bool(self.archive_db_name) and os.path.exists(self.archive_db_name)
+
     def create_tables(self):
         """Membuat tabel Doctors, Schedules, dan Bookings jika belum ada."""
         conn = self.get_connection()
         if conn:
             try:
                 cursor = conn.cursor()
+                # auto_vacuum harus diset sebelum tabel pertama dibuat agar file baru
+                # mendukung PRAGMA incremental_vacuum setelah data lama diarsipkan.
+                cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
                 # Tabel Doctors
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS Doctors (
@@ -42,28 +157,191 @@ class DatabaseManager:
                         StartTime TEXT NOT NULL, -- Format HH:MM
                         EndTime TEXT NOT NULL,   -- Format HH:MM
                         IsBooked INTEGER DEFAULT 0, -- 0 for false, 1 for true
+                        IsBlocked INTEGER DEFAULT 0, -- 1 jika dokter berhalangan (jadwal tidak bisa dibooking)
+                        SlotMinutes INTEGER DEFAULT 0, -- Panjang slot; 0 = satu booking untuk seluruh shift
+                        SlotTotal INTEGER DEFAULT 0,   -- Jumlah slot dalam shift (jika SlotMinutes > 0)
+                        Occupancy INTEGER DEFAULT 0,   -- Bitmap slot terisi: bit i = slot ke-i
                         FOREIGN KEY (DoctorID) REFERENCES Doctors (DoctorID)
                             ON DELETE CASCADE ON UPDATE CASCADE
                     )
                 """)
 
                 # Tabel Bookings
+                cursor.execute(BOOKINGS_TABLE_SQL.format(table="Bookings"))
+                self._migrate_bookings_soft_cancel(cursor)
+
+                # Database lama belum punya kolom-kolom yang ditambahkan belakangan
+                self._add_missing_columns(cursor, "Schedules", [
+                    ("IsBlocked", "INTEGER DEFAULT 0"),
+                    ("SlotMinutes", "INTEGER DEFAULT 0"),
+                    ("SlotTotal", "INTEGER DEFAULT 0"),
+                    ("Occupancy", "INTEGER DEFAULT 0"),
+                ])
+                # PatientID sengaja tanpa REFERENCES, sama dengan BOOKINGS_TABLE_SQL (tabel arsip tidak punya Patients)
+                self._add_missing_columns(cursor, "Bookings", [
+                    ("SlotIndex", "INTEGER"),
+                    ("SlotCount", "INTEGER DEFAULT 1"),
+                    ("PatientID", "INTEGER"),
+                ])
+
+                # Index untuk query jadwal per dokter/tanggal dan pemindahan data lama ke arsip
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_schedules_doctor_date ON Schedules (DoctorID, Date)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_schedules_date ON Schedules (Date)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookings_date ON Bookings (BookingDate, BookingTime)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookings_schedule ON Bookings (ScheduleID)")
+
+                # Partial index: hanya booking aktif yang dibatasi unik per jadwal (dan per slot awal untuk
+                # shift bertingkat slot), sehingga jadwal dari booking yang dibatalkan bisa dibooking ulang
+                # tanpa menghapus riwayatnya. Tumpang tindih antar slot dicegah oleh bitmap Occupancy.
+                cursor.execute("DROP INDEX IF EXISTS ux_bookings_active_schedule")
                 cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS Bookings (
-                        BookingID INTEGER PRIMARY KEY AUTOINCREMENT,
-                        ScheduleID INTEGER UNIQUE NOT NULL, -- Satu jadwal hanya bisa punya satu booking
-                        DoctorID INTEGER NOT NULL,
+                    CREATE UNIQUE INDEX IF NOT EXISTS ux_bookings_active_slot
+                    ON Bookings (ScheduleID, IFNULL(SlotIndex, -1)) WHERE Status = 'Confirmed'
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_bookings_confirmed_doctor
+                    ON Bookings (DoctorID, BookingDate) WHERE Status = 'Confirmed'
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_bookings_confirmed_date
+                    ON Bookings (BookingDate, BookingTime) WHERE Status = 'Confirmed'
+                """)
+
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookings_doctor ON Bookings (DoctorID)")
+
+                # Registri pasien: satu baris per nomor telepon (PhoneKey, lihat phone_key); booking merujuk
+                # lewat PatientID, sedangkan PatientName/PatientPhone di Bookings tetap disimpan sebagai riwayat.
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS Patients (
+                        PatientID INTEGER PRIMARY KEY AUTOINCREMENT,
+                        Name TEXT NOT NULL COLLATE NOCASE, -- Nama terakhir yang dipakai saat booking
+                        Phone TEXT NOT NULL, -- Nomor telepon seperti terakhir diketik
+                        PhoneKey TEXT NOT NULL, -- Hanya digit, awalan 62 diganti 0
+                        CreatedAt TEXT,
+                        LastBookingDate TEXT, -- Format YYYY-MM-DD
+                        BookingCount INTEGER DEFAULT 0
+                    )
+                """)
+                cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_patients_phone_key ON Patients (PhoneKey)")
+                # Kolom NOCASE -> LIKE 'awalan%' dan ORDER BY Name memakai index ini (saran nama saat mengetik)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_patients_name ON Patients (Name)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookings_patient ON Bookings (PatientID, BookingDate)")
+                # Booking lama (hasil ALTER maupun tabel yang dibangun ulang _migrate_bookings_soft_cancel) belum
+                # punya PatientID; hanya baris PatientID IS NULL yang dibaca, lewat idx_bookings_patient.
+                self._link_patients(cursor)
+                self._create_booking_search(cursor)
+                self._create_change_log(cursor)
+
+                # Tabel Waitlist: pasien yang menunggu jadwal kosong pada dokter atau spesialisasi tertentu
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS Waitlist (
+                        WaitlistID INTEGER PRIMARY KEY AUTOINCREMENT,
                         PatientName TEXT NOT NULL,
                         PatientPhone TEXT,
-                        BookingDate TEXT NOT NULL, -- Format YYYY-MM-DD
-                        BookingTime TEXT NOT NULL, -- Format HH:MM (dari StartTime jadwal)
-                        Status TEXT DEFAULT 'Confirmed', -- e.g., 'Confirmed', 'Cancelled', 'Completed'
-                        FOREIGN KEY (ScheduleID) REFERENCES Schedules (ScheduleID)
-                            ON DELETE CASCADE ON UPDATE CASCADE,
+                        DoctorID INTEGER, -- Diisi jika pasien menunggu dokter tertentu
+                        Specialty TEXT,   -- Diisi jika pasien mau dokter mana saja dengan spesialisasi ini
+                        DateFrom TEXT NOT NULL, -- Format YYYY-MM-DD
+                        DateTo TEXT NOT NULL,   -- Format YYYY-MM-DD
+                        Priority INTEGER DEFAULT 0, -- Semakin besar semakin didahulukan
+                        CreatedAt TEXT NOT NULL,
+                        Status TEXT DEFAULT 'Waiting', -- 'Waiting', 'Assigned', 'Removed'
+                        AssignedBookingID INTEGER,
+                        AssignedAt TEXT,
+                        CHECK (DoctorID IS NOT NULL OR Specialty IS NOT NULL),
                         FOREIGN KEY (DoctorID) REFERENCES Doctors (DoctorID)
                             ON DELETE CASCADE ON UPDATE CASCADE
                     )
                 """)
+                # Urutan index = urutan pemilihan kandidat, jadi pencocokan berhenti di baris pertama yang cocok
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_waitlist_doctor
+                    ON Waitlist (DoctorID, Priority DESC, CreatedAt) WHERE Status = 'Waiting'
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_waitlist_specialty
+                    ON Waitlist (Specialty, Priority DESC, CreatedAt) WHERE Status = 'Waiting'
+                """)
+
+                # Outbox pengingat janji temu: satu baris per (booking, jenis pengingat), sehingga
+                # pengingat yang sama tidak pernah ditulis atau dikirim dua kali
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS ReminderOutbox (
+                        OutboxID INTEGER PRIMARY KEY AUTOINCREMENT,
+                        BookingID INTEGER NOT NULL,
+                        Kind TEXT NOT NULL, -- Jenis pengingat, mis. '24h' atau '2h' sebelum janji temu
+                        PatientPhone TEXT NOT NULL,
+                        Message TEXT NOT NULL,
+                        DueAt TEXT NOT NULL, -- Format YYYY-MM-DD HH:MM:SS; digeser saat retry
+                        Status TEXT DEFAULT 'Pending', -- 'Pending', 'Sending', 'Sent', 'Failed', 'Skipped'
+                        Attempts INTEGER DEFAULT 0,
+                        LastError TEXT,
+                        CreatedAt TEXT NOT NULL,
+                        SentAt TEXT,
+                        ClaimedBy TEXT, -- Meja/proses yang sedang mengirim (Status 'Sending')
+                        ClaimedAt TEXT,
+                        UNIQUE (BookingID, Kind)
+                    )
+                """)
+                self._add_missing_columns(cursor, "ReminderOutbox", [("ClaimedBy", "TEXT"), ("ClaimedAt", "TEXT")])
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_reminder_outbox_pending
+                    ON ReminderOutbox (DueAt) WHERE Status = 'Pending'
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_reminder_outbox_sending
+                    ON ReminderOutbox (ClaimedAt) WHERE Status = 'Sending'
+                """)
+
+                # Jurnal audit booking (append-only): siapa membuat/membatalkan booking apa dan kapan.
+                # Diisi JournalService lewat antrean; baris tidak boleh diubah atau dihapus.
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS BookingJournal (
+                        JournalID INTEGER PRIMARY KEY AUTOINCREMENT,
+                        EventAt TEXT NOT NULL, -- Waktu kejadian (bukan waktu ditulis), format YYYY-MM-DD HH:MM:SS
+                        Event TEXT NOT NULL, -- 'Booked', 'Cancelled', 'Completed', 'NoShow', 'WaitlistAssigned', 'Waitlisted'
+                        BookingID INTEGER, -- Tanpa foreign key: jurnal tetap utuh walau booking diarsipkan
+                        ScheduleID INTEGER,
+                        DoctorID INTEGER,
+                        PatientName TEXT COLLATE NOCASE,
+                        PatientPhone TEXT, -- phone_key (hanya digit, +62 jadi 0), agar pencarian tidak bergantung format
+                        BookingDate TEXT,
+                        BookingTime TEXT,
+                        Actor TEXT, -- Nama komputer/meja yang melakukan perubahan
+                        Details TEXT -- JSON tambahan, mis. ID daftar tunggu
+                    )
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_journal_event_at ON BookingJournal (EventAt)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_journal_doctor ON BookingJournal (DoctorID, EventAt)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_journal_phone ON BookingJournal (PatientPhone, EventAt)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_journal_name ON BookingJournal (PatientName)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_journal_booking ON BookingJournal (BookingID)")
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_journal_no_update BEFORE UPDATE ON BookingJournal BEGIN
+                        SELECT RAISE(ABORT, 'BookingJournal is append-only');
+                    END
+                """)
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_journal_no_delete BEFORE DELETE ON BookingJournal BEGIN
+                        SELECT RAISE(ABORT, 'BookingJournal is append-only');
+                    END
+                """)
+
+                # Penanda batas data yang sudah dipindahkan ke database arsip
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS ArchiveState (
+                        ID INTEGER PRIMARY KEY CHECK (ID = 1),
+                        ArchivedBefore TEXT NOT NULL, -- Format YYYY-MM-DD, data < tanggal ini ada di arsip
+                        LastRunAt TEXT
+                    )
+                """)
+
+                # Migrasi data satu kali yang sudah dijalankan (mis. shift lama -> slot), agar tidak diulang tiap start
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS SchemaMigrations (
+                        Name TEXT PRIMARY KEY,
+                        AppliedAt TEXT NOT NULL -- Format YYYY-MM-DD HH:MM:SS
+                    )
+                """)
                 conn.commit()
                 logging.info("Database tables checked/created successfully.")
             except sqlite3.Error as e:
@@ -71,9 +349,218 @@ class DatabaseManager:
             finally:
                 conn.close()
 
+    def _add_missing_columns(self, cursor, table, columns):
+        """Menambahkan kolom (nama, tipe) yang belum ada di tabel lama."""
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        added = []
+        for column, column_type in columns:
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                logging.info(f"Added column {table}.{column}.")
+                added.append(column)
+        return added
+
+    def _link_patients(self, cursor):
+        """
+        Mengisi Patients dari booking yang belum punya PatientID dan menautkan booking tersebut, berbasis himpunan:
+        semua booking dengan PhoneKey yang sama menjadi satu pasien (nama dan nomor dari booking terbaru).
+        Mengembalikan (jumlah pasien baru, jumlah booking yang ditautkan).
+        """
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS PatientLink (BookingID INTEGER PRIMARY KEY, PhoneKey TEXT)")
+        cursor.execute("DELETE FROM temp.PatientLink")
+        cursor.execute(f"""
+            INSERT INTO temp.PatientLink (BookingID, PhoneKey)
+            SELECT BookingID, PhoneKey FROM (
+                SELECT BookingID, {PHONE_KEY_SQL.format(column="PatientPhone")} AS PhoneKey
+                FROM Bookings WHERE PatientID IS NULL
+            )
+            WHERE PhoneKey != ''
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS temp.idx_patient_link_key ON PatientLink (PhoneKey)")
+        cursor.execute("SELECT COUNT(*) FROM Patients")
+        patients_before = cursor.fetchone()[0]
+        cursor.execute("""
+            INSERT INTO Patients (Name, Phone, PhoneKey, CreatedAt, LastBookingDate, BookingCount)
+            SELECT latest.PatientName, latest.PatientPhone, g.PhoneKey, g.FirstCreatedAt, g.LastBookingDate, g.Bookings
+            FROM (
+                SELECT l.PhoneKey, MAX(l.BookingID) AS LatestID, COUNT(*) AS Bookings,
+                       MIN(b.CreatedAt) AS FirstCreatedAt, MAX(b.BookingDate) AS LastBookingDate
+                FROM temp.PatientLink l JOIN Bookings b ON b.BookingID = l.BookingID
+                GROUP BY l.PhoneKey
+            ) g
+            JOIN Bookings latest ON latest.BookingID = g.LatestID
+            WHERE true
+            ON CONFLICT (PhoneKey) DO UPDATE SET
+                BookingCount = BookingCount + excluded.BookingCount,
+                LastBookingDate = MAX(IFNULL(LastBookingDate, ''), excluded.LastBookingDate)
+        """)
+        cursor.execute("SELECT COUNT(*) FROM Patients")
+        patients_added = cursor.fetchone()[0] - patients_before
+        cursor.execute("""
+            UPDATE Bookings SET PatientID = p.PatientID
+            FROM temp.PatientLink l JOIN Patients p ON p.PhoneKey = l.PhoneKey
+            WHERE Bookings.BookingID = l.BookingID
+        """)
+        linked = cursor.rowcount
+        cursor.execute("DELETE FROM temp.PatientLink")
+        if linked:
+            logging.info(f"Linked {linked} bookings to patients ({patients_added} new patients).")
+        return patients_added, linked
+
+    def link_patients(self):
+        """Menautkan booking yang belum punya PatientID (mis. hasil impor atau data seed) ke registri pasien."""
+        conn = self.get_connection()
+        try:
+            result = self._link_patients(conn.cursor())
+            conn.commit()
+            return result
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error linking bookings to patients: {e}")
+            return 0, 0
+        finally:
+            conn.close()
+
+    def _create_booking_search(self, cursor):
+        """
+        Membuat indeks full-text FTS5 untuk pencarian booking (nama pasien, telepon, nama dokter).
+        Isi indeks dijaga tetap sinkron dengan Bookings/Doctors lewat trigger.
+        Nomor telepon disimpan hanya digit agar '0812-3456' bisa dicari dengan '08123'.
+        """
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS BookingsSearch USING fts5(
+                PatientName, PatientPhone, DoctorName,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        """)
+        new_row = f"""
+            INSERT INTO BookingsSearch (rowid, PatientName, PatientPhone, DoctorName)
+            SELECT new.BookingID, new.PatientName, {PHONE_DIGITS_SQL.format(column="new.PatientPhone")},
+                   (SELECT Name FROM Doctors WHERE DoctorID = new.DoctorID);
+        """
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_bookings_search_insert AFTER INSERT ON Bookings BEGIN
+                {new_row}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_bookings_search_update
+            AFTER UPDATE OF PatientName, PatientPhone, DoctorID ON Bookings BEGIN
+                DELETE FROM BookingsSearch WHERE rowid = old.BookingID;
+                {new_row}
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_bookings_search_delete AFTER DELETE ON Bookings BEGIN
+                DELETE FROM BookingsSearch WHERE rowid = old.BookingID;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_doctors_search_rename AFTER UPDATE OF Name ON Doctors BEGIN
+                UPDATE BookingsSearch SET DoctorName = new.Name
+                WHERE rowid IN (SELECT BookingID FROM Bookings WHERE DoctorID = new.DoctorID);
+            END
+        """)
+
+        # Isi awal untuk database yang sudah punya booking sebelum indeks dibuat
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM BookingsSearch)")
+        if not cursor.fetchone()[0]:
+            cursor.execute(f"""
+                INSERT INTO BookingsSearch (rowid, PatientName, PatientPhone, DoctorName)
+                SELECT b.BookingID, b.PatientName, {PHONE_DIGITS_SQL.format(column="b.PatientPhone")}, d.Name
+                FROM Bookings b LEFT JOIN Doctors d ON d.DoctorID = b.DoctorID
+            """)
+            if cursor.rowcount > 0:
+                logging.info(f"Booking search index populated with {cursor.rowcount} bookings.")
+
+    def _create_change_log(self, cursor):
+        """
+        Membuat ChangeLog: nomor urut perubahan Bookings/Schedules/Doctors yang diisi trigger, sehingga
+        aplikasi di meja lain cukup membaca baris setelah Seq terakhir yang sudah dilihat (lihat ChangeWatcher).
+        Trigger UPDATE hanya untuk kolom yang tampil di layar; migrasi seperti pengisian PatientID tidak dicatat.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ChangeLog (
+                Seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                TableName TEXT NOT NULL, -- 'Bookings', 'Schedules', atau 'Doctors'
+                KeyID INTEGER NOT NULL, -- BookingID/ScheduleID/DoctorID baris yang berubah
+                DoctorID INTEGER -- Dokter pemilik baris, untuk memperbarui kartu dokter saja
+            )
+        """)
+        for table, (key, watched_columns) in CHANGE_LOG_TABLES.items():
+            for event, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+                event_sql = f"UPDATE OF {watched_columns}" if event == "UPDATE" else event
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_changelog_{table.lower()}_{event.lower()}
+                    AFTER {event_sql} ON {table} BEGIN
+                        INSERT INTO ChangeLog (TableName, KeyID, DoctorID) VALUES ('{table}', {row}.{key}, {row}.DoctorID);
+                    END
+                """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_changelog_prune AFTER INSERT ON ChangeLog
+            WHEN new.Seq % {CHANGE_LOG_PRUNE_EVERY} = 0 BEGIN
+                DELETE FROM ChangeLog WHERE Seq <= new.Seq - {CHANGE_LOG_RETAIN};
+            END
+        """)
+
+    def _migrate_bookings_soft_cancel(self, cursor):
+        """
+        Migrasi tabel Bookings lama (ScheduleID UNIQUE, tanpa kolom waktu status) ke skema baru.
+        SQLite tidak bisa menghapus constraint UNIQUE, jadi tabel dibangun ulang lalu datanya disalin.
+        """
+        cursor.execute("PRAGMA table_info(Bookings)")
+        columns = [row[1] for row in cursor.fetchall()]
+        if "StatusUpdatedAt" in columns:
+            return
+        logging.info("Migrating Bookings table to soft-cancel schema...")
+        cursor.execute(BOOKINGS_TABLE_SQL.format(table="Bookings_new"))
+        cursor.execute("""
+            INSERT INTO Bookings_new (BookingID, ScheduleID, DoctorID, PatientName, PatientPhone,
+                                      BookingDate, BookingTime, Status)
+            SELECT BookingID, ScheduleID, DoctorID, PatientName, PatientPhone,
+                   BookingDate, BookingTime, Status
+            FROM Bookings
+        """)
+        cursor.execute("DROP TABLE Bookings")
+        cursor.execute("ALTER TABLE Bookings_new RENAME TO Bookings")
+        logging.info("Bookings table migrated.")
+
+    def load_snapshot(self, path):
+        """
+        Mengganti seluruh isi database dengan file snapshot SQLite memakai backup API
+        (halaman disalin apa adanya, tanpa menjalankan ulang INSERT dan trigger).
+        """
+        source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        target = self._anchor if self.in_memory else self.get_connection()
+        try:
+            source.backup(target)
+            logging.info(f"Database {self.db_name} loaded from snapshot {path}.")
+        finally:
+            source.close()
+            if target is not self._anchor:
+                target.close()
+
+    def save_snapshot(self, path):
+        """Menyalin isi database ke file snapshot (ditimpa jika sudah ada) memakai backup API."""
+        source = self.get_connection()
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
     def close_connection(self):
-        """Menutup koneksi database."""
+        """Menutup koneksi database. Untuk database in-memory, isinya ikut dibuang."""
         if self.conn:
-            self.conn.close()
+            try:
+                self.conn.close()
+                logging.info("Database connection closed.")
+            except sqlite3.ProgrammingError:
+                pass # Koneksi terakhir dibuka thread lain (server/worker); thread itu yang menutupnya
             self.conn = None
-            logging.info("Database connection closed.")
\ No newline at end of file
+        if self._anchor is not None:
+            self._anchor.close()
+            self._anchor = None
\ No newline at end of file
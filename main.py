@@ -3,26 +3,87 @@ import os
 import logging
 import json
 
+# Dibuat sebelum import PyQt5 agar waktu import ikut terukur pada mode --profile-startup
+from services.startup_profile import StartupProfiler, PROFILE_FLAG, EXIT_AFTER_PAINT_FLAG
+STARTUP_PROFILER = StartupProfiler(enabled=PROFILE_FLAG in sys.argv)
+
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QTableWidget, QTableWidgetItem, QMessageBox, QDateEdit,
     QHeaderView, QComboBox, QLineEdit, QTextBrowser, QPushButton, QVBoxLayout,
     QHBoxLayout, QLabel, QStackedWidget, QFrame, QSizePolicy, QSpacerItem, QDialog, QGridLayout, QScrollArea,
-    QGraphicsDropShadowEffect
+    QGraphicsDropShadowEffect, QCheckBox, QCompleter
 )
 from PyQt5 import QtCore, QtGui
-from PyQt5.QtCore import Qt, QDate, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QDate, QObject, QThread, QTimer, QStringListModel, pyqtSignal
 from PyQt5.QtGui import QPixmap, QColor
 
 # Tambahkan direktori project ke PYTHONPATH agar modul lokal dapat diimpor
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
 
-from database import DatabaseManager
+from database import DatabaseManager, MEMORY_DATABASE
 from services.booking_service import BookingService
 import services.app_tools
-from services.chatbot import GeminiChatbotWorker, GeminiChatbotService
+from services.archive_service import ArchiveService
+from services.backup_service import BackupService
+from services.reminder_service import ReminderService, FileReminderSender
+from services.journal_service import JournalService
+from services.consistency_service import ConsistencyService
+from services.seed_snapshots import load_seed
+from services.patient_lookup import PatientLookup
+from services.change_watcher import ChangeWatcher
+from services.booking_client import RemoteBookingService
+from services.chatbot import GeminiChatbotService, GeminiChatModel, ChatbotSignals
+from services.chat_scheduler import ChatRequestScheduler, FakeChatModel
+from services.local_answers import LocalAnswerEngine, CLINIC_INFO, CAPABILITIES
+import config
 from config import DATABASE_NAME, GEMINI_API_KEY # Pastikan GEMINI_API_KEY ada di config.py
 
+# Pengaturan opsional; config.py lama tanpa entri ini tetap berjalan dengan nilai default
+# Untuk demo dengan DATABASE_NAME = ":memory:": isi awal dari snapshot seed "small"/"medium"/"large"
+DATABASE_SEED_SNAPSHOT = getattr(config, "DATABASE_SEED_SNAPSHOT", None)
+ARCHIVE_DATABASE_NAME = getattr(config, "ARCHIVE_DATABASE_NAME", "klinik_awan_archive.db")
+ARCHIVE_RETENTION_DAYS = getattr(config, "ARCHIVE_RETENTION_DAYS", 90)
+ARCHIVE_INTERVAL_HOURS = getattr(config, "ARCHIVE_INTERVAL_HOURS", 24)
+# True: database lama diubah ke auto_vacuum INCREMENTAL (VACUUM penuh, mengunci seluruh file) pada arsip pertama.
+# Default False; jalankan 'python -m services.archive_service --enable-incremental-vacuum' di luar jam operasional
+ARCHIVE_CONVERT_AUTO_VACUUM = getattr(config, "ARCHIVE_CONVERT_AUTO_VACUUM", False)
+BACKUP_DIR = getattr(config, "BACKUP_DIR", "backups")
+BACKUP_KEEP = getattr(config, "BACKUP_KEEP", 7)
+BACKUP_INTERVAL_HOURS = getattr(config, "BACKUP_INTERVAL_HOURS", 6)
+# Backup yang dilewati karena database sedang sibuk dicoba lagi setelah BACKUP_RETRY_MINUTES menit
+BACKUP_RETRY_MINUTES = getattr(config, "BACKUP_RETRY_MINUTES", 15)
+# Pengingat janji temu ke PatientPhone; selama belum ada gateway SMS/WhatsApp pesan ditulis ke file ini
+REMINDERS_ENABLED = getattr(config, "REMINDERS_ENABLED", True)
+REMINDER_OUTBOX_FILE = getattr(config, "REMINDER_OUTBOX_FILE", "reminders_outbox.jsonl")
+# Jurnal audit booking (siapa membuat/membatalkan booking apa dan kapan); JOURNAL_ACTOR default = nama komputer
+JOURNAL_ENABLED = getattr(config, "JOURNAL_ENABLED", True)
+JOURNAL_ACTOR = getattr(config, "JOURNAL_ACTOR", None)
+# Audit berkala IsBooked/Occupancy vs Bookings untuk jadwal AUDIT_LOOKBACK_DAYS terakhir dan seterusnya
+AUDIT_INTERVAL_HOURS = getattr(config, "AUDIT_INTERVAL_HOURS", 24)
+AUDIT_LOOKBACK_DAYS = getattr(config, "AUDIT_LOOKBACK_DAYS", 30)
+AUDIT_AUTO_REPAIR = getattr(config, "AUDIT_AUTO_REPAIR", False)
+# Shift lama satu-booking-per-shift (mulai hari ini) diubah sekali menjadi slot SCHEDULE_SLOT_MINUTES menit saat
+# aplikasi pertama kali dibuka (tercatat di SchemaMigrations); None untuk mempertahankan shift tanpa slot
+SCHEDULE_SLOT_MINUTES = getattr(config, "SCHEDULE_SLOT_MINUTES", 15)
+# Jika diisi (mis. "http://127.0.0.1:8765"), aplikasi memakai server booking bersama, bukan file SQLite langsung.
+# Server hanya mendengarkan di localhost; agar meja lain di LAN bisa memakainya, jalankan server dengan
+# --host 0.0.0.0 --token <rahasia> dan isi BOOKING_SERVER_TOKEN di setiap meja dengan token yang sama
+BOOKING_SERVER_URL = getattr(config, "BOOKING_SERVER_URL", None)
+BOOKING_SERVER_TOKEN = getattr(config, "BOOKING_SERVER_TOKEN", None)
+# Booking/jadwal dari meja lain muncul otomatis; saat tidak ada perubahan, biayanya satu query ringan per interval
+CHANGE_WATCH_ENABLED = getattr(config, "CHANGE_WATCH_ENABLED", True)
+CHANGE_WATCH_INTERVAL_SECONDS = getattr(config, "CHANGE_WATCH_INTERVAL_SECONDS", 2)
+# Batas permintaan ke Gemini (free tier gemini-1.5-flash: 15 per menit) dan kebijakan retry
+CHATBOT_REQUESTS_PER_MINUTE = getattr(config, "CHATBOT_REQUESTS_PER_MINUTE", 15)
+CHATBOT_MAX_RETRIES = getattr(config, "CHATBOT_MAX_RETRIES", 4)
+CHATBOT_REQUEST_DEADLINE_SECONDS = getattr(config, "CHATBOT_REQUEST_DEADLINE_SECONDS", 60)
+# True -> chatbot memakai model tiruan lokal (tanpa jaringan), untuk uji coba antarmuka
+CHATBOT_USE_FAKE_MODEL = getattr(config, "CHATBOT_USE_FAKE_MODEL", False)
+# Skor minimum agar pertanyaan dijawab lokal tanpa Gemini; isi > 1 untuk selalu memakai Gemini
+CHATBOT_LOCAL_CONFIDENCE_THRESHOLD = getattr(config, "CHATBOT_LOCAL_CONFIDENCE_THRESHOLD", 0.7)
+
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+STARTUP_PROFILER.mark("imports")
 
 class BookingDialog(QDialog):
     booking_confirmed = pyqtSignal()
@@ -57,6 +118,17 @@ class BookingDialog(QDialog):
         self.patientPhoneInput.setPlaceholderText("Masukkan nomor telepon pasien")
         layout.addWidget(self.patientPhoneInput)
 
+        # Saran pasien terdaftar saat mengetik nama atau nomor telepon; memilih saran mengisi keduanya
+        self.selected_patient_id = None
+        self.patient_suggestions = {} # teks saran -> PatientRecord
+        for line_edit in (self.patientNameInput, self.patientPhoneInput):
+            completer = QCompleter(self)
+            completer.setModel(QStringListModel(completer))
+            completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion) # Sudah disaring oleh query awalan
+            completer.activated[str].connect(self.apply_patient_suggestion)
+            line_edit.setCompleter(completer)
+            line_edit.textEdited.connect(lambda text, c=completer: self.update_patient_suggestions(c, text))
+
         # Booking Date
         layout.addWidget(QLabel("Tanggal Booking:"))
         self.bookingDateInput = QDateEdit(self.initial_date)
@@ -75,11 +147,36 @@ class BookingDialog(QDialog):
         confirm_button.clicked.connect(self.confirm_booking)
         layout.addWidget(confirm_button)
 
+        # Jika jadwal penuh, pasien bisa menunggu; jadwal yang dibatalkan akan otomatis diberikan
+        waitlist_button = QPushButton("Masuk Daftar Tunggu (7 hari ke depan)")
+        waitlist_button.clicked.connect(self.join_waitlist)
+        layout.addWidget(waitlist_button)
+
         self.setLayout(layout)
 
         # Populate schedule initially
         self.populate_schedule_combobox()
 
+    def update_patient_suggestions(self, completer, text):
+        self.selected_patient_id = None # Data pasien diketik ulang; booking ditautkan lewat nomor telepon
+        labels = []
+        for patient in self.parent_window.patient_lookup.suggest(text):
+            label = f"{patient.name} — {patient.phone}"
+            self.patient_suggestions[label] = patient
+            labels.append(label)
+        completer.model().setStringList(labels)
+        if labels:
+            completer.complete()
+
+    def apply_patient_suggestion(self, label):
+        patient = self.patient_suggestions.get(label)
+        if patient is None:
+            return
+        self.selected_patient_id = patient.patient_id
+        # Ditunda satu putaran event loop: QCompleter baru saja menulis teks saran ke QLineEdit
+        QTimer.singleShot(0, lambda: (self.patientNameInput.setText(patient.name),
+                                      self.patientPhoneInput.setText(patient.phone)))
+
     def populate_schedule_combobox(self):
         self.scheduleIdComboBox.clear()
         selected_date = self.bookingDateInput.date().toString(Qt.ISODate) # FormatSCAPE-MM-DD
@@ -89,19 +186,27 @@ class BookingDialog(QDialog):
         
         if schedules:
             self.scheduleIdComboBox.addItem("-- Pilih Jadwal --", None)
-            for schedule_id, doctor_id, date, start_time, end_time, is_booked in schedules:
-                display_text = f"{start_time} - {end_time}"
-                if is_booked:
+            for schedule in schedules:
+                display_text = f"{schedule.start_time} - {schedule.end_time}"
+                if schedule.is_booked:
                     display_text += " (Terisi)"
                     self.scheduleIdComboBox.addItem(display_text, None) # Jangan tambahkan data jika terisi
                     self.scheduleIdComboBox.model().item(self.scheduleIdComboBox.count() - 1).setEnabled(False)
                 else:
-                    self.scheduleIdComboBox.addItem(display_text, schedule_id)
+                    self.scheduleIdComboBox.addItem(display_text, schedule.schedule_id)
         else:
             self.scheduleIdComboBox.addItem("Tidak ada jadwal tersedia", None)
         
         logging.info(f"Populated schedule combobox with {self.scheduleIdComboBox.count()} items.")
 
+    def refresh_schedules(self):
+        """Memuat ulang daftar jadwal (mis. slot diisi meja lain); pilihan yang masih tersedia dipertahankan."""
+        selected_text = self.scheduleIdComboBox.currentText()
+        self.populate_schedule_combobox()
+        index = self.scheduleIdComboBox.findText(selected_text)
+        if index > 0 and self.scheduleIdComboBox.itemData(index) is not None:
+            self.scheduleIdComboBox.setCurrentIndex(index)
+
 
     def confirm_booking(self):
         logging.info("Confirming booking from dialog.")
@@ -127,7 +232,8 @@ class BookingDialog(QDialog):
             patient_phone=no_telepon_pasien,
             booking_date=tanggal_booking,
             schedule_id=selected_schedule_id,
-            waktu_booking=waktu_booking
+            waktu_booking=waktu_booking,
+            patient_id=self.selected_patient_id
         )
 
         if success:
@@ -136,26 +242,76 @@ class BookingDialog(QDialog):
         else:
             QMessageBox.critical(self, "Booking Gagal", message)
 
+    def join_waitlist(self):
+        nama_pasien = self.patientNameInput.text().strip()
+        no_telepon_pasien = self.patientPhoneInput.text().strip()
+        if not nama_pasien or not no_telepon_pasien:
+            QMessageBox.warning(self, "Input Kurang", "Mohon isi nama dan nomor telepon pasien.")
+            return
+
+        date_from = self.bookingDateInput.date()
+        success, message = self.parent_window.booking_service.add_to_waitlist(
+            nama_pasien, no_telepon_pasien,
+            date_from.toString(Qt.ISODate), date_from.addDays(6).toString(Qt.ISODate),
+            doctor_id=self.doctor_id
+        )
+        if success:
+            QMessageBox.information(self, "Daftar Tunggu", message)
+            self.accept()
+        else:
+            QMessageBox.critical(self, "Daftar Tunggu Gagal", message)
+
+class ChangeSignals(QObject):
+    """Meneruskan ChangeSet dari thread ChangeWatcher ke thread GUI (queued connection)."""
+    changes_detected = pyqtSignal(object)
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
 
-        self.db_manager = DatabaseManager(DATABASE_NAME)
-        self.booking_service = BookingService(self.db_manager)
+        # Database in-memory (demo) tidak diarsipkan ke file
+        self.db_manager = DatabaseManager(DATABASE_NAME,
+                                          archive_db_name=None if DATABASE_NAME == MEMORY_DATABASE else ARCHIVE_DATABASE_NAME)
+        # Event jurnal ditulis thread background secara berkelompok (dalam mode server: oleh proses server,
+        # atas nama JOURNAL_ACTOR meja ini yang dikirim RemoteBookingService)
+        self.journal_service = None
+        if JOURNAL_ENABLED and not BOOKING_SERVER_URL:
+            self.journal_service = JournalService(self.db_manager, actor=JOURNAL_ACTOR)
+            self.journal_service.start()
+        if BOOKING_SERVER_URL:
+            # Database, data awal, dan pengarsipan dikelola oleh proses server
+            self.booking_service = RemoteBookingService(BOOKING_SERVER_URL, token=BOOKING_SERVER_TOKEN,
+                                                        actor=JOURNAL_ACTOR)
+            logging.info(f"Using shared booking server at {BOOKING_SERVER_URL}.")
+        else:
+            self.booking_service = BookingService(self.db_manager, journal=self.journal_service)
+        self.patient_lookup = PatientLookup(self.booking_service)
+        self.archive_service = ArchiveService(self.db_manager, retention_days=ARCHIVE_RETENTION_DAYS,
+                                              convert_auto_vacuum=ARCHIVE_CONVERT_AUTO_VACUUM)
+        self.backup_service = BackupService(self.db_manager, backup_dir=BACKUP_DIR, keep=BACKUP_KEEP)
+        self.consistency_service = ConsistencyService(self.db_manager)
         self.chatbot_service = GeminiChatbotService()
+        self.background_tasks = {} # nama tugas -> (QThread, worker) yang sedang berjalan
         
-        # Inisialisasi thread dan worker sebagai None
-        self.chatbot_thread = None
-        self.chatbot_worker = None
+        # Antrean permintaan chatbot dibuat saat halaman chatbot pertama kali dibuka
+        self.chat_scheduler = None
+        self.chatbot_signals = ChatbotSignals()
+        self.local_answer_engine = LocalAnswerEngine(self.booking_service, CHATBOT_LOCAL_CONFIDENCE_THRESHOLD)
+        self.chatbot_signals.response_received.connect(self.display_chatbot_response)
+        self.chatbot_signals.error_occurred.connect(self.display_chatbot_error)
         self.chat_history = [] # Untuk menyimpan riwayat chat
 
         self.doctor_cards_layout = None # Akan diinisialisasi di init_ui
+        self.doctor_status_labels = {} # doctor_id -> label ketersediaan di kartu dokter
+        self.active_booking_dialog = None
 
         self.setWindowTitle("Sistem Booking Dokter")
         self.setGeometry(100, 100, 1200, 800) # Ukuran jendela utama yang lebih besar
         
         # PENTING: Panggil ini pertama untuk memastikan tabel dibuat sebelum digunakan
-        self.check_and_insert_initial_data() 
+        if not BOOKING_SERVER_URL:
+            self.check_and_insert_initial_data() 
         
         self.init_ui()
         self.load_initial_data() # Ini akan memuat data setelah tabel dipastikan ada
@@ -163,10 +319,64 @@ class MainWindow(QMainWindow):
         self.populate_doctor_cards()
         self.populate_booking_table()
 
-        # Inisialisasi Gemini Chatbot Service
-        if not self.chatbot_service.initialize_model(GEMINI_API_KEY):
-            QMessageBox.warning(self, "API Key Error", "Gagal menginisialisasi Gemini API. Pastikan API Key benar dan koneksi internet tersedia.")
-            logging.error("Failed to initialize Gemini API service.")
+        # Pengarsipan data lama berjalan di background: sekali setelah start, lalu berkala
+        if not BOOKING_SERVER_URL and not self.db_manager.in_memory:
+            QTimer.singleShot(30 * 1000, self.start_archive_job)
+            self.archive_timer = QTimer(self)
+            self.archive_timer.timeout.connect(self.start_archive_job)
+            self.archive_timer.start(int(ARCHIVE_INTERVAL_HOURS * 60 * 60 * 1000))
+
+            # Backup online berkala (tidak mengunci booking karena disalin bertahap)
+            self.backup_timer = QTimer(self)
+            self.backup_timer.timeout.connect(self.start_backup_job)
+            self.backup_timer.start(int(BACKUP_INTERVAL_HOURS * 60 * 60 * 1000))
+
+        if not BOOKING_SERVER_URL:
+            # Audit konsistensi jadwal bertahap per rentang tanggal
+            self.audit_timer = QTimer(self)
+            self.audit_timer.timeout.connect(self.start_audit_job)
+            self.audit_timer.start(int(AUDIT_INTERVAL_HOURS * 60 * 60 * 1000))
+
+        # Pengingat janji temu dikirim oleh thread background (dalam mode server: oleh proses server)
+        self.reminder_service = None
+        if REMINDERS_ENABLED and not BOOKING_SERVER_URL:
+            self.reminder_service = ReminderService(self.db_manager, FileReminderSender(REMINDER_OUTBOX_FILE))
+            self.reminder_service.start()
+
+        # Perubahan dari meja lain (booking, pembatalan, jadwal) diterapkan ke tampilan yang terbuka
+        self.change_watcher = None
+        if CHANGE_WATCH_ENABLED:
+            self.change_signals = ChangeSignals()
+            self.change_signals.changes_detected.connect(self.apply_external_changes)
+            self.change_watcher = ChangeWatcher(self.booking_service, self.change_signals.changes_detected.emit,
+                                                db_manager=None if BOOKING_SERVER_URL else self.db_manager,
+                                                interval_seconds=CHANGE_WATCH_INTERVAL_SECONDS)
+            self.change_watcher.start()
+
+        # Gemini Chatbot Service baru diinisialisasi saat halaman chatbot pertama kali dibuka
+        self.chatbot_initialized = False
+
+    def ensure_chatbot_initialized(self):
+        """Memuat stack Gemini (import berat) sekali saja, saat chatbot pertama kali dipakai."""
+        if self.chatbot_initialized:
+            return
+        self.chatbot_initialized = True
+        if CHATBOT_USE_FAKE_MODEL:
+            model = FakeChatModel(latency=0.5, error_rate=0.2)
+            logging.info("Chatbot is using the local fake model.")
+        else:
+            model = GeminiChatModel(GEMINI_API_KEY)
+            if not self.chatbot_service.initialize_model(GEMINI_API_KEY):
+                QMessageBox.warning(self, "API Key Error", "Gagal menginisialisasi Gemini API. Pastikan API Key benar dan koneksi internet tersedia.")
+                logging.error("Failed to initialize Gemini API service.")
+        self.chat_scheduler = ChatRequestScheduler(
+            model,
+            prompt_builder=self.build_chatbot_prompt,
+            history=self.chat_history,
+            requests_per_minute=CHATBOT_REQUESTS_PER_MINUTE,
+            max_retries=CHATBOT_MAX_RETRIES,
+            deadline_seconds=CHATBOT_REQUEST_DEADLINE_SECONDS,
+        )
 
     def init_ui(self):
         # Main layout (vertical)
@@ -215,6 +425,21 @@ class MainWindow(QMainWindow):
         # 2. Bookings View (Table)
         self.bookings_page = QWidget()
         bookings_layout = QVBoxLayout(self.bookings_page)
+        self.booking_search_input = QLineEdit()
+        self.booking_search_input.setPlaceholderText("Cari nama pasien, nomor telepon, atau dokter...")
+        self.booking_search_input.setToolTip(f"Booking yang sudah diarsipkan (lebih dari {ARCHIVE_RETENTION_DAYS} hari) "
+                                             "tidak ikut dicari.")
+        self.booking_search_input.setClearButtonEnabled(True)
+        # Debounce: pencarian baru dijalankan setelah pengguna berhenti mengetik sejenak
+        self.booking_search_timer = QTimer(self)
+        self.booking_search_timer.setSingleShot(True)
+        self.booking_search_timer.setInterval(250)
+        self.booking_search_timer.timeout.connect(self.populate_booking_table)
+        self.booking_search_input.textChanged.connect(lambda _: self.booking_search_timer.start())
+        bookings_layout.addWidget(self.booking_search_input)
+        self.show_history_checkbox = QCheckBox("Tampilkan riwayat (dibatalkan/selesai/tidak hadir)")
+        self.show_history_checkbox.stateChanged.connect(self.populate_booking_table)
+        bookings_layout.addWidget(self.show_history_checkbox)
         self.booking_table = QTableWidget()
         # Tambahkan 1 kolom untuk tombol Hapus
         self.booking_table.setColumnCount(9) 
@@ -225,7 +450,7 @@ class MainWindow(QMainWindow):
         self.booking_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         # Atur lebar kolom Aksi agar tidak terlalu lebar
         self.booking_table.horizontalHeader().setSectionResizeMode(8, QHeaderView.Fixed) 
-        self.booking_table.setColumnWidth(8, 100) # Sesuaikan lebar jika perlu
+        self.booking_table.setColumnWidth(8, 260) # Cukup untuk tombol Batalkan/Selesai/Tidak Hadir
         
         bookings_layout.addWidget(self.booking_table)
         self.stacked_widget.addWidget(self.bookings_page)
@@ -251,6 +476,10 @@ class MainWindow(QMainWindow):
         chat_input_hbox.addWidget(self.chatSendButton)
 
         chatbot_layout.addLayout(chat_input_hbox)
+
+        self.chatQueueLabel = QLabel("")
+        self.chatQueueLabel.setStyleSheet("color: #808080;")
+        chatbot_layout.addWidget(self.chatQueueLabel)
         self.stacked_widget.addWidget(self.chatbot_page)
 
         # Set central widget
@@ -263,6 +492,8 @@ class MainWindow(QMainWindow):
 
     def check_and_insert_initial_data(self):
         # Memastikan tabel ada dan menyisipkan data jika kosong
+        if DATABASE_SEED_SNAPSHOT and self.db_manager.in_memory:
+            load_seed(self.db_manager, DATABASE_SEED_SNAPSHOT) # Tabel dan data demo sekaligus, dalam milidetik
         self.db_manager.create_tables() # Pastikan tabel dibuat!
         # Setelah tabel dibuat, cek apakah ada dokter. Jika tidak ada, sisipkan data awal.
         if not self.booking_service.get_all_doctors_with_specialty(): 
@@ -271,6 +502,8 @@ class MainWindow(QMainWindow):
             logging.info("Initial dokter and jadwal data inserted successfully.")
         else:
             logging.info("Database already contains doctor data. Skipping initial data insertion.")
+        if SCHEDULE_SLOT_MINUTES:
+            self.booking_service.convert_schedules_to_slots(SCHEDULE_SLOT_MINUTES, once=True)
 
     def load_initial_data(self):
         # Memastikan data awal dimuat (seperti kartu dokter dan booking)
@@ -278,20 +511,80 @@ class MainWindow(QMainWindow):
         self.populate_booking_table()
         logging.info("Initial data (doctor cards and bookings) loaded.")
     
-    def add_new_booking(self, doctor_id, doctor_name, patient_name, patient_phone, booking_date, schedule_id, waktu_booking):
+    def add_new_booking(self, doctor_id, doctor_name, patient_name, patient_phone, booking_date, schedule_id, waktu_booking,
+                        patient_id=None):
         # Format tanggal dari QDate ke string 'YYYY-MM-DD'
         formatted_date = booking_date.toString(Qt.ISODate)
         
         success, message = self.booking_service.add_booking(
-            schedule_id, doctor_id, patient_name, patient_phone, formatted_date, waktu_booking
+            schedule_id, doctor_id, patient_name, patient_phone, formatted_date, waktu_booking, patient_id=patient_id
         )
         if success:
+            self.patient_lookup.invalidate() # Pasien baru/nama terbaru langsung muncul di saran berikutnya
             QMessageBox.information(self, "Booking Berhasil", message)
             self.populate_booking_table() # Refresh table
             self.populate_doctor_cards() # Refresh doctor cards (to update "available" status)
+            if self.reminder_service is not None:
+                self.reminder_service.wake() # Booking mendadak (< 24 jam) langsung dijadwalkan pengingatnya
             logging.info(f"Booking confirmed for {doctor_name} on {formatted_date} at {waktu_booking} by {patient_name}.")
         return success, message
 
+    def start_background_task(self, name, task, on_result=None, *args, **kwargs):
+        """Menjalankan fungsi layanan di QThread terpisah; tugas dengan nama sama tidak dijalankan ganda."""
+        if name in self.background_tasks:
+            logging.info(f"Background task '{name}' is still running, skipping.")
+            return
+        worker = services.app_tools.BackgroundTaskWorker(task, *args, **kwargs)
+        thread = QThread()
+        worker.moveToThread(thread)
+        if on_result:
+            worker.result_ready.connect(on_result)
+        thread.started.connect(worker.run)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        thread.finished.connect(lambda: self.background_tasks.pop(name, None))
+        self.background_tasks[name] = (thread, worker)
+        thread.start()
+        logging.info(f"Background task '{name}' started.")
+
+    def start_archive_job(self):
+        self.start_background_task("archive", self.archive_service.run_archive, self.on_archive_finished)
+
+    def on_archive_finished(self, stats):
+        logging.info(f"Archive job result: {stats}")
+        if stats and (stats["bookings_moved"] or stats["schedules_moved"]):
+            self.populate_booking_table()
+
+    def start_backup_job(self):
+        self.start_background_task("backup", self.backup_service.run_backup, self.on_backup_finished)
+
+    def on_backup_finished(self, stats):
+        if stats and stats.get("skipped"):
+            # Database sedang sibuk dan tidak dalam mode WAL; coba lagi nanti tanpa mengganggu meja depan
+            logging.info(f"Backup skipped while the database is busy; retrying in {BACKUP_RETRY_MINUTES} minutes.")
+            QTimer.singleShot(int(BACKUP_RETRY_MINUTES * 60 * 1000), self.start_backup_job)
+            return
+        if stats and stats.get("path"):
+            logging.info(f"Backup finished: {stats['path']} ({stats['throughput_mb_s']:.1f} MB/s, "
+                         f"{stats['elapsed_seconds']:.2f}s, integrity={stats['integrity']}).")
+        else:
+            QMessageBox.warning(self, "Backup Gagal", f"Snapshot backup tidak lolos pemeriksaan integritas: {stats}")
+
+    def start_audit_job(self):
+        date_from = QDate.currentDate().addDays(-AUDIT_LOOKBACK_DAYS).toString(Qt.ISODate)
+        self.start_background_task("audit", self.consistency_service.run_incremental, self.on_audit_finished,
+                                   date_from, repair=AUDIT_AUTO_REPAIR)
+
+    def on_audit_finished(self, report):
+        if not report:
+            return
+        problems = {kind: count for kind, count in report["findings"].items() if count}
+        logging.info(f"Consistency audit finished in {report['elapsed_seconds']:.2f}s: "
+                     f"findings={problems or 'none'}, repaired={report['repaired']}.")
+        if report["repaired"]:
+            self.populate_doctor_cards()
+
     def populate_doctor_comboboxes(self):
         self.doctor_filter_combo.clear()
         self.doctor_filter_combo.addItem("Semua Spesialisasi") # Ubah teks filter
@@ -308,6 +601,7 @@ class MainWindow(QMainWindow):
         # Hapus kartu dokter yang ada
         if self.doctor_cards_layout:
             services.app_tools.clear_layout(self.doctor_cards_layout)
+        self.doctor_status_labels = {}
         
         selected_specialty = self.doctor_filter_combo.currentText()
         
@@ -320,8 +614,8 @@ class MainWindow(QMainWindow):
         logging.info(f"Fetched doctors for display based on filter '{selected_specialty}': {len(doctors_data)} entries.")
 
         row, col = 0, 0
-        for doc_id, name, specialty in doctors_data:
-            card = self.create_doctor_card(doc_id, name, specialty)
+        for doctor in doctors_data:
+            card = self.create_doctor_card(doctor.doctor_id, doctor.name, doctor.specialty)
             self.doctor_cards_layout.addWidget(card, row, col)
             col += 1
             if col == 3: # 3 cards per row
@@ -390,18 +684,9 @@ class MainWindow(QMainWindow):
         name_label.setObjectName("doctor_name") # Untuk CSS
         specialty_label = QLabel(f"Spesialisasi: {specialty}")
         
-        # Cek ketersediaan jadwal
-        today = QDate.currentDate().toString(Qt.ISODate)
-        available_schedules = self.booking_service.get_doctor_schedules(doctor_id, today, include_booked=False)
-        
-        status_text = "Tidak Ada Jadwal Hari Ini"
-        status_color = "red"
-        if available_schedules:
-            status_text = f"{len(available_schedules)} Jadwal Tersedia Hari Ini"
-            status_color = "green"
-
-        status_label = QLabel(f"<span style='color: {status_color}; font-weight: bold;'>{status_text}</span>")
+        status_label = QLabel(self.doctor_availability_html(doctor_id))
         status_label.setAlignment(Qt.AlignCenter) # Pusatkan teks status
+        self.doctor_status_labels[doctor_id] = status_label
 
         booking_button = QPushButton("Booking Sekarang")
         booking_button.clicked.connect(lambda: self.open_booking_dialog(doctor_id, name, specialty))
@@ -414,14 +699,34 @@ class MainWindow(QMainWindow):
         
         return card_frame
 
+    def doctor_availability_html(self, doctor_id):
+        # Cek ketersediaan jadwal
+        today = QDate.currentDate().toString(Qt.ISODate)
+        available_schedules = self.booking_service.get_doctor_schedules(doctor_id, today, include_booked=False)
+        
+        status_text = "Tidak Ada Jadwal Hari Ini"
+        status_color = "red"
+        if available_schedules:
+            status_text = f"{len(available_schedules)} Jadwal Tersedia Hari Ini"
+            status_color = "green"
+        return f"<span style='color: {status_color}; font-weight: bold;'>{status_text}</span>"
+
     def open_booking_dialog(self, doctor_id, doctor_name, specialty):
         dialog = BookingDialog(self, doctor_id, doctor_name, specialty)
         dialog.booking_confirmed.connect(self.populate_booking_table) # Refresh table on booking
         dialog.booking_confirmed.connect(self.populate_doctor_cards) # Refresh cards on booking
-        dialog.exec_()
+        self.active_booking_dialog = dialog # Daftar jadwalnya ikut diperbarui jika meja lain mengisi slot
+        try:
+            dialog.exec_()
+        finally:
+            self.active_booking_dialog = None
 
     def populate_booking_table(self):
-        bookings = self.booking_service.get_all_bookings()
+        search_text = self.booking_search_input.text().strip()
+        if search_text:
+            bookings = self.booking_service.search_bookings(search_text, limit=200)
+        else:
+            bookings = self.booking_service.get_all_bookings(include_history=self.show_history_checkbox.isChecked())
         logging.info(f"Retrieved {len(bookings)} bookings.")
         self.booking_table.setRowCount(0) # Clear existing rows
         
@@ -433,36 +738,130 @@ class MainWindow(QMainWindow):
         ])
         self.booking_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.booking_table.horizontalHeader().setSectionResizeMode(8, QHeaderView.Fixed) # Kolom Aksi
-        self.booking_table.setColumnWidth(8, 100) # Lebar kolom Aksi
+        self.booking_table.setColumnWidth(8, 260) # Lebar kolom Aksi
         
         for row_num, booking in enumerate(bookings):
             self.booking_table.insertRow(row_num)
-            for col_num, data in enumerate(booking):
-                self.booking_table.setItem(row_num, col_num, QTableWidgetItem(str(data)))
-            
-            # Tambahkan tombol Hapus Booking di kolom terakhir (indeks 8)
-            delete_button = QPushButton("Hapus")
-            delete_button.setStyleSheet("background-color: #dc3545; color: white; border-radius: 4px; padding: 5px;")
-            delete_button.clicked.connect(lambda _, b_id=booking[0]: self.delete_booking(b_id))
-            self.booking_table.setCellWidget(row_num, 8, delete_button) # Masukkan tombol ke sel
+            self.fill_booking_row(row_num, booking)
             
-        logging.info(f"Loaded {len(bookings)} bookings into table with delete buttons.")
+        logging.info(f"Loaded {len(bookings)} bookings into table with action buttons.")
+
+    def fill_booking_row(self, row_num, booking):
+        for col_num, data in enumerate(booking):
+            self.booking_table.setItem(row_num, col_num, QTableWidgetItem(str(data)))
 
-    def delete_booking(self, booking_id):
-        # Konfirmasi penghapusan
-        reply = QMessageBox.question(self, 'Konfirmasi Hapus', 
-                                    f"Anda yakin ingin menghapus booking ID {booking_id}?",
+        # Tombol aksi hanya untuk booking aktif
+        if booking.status == "Confirmed":
+            self.booking_table.setCellWidget(row_num, 8, self.create_booking_actions(booking.booking_id))
+        else:
+            self.booking_table.removeCellWidget(row_num, 8)
+
+    def booking_table_rows(self):
+        """Teks ID booking -> nomor baris di tabel booking."""
+        return {self.booking_table.item(row, 0).text(): row for row in range(self.booking_table.rowCount())}
+
+    def booking_row_position(self, booking):
+        """Baris sisipan agar urutan tetap sama dengan get_all_bookings (tanggal dan jam terbaru dulu)."""
+        key = (booking.booking_date, booking.booking_time)
+        for row in range(self.booking_table.rowCount()):
+            if (self.booking_table.item(row, 5).text(), self.booking_table.item(row, 6).text()) < key:
+                return row
+        return self.booking_table.rowCount()
+
+    def patch_booking_table(self, bookings, removed_booking_ids):
+        """
+        Menerapkan booking yang berubah di meja lain tanpa memuat ulang seluruh tabel: baris diperbarui di tempat,
+        dipindah jika tanggal/jamnya berubah, disisipkan jika baru, atau dihapus jika tidak lolos filter riwayat.
+        """
+        rows = self.booking_table_rows()
+        if self.booking_search_input.text().strip() or any(str(b_id) in rows for b_id in removed_booking_ids):
+            # Hasil pencarian diurutkan relevansi, dan booking yang hilang bisa jadi hanya pindah ke arsip
+            self.populate_booking_table()
+            return
+        include_history = self.show_history_checkbox.isChecked()
+        for booking in bookings:
+            row = rows.get(str(booking.booking_id))
+            visible = include_history or booking.status == "Confirmed"
+            if (row is not None and visible and self.booking_table.item(row, 5).text() == booking.booking_date
+                    and self.booking_table.item(row, 6).text() == booking.booking_time):
+                self.fill_booking_row(row, booking)
+                continue
+            if row is not None:
+                self.booking_table.removeRow(row)
+            if visible:
+                row = self.booking_row_position(booking)
+                self.booking_table.insertRow(row)
+                self.fill_booking_row(row, booking)
+            rows = self.booking_table_rows()
+        logging.info(f"Patched booking table with {len(bookings)} changed bookings.")
+
+    def apply_external_changes(self, changes):
+        """Slot ChangeWatcher: memperbarui tabel booking, kartu dokter, dan dialog booking yang sedang terbuka."""
+        if changes.doctors_changed:
+            # Dokter/spesialisasi berubah (jarang): daftar filter dibangun ulang tanpa mengubah pilihan
+            selected_specialty = self.doctor_filter_combo.currentText()
+            self.doctor_filter_combo.blockSignals(True)
+            self.populate_doctor_comboboxes()
+            self.doctor_filter_combo.setCurrentIndex(max(0, self.doctor_filter_combo.findText(selected_specialty)))
+            self.doctor_filter_combo.blockSignals(False)
+        if not changes.complete or changes.doctors_changed:
+            self.populate_doctor_cards()
+            self.populate_booking_table()
+        else:
+            if changes.bookings or changes.removed_booking_ids:
+                self.patch_booking_table(changes.bookings, changes.removed_booking_ids)
+            for doctor_id in changes.doctor_ids:
+                status_label = self.doctor_status_labels.get(doctor_id)
+                if status_label is not None:
+                    status_label.setText(self.doctor_availability_html(doctor_id))
+        if changes.doctors_changed or not changes.complete:
+            self.local_answer_engine.invalidate() # Spesialisasi baru/terhapus ikut dikenali chatbot
+        if changes.bookings or not changes.complete:
+            self.patient_lookup.invalidate() # Pasien baru dari meja lain ikut muncul di saran
+        dialog = self.active_booking_dialog
+        if dialog is not None and (not changes.complete or dialog.doctor_id in changes.doctor_ids):
+            dialog.refresh_schedules()
+
+    def create_booking_actions(self, booking_id):
+        actions_widget = QWidget()
+        actions_layout = QHBoxLayout(actions_widget)
+        actions_layout.setContentsMargins(2, 2, 2, 2)
+        buttons = [
+            ("Batalkan", "#dc3545", self.cancel_booking),
+            ("Selesai", "#28a745", self.complete_booking),
+            ("Tidak Hadir", "#6c757d", self.mark_no_show),
+        ]
+        for text, color, handler in buttons:
+            button = QPushButton(text)
+            button.setStyleSheet(f"background-color: {color}; color: white; border-radius: 4px; padding: 5px;")
+            button.clicked.connect(lambda _, b_id=booking_id, h=handler: h(b_id))
+            actions_layout.addWidget(button)
+        return actions_widget
+
+    def cancel_booking(self, booking_id):
+        # Konfirmasi pembatalan
+        reply = QMessageBox.question(self, 'Konfirmasi Pembatalan', 
+                                    f"Anda yakin ingin membatalkan booking ID {booking_id}?",
                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            success, message = self.booking_service.delete_booking(booking_id)
-            if success:
-                QMessageBox.information(self, "Berhasil", message)
-                self.populate_booking_table() # Refresh table setelah penghapusan
-                self.populate_doctor_cards() # Refresh kartu dokter jika ketersediaan berubah
-            else:
-                QMessageBox.critical(self, "Gagal", message)
-        logging.info(f"Attempted to delete booking ID {booking_id}. Success: {success}, Message: {message}")
+            self.apply_booking_status_change(booking_id, self.booking_service.cancel_booking)
+
+    def complete_booking(self, booking_id):
+        self.apply_booking_status_change(booking_id, self.booking_service.complete_booking)
+
+    def mark_no_show(self, booking_id):
+        self.apply_booking_status_change(booking_id, self.booking_service.mark_no_show)
+
+    def apply_booking_status_change(self, booking_id, action):
+        success, message = action(booking_id)
+        if success:
+            QMessageBox.information(self, "Berhasil", message)
+            self.populate_booking_table() # Refresh table setelah perubahan status
+            self.populate_doctor_cards() # Refresh kartu dokter jika ketersediaan berubah
+        else:
+            QMessageBox.critical(self, "Gagal", message)
+        logging.info(f"Status change for booking ID {booking_id}. Success: {success}, Message: {message}")
 
 
     def show_doctors_view(self):
@@ -486,40 +885,18 @@ class MainWindow(QMainWindow):
         self.show_doctors_button.setStyleSheet("")
         self.show_bookings_button.setStyleSheet("")
         logging.info("Switched to Chatbot View.")
+        self.ensure_chatbot_initialized()
         
         # --- Pesan Pembuka Chatbot ---
         self.chatMessages.clear() 
         self.chatMessages.append("<p style='color: #0056b3; text-align: left;'><b>MediBot:</b> Hai! Saya MediBot, asisten virtual Klinik Awan. Apa yang bisa saya bantu hari ini?</p>")
         # --- AKHIR Pesan Pembuka Chatbot ---
 
-    def _cleanup_chatbot_thread(self):
-        logging.debug("Cleaning up chatbot thread references.")
-        # Slot ini dipanggil ketika sinyal finished dari self.chatbot_thread dipancarkan,
-        # menunjukkan bahwa thread telah selesai dieksekusi dan akan dihapus.
-        if self.chatbot_thread is not None:
-            # Putuskan koneksi sinyal untuk mencegah koneksi yang tertinggal (opsional tapi baik)
-            try:
-                self.chatbot_thread.started.disconnect(self.chatbot_worker.run)
-            except TypeError: # Tangani kasus di mana sudah terputus
-                pass
-
-            # Setel referensi ke None agar Python GC bisa membersihkan dan mencegah RuntimeError
-            self.chatbot_thread = None
-            self.chatbot_worker = None
-        logging.debug("Chatbot thread references set to None.")
-
-
     def send_message_to_chatbot(self, message):
         if not message.strip():
             logging.info("Chat message is empty, not sending.")
             return
 
-        # Periksa apakah ada thread yang sedang berjalan.
-        # Jika ada, dan belum selesai dibersihkan, abaikan pesan baru.
-        if self.chatbot_thread is not None and self.chatbot_thread.isRunning():
-            logging.warning("Chatbot thread is already running, ignoring new message.")
-            return
-
         user_message_html = f"<p style='color: #000080; text-align: right;'><b>Anda:</b> {message}</p>"
         self.chatMessages.append(user_message_html)
         self.chatInput.clear()
@@ -530,9 +907,32 @@ class MainWindow(QMainWindow):
         self.chatMessages.append("<p style='color: #808080; text-align: left;'><b>MediBot:</b> Mengetik...</p>")
         QApplication.processEvents() # Paksa UI untuk update
 
-        self.chatInput.setEnabled(False)
-        self.chatSendButton.setEnabled(False)
-        
+        # Pertanyaan terstruktur (daftar dokter, info klinik, dst.) dijawab langsung dari database
+        local_answer = self.local_answer_engine.answer(message)
+        if local_answer is not None:
+            self._remove_typing_indicator()
+            answer_html = local_answer.text.replace("\n", "<br>")
+            self.chatMessages.append(f"<p style='color: #0056b3; text-align: left;'><b>MediBot:</b> {answer_html}</p>")
+            # Jawaban lokal tetap masuk riwayat agar pertanyaan lanjutan ke Gemini punya konteksnya
+            turns = [{"role": "user", "parts": [message]}, {"role": "model", "parts": [local_answer.text]}]
+            self.chat_history.extend(turns)
+            if self.chat_scheduler is not None:
+                self.chat_scheduler.add_history(turns)
+            if self.chat_scheduler is not None and self.chat_scheduler.queue_depth():
+                self.chatMessages.append("<p style='color: #808080; text-align: left;'><b>MediBot:</b> Mengetik...</p>")
+            return
+
+        # Pesan tidak pernah diabaikan: masuk antrean, dan pesan susulan yang belum terkirim digabung
+        self.ensure_chatbot_initialized()
+        request_id = self.chat_scheduler.submit(message, self.chatbot_signals.on_result, self.chatbot_signals.on_error)
+        logging.info(f"Chat message queued as request {request_id}.")
+        self.update_chat_queue_label()
+
+    def build_chatbot_prompt(self, message):
+        """
+        Menyusun prompt lengkap (instruksi + data dari database) untuk Gemini.
+        Dipanggil dari thread ChatRequestScheduler tepat sebelum permintaan dikirim.
+        """
         # --- LOGIKA RAG DIMULAI DI SINI ---
         base_instruction = "Anda adalah asisten virtual untuk Klinik Awan. Jawab pertanyaan pengguna HANYA berdasarkan informasi yang saya berikan. Jika informasi tidak tersedia dalam data yang saya berikan, katakan 'Maaf, saya tidak memiliki informasi tersebut.' "
 
@@ -546,8 +946,8 @@ class MainWindow(QMainWindow):
             doctors = self.booking_service.get_all_doctors_with_specialty()
             if doctors:
                 context_data += "\nInformasi Dokter dari database:\n"
-                for doc_id, name, specialty in doctors:
-                    context_data += f"- Nama: {name}, Spesialisasi: {specialty}\n"
+                for doctor in doctors:
+                    context_data += f"- Nama: {doctor.name}, Spesialisasi: {doctor.specialty}\n"
                 # Instruksi langsung ke Gemini untuk menampilkan daftar dokter
                 full_prompt_for_gemini += "\nBerdasarkan informasi dokter di atas, berikan daftar dokter yang tersedia dalam format poin-poin yang jelas (misalnya: - Nama: dr. [Nama], Spesialisasi: [Spesialisasi])."
             else:
@@ -570,8 +970,8 @@ class MainWindow(QMainWindow):
                 doctors = self.booking_service.get_doctors_by_specialty(matched_specialty)
                 if doctors:
                     context_data += f"\nInformasi Dokter Spesialis {matched_specialty} dari database:\n"
-                    for doc_id, name, specialty in doctors:
-                        context_data += f"- Nama: {name}, Spesialisasi: {specialty}\n"
+                    for doctor in doctors:
+                        context_data += f"- Nama: {doctor.name}, Spesialisasi: {doctor.specialty}\n"
                     full_prompt_for_gemini += f"\nBerdasarkan informasi dokter di atas, jika pengguna memiliki keluhan terkait {matched_specialty.lower()}, rekomendasikan dokter yang cocok. Berikan nama dan spesialisasi dokter tersebut dalam format poin-poin yang jelas (misalnya: - Nama: dr. [Nama], Spesialisasi: [Spesialisasi]). Jika tidak ada dokter yang cocok, katakan maaf."
                 else:
                     context_data += f"\n\nInformasi Dokter Spesialis {matched_specialty} dari database: Saat ini tidak ditemukan dokter spesialis {matched_specialty} yang terdaftar."
@@ -579,23 +979,22 @@ class MainWindow(QMainWindow):
         
         # RAG Logic for Klinik Information
         elif any(keyword in message_lower for keyword in ["alamat klinik", "lokasi klinik", "info klinik", "kontak klinik", "nomor telepon klinik", "jam buka klinik", "klinik awan"]):
-            context_data += """
+            context_data += f"""
             Informasi Detail Klinik Awan:
-            Alamat: Jalan Merdeka No. 123, Semarang, Jawa Tengah.
-            Nomor Telepon: (024) 12345678
-            Jam Buka: Senin - Jumat, 08:00 - 20:00; Sabtu, 09:00 - 17:00; Minggu Tutup.
+            Alamat: {CLINIC_INFO['address']}
+            Nomor Telepon: {CLINIC_INFO['phone']}
+            Jam Buka: {CLINIC_INFO['hours']}
             """
             full_prompt_for_gemini += "\nBerdasarkan informasi di atas, berikan detail alamat, nomor telepon, dan jam buka Klinik Awan kepada pengguna."
         
         # RAG Logic for Chatbot Capabilities
         elif any(keyword in message_lower for keyword in ["bisa apa", "fungsi", "kemampuan", "fitur", "apa saja", "tentang kamu", "tentang chatbot", "kamu bisa apa"]):
-            context_data += """
+            capabilities = "\n            ".join(f"- {item}" for item in CAPABILITIES)
+            context_data += f"""
             Informasi tentang kemampuan Chatbot Asisten:
             Chatbot Asisten ini dirancang untuk membantu Anda dengan informasi terkait dokter di Klinik Awan.
             Kemampuan utamanya meliputi:
-            - Memberikan daftar semua dokter yang tersedia.
-            - Merekomendasikan dokter berdasarkan keluhan atau spesialisasi (misalnya, untuk sakit gigi, sakit kepala, demam, flu, batuk, pilek, atau terkait anak/bayi).
-            - Menjawab pertanyaan terkait informasi umum klinik seperti alamat, nomor telepon, dan jam buka.
+            {capabilities}
             Chatbot ini tidak dapat membuat booking atau mengubah jadwal secara langsung, tetapi dapat memandu Anda untuk menemukan informasi dokter.
             """
             full_prompt_for_gemini += "\nBerdasarkan informasi di atas, jelaskan kepada pengguna apa saja yang bisa Anda lakukan sebagai Chatbot Asisten Klinik Awan dalam format poin-poin yang mudah dimengerti."
@@ -606,24 +1005,7 @@ class MainWindow(QMainWindow):
         logging.info(f"Full prompt sent to Gemini: {full_prompt_for_gemini}")
         # --- LOGIKA RAG SELESAI ---
 
-        logging.info("Starting new chatbot worker thread.")
-        self.chatbot_worker = GeminiChatbotWorker(GEMINI_API_KEY, full_prompt_for_gemini, chat_history=self.chat_history)
-        self.chatbot_thread = QThread()
-        self.chatbot_worker.moveToThread(self.chatbot_thread)
-
-        self.chatbot_worker.response_received.connect(self.display_chatbot_response)
-        self.chatbot_worker.error_occurred.connect(self.display_chatbot_error)
-        self.chatbot_thread.started.connect(self.chatbot_worker.run)
-        
-        # Hubungkan sinyal finished untuk quit dan cleanup
-        self.chatbot_worker.finished.connect(self.chatbot_thread.quit)
-        self.chatbot_worker.finished.connect(self.chatbot_worker.deleteLater)
-        self.chatbot_thread.finished.connect(self.chatbot_thread.deleteLater)
-        
-        # Hubungkan ke metode cleanup kustom setelah semua panggilan deleteLater
-        self.chatbot_thread.finished.connect(self._cleanup_chatbot_thread) 
-
-        self.chatbot_thread.start()
+        return full_prompt_for_gemini
 
     def _remove_typing_indicator(self):
         cursor = self.chatMessages.textCursor()
@@ -639,8 +1021,19 @@ class MainWindow(QMainWindow):
             QApplication.processEvents()
 
 
-    def display_chatbot_response(self, response_text, updated_history):
-        logging.info("Displaying chatbot response and updating history.")
+    def update_chat_queue_label(self):
+        depth = self.chat_scheduler.queue_depth() if self.chat_scheduler else 0
+        self.chatQueueLabel.setText(f"Menunggu jawaban untuk {depth} permintaan..." if depth else "")
+
+    def _after_chatbot_reply(self):
+        # Masih ada pesan dalam antrean -> tampilkan lagi indikator "Mengetik..."
+        if self.chat_scheduler.queue_depth():
+            self.chatMessages.append("<p style='color: #808080; text-align: left;'><b>MediBot:</b> Mengetik...</p>")
+        self.update_chat_queue_label()
+        logging.debug(f"Chatbot scheduler metrics: {self.chat_scheduler.metrics()}")
+
+    def display_chatbot_response(self, request_id, response_text, updated_history):
+        logging.info(f"Displaying chatbot response for request {request_id} and updating history.")
         self._remove_typing_indicator()
 
         bot_message_html = f"<p style='color: #0056b3; text-align: left;'><b>MediBot:</b> {response_text}</p>"
@@ -648,24 +1041,42 @@ class MainWindow(QMainWindow):
 
         self.chat_history = updated_history
         logging.debug(f"Chat history updated. New size: {len(self.chat_history)}")
+        self._after_chatbot_reply()
 
-        self.chatInput.setEnabled(True)
-        self.chatSendButton.setEnabled(True)
-        self.chatInput.setFocus()
-
-    def display_chatbot_error(self, error_message):
-        logging.error(f"Displaying chatbot error: {error_message}")
+    def display_chatbot_error(self, request_id, error_message):
+        logging.error(f"Displaying chatbot error for request {request_id}: {error_message}")
         self._remove_typing_indicator()
 
         error_html = f"<p style='color: red; text-align: left;'><b>MediBot (Error):</b> {error_message}</p>"
         self.chatMessages.append(error_html)
-        self.chatInput.setEnabled(True)
-        self.chatSendButton.setEnabled(True)
-        self.chatInput.setFocus()
+        self._after_chatbot_reply()
+
+    def closeEvent(self, event):
+        if self.chat_scheduler is not None:
+            self.chat_scheduler.close(timeout=2)
+        if self.reminder_service is not None:
+            self.reminder_service.close(timeout=2)
+        if self.change_watcher is not None:
+            self.change_watcher.close(timeout=2)
+        if self.journal_service is not None:
+            self.journal_service.close(timeout=5) # Tulis semua event audit yang masih di antrean
+        super().closeEvent(event)
+
+
+def on_first_paint(app):
+    STARTUP_PROFILER.mark("first_paint")
+    STARTUP_PROFILER.report()
+    if EXIT_AFTER_PAINT_FLAG in sys.argv:
+        app.quit()
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    STARTUP_PROFILER.mark("qapplication")
     main_window = MainWindow()
+    STARTUP_PROFILER.mark("window_constructed")
     main_window.show()
+    if STARTUP_PROFILER.enabled:
+        # Timer 0 ms berjalan setelah event loop memproses paint pertama jendela
+        QTimer.singleShot(0, lambda: on_first_paint(app))
     sys.exit(app.exec_())
\ No newline at end of file
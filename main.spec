@@ -1,4 +1,21 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+
+# Default: build one-dir (folder dist/AplikasiDokter). Jauh lebih cepat dibuka karena EXE tidak perlu
+# mengekstrak seluruh isi (Qt + stack Gemini) ke folder temp setiap kali dijalankan.
+# Set KLINIK_ONEFILE=1 untuk tetap membuat satu file .exe seperti sebelumnya.
+ONEFILE = os.environ.get("KLINIK_ONEFILE") == "1"
+
+# Modul Qt/stdlib yang tidak dipakai aplikasi; dikeluarkan agar bundle lebih kecil dan cepat dimuat
+EXCLUDED_MODULES = [
+    'PyQt5.QtWebEngine', 'PyQt5.QtWebEngineCore', 'PyQt5.QtWebEngineWidgets', 'PyQt5.QtWebChannel',
+    'PyQt5.QtWebSockets', 'PyQt5.QtQml', 'PyQt5.QtQuick', 'PyQt5.QtQuickWidgets', 'PyQt5.QtMultimedia',
+    'PyQt5.QtMultimediaWidgets', 'PyQt5.QtBluetooth', 'PyQt5.QtNfc', 'PyQt5.QtPositioning',
+    'PyQt5.QtLocation', 'PyQt5.QtSensors', 'PyQt5.QtSerialPort', 'PyQt5.QtSql', 'PyQt5.QtTest',
+    'PyQt5.QtDesigner', 'PyQt5.QtHelp', 'PyQt5.QtOpenGL', 'PyQt5.Qt3DCore', 'PyQt5.QtSvg',
+    'PyQt5.QtXmlPatterns', 'PyQt5.QtDBus', 'PyQt5.QtNetwork',
+    'tkinter', 'matplotlib', 'numpy', 'pandas', 'IPython',
+]
 
 
 a = Analysis(
@@ -19,38 +36,57 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=EXCLUDED_MODULES,
     noarchive=False,
     optimize=0,
 )
 pyz = PYZ(a.pure)
 
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
-    [],
-    name='AplikasiDokter', # <-- Ganti nama file .exe akhir Anda di sini jika mau
-    debug=False,
-    bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
-    console=False, # <--- UBAH INI JADI TRUE UNTUK DEBUGGING (agar konsol tetap terbuka)
-    disable_windowed_traceback=False,
-    argv_emulation=False,
-    target_arch=None,
-    codesign_identity=None,
-    entitlements_file=None,
-)
-
-# coll = COLLECT(exe,
-#                a.binaries,
-#                a.zipfiles,
-#                a.datas,
-#                strip=False,
-#                upx=True,
-#                upx_exclude=[],
-#                name='AplikasiDokter') # <-- KOMENTARI SELURUH BAGIAN INI jika Anda ingin 1 file .exe saja
\ No newline at end of file
+if ONEFILE:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.datas,
+        [],
+        name='AplikasiDokter', # <-- Ganti nama file .exe akhir Anda di sini jika mau
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=True,
+        upx_exclude=[],
+        runtime_tmpdir=None,
+        console=False, # <--- UBAH INI JADI TRUE UNTUK DEBUGGING (agar konsol tetap terbuka)
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
+else:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        exclude_binaries=True,
+        name='AplikasiDokter',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False, # DLL hasil UPX harus didekompresi setiap kali dimuat; one-dir tanpa UPX lebih cepat start
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=False,
+        upx_exclude=[],
+        name='AplikasiDokter',
+    )
@@ -1,4 +1,6 @@
+import logging
 from PyQt5.QtWidgets import QLayout, QWidget
+from PyQt5.QtCore import QObject, pyqtSignal
 
 def clear_layout(layout):
     """
@@ -14,4 +16,29 @@ def clear_layout(layout):
             else:
                 sub_layout = item.layout()
                 if sub_layout is not None:
-                    clear_layout(sub_layout) # Rekursif untuk sub-layout
\ No newline at end of file
+                    clear_layout(sub_layout) # Rekursif untuk sub-layout
+
+
+class BackgroundTaskWorker(QObject):
+    """
+    Worker generik untuk menjalankan fungsi layanan yang lama (arsip, backup, dll.)
+    di QThread terpisah agar GUI tetap responsif.
+    """
+    result_ready = pyqtSignal(object)
+    error_occurred = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(self, task, *args, parent=None, **kwargs):
+        super().__init__(parent)
+        self._task = task
+        self._args = args
+        self._kwargs = kwargs
+
+    def run(self):
+        try:
+            self.result_ready.emit(self._task(*self._args, **self._kwargs))
+        except Exception as e:
+            logging.error(f"Background task {getattr(self._task, '__name__', self._task)} failed: {e}", exc_info=True)
+            self.error_occurred.emit(str(e))
+        finally:
+            self.finished.emit()
@@ -0,0 +1,262 @@
+"""
+Pengarsipan jadwal dan booking lama ke database arsip terpisah.
+
+Menjalankan arsip atau konversi auto_vacuum dari command line (konversi: di luar jam operasional):
+    python -m services.archive_service --db klinik_awan.db --archive-db klinik_awan_archive.db
+    python -m services.archive_service --db klinik_awan.db --enable-incremental-vacuum
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import ARCHIVE_SCHEMA, DatabaseManager
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Kolom yang disalin apa adanya dari tabel live ke tabel arsip
+SCHEDULE_COLUMNS = ("ScheduleID, DoctorID, Date, StartTime, EndTime, IsBooked, IsBlocked, "
+                    "SlotMinutes, SlotTotal, Occupancy")
+BOOKING_COLUMNS = ("BookingID, ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, Status, "
+                   "SlotIndex, SlotCount, CreatedAt, StatusUpdatedAt, PatientID")
+
+
+class ArchiveService:
+    """
+    Memindahkan jadwal dan booking yang lebih tua dari batas retensi ke database arsip
+    terpisah (lewat ATTACH). Pemindahan dilakukan per batch kecil dengan jeda di antara
+    batch agar transaksi tulis tidak menahan lock terlalu lama dan meja depan tetap bisa booking.
+
+    Database lama yang dibuat sebelum auto_vacuum diaktifkan belum bisa memakai incremental_vacuum.
+    Konversinya butuh VACUUM penuh yang mengunci seluruh file, jadi secara default tidak dilakukan
+    oleh run_archive: admin menjalankan enable_incremental_vacuum() (atau --enable-incremental-vacuum)
+    di luar jam operasional. convert_auto_vacuum=True membuat run pertama melakukannya sendiri.
+    """
+
+    def __init__(self, db_manager, retention_days=90, batch_size=500, pause_seconds=0.05, vacuum_pages=1000,
+                 convert_auto_vacuum=False):
+        self.db_manager = db_manager
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.vacuum_pages = vacuum_pages
+        self.convert_auto_vacuum = convert_auto_vacuum
+        self._warned_auto_vacuum = False
+
+    def _create_archive_tables(self, cursor):
+        """Membuat tabel arsip (tanpa foreign key, karena referensi lintas database tidak didukung)."""
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.Schedules (
+                ScheduleID INTEGER PRIMARY KEY,
+                DoctorID INTEGER NOT NULL,
+                Date TEXT NOT NULL,
+                StartTime TEXT NOT NULL,
+                EndTime TEXT NOT NULL,
+                IsBooked INTEGER DEFAULT 0,
+                IsBlocked INTEGER DEFAULT 0,
+                SlotMinutes INTEGER DEFAULT 0,
+                SlotTotal INTEGER DEFAULT 0,
+                Occupancy INTEGER DEFAULT 0
+            )
+        """)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.Bookings (
+                BookingID INTEGER PRIMARY KEY,
+                ScheduleID INTEGER NOT NULL,
+                DoctorID INTEGER NOT NULL,
+                PatientName TEXT NOT NULL,
+                PatientPhone TEXT,
+                BookingDate TEXT NOT NULL,
+                BookingTime TEXT NOT NULL,
+                Status TEXT,
+                SlotIndex INTEGER,
+                SlotCount INTEGER DEFAULT 1,
+                CreatedAt TEXT,
+                StatusUpdatedAt TEXT,
+                PatientID INTEGER
+            )
+        """)
+        # File arsip dari versi sebelumnya belum punya kolom-kolom yang ditambahkan belakangan
+        added_columns = {
+            "Bookings": [("CreatedAt", "TEXT"), ("StatusUpdatedAt", "TEXT"),
+                         ("SlotIndex", "INTEGER"), ("SlotCount", "INTEGER DEFAULT 1"), ("PatientID", "INTEGER")],
+            "Schedules": [("IsBlocked", "INTEGER DEFAULT 0"), ("SlotMinutes", "INTEGER DEFAULT 0"),
+                          ("SlotTotal", "INTEGER DEFAULT 0"), ("Occupancy", "INTEGER DEFAULT 0")],
+        }
+        for table, columns in added_columns.items():
+            cursor.execute(f"PRAGMA {ARCHIVE_SCHEMA}.table_info({table})")
+            existing = {row[1] for row in cursor.fetchall()}
+            for column, column_type in columns:
+                if column not in existing:
+                    cursor.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{table} ADD COLUMN {column} {column_type}")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_schedules_doctor_date ON Schedules (DoctorID, Date)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_bookings_date ON Bookings (BookingDate, BookingTime)")
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS ArchiveBatch (ID INTEGER PRIMARY KEY)")
+
+    def _move_batch(self, cursor, table, id_column, date_column, columns, cutoff, extra_condition=""):
+        """Memindahkan satu batch baris dari main.<table> ke archive.<table>. Mengembalikan jumlah baris."""
+        cursor.execute("DELETE FROM temp.ArchiveBatch")
+        cursor.execute(
+            f"INSERT INTO temp.ArchiveBatch (ID) SELECT {id_column} FROM main.{table} t "
+            f"WHERE t.{date_column} < ? {extra_condition} ORDER BY t.{date_column} LIMIT ?",
+            (cutoff, self.batch_size)
+        )
+        moved = cursor.rowcount
+        if moved <= 0:
+            return 0
+        cursor.execute(
+            f"INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.{table} ({columns}) "
+            f"SELECT {columns} FROM main.{table} WHERE {id_column} IN (SELECT ID FROM temp.ArchiveBatch)"
+        )
+        cursor.execute(f"DELETE FROM main.{table} WHERE {id_column} IN (SELECT ID FROM temp.ArchiveBatch)")
+        return moved
+
+    def _move_all(self, conn, table, id_column, date_column, columns, cutoff, extra_condition=""):
+        """Mengulang _move_batch sampai tidak ada lagi baris lama; setiap batch adalah transaksi tersendiri."""
+        cursor = conn.cursor()
+        total = 0
+        while True:
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                moved = self._move_batch(cursor, table, id_column, date_column, columns, cutoff, extra_condition)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            total += moved
+            if moved < self.batch_size:
+                return total
+            time.sleep(self.pause_seconds) # Beri kesempatan penulis lain mengambil lock
+
+    def run_archive(self, today=None):
+        """
+        Menjalankan satu siklus pengarsipan.
+        Mengembalikan dict statistik: cutoff, jumlah booking/jadwal yang dipindah, dan durasi.
+        """
+        today = today or datetime.now().date()
+        cutoff = (today - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        started = time.perf_counter()
+
+        conn = self.db_manager.get_connection()
+        # isolation_level=None: transaksi dikontrol manual per batch
+        conn.isolation_level = None
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (self.db_manager.archive_db_name,))
+            self._create_archive_tables(cursor)
+
+            # Booking dipindah lebih dulu agar ON DELETE CASCADE pada jadwal tidak menghapus booking live
+            bookings_moved = self._move_all(conn, "Bookings", "BookingID", "BookingDate", BOOKING_COLUMNS, cutoff)
+            schedules_moved = self._move_all(
+                conn, "Schedules", "ScheduleID", "Date", SCHEDULE_COLUMNS, cutoff,
+                extra_condition="AND NOT EXISTS (SELECT 1 FROM main.Bookings b WHERE b.ScheduleID = t.ScheduleID)"
+            )
+
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                INSERT INTO ArchiveState (ID, ArchivedBefore, LastRunAt) VALUES (1, ?, datetime('now'))
+                ON CONFLICT(ID) DO UPDATE SET
+                    ArchivedBefore = MAX(ArchivedBefore, excluded.ArchivedBefore),
+                    LastRunAt = excluded.LastRunAt
+            """, (cutoff,))
+            # Pengingat yang sudah selesai diproses untuk janji temu lama tidak perlu disimpan lagi
+            cursor.execute("DELETE FROM ReminderOutbox WHERE Status NOT IN ('Pending', 'Sending') AND DueAt < ?", (cutoff,))
+            reminders_pruned = cursor.rowcount
+            conn.commit()
+
+            vacuumed_pages, converted = self._incremental_vacuum(conn)
+            elapsed = time.perf_counter() - started
+            logging.info(
+                f"Archive run finished: cutoff={cutoff}, bookings={bookings_moved}, "
+                f"schedules={schedules_moved}, reminders_pruned={reminders_pruned}, "
+                f"vacuumed_pages={vacuumed_pages}, auto_vacuum_converted={converted}, elapsed={elapsed:.2f}s"
+            )
+            return {
+                "cutoff": cutoff,
+                "bookings_moved": bookings_moved,
+                "schedules_moved": schedules_moved,
+                "reminders_pruned": reminders_pruned,
+                "vacuumed_pages": vacuumed_pages,
+                "auto_vacuum_converted": converted,
+                "elapsed_seconds": elapsed,
+            }
+        except Exception as e:
+            logging.error(f"Error archiving data older than {cutoff}: {e}")
+            raise
+        finally:
+            conn.close()
+
+    def _incremental_vacuum(self, conn):
+        """
+        Mengembalikan sebagian halaman kosong ke sistem file tanpa VACUUM penuh.
+        Mengembalikan (jumlah halaman yang dilepas, True jika database baru saja dikonversi ke INCREMENTAL).
+        """
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA main.freelist_count")
+        free_before = cursor.fetchone()[0]
+        cursor.execute("PRAGMA main.auto_vacuum")
+        if cursor.fetchone()[0] != 2: # 2 = INCREMENTAL
+            if self.convert_auto_vacuum:
+                self._convert_to_incremental(conn)
+                return free_before, True
+            if not self._warned_auto_vacuum:
+                logging.warning("auto_vacuum is not INCREMENTAL on the live database; run "
+                                "'python -m services.archive_service --enable-incremental-vacuum' once, off-hours.")
+                self._warned_auto_vacuum = True
+            return 0, False
+        cursor.execute(f"PRAGMA main.incremental_vacuum({int(self.vacuum_pages)})")
+        cursor.fetchall()
+        cursor.execute("PRAGMA main.freelist_count")
+        return free_before - cursor.fetchone()[0], False
+
+    def _convert_to_incremental(self, conn):
+        """auto_vacuum pada file yang sudah ada baru berlaku setelah VACUUM penuh (menahan lock selama berjalan)."""
+        started = time.perf_counter()
+        conn.execute("PRAGMA main.auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM main")
+        logging.info(f"Live database converted to incremental auto_vacuum in {time.perf_counter() - started:.2f}s.")
+
+    def enable_incremental_vacuum(self):
+        """
+        Mengubah database lama (dibuat sebelum auto_vacuum diaktifkan) ke mode INCREMENTAL.
+        Membutuhkan satu kali VACUUM penuh, jadi jalankan di luar jam operasional.
+        Mengembalikan True jika database dikonversi, False jika sudah INCREMENTAL.
+        """
+        conn = self.db_manager.get_connection()
+        try:
+            conn.isolation_level = None
+            if conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] == 2:
+                logging.info("Live database already uses incremental auto_vacuum.")
+                return False
+            self._convert_to_incremental(conn)
+            return True
+        finally:
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pengarsipan data lama Klinik Awan")
+    parser.add_argument("--db", default="klinik_awan.db", help="Path file database SQLite")
+    parser.add_argument("--archive-db", default="klinik_awan_archive.db", help="Path file database arsip")
+    parser.add_argument("--retention-days", type=int, default=90)
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="Hanya ubah database lama ke auto_vacuum INCREMENTAL (VACUUM penuh, kunci seluruh file)")
+    args = parser.parse_args()
+
+    service = ArchiveService(DatabaseManager(args.db, archive_db_name=args.archive_db),
+                             retention_days=args.retention_days)
+    if args.enable_incremental_vacuum:
+        converted = service.enable_incremental_vacuum()
+        print("Database diubah ke auto_vacuum INCREMENTAL." if converted else "Database sudah INCREMENTAL.")
+        return
+    stats = service.run_archive()
+    print(f"Cutoff {stats['cutoff']}: {stats['bookings_moved']} booking, {stats['schedules_moved']} jadwal dipindah, "
+          f"{stats['vacuumed_pages']} halaman dilepas, {stats['elapsed_seconds']:.2f} detik")
+
+
+if __name__ == "__main__":
+    main()
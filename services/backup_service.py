@@ -0,0 +1,146 @@
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class _TooManyRestarts(Exception):
+    """Dipakai untuk menghentikan backup bertahap yang terus diulang karena sumber sering berubah."""
+
+
+class BackupService:
+    """
+    Backup online database klinik memakai sqlite3.Connection.backup.
+    Halaman database disalin bertahap (pages_per_step) dengan jeda di antara langkah sehingga
+    booking tetap bisa berjalan selama backup. Setiap snapshot diperiksa dengan PRAGMA integrity_check
+    sebelum disimpan, dan hanya `keep` snapshot terbaru yang dipertahankan.
+    Jika database terus berubah sehingga salinan bertahap dimulai ulang lebih dari max_restarts kali,
+    backup disalin dalam satu langkah hanya pada mode WAL; selain itu backup dilewati (skipped=True)
+    agar tidak mengunci meja depan, dan pemanggil menjadwalkan percobaan berikutnya.
+    """
+
+    def __init__(self, db_manager, backup_dir="backups", keep=7, pages_per_step=256, pause_seconds=0.01, max_restarts=3):
+        self.db_manager = db_manager
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.pages_per_step = pages_per_step
+        self.pause_seconds = pause_seconds
+        self.max_restarts = max_restarts
+
+    def _snapshot_prefix(self):
+        if self.db_manager.in_memory:
+            return "memory-" # ':memory:' bukan nama file yang valid di semua sistem
+        return os.path.splitext(os.path.basename(self.db_manager.db_name))[0] + "-"
+
+    def list_snapshots(self):
+        """Daftar path snapshot yang ada, dari yang terlama ke terbaru."""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        prefix = self._snapshot_prefix()
+        names = sorted(name for name in os.listdir(self.backup_dir) if name.startswith(prefix) and name.endswith(".db"))
+        return [os.path.join(self.backup_dir, name) for name in names]
+
+    def _copy(self, source, target, pages):
+        """Menyalin source ke target; mengembalikan jumlah restart yang terjadi karena source berubah."""
+        state = {"last_remaining": None, "restarts": 0}
+
+        def progress(status, remaining, total):
+            # Sisa halaman bertambah -> SQLite memulai ulang backup karena ada penulisan di source
+            if state["last_remaining"] is not None and remaining > state["last_remaining"]:
+                state["restarts"] += 1
+                if state["restarts"] > self.max_restarts:
+                    raise _TooManyRestarts()
+            state["last_remaining"] = remaining
+            if remaining and self.pause_seconds:
+                time.sleep(self.pause_seconds) # Jeda agar penulis lain bisa mengambil lock
+
+        source.backup(target, pages=pages, progress=progress)
+        return state["restarts"]
+
+    def run_backup(self):
+        """
+        Membuat satu snapshot baru. Mengembalikan dict berisi path, ukuran, durasi, throughput,
+        jumlah restart, hasil integrity check, dan jumlah snapshot lama yang dihapus; atau
+        {"path": None, "skipped": True, ...} jika backup dilewati karena database sedang sibuk.
+        """
+        os.makedirs(self.backup_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        final_path = os.path.join(self.backup_dir, f"{self._snapshot_prefix()}{timestamp}.db")
+        partial_path = final_path + ".partial"
+        started = time.perf_counter()
+
+        source = self.db_manager.get_connection()
+        target = sqlite3.connect(partial_path)
+        restarts = 0
+        try:
+            try:
+                restarts = self._copy(source, target, self.pages_per_step)
+            except _TooManyRestarts:
+                restarts = self.max_restarts + 1
+                journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0]
+                if journal_mode.lower() != "wal":
+                    # Tanpa WAL, salinan satu langkah menahan kunci baca selama seluruh salinan dan penulis
+                    # mendapat 'database is locked'; backup dilewati dan pemanggil mencoba lagi nanti.
+                    logging.warning(f"Backup restarted more than {self.max_restarts} times while the database is busy "
+                                    f"(journal_mode={journal_mode}); skipping this backup.")
+                    target.close()
+                    target = None
+                    os.remove(partial_path)
+                    return {"path": None, "skipped": True, "integrity": None, "restarts": restarts}
+                # Database terlalu sibuk untuk backup bertahap; dalam mode WAL salinan satu langkah
+                # membaca snapshot tanpa menahan penulis.
+                logging.warning(f"Backup restarted more than {self.max_restarts} times, falling back to a single-step copy.")
+                self._copy(source, target, -1)
+            copy_seconds = time.perf_counter() - started
+
+            integrity = target.execute("PRAGMA integrity_check").fetchone()[0]
+            target.close()
+            target = None
+            if integrity != "ok":
+                os.remove(partial_path)
+                logging.error(f"Backup snapshot failed integrity check: {integrity}")
+                return {"path": None, "integrity": integrity, "restarts": restarts}
+
+            os.replace(partial_path, final_path)
+            size_bytes = os.path.getsize(final_path)
+            removed = self._prune()
+            elapsed = time.perf_counter() - started
+            stats = {
+                "path": final_path,
+                "size_bytes": size_bytes,
+                "copy_seconds": copy_seconds,
+                "elapsed_seconds": elapsed,
+                "throughput_mb_s": size_bytes / (1024 * 1024) / copy_seconds if copy_seconds else 0.0,
+                "restarts": restarts,
+                "integrity": integrity,
+                "removed_snapshots": removed,
+            }
+            logging.info(
+                f"Backup written to {final_path}: {size_bytes / 1024:.0f} KiB in {copy_seconds:.2f}s "
+                f"({stats['throughput_mb_s']:.1f} MB/s), restarts={restarts}, removed={removed}"
+            )
+            return stats
+        except Exception as e:
+            logging.error(f"Error creating backup {final_path}: {e}")
+            if target is not None:
+                target.close()
+                target = None
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        finally:
+            if target is not None:
+                target.close()
+            source.close()
+
+    def _prune(self):
+        """Menghapus snapshot terlama sehingga yang tersisa paling banyak `keep`."""
+        snapshots = self.list_snapshots()
+        stale = snapshots[:-self.keep] if self.keep > 0 else []
+        for path in stale:
+            os.remove(path)
+            logging.info(f"Removed old backup snapshot {path}.")
+        return len(stale)
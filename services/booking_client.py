@@ -0,0 +1,138 @@
+import http.client
+import json
+import logging
+import socket
+import threading
+import uuid
+from urllib.parse import urlparse
+
+from services.booking_server import READ_METHODS, WRITE_METHODS
+from services.records import DoctorRecord, ScheduleRecord, BookingRecord, PatientRecord, ChangeSet
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+# Method yang hasilnya berupa record; JSON hanya membawa list, jadi record dibangun ulang di sisi client
+RECORD_RESULTS = {
+    "get_all_doctors_with_specialty": DoctorRecord,
+    "get_doctors_by_specialty": DoctorRecord,
+    "get_doctor_by_id": DoctorRecord,
+    "get_doctor_schedules": ScheduleRecord,
+    "get_available_schedules": ScheduleRecord,
+    "get_all_bookings": BookingRecord,
+    "search_bookings": BookingRecord,
+    "get_patient": PatientRecord,
+    "search_patients": PatientRecord,
+    "get_patient_bookings": BookingRecord,
+}
+# Method yang mengembalikan satu record (atau None), bukan list
+SINGLE_RECORD_RESULTS = {"get_doctor_by_id", "get_patient"}
+# Operasi massal yang mengembalikan (success, message, detail) alih-alih (success, message)
+BULK_WRITE_METHODS = {"add_bookings", "cancel_bookings", "block_schedules"}
+# Method baca yang mengembalikan None (bukan list kosong) jika gagal
+OPTIONAL_RESULTS = SINGLE_RECORD_RESULTS | {"get_change_sequence", "get_changes"}
+UNAVAILABLE_MESSAGE = "Server booking tidak dapat dihubungi. Periksa jaringan lalu coba lagi."
+
+
+def _decode_result(method_name, value):
+    """JSON tidak mengenal tuple/namedtuple; baris hasil query dikembalikan lagi ke bentuk aslinya."""
+    if method_name == "get_changes" and value is not None:
+        changes = ChangeSet._make(value)
+        return changes._replace(bookings=[BookingRecord._make(item) for item in changes.bookings])
+    record_type = RECORD_RESULTS.get(method_name)
+    if record_type and value is not None:
+        if method_name in SINGLE_RECORD_RESULTS:
+            return record_type._make(value)
+        return [record_type._make(item) for item in value]
+    if isinstance(value, list):
+        return [tuple(item) if isinstance(item, list) else item for item in value]
+    return value
+
+
+def _unavailable_result(method_name):
+    """Hasil pengganti saat server tidak terjangkau, dengan bentuk yang sama seperti kegagalan di BookingService."""
+    if method_name in BULK_WRITE_METHODS:
+        return False, UNAVAILABLE_MESSAGE, []
+    if method_name in WRITE_METHODS:
+        return False, UNAVAILABLE_MESSAGE
+    if method_name in OPTIONAL_RESULTS:
+        return None
+    return []
+
+
+class RemoteBookingService:
+    """
+    Adapter dengan antarmuka yang sama seperti BookingService, tetapi meneruskan setiap panggilan
+    ke BookingServer lewat HTTP. Dipakai MainWindow jika BOOKING_SERVER_URL diisi di config.py.
+    Setiap thread memakai koneksi HTTP keep-alive sendiri.
+    Operasi tulis dikirim dengan Idempotency-Key, sehingga aman dicoba ulang: jika request pertama
+    sudah diproses tetapi responsnya hilang, server mengembalikan hasil yang sama tanpa menulis lagi.
+    Jika server tidak terjangkau atau gagal (HTTP 5xx), hasilnya sama seperti kegagalan BookingService
+    ((False, pesan) untuk operasi tulis, [] atau None untuk operasi baca), bukan exception.
+    actor (default: hostname) dikirim sebagai X-Actor agar jurnal audit server mencatat meja ini.
+    """
+
+    def __init__(self, base_url, timeout=10, token=None, actor=None):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 8765
+        self.timeout = timeout
+        self.token = token
+        self.actor = actor or socket.gethostname()
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _call(self, method_name, *args, **kwargs):
+        body = json.dumps({"args": args, "kwargs": kwargs})
+        headers = {"Content-Type": "application/json", "X-Actor": self.actor}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if method_name in WRITE_METHODS:
+            headers["Idempotency-Key"] = uuid.uuid4().hex # Sama untuk percobaan ulang di bawah
+        # Satu kali coba ulang jika koneksi keep-alive sudah ditutup server
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request("POST", f"/rpc/{method_name}", body=body, headers=headers)
+                response = conn.getresponse()
+                payload = json.loads(response.read())
+                break
+            except (http.client.HTTPException, ConnectionError) as e:
+                conn.close()
+                self._local.conn = None
+                if attempt == 1:
+                    logging.error(f"Error calling booking server method {method_name}: {e}")
+                    return _unavailable_result(method_name)
+            except (OSError, ValueError) as e:
+                # Timeout/host tidak terjangkau (tidak dicoba ulang), atau respons bukan JSON
+                conn.close()
+                self._local.conn = None
+                logging.error(f"Error calling booking server method {method_name}: {e}")
+                return _unavailable_result(method_name)
+        if response.status == 401:
+            logging.error(f"Booking server rejected {method_name}: token missing or wrong (BOOKING_SERVER_TOKEN).")
+            return _unavailable_result(method_name)
+        if response.status >= 500:
+            logging.error(f"Booking server error ({response.status}) on {method_name}: {payload.get('error')}")
+            return _unavailable_result(method_name)
+        if response.status != 200:
+            # 4xx: method/argumen salah, yaitu bug di client, bukan gangguan jaringan
+            raise RuntimeError(f"Booking server error ({response.status}) on {method_name}: {payload.get('error')}")
+        return _decode_result(method_name, payload["result"])
+
+    def __getattr__(self, name):
+        if name in READ_METHODS or name in WRITE_METHODS:
+            return lambda *args, **kwargs: self._call(name, *args, **kwargs)
+        raise AttributeError(f"RemoteBookingService has no attribute '{name}'")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,353 @@
+"""
+Server booking lokal (mode headless) agar beberapa meja depan berbagi satu proses dan satu database.
+
+BookingService diekspos lewat JSON-over-HTTP sederhana:
+    POST /rpc/<nama_method>   body: {"args": [...], "kwargs": {...}}
+    GET  /health
+
+Semua operasi tulis dijalankan berurutan oleh satu thread penulis, sedangkan operasi baca
+berjalan paralel di thread pool sendiri (database di-set ke WAL agar pembaca tidak menunggu penulis).
+
+Data pasien (nama, nomor telepon) hanya dilayani untuk client yang mengirim token bersama
+(header "Authorization: Bearer <token>") jika server dijalankan dengan --token / BOOKING_SERVER_TOKEN.
+Tanpa token, server hanya boleh mendengarkan di localhost (default 127.0.0.1).
+
+Header X-Actor (nama meja client) dicatat sebagai actor di jurnal audit untuk operasi tulis;
+tanpa header itu, event dicatat atas nama server (--journal-actor atau hostname).
+
+Operasi tulis boleh membawa header Idempotency-Key: hasilnya disimpan sementara, sehingga client yang
+mengulang request (mis. respons hilang karena koneksi putus) menerima hasil yang sama tanpa menulis dua kali.
+
+Menjalankan server:
+    python -m services.booking_server --db klinik_awan.db --port 8765
+    BOOKING_SERVER_TOKEN=<rahasia> python -m services.booking_server --db klinik_awan.db --host 0.0.0.0
+"""
+import argparse
+import asyncio
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.booking_service import BookingService, DEFAULT_SLOT_MINUTES
+from services.archive_service import ArchiveService
+from services.backup_service import BackupService
+from services.reminder_service import ReminderService, FileReminderSender
+from services.journal_service import JournalService, acting_as
+from services.consistency_service import ConsistencyService
+from services.seed_snapshots import load_seed, SEED_SIZES
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Hanya method di daftar ini yang boleh dipanggil dari client
+READ_METHODS = {
+    "get_all_doctors_with_specialty",
+    "get_doctor_names",
+    "get_all_specialties",
+    "get_doctors_by_specialty",
+    "get_doctor_by_id",
+    "get_doctor_schedules",
+    "get_available_schedules",
+    "get_all_bookings",
+    "search_bookings",
+    "get_waitlist",
+    "get_patient",
+    "search_patients",
+    "get_patient_bookings",
+    "get_change_sequence",
+    "get_changes",
+}
+WRITE_METHODS = {
+    "add_booking",
+    "cancel_booking",
+    "complete_booking",
+    "mark_no_show",
+    "delete_booking",
+    "add_bookings",
+    "cancel_bookings",
+    "block_schedules",
+    "add_to_waitlist",
+    "remove_from_waitlist",
+}
+
+MAX_BODY_BYTES = 1024 * 1024
+LOOPBACK_HOSTS = {"localhost"}
+MAX_ACTOR_LENGTH = 100
+# Jumlah hasil operasi tulis terakhir yang diingat per Idempotency-Key
+IDEMPOTENCY_CACHE_SIZE = 2048
+
+
+class BookingServer:
+    def __init__(self, db_manager, host="127.0.0.1", port=8765, reader_threads=4, archive_interval_hours=24,
+                 backup_dir=None, backup_interval_hours=6, reminder_outbox_file=None, audit_interval_hours=None,
+                 audit_repair=False, journal_actor=None, journal_enabled=True, token=None,
+                 archive_convert_auto_vacuum=False, slot_minutes=DEFAULT_SLOT_MINUTES):
+        self.db_manager = db_manager
+        self.token = token
+        self.slot_minutes = slot_minutes
+        self.journal_service = JournalService(db_manager, actor=journal_actor) if journal_enabled else None
+        self.booking_service = BookingService(db_manager, journal=self.journal_service)
+        self.archive_service = (ArchiveService(db_manager, convert_auto_vacuum=archive_convert_auto_vacuum)
+                                if db_manager.archive_db_name else None)
+        self.archive_interval_hours = archive_interval_hours
+        self.backup_service = BackupService(db_manager, backup_dir=backup_dir) if backup_dir else None
+        self.backup_interval_hours = backup_interval_hours
+        self.consistency_service = ConsistencyService(db_manager) if audit_interval_hours else None
+        self.audit_interval_hours = audit_interval_hours
+        self.audit_repair = audit_repair
+        self.reminder_service = (ReminderService(db_manager, FileReminderSender(reminder_outbox_file))
+                                 if reminder_outbox_file else None)
+        self.host = host
+        self.port = port
+        self._writer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="booking-writer")
+        self._reader_pool = ThreadPoolExecutor(max_workers=reader_threads, thread_name_prefix="booking-reader")
+        self._server = None
+        self._maintenance_tasks = []
+        self._idempotent_results = OrderedDict() # Idempotency-Key -> future hasil operasi tulis
+
+    def prepare_database(self):
+        """
+        Membuat tabel, mengisi data awal, mengubah shift lama tanpa slot menjadi slot slot_minutes menit
+        (jika slot_minutes diisi; hanya sekali per database, lihat convert_schedules_to_slots), dan
+        mengaktifkan WAL agar pembaca berjalan paralel.
+        """
+        self.db_manager.create_tables()
+        if not self.booking_service.get_all_doctors_with_specialty():
+            self.booking_service.insert_initial_data()
+        if self.slot_minutes:
+            self.booking_service.convert_schedules_to_slots(self.slot_minutes, once=True)
+        conn = self.db_manager.get_connection()
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+        finally:
+            conn.close()
+
+    async def _dispatch(self, method_name, args, kwargs, idempotency_key=None, actor=None):
+        if method_name in WRITE_METHODS:
+            pool = self._writer_pool
+        elif method_name in READ_METHODS:
+            pool = self._reader_pool
+        else:
+            return 404, {"error": f"Unknown method '{method_name}'"}
+        method = getattr(self.booking_service, method_name)
+        actor = (actor or "").strip()[:MAX_ACTOR_LENGTH] or None
+
+        def call():
+            if actor is None:
+                return method(*args, **kwargs)
+            # Event jurnal dari operasi ini dicatat atas nama meja yang meminta
+            with acting_as(actor):
+                return method(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        if not idempotency_key or pool is not self._writer_pool:
+            result = await loop.run_in_executor(pool, call)
+            return 200, {"result": result}
+
+        cache_key = (method_name, idempotency_key)
+        future = self._idempotent_results.get(cache_key)
+        if future is None:
+            future = loop.run_in_executor(pool, call)
+            self._idempotent_results[cache_key] = future
+            while len(self._idempotent_results) > IDEMPOTENCY_CACHE_SIZE:
+                self._idempotent_results.popitem(last=False)
+        else:
+            # Request ulang: menunggu/mengembalikan hasil eksekusi pertama (bisa masih berjalan)
+            logging.info(f"Replaying result of {method_name} for idempotency key {idempotency_key}.")
+        result = await asyncio.shield(future)
+        return 200, {"result": result}
+
+    def _authorized(self, headers):
+        if not self.token:
+            return True
+        scheme, _, supplied = headers.get("authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(supplied.strip().encode(), self.token.encode())
+
+    async def _handle_request(self, request_line, body, headers=None):
+        try:
+            http_method, path, _ = request_line.split(" ", 2)
+        except ValueError:
+            return 400, {"error": "Malformed request line"}
+
+        if http_method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if http_method != "POST" or not path.startswith("/rpc/"):
+            return 404, {"error": f"No route for {http_method} {path}"}
+        if not self._authorized(headers or {}):
+            return 401, {"error": "Missing or invalid token"}
+
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            return 400, {"error": f"Invalid JSON body: {e}"}
+        headers = headers or {}
+        return await self._dispatch(path[len("/rpc/"):], payload.get("args", []), payload.get("kwargs", {}),
+                                    idempotency_key=headers.get("idempotency-key"), actor=headers.get("x-actor"))
+
+    async def _handle_connection(self, reader, writer):
+        """Melayani satu koneksi; koneksi dipakai ulang (keep-alive) sampai client menutupnya."""
+        try:
+            while True:
+                try:
+                    header_block = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionResetError):
+                    return
+                lines = header_block.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    status, response = 413, {"error": "Request body too large"}
+                    body = b""
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    try:
+                        status, response = await self._handle_request(lines[0], body, headers)
+                    except Exception as e:
+                        logging.error(f"Error handling request '{lines[0]}': {e}", exc_info=True)
+                        status, response = 500, {"error": str(e)}
+
+                data = json.dumps(response).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1] # port=0 -> port acak dari OS
+        logging.info(f"Booking server listening on http://{self.host}:{self.port}")
+
+    async def _run_periodically(self, name, task, interval_hours, executor=None):
+        """
+        Menjalankan tugas pemeliharaan setiap interval_hours. Tugas yang menulis ke database booking
+        (arsip, audit dengan repair) diberi executor=self._writer_pool agar tetap satu penulis dan
+        tidak berebut lock dengan operasi tulis client; tugas baca saja (backup, audit tanpa repair)
+        berjalan di executor default sehingga antrean penulis tidak tertahan.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(executor, task)
+            except Exception as e:
+                logging.error(f"Scheduled {name} run failed: {e}")
+            await asyncio.sleep(interval_hours * 60 * 60)
+
+    async def serve_forever(self):
+        await self.start()
+        if self.journal_service:
+            self.journal_service.start()
+        if self.reminder_service:
+            self.reminder_service.start()
+        if self.archive_service:
+            self._maintenance_tasks.append(asyncio.create_task(
+                self._run_periodically("archive", self.archive_service.run_archive, self.archive_interval_hours,
+                                       executor=self._writer_pool)))
+        if self.backup_service:
+            self._maintenance_tasks.append(asyncio.create_task(
+                self._run_periodically("backup", self.backup_service.run_backup, self.backup_interval_hours)))
+        if self.consistency_service:
+            audit = lambda: self.consistency_service.run_incremental(repair=self.audit_repair)
+            self._maintenance_tasks.append(asyncio.create_task(
+                self._run_periodically("audit", audit, self.audit_interval_hours,
+                                       executor=self._writer_pool if self.audit_repair else None)))
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server:
+            self._server.close()
+        if self.reminder_service:
+            self.reminder_service.close(timeout=5)
+        self._writer_pool.shutdown(wait=True)
+        self._reader_pool.shutdown(wait=True)
+        if self.journal_service:
+            # Setelah thread penulis booking berhenti, jadi tidak ada event baru yang tertinggal
+            self.journal_service.close(timeout=10)
+
+
+def is_loopback(host):
+    if host in LOOPBACK_HOSTS:
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server booking lokal Klinik Awan")
+    parser.add_argument("--db", default="klinik_awan.db", help="Path file database SQLite, atau :memory: untuk demo")
+    parser.add_argument("--seed-snapshot", choices=sorted(SEED_SIZES), default=None,
+                        help="Isi database :memory: dari snapshot seed (untuk demo dan uji beban)")
+    parser.add_argument("--archive-db", default=None, help="Path file database arsip (opsional)")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Alamat yang didengarkan; selain localhost wajib memakai --token")
+    parser.add_argument("--token", default=os.environ.get("BOOKING_SERVER_TOKEN"),
+                        help="Token bersama yang wajib dikirim client (default: env BOOKING_SERVER_TOKEN)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--readers", type=int, default=4, help="Jumlah thread pembaca")
+    parser.add_argument("--archive-interval-hours", type=float, default=24)
+    parser.add_argument("--slot-minutes", type=int, default=DEFAULT_SLOT_MINUTES,
+                        help="Ubah shift lama tanpa slot (mulai hari ini) menjadi slot N menit pada start pertama; 0 = biarkan")
+    parser.add_argument("--convert-auto-vacuum", action="store_true",
+                        help="Ubah database lama ke auto_vacuum INCREMENTAL (VACUUM penuh, mengunci file) pada arsip "
+                             "pertama; sebaiknya pakai python -m services.archive_service --enable-incremental-vacuum")
+    parser.add_argument("--backup-dir", default=None, help="Folder snapshot backup (opsional)")
+    parser.add_argument("--backup-interval-hours", type=float, default=6)
+    parser.add_argument("--reminder-outbox-file", default=None,
+                        help="File JSON lines tujuan pengingat janji temu (opsional; mengaktifkan pengingat)")
+    parser.add_argument("--audit-interval-hours", type=float, default=None,
+                        help="Interval audit konsistensi jadwal (opsional)")
+    parser.add_argument("--audit-repair", action="store_true", help="Perbaiki otomatis IsBooked/Occupancy saat audit")
+    parser.add_argument("--journal-actor", default=None, help="Nama yang dicatat di jurnal audit (default: hostname)")
+    parser.add_argument("--no-journal", action="store_true", help="Nonaktifkan jurnal audit booking")
+    args = parser.parse_args()
+    if not args.token and not is_loopback(args.host):
+        parser.error(f"--host {args.host} membuka data pasien ke jaringan; set --token atau BOOKING_SERVER_TOKEN")
+
+    db_manager = DatabaseManager(args.db, archive_db_name=args.archive_db)
+    if args.seed_snapshot:
+        if not db_manager.in_memory:
+            parser.error("--seed-snapshot hanya bisa dipakai dengan --db :memory:")
+        load_seed(db_manager, args.seed_snapshot)
+    server = BookingServer(db_manager,
+                           host=args.host, port=args.port, reader_threads=args.readers,
+                           archive_interval_hours=args.archive_interval_hours,
+                           archive_convert_auto_vacuum=args.convert_auto_vacuum,
+                           slot_minutes=args.slot_minutes,
+                           backup_dir=args.backup_dir, backup_interval_hours=args.backup_interval_hours,
+                           reminder_outbox_file=args.reminder_outbox_file,
+                           audit_interval_hours=args.audit_interval_hours, audit_repair=args.audit_repair,
+                           journal_actor=args.journal_actor, journal_enabled=not args.no_journal,
+                           token=args.token)
+    server.prepare_database()
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        logging.info("Booking server stopped.")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
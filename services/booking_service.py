@@ -1,12 +1,113 @@
 import logging
-from PyQt5.QtCore import QDate # Asumsi QDate digunakan untuk tanggal dalam main.py
+import re
 from datetime import datetime, timedelta # Import datetime dan timedelta untuk perhitungan tanggal
 
+from database import phone_key, phone_prefix_key
+from services.records import ROW_FACTORIES, row_id, DoctorRecord, ScheduleRecord, BookingRecord, PatientRecord, ChangeSet
+from services.journal_service import (JOURNAL_BOOKING_COLUMNS, EVENT_BOOKED, EVENT_WAITLIST_ASSIGNED,
+                                      EVENT_WAITLISTED)
+
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Siklus hidup booking: hanya 'Confirmed' yang aktif, status lain adalah riwayat
+STATUS_CONFIRMED = "Confirmed"
+STATUS_CANCELLED = "Cancelled"
+STATUS_COMPLETED = "Completed"
+STATUS_NO_SHOW = "NoShow"
+
+SEARCH_IGNORED_TITLES = {"dr", "drg"}
+
+# Jumlah saran pasien default untuk autocomplete
+PATIENT_SUGGESTION_LIMIT = 10
+
+# Batas perubahan per get_changes; lebih dari ini lebih murah memuat ulang tampilan penuh
+CHANGE_BATCH_LIMIT = 500
+
+# Shift dibagi menjadi slot janji temu; bitmap Occupancy disimpan di INTEGER SQLite (64-bit bertanda)
+DEFAULT_SLOT_MINUTES = 15
+MAX_SLOTS_PER_SHIFT = 62
+# Nama migrasi shift lama -> slot di SchemaMigrations (convert_schedules_to_slots(once=True))
+SLOT_MIGRATION = "schedule_slots"
+
+# Jadwal per shift/slot. Shift tanpa slot dikembalikan apa adanya (SlotIndex NULL); shift yang dibagi slot
+# diturunkan menjadi satu baris per slot dari bitmap Occupancy, tanpa tabel per-slot.
+SCHEDULE_SLOTS_SQL = """
+    WITH RECURSIVE shifts AS (
+        SELECT ScheduleID, DoctorID, Date, StartTime, EndTime, IsBooked, IsBlocked, SlotMinutes, SlotTotal, Occupancy
+        FROM {table} WHERE {where}
+    ),
+    slot_numbers(SlotIndex) AS (
+        SELECT 0 UNION ALL
+        SELECT SlotIndex + 1 FROM slot_numbers WHERE SlotIndex + 1 < (SELECT MAX(SlotTotal) FROM shifts)
+    )
+    SELECT ScheduleID, DoctorID, Date, StartTime, EndTime, IsBooked, NULL AS SlotIndex
+    FROM shifts WHERE SlotMinutes = 0{shift_filter}
+    UNION ALL
+    SELECT s.ScheduleID, s.DoctorID, s.Date,
+           strftime('%H:%M', s.StartTime, '+' || (n.SlotIndex * s.SlotMinutes) || ' minutes'),
+           strftime('%H:%M', s.StartTime, '+' || ((n.SlotIndex + 1) * s.SlotMinutes) || ' minutes'),
+           (s.Occupancy >> n.SlotIndex) & 1,
+           n.SlotIndex
+    FROM shifts s JOIN slot_numbers n ON n.SlotIndex < s.SlotTotal
+    WHERE s.SlotMinutes > 0{slot_filter}
+    ORDER BY 4, 2
+"""
+
+def _schedule_slots_query(table, where, include_booked):
+    return SCHEDULE_SLOTS_SQL.format(
+        table=table,
+        where=where,
+        shift_filter="" if include_booked else " AND IsBooked = 0 AND IsBlocked = 0",
+        slot_filter="" if include_booked else " AND s.IsBlocked = 0 AND ((s.Occupancy >> n.SlotIndex) & 1) = 0",
+    )
+
+def _now_str():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def _minutes(hhmm):
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+def _slot_time(start_time, slot_minutes, slot_index):
+    """Jam mulai slot ke-slot_index dalam shift yang dimulai start_time (format HH:MM)."""
+    total = _minutes(start_time) + slot_index * slot_minutes
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+def _slot_mask(slot_index, slot_count):
+    return ((1 << slot_count) - 1) << slot_index
+
 class BookingService:
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, row_factory="record", journal=None, raise_errors=False):
+        """
+        row_factory menentukan bentuk baris hasil query dokter/jadwal/booking:
+        'record' (namedtuple ringkas, default), 'tuple' (tuple sqlite3 biasa), atau 'dict'.
+        MainWindow dan RemoteBookingService membaca field record (booking.status), jadi aplikasi selalu
+        memakai 'record'; 'tuple'/'dict' untuk skrip dan ekspor.
+        journal (opsional, JournalService) menerima event audit setiap perubahan booking setelah commit.
+        raise_errors=True membuat query direktori dokter, jadwal tersedia dan daftar/pencarian booking
+        meneruskan error database setelah dicatat di log, alih-alih mengembalikan list kosong; dipakai
+        FederatedBookingService agar cabang yang rusak tidak terlihat seperti cabang tanpa data.
+        """
         self.db_manager = db_manager
+        self.journal = journal
+        self.raise_errors = raise_errors
+        if row_factory not in ROW_FACTORIES:
+            raise ValueError(f"Unknown row_factory '{row_factory}', expected one of {sorted(ROW_FACTORIES)}")
+        self._make_row_factory = ROW_FACTORIES[row_factory]
+        self._row_factories = {}
+
+    def _row_factory(self, record_type):
+        """Row factory sqlite3 untuk record_type sesuai konfigurasi (di-cache per tipe)."""
+        if record_type not in self._row_factories:
+            self._row_factories[record_type] = self._make_row_factory(record_type)
+        return self._row_factories[record_type]
+
+    def _record_journal(self, events):
+        """Meneruskan event (event, rows, details) ke jurnal audit; dipanggil setelah commit berhasil."""
+        if self.journal is None:
+            return
+        for event, rows, details in events:
+            self.journal.record_many(event, rows, details)
 
     def insert_initial_data(self):
         """Menyisipkan data dokter dan jadwal awal jika database kosong."""
@@ -56,14 +157,18 @@ class BookingService:
                     # Tambahkan jadwal untuk setiap dokter pada tanggal ini
                     for doc_id, doc_name in doctors:
                         if doc_name in ("dr. Budi Santoso", "dr. Surya Perkasa"): # Dokter Umum
-                            schedules_data.append((doc_id, schedule_date_str, "09:00", "12:00", 0))
-                            schedules_data.append((doc_id, schedule_date_str, "14:00", "17:00", 0))
+                            shifts = [("09:00", "12:00"), ("14:00", "17:00")]
                         elif doc_name in ("drg. Citra Dewi", "drg. Dewi Lestari"): # Dokter Gigi
-                            schedules_data.append((doc_id, schedule_date_str, "10:00", "13:00", 0))
-                            schedules_data.append((doc_id, schedule_date_str, "15:00", "18:00", 0))
+                            shifts = [("10:00", "13:00"), ("15:00", "18:00")]
                         elif doc_name == "dr. Ana Maria": # Dokter Anak
-                            schedules_data.append((doc_id, schedule_date_str, "08:30", "11:30", 0))
-                            schedules_data.append((doc_id, schedule_date_str, "13:30", "16:30", 0))
+                            shifts = [("08:30", "11:30"), ("13:30", "16:30")]
+                        else:
+                            shifts = []
+                        # Satu baris per shift; janji temu DEFAULT_SLOT_MINUTES menit dicatat di bitmap Occupancy
+                        for start_time, end_time in shifts:
+                            slot_total = (_minutes(end_time) - _minutes(start_time)) // DEFAULT_SLOT_MINUTES
+                            schedules_data.append((doc_id, schedule_date_str, start_time, end_time, 0,
+                                                   DEFAULT_SLOT_MINUTES, slot_total))
                     
                     # Maju ke hari berikutnya
                     current_date += timedelta(days=1)
@@ -71,7 +176,7 @@ class BookingService:
                 # --- END PERUBAHAN PENTING DI SINI ---
 
                 logging.info(f"Inserting {len(schedules_data)} initial schedule entries...")
-                cursor.executemany("INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked) VALUES (?, ?, ?, ?, ?)", schedules_data)
+                cursor.executemany("INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked, SlotMinutes, SlotTotal) VALUES (?, ?, ?, ?, ?, ?, ?)", schedules_data)
                 conn.commit()
                 logging.info("Initial schedule data inserted.")
             else:
@@ -86,12 +191,15 @@ class BookingService:
         """Mengambil semua dokter beserta spesialisasinya."""
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = self._row_factory(DoctorRecord)
         try:
             cursor.execute("SELECT DoctorID, Name, Specialty FROM Doctors")
             doctors = cursor.fetchall()
             return doctors
         except Exception as e:
             logging.error(f"Error getting all doctors with specialty: {e}")
+            if self.raise_errors:
+                raise
             return []
         finally:
             conn.close()
@@ -128,51 +236,60 @@ class BookingService:
         """Mengambil daftar dokter berdasarkan spesialisasi tertentu."""
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = self._row_factory(DoctorRecord)
         try:
             cursor.execute("SELECT DoctorID, Name, Specialty FROM Doctors WHERE Specialty = ?", (specialty_name,))
             doctors = cursor.fetchall()
             return doctors
         except Exception as e:
             logging.error(f"Error getting doctors by specialty '{specialty_name}': {e}")
+            if self.raise_errors:
+                raise
             return []
         finally:
             conn.close()
             
     def get_doctor_by_id(self, doctor_id):
-        """Mengambil data dokter berdasarkan ID."""
+        """Mengambil data dokter berdasarkan ID (record sesuai row_factory, atau None)."""
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = self._row_factory(DoctorRecord)
         try:
             cursor.execute("SELECT DoctorID, Name, Specialty FROM Doctors WHERE DoctorID = ?", (doctor_id,))
-            doctor = cursor.fetchone()
-            if doctor:
-                return {"id": doctor[0], "name": doctor[1], "specialty": doctor[2]}
-            return None
+            return cursor.fetchone()
         except Exception as e:
             logging.error(f"Error getting doctor by ID {doctor_id}: {e}")
             return None
         finally:
             conn.close()
 
+    def _get_archive_boundary(self, cursor):
+        """
+        Mengembalikan tanggal batas arsip (data sebelum tanggal ini ada di database arsip),
+        atau None jika belum pernah ada data yang diarsipkan / arsip tidak tersedia.
+        """
+        if not self.db_manager.has_archive():
+            return None
+        cursor.execute("SELECT ArchivedBefore FROM ArchiveState WHERE ID = 1")
+        row = cursor.fetchone()
+        return row[0] if row else None
+
     def get_doctor_schedules(self, doctor_id, date, include_booked=False): # Ubah default include_booked menjadi False
         """
-        Mengambil jadwal dokter untuk tanggal tertentu.
-        Jika include_booked=False, hanya jadwal yang belum terisi akan dikembalikan.
+        Mengambil jadwal dokter untuk tanggal tertentu (lihat SCHEDULE_SLOTS_SQL).
+        Jika include_booked=False, hanya jadwal/slot yang belum terisi akan dikembalikan.
+        Tanggal yang sudah diarsipkan dibaca dari database arsip.
         """
-        conn = self.db_manager.get_connection()
+        conn = self.db_manager.get_connection(attach_archive=True)
         cursor = conn.cursor()
         try:
-            query = "SELECT ScheduleID, DoctorID, Date, StartTime, EndTime, IsBooked FROM Schedules WHERE DoctorID = ? AND Date = ?"
-            params = (doctor_id, date)
-            
-            if not include_booked:
-                query += " AND IsBooked = 0"
-            
-            query += " ORDER BY StartTime"
-            
-            cursor.execute(query, params)
+            archived_before = self._get_archive_boundary(cursor)
+            table = "archive.Schedules" if archived_before and date < archived_before else "Schedules"
+            query = _schedule_slots_query(table, "DoctorID = ? AND Date = ?", include_booked)
+            cursor.row_factory = self._row_factory(ScheduleRecord)
+            cursor.execute(query, (doctor_id, date))
             schedules = cursor.fetchall()
-            logging.debug(f"Schedules found for doctor {doctor_id} on {date}: {schedules}")
+            logging.debug(f"Schedules found for doctor {doctor_id} on {date}: {len(schedules)} rows")
             return schedules
         except Exception as e:
             logging.error(f"Error getting doctor schedules for doctor {doctor_id} on {date}: {e}")
@@ -180,28 +297,255 @@ class BookingService:
         finally:
             conn.close()
 
-    def add_booking(self, schedule_id, doctor_id, patient_name, patient_phone, booking_date, waktu_booking):
-        """Menambahkan booking baru dan memperbarui status jadwal."""
+    def get_available_schedules(self, date, specialty=None, include_booked=False, limit=None):
+        """
+        Mengambil jadwal/slot semua dokter (opsional satu spesialisasi) pada tanggal tertentu dengan satu query,
+        diurutkan jam mulai lalu DoctorID. limit membatasi jumlah slot paling awal yang diambil.
+        """
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
         try:
-            # Periksa apakah jadwal sudah terisi
-            cursor.execute("SELECT IsBooked FROM Schedules WHERE ScheduleID = ?", (schedule_id,))
-            is_booked = cursor.fetchone()
-            if is_booked and is_booked[0] == 1:
-                return False, "Jadwal ini sudah terisi. Mohon pilih jadwal lain."
+            where = "Date = ?"
+            params = [date]
+            if specialty:
+                where += " AND DoctorID IN (SELECT DoctorID FROM Doctors WHERE Specialty = ?)"
+                params.append(specialty)
+            cursor.row_factory = self._row_factory(ScheduleRecord)
+            query = _schedule_slots_query("Schedules", where, include_booked)
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        except Exception as e:
+            logging.error(f"Error getting available schedules on {date}: {e}")
+            if self.raise_errors:
+                raise
+            return []
+        finally:
+            conn.close()
 
-            # Tambahkan booking
+    def add_shift(self, doctor_id, date, start_time, end_time, slot_minutes=DEFAULT_SLOT_MINUTES):
+        """
+        Menambahkan satu shift praktik dokter. slot_minutes > 0 membagi shift menjadi slot janji temu
+        (dicatat di bitmap Occupancy); slot_minutes=0 berarti satu booking untuk seluruh shift.
+        """
+        duration = _minutes(end_time) - _minutes(start_time)
+        if duration <= 0:
+            return False, "Jam selesai harus setelah jam mulai."
+        slot_total = 0
+        if slot_minutes:
+            if duration % slot_minutes:
+                return False, f"Durasi shift harus kelipatan {slot_minutes} menit."
+            slot_total = duration // slot_minutes
+            if slot_total > MAX_SLOTS_PER_SHIFT:
+                return False, f"Satu shift maksimal {MAX_SLOTS_PER_SHIFT} slot."
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        try:
             cursor.execute(
-                "INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, Status) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (schedule_id, doctor_id, patient_name, patient_phone, booking_date, waktu_booking, "Confirmed")
+                "INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked, SlotMinutes, SlotTotal, Occupancy) VALUES (?, ?, ?, ?, 0, ?, ?, 0)",
+                (doctor_id, date, start_time, end_time, slot_minutes, slot_total)
             )
-            
-            # Perbarui status jadwal menjadi terisi (IsBooked = 1)
-            cursor.execute("UPDATE Schedules SET IsBooked = 1 WHERE ScheduleID = ?", (schedule_id,))
+            conn.commit()
+            logging.info(f"Shift {cursor.lastrowid} added for doctor {doctor_id} on {date} {start_time}-{end_time} ({slot_total} slots).")
+            return True, "Jadwal berhasil ditambahkan."
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"Error adding shift for doctor {doctor_id} on {date}: {e}")
+            return False, f"Gagal menambahkan jadwal: {e}"
+        finally:
+            conn.close()
+
+    def convert_schedules_to_slots(self, slot_minutes=DEFAULT_SLOT_MINUTES, date_from=None, once=False):
+        """
+        Migrasi shift lama (satu booking per shift) mulai date_from (default hari ini) menjadi shift
+        dengan slot slot_minutes menit, dalam satu transaksi dan dengan beberapa query set-based.
+        Booking yang masih memegang shift lama (semua status kecuali Cancelled, sama seperti
+        _change_booking_status) dipindahkan ke slot pertama (jam booking-nya memang StartTime),
+        sehingga sisa shift terbuka untuk pasien lain. Shift yang durasinya bukan kelipatan
+        slot_minutes dibiarkan apa adanya.
+        once=True (dipakai saat aplikasi/server start) hanya menjalankan migrasi jika belum tercatat di
+        SchemaMigrations, lalu mencatatnya dalam transaksi yang sama; shift tanpa slot yang dibuat
+        sesudahnya dengan add_shift(..., slot_minutes=0) tidak diubah lagi.
+        Mengembalikan (success, message, jumlah shift yang diubah).
+        """
+        date_from = date_from or datetime.now().strftime("%Y-%m-%d")
+        conn = self.db_manager.get_connection()
+        conn.isolation_level = None
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            if once:
+                cursor.execute("SELECT AppliedAt FROM SchemaMigrations WHERE Name = ?", (SLOT_MIGRATION,))
+                applied = cursor.fetchone()
+                if applied:
+                    conn.rollback()
+                    return True, f"Jadwal sudah diubah menjadi slot pada {applied[0]}.", 0
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS ConvertedShifts (ScheduleID INTEGER PRIMARY KEY, SlotTotal INTEGER)")
+            cursor.execute("DELETE FROM temp.ConvertedShifts")
+            cursor.execute(f"""
+                INSERT INTO temp.ConvertedShifts (ScheduleID, SlotTotal)
+                SELECT ScheduleID, Duration / :slot_minutes FROM (
+                    SELECT ScheduleID, (strftime('%s', EndTime) - strftime('%s', StartTime)) / 60 AS Duration
+                    FROM Schedules WHERE SlotMinutes = 0 AND Date >= :date_from
+                )
+                WHERE Duration > 0 AND Duration % :slot_minutes = 0 AND Duration / :slot_minutes <= {MAX_SLOTS_PER_SHIFT}
+            """, {"slot_minutes": slot_minutes, "date_from": date_from})
+            converted = cursor.rowcount
+            cursor.execute(f"""
+                UPDATE Bookings SET SlotIndex = 0, SlotCount = 1
+                WHERE Status != '{STATUS_CANCELLED}' AND ScheduleID IN (SELECT ScheduleID FROM temp.ConvertedShifts)
+            """)
+            moved_bookings = cursor.rowcount
+            cursor.execute(f"""
+                UPDATE Schedules
+                SET SlotMinutes = ?,
+                    SlotTotal = c.SlotTotal,
+                    Occupancy = EXISTS (SELECT 1 FROM Bookings b WHERE b.ScheduleID = Schedules.ScheduleID
+                                        AND b.Status != '{STATUS_CANCELLED}'),
+                    IsBooked = c.SlotTotal = 1 AND EXISTS (SELECT 1 FROM Bookings b WHERE b.ScheduleID = Schedules.ScheduleID
+                                                           AND b.Status != '{STATUS_CANCELLED}')
+                FROM temp.ConvertedShifts c
+                WHERE c.ScheduleID = Schedules.ScheduleID
+            """, (slot_minutes,))
+            if once:
+                cursor.execute("INSERT INTO SchemaMigrations (Name, AppliedAt) VALUES (?, ?)", (SLOT_MIGRATION, _now_str()))
+            conn.commit()
+            logging.info(f"Converted {converted} shifts to {slot_minutes}-minute slots ({moved_bookings} bookings moved to slot 0).")
+            return True, f"{converted} jadwal diubah menjadi slot {slot_minutes} menit.", converted
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"Error converting schedules to slots: {e}")
+            return False, f"Gagal mengubah jadwal menjadi slot: {e}", 0
+        finally:
+            conn.close()
+
+    def _reserve_schedule(self, cursor, schedule_id, slot_index=None, slot_count=1):
+        """
+        Menandai jadwal (atau slot di dalam shift) terisi dengan satu UPDATE bersyarat, sehingga
+        pengecekan bentrok dan penandaan terjadi atomik. Mengembalikan True jika berhasil.
+        """
+        if slot_index is None:
+            cursor.execute(
+                "UPDATE Schedules SET IsBooked = 1 WHERE ScheduleID = ? AND SlotMinutes = 0 AND IsBooked = 0 AND IsBlocked = 0",
+                (schedule_id,)
+            )
+        else:
+            mask = _slot_mask(slot_index, slot_count)
+            # Ekspresi SET memakai nilai lama Occupancy; IsBooked = 1 jika semua slot shift kini terisi
+            cursor.execute("""
+                UPDATE Schedules
+                SET Occupancy = Occupancy | :mask,
+                    IsBooked = ((Occupancy | :mask) = (1 << SlotTotal) - 1)
+                WHERE ScheduleID = :schedule_id AND SlotMinutes > 0 AND IsBlocked = 0
+                  AND :slot_index >= 0 AND :slot_index + :slot_count <= SlotTotal
+                  AND (Occupancy & :mask) = 0
+            """, {"mask": mask, "schedule_id": schedule_id, "slot_index": slot_index, "slot_count": slot_count})
+        return cursor.rowcount == 1
+
+    def _release_schedule(self, cursor, schedule_id, slot_index=None, slot_count=1):
+        """Mengosongkan kembali jadwal atau slot yang dipakai booking (dalam transaksi pemanggil)."""
+        if slot_index is None:
+            cursor.execute("UPDATE Schedules SET IsBooked = 0 WHERE ScheduleID = ?", (schedule_id,))
+        else:
+            cursor.execute("UPDATE Schedules SET Occupancy = Occupancy & ~?, IsBooked = 0 WHERE ScheduleID = ?",
+                           (_slot_mask(slot_index, slot_count), schedule_id))
+
+    def _insert_booking(self, cursor, schedule_id, doctor_id, patient_name, patient_phone, booking_date, waktu_booking,
+                        slot_index=None, slot_count=1):
+        """
+        Menandai jadwal/slot terisi lalu menyisipkan booking aktif (dalam transaksi pemanggil).
+        Mengembalikan booking_id, atau None jika jadwal/slot sudah tidak tersedia.
+        """
+        if not self._reserve_schedule(cursor, schedule_id, slot_index, slot_count):
+            return None
+        patient_id = self._upsert_patient(cursor, patient_name, patient_phone, booking_date)
+        cursor.execute(
+            "INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, Status, SlotIndex, SlotCount, CreatedAt, PatientID) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (schedule_id, doctor_id, patient_name, patient_phone, booking_date, waktu_booking, STATUS_CONFIRMED,
+             slot_index, slot_count, _now_str(), patient_id)
+        )
+        return cursor.lastrowid
+
+    def _upsert_patient(self, cursor, patient_name, patient_phone, booking_date):
+        """
+        Mendaftarkan pasien berdasarkan nomor telepon yang dinormalisasi (dalam transaksi pemanggil), atau
+        memperbarui nama/nomor terakhir dan jumlah booking jika sudah terdaftar.
+        Mengembalikan PatientID, atau None jika nomor telepon kosong.
+        """
+        key = phone_key(patient_phone)
+        if not key:
+            return None
+        cursor.execute("""
+            INSERT INTO Patients (Name, Phone, PhoneKey, CreatedAt, LastBookingDate, BookingCount)
+            VALUES (?, ?, ?, ?, ?, 1)
+            ON CONFLICT (PhoneKey) DO UPDATE SET
+                Name = excluded.Name,
+                Phone = excluded.Phone,
+                BookingCount = BookingCount + 1,
+                LastBookingDate = MAX(IFNULL(LastBookingDate, ''), excluded.LastBookingDate)
+        """, (patient_name, patient_phone, key, _now_str(), booking_date))
+        cursor.execute("SELECT PatientID FROM Patients WHERE PhoneKey = ?", (key,))
+        return cursor.fetchone()[0]
+
+    def add_booking(self, schedule_id, doctor_id, patient_name, patient_phone, booking_date, waktu_booking,
+                    slot_index=None, slot_count=1, patient_id=None):
+        """
+        Menambahkan booking baru dan memperbarui status jadwal.
+        Untuk shift yang dibagi slot, slot ditentukan dari slot_index, atau dari waktu_booking jika
+        slot_index tidak diberikan; slot_count slot berurutan dipakai sekaligus (mis. 2 x 15 menit).
+        patient_id (pasien terdaftar, mis. dari saran autocomplete) mengisi nama/nomor yang dikosongkan;
+        booking selalu ditautkan ke registri pasien lewat nomor teleponnya.
+        """
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        try:
+            if patient_id is not None:
+                cursor.execute("SELECT Name, Phone FROM Patients WHERE PatientID = ?", (patient_id,))
+                patient = cursor.fetchone()
+                if not patient:
+                    return False, "Pasien tidak ditemukan."
+                patient_name = patient_name or patient[0]
+                patient_phone = patient_phone or patient[1]
+
+            # Periksa apakah jadwal sudah terisi
+            cursor.execute("SELECT IsBooked, IsBlocked, StartTime, SlotMinutes, SlotTotal, Occupancy FROM Schedules WHERE ScheduleID = ?", (schedule_id,))
+            schedule_state = cursor.fetchone()
+            if not schedule_state:
+                return False, "Jadwal tidak ditemukan."
+            is_booked, is_blocked, start_time, slot_minutes, slot_total, occupancy = schedule_state
+            if is_blocked == 1:
+                return False, "Dokter berhalangan pada jadwal ini. Mohon pilih jadwal lain."
+
+            if slot_minutes:
+                if slot_index is None:
+                    offset = _minutes(waktu_booking) - _minutes(start_time)
+                    if offset < 0 or offset % slot_minutes:
+                        return False, "Waktu booking tidak sesuai dengan slot jadwal."
+                    slot_index = offset // slot_minutes
+                if slot_count < 1 or slot_index < 0 or slot_index + slot_count > slot_total:
+                    return False, "Slot yang dipilih berada di luar jam praktik."
+                if occupancy & _slot_mask(slot_index, slot_count):
+                    return False, "Slot ini sudah terisi. Mohon pilih slot lain."
+                waktu_booking = _slot_time(start_time, slot_minutes, slot_index)
+            else:
+                slot_index, slot_count = None, 1
+                if is_booked == 1:
+                    return False, "Jadwal ini sudah terisi. Mohon pilih jadwal lain."
+
+            # Tambahkan booking
+            booking_id = self._insert_booking(cursor, schedule_id, doctor_id, patient_name, patient_phone, booking_date,
+                                              waktu_booking, slot_index, slot_count)
+            if booking_id is None:
+                # Jadwal diambil booking lain di antara pengecekan dan penyimpanan
+                conn.rollback()
+                return False, "Jadwal ini sudah terisi. Mohon pilih jadwal lain."
             
             conn.commit()
-            logging.info(f"New booking added for schedule {schedule_id} by {patient_name}.")
+            self._record_journal([(EVENT_BOOKED, [(booking_id, schedule_id, doctor_id, patient_name, patient_phone,
+                                                   booking_date, waktu_booking)], None)])
+            logging.info(f"New booking added for schedule {schedule_id} (slot {slot_index}) by {patient_name}.")
             return True, "Booking berhasil ditambahkan!"
         except Exception as e:
             conn.rollback()
@@ -210,12 +554,31 @@ class BookingService:
         finally:
             conn.close()
 
-    def get_all_bookings(self):
-        """Mengambil semua booking beserta detail dokter dan spesialisasinya."""
-        conn = self.db_manager.get_connection()
+    def get_all_bookings(self, start_date=None, end_date=None, include_history=False, limit=None):
+        """
+        Mengambil semua booking beserta detail dokter dan spesialisasinya.
+        start_date/end_date (YYYY-MM-DD, inklusif) membatasi rentang tanggal booking.
+        Secara default hanya booking aktif (Confirmed) yang diambil, lewat partial index;
+        include_history=True ikut mengambil booking yang dibatalkan/selesai/tidak hadir.
+        Database arsip hanya ikut di-UNION jika rentang yang diminta mencakup tanggal yang sudah diarsipkan.
+        limit membatasi jumlah booking terbaru yang diambil.
+        """
+        conn = self.db_manager.get_connection(attach_archive=True)
         cursor = conn.cursor()
         try:
-            query = """
+            conditions = []
+            params = []
+            if not include_history:
+                conditions.append(f"b.Status = '{STATUS_CONFIRMED}'")
+            if start_date:
+                conditions.append("b.BookingDate >= ?")
+                params.append(start_date)
+            if end_date:
+                conditions.append("b.BookingDate <= ?")
+                params.append(end_date)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+            select = """
             SELECT 
                 b.BookingID, 
                 b.PatientName, 
@@ -225,44 +588,656 @@ class BookingService:
                 b.BookingDate, 
                 b.BookingTime, 
                 b.Status
-            FROM Bookings b
+            FROM {table} b
             JOIN Doctors d ON b.DoctorID = d.DoctorID
-            ORDER BY b.BookingDate DESC, b.BookingTime DESC
+            {where}
             """
-            cursor.execute(query)
+            query = select.format(table="Bookings", where=where)
+
+            archived_before = self._get_archive_boundary(cursor)
+            if archived_before and (not start_date or start_date < archived_before):
+                query += " UNION ALL " + select.format(table="archive.Bookings", where=where)
+                params = params * 2
+
+            query += " ORDER BY BookingDate DESC, BookingTime DESC"
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
+            cursor.row_factory = self._row_factory(BookingRecord)
+            cursor.execute(query, params)
             bookings = cursor.fetchall()
             return bookings
         except Exception as e:
             logging.error(f"Error getting all bookings: {e}")
+            if self.raise_errors:
+                raise
             return []
         finally:
             conn.close()
             
-    def delete_booking(self, booking_id):
-        """Menghapus booking dari database berdasarkan booking_id dan memperbarui status jadwal."""
+    def search_bookings(self, query, limit=50):
+        """
+        Mencari booking berdasarkan nama pasien, nomor telepon, atau nama dokter (FTS5).
+        Setiap kata diperlakukan sebagai prefix (mis. 'bud 0812' cocok dengan 'Budi', '08123...'),
+        hasil diurutkan berdasarkan relevansi (bm25) atas semua booking yang cocok, lalu booking terbaru.
+        Format baris sama dengan get_all_bookings.
+        Hanya booking di database live yang dicari: booking yang sudah dipindah ArchiveService ke database
+        arsip tidak punya indeks FTS dan tidak ikut dalam hasil.
+        """
+        # Nomor telepon diindeks hanya digit, jadi '0812-3456' digabung menjadi '08123456'
+        query = re.sub(r"(?<=\d)[\s\-.()]+(?=\d)", "", query or "")
+        # Hanya huruf/angka yang diteruskan agar sintaks FTS5 dari input pengguna tidak bisa disisipkan
+        tokens = re.findall(r"\w+", query)
+        # Gelar 'dr'/'drg' ada di hampir semua baris; diabaikan jika ada kata lain yang lebih selektif
+        selective = [token for token in tokens if token.lower() not in SEARCH_IGNORED_TITLES]
+        tokens = selective or tokens
+        if not tokens:
+            return []
+        match_expr = " ".join(f'"{token}"*' for token in tokens)
+
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = self._row_factory(BookingRecord)
+        try:
+            # bm25 dihitung untuk semua baris yang cocok; LIMIT di dalam query FTS membuat SQLite hanya
+            # menyimpan `limit` hasil terbaik saat mengurutkan, dan join ke Bookings hanya untuk baris itu.
+            cursor.execute("""
+                WITH hits AS (
+                    SELECT rowid AS BookingID, rank
+                    FROM BookingsSearch
+                    WHERE BookingsSearch MATCH ?
+                    ORDER BY rank, rowid DESC
+                    LIMIT ?
+                )
+                SELECT 
+                    b.BookingID, 
+                    b.PatientName, 
+                    b.PatientPhone, 
+                    d.Name AS DoctorName, 
+                    d.Specialty, 
+                    b.BookingDate, 
+                    b.BookingTime, 
+                    b.Status
+                FROM hits h
+                JOIN Bookings b ON b.BookingID = h.BookingID
+                JOIN Doctors d ON b.DoctorID = d.DoctorID
+                ORDER BY h.rank, h.BookingID DESC
+            """, (match_expr, limit))
+            bookings = cursor.fetchall()
+            logging.debug(f"Booking search '{query}' returned {len(bookings)} rows.")
+            return bookings
+        except Exception as e:
+            logging.error(f"Error searching bookings for '{query}': {e}")
+            if self.raise_errors:
+                raise
+            return []
+        finally:
+            conn.close()
+
+    def get_patient(self, patient_id):
+        """Mengambil satu pasien terdaftar berdasarkan ID."""
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = self._row_factory(PatientRecord)
+        try:
+            cursor.execute(
+                "SELECT PatientID, Name, Phone, BookingCount, LastBookingDate FROM Patients WHERE PatientID = ?",
+                (patient_id,)
+            )
+            return cursor.fetchone()
+        except Exception as e:
+            logging.error(f"Error getting patient ID {patient_id}: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def search_patients(self, query, limit=PATIENT_SUGGESTION_LIMIT):
+        """
+        Saran pasien terdaftar untuk autocomplete: awalan nomor telepon (jika input hanya angka/pemisah,
+        dinormalisasi seperti phone_prefix_key) atau awalan nama tanpa beda huruf besar/kecil.
+        Keduanya berupa range scan pada index (ux_patients_phone_key / idx_patients_name) yang berhenti
+        setelah limit baris, jadi tetap instan walau pasiennya ratusan ribu.
+        """
+        text = (query or "").strip()
+        if not text:
+            return []
+        if re.fullmatch(r"[\d\s\-+.()]+", text):
+            key = phone_prefix_key(text)
+            if not key:
+                return []
+            # GLOB (bukan LIKE) agar index BINARY pada PhoneKey terpakai; isinya hanya digit
+            where, param, order = "PhoneKey GLOB ?", key + "*", "PhoneKey"
+        else:
+            where, param, order = "Name LIKE ?", re.sub(r"[%_]", "", text) + "%", "Name"
+
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = self._row_factory(PatientRecord)
+        try:
+            cursor.execute(f"""
+                SELECT PatientID, Name, Phone, BookingCount, LastBookingDate
+                FROM Patients WHERE {where}
+                ORDER BY {order}
+                LIMIT ?
+            """, (param, limit))
+            return cursor.fetchall()
+        except Exception as e:
+            logging.error(f"Error searching patients for '{query}': {e}")
+            return []
+        finally:
+            conn.close()
+
+    def get_patient_bookings(self, patient_id, include_history=True, limit=None):
+        """
+        Booking seorang pasien terdaftar (yang belum diarsipkan), terbaru dulu; format baris sama dengan get_all_bookings.
+        """
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = self._row_factory(BookingRecord)
         try:
-            # Dapatkan schedule_id dari booking yang akan dihapus
-            cursor.execute("SELECT ScheduleID FROM Bookings WHERE BookingID = ?", (booking_id,))
+            query = """
+                SELECT b.BookingID, b.PatientName, b.PatientPhone, d.Name AS DoctorName, d.Specialty,
+                       b.BookingDate, b.BookingTime, b.Status
+                FROM Bookings b
+                JOIN Doctors d ON b.DoctorID = d.DoctorID
+                WHERE b.PatientID = ?
+            """
+            params = [patient_id]
+            if not include_history:
+                query += f" AND b.Status = '{STATUS_CONFIRMED}'"
+            query += " ORDER BY b.BookingDate DESC, b.BookingTime DESC"
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        except Exception as e:
+            logging.error(f"Error getting bookings for patient ID {patient_id}: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def get_change_sequence(self):
+        """Seq terakhir di ChangeLog (0 jika belum ada perubahan); satu lookup baris, murah untuk dipanggil berkala."""
+        conn = self.db_manager.get_connection()
+        try:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'ChangeLog'").fetchone()
+            return row[0] if row else 0
+        except Exception as e:
+            logging.error(f"Error getting change sequence: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def get_changes(self, since_seq, limit=CHANGE_BATCH_LIMIT):
+        """
+        ChangeSet berisi perubahan setelah since_seq: booking yang berubah (format baris sama dengan
+        get_all_bookings), booking yang sudah tidak ada, dan dokter yang jadwalnya berubah.
+        Jika lebih dari limit perubahan, atau since_seq sudah terpangkas dari ChangeLog / lebih besar dari
+        Seq terakhir (database diganti), complete=False dan pemanggil sebaiknya memuat ulang penuh.
+        Mengembalikan None jika terjadi error.
+        """
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN") # Seq dan isi booking dibaca dari snapshot yang sama
+            cursor.execute("""
+                SELECT (SELECT seq FROM sqlite_sequence WHERE name = 'ChangeLog'), (SELECT MIN(Seq) FROM ChangeLog)
+            """)
+            latest, oldest = cursor.fetchone()
+            latest = latest or 0
+            if since_seq > latest or (oldest is not None and since_seq < oldest - 1):
+                return ChangeSet(latest, False, [], [], [], False)
+
+            cursor.execute("SELECT TableName, KeyID, DoctorID FROM ChangeLog WHERE Seq > ? ORDER BY Seq LIMIT ?",
+                           (since_seq, limit + 1))
+            rows = cursor.fetchall()
+            if len(rows) > limit:
+                return ChangeSet(latest, False, [], [], [], False)
+            booking_ids = sorted({key for table, key, _ in rows if table == "Bookings"})
+            doctor_ids = sorted({doctor_id for table, _, doctor_id in rows if table == "Schedules" and doctor_id})
+            doctors_changed = any(table == "Doctors" for table, _, _ in rows)
+
+            bookings = []
+            if booking_ids:
+                cursor.row_factory = self._row_factory(BookingRecord)
+                cursor.execute(f"""
+                    SELECT b.BookingID, b.PatientName, b.PatientPhone, d.Name AS DoctorName, d.Specialty,
+                           b.BookingDate, b.BookingTime, b.Status
+                    FROM Bookings b
+                    JOIN Doctors d ON b.DoctorID = d.DoctorID
+                    WHERE b.BookingID IN ({', '.join('?' * len(booking_ids))})
+                """, booking_ids)
+                bookings = cursor.fetchall()
+            found = {row_id(booking) for booking in bookings}
+            removed = [booking_id for booking_id in booking_ids if booking_id not in found]
+            return ChangeSet(latest, True, bookings, removed, doctor_ids, doctors_changed)
+        except Exception as e:
+            logging.error(f"Error getting changes since {since_seq}: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def _change_booking_status(self, booking_id, new_status, free_schedule):
+        """
+        Memindahkan booking aktif ke status akhir (Cancelled/Completed/NoShow) dan mencatat waktunya.
+        Jika free_schedule=True, jadwal dikosongkan kembali lalu langsung ditawarkan ke pasien
+        teratas di daftar tunggu, semuanya dalam satu transaksi.
+        """
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT Status, SlotIndex, SlotCount, {JOURNAL_BOOKING_COLUMNS} FROM Bookings WHERE BookingID = ?",
+                           (booking_id,))
             result = cursor.fetchone()
             if not result:
                 return False, "Booking tidak ditemukan."
-            
-            schedule_id = result[0]
 
-            # Hapus booking
-            cursor.execute("DELETE FROM Bookings WHERE BookingID = ?", (booking_id,))
-            
-            # Ubah status is_booked di tabel Schedules menjadi 0 (False)
-            cursor.execute("UPDATE Schedules SET IsBooked = 0 WHERE ScheduleID = ?", (schedule_id,))
-            
+            status, slot_index, slot_count = result[:3]
+            schedule_id = result[4]
+            # Status akhir sama dengan nama event jurnalnya ('Cancelled', 'Completed', 'NoShow')
+            events = [(new_status, [result[3:]], None)]
+            if status != STATUS_CONFIRMED:
+                return False, f"Booking ID {booking_id} sudah berstatus {status}."
+
+            cursor.execute(
+                "UPDATE Bookings SET Status = ?, StatusUpdatedAt = ? WHERE BookingID = ? AND Status = ?",
+                (new_status, _now_str(), booking_id, STATUS_CONFIRMED)
+            )
+            message = f"Booking ID {booking_id} berhasil diubah menjadi {new_status}."
+            if free_schedule:
+                # Kosongkan jadwal (atau slot-nya saja pada shift yang dibagi slot)
+                self._release_schedule(cursor, schedule_id, slot_index, slot_count)
+                assigned = self._assign_from_waitlist(cursor, schedule_id, slot_index, slot_count, events)
+                if assigned:
+                    message += f" Jadwal langsung diberikan ke pasien daftar tunggu: {assigned}."
+
+            conn.commit()
+            self._record_journal(events)
+            logging.info(f"Booking ID {booking_id} (schedule {schedule_id}) changed to {new_status}.")
+            return True, message
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"Error changing booking ID {booking_id} to {new_status}: {e}")
+            return False, f"Gagal mengubah status booking: {e}"
+        finally:
+            conn.close()
+
+    def _find_waitlist_candidate(self, cursor, doctor_id, specialty, date):
+        """
+        Mencari pasien daftar tunggu terbaik untuk jadwal dokter pada tanggal tertentu.
+        Dua lookup berindeks (per dokter dan per spesialisasi), masing-masing berhenti di baris pertama
+        yang rentang tanggalnya cocok; pemenangnya ditentukan prioritas lalu waktu mendaftar.
+        """
+        cursor.execute("""
+            SELECT WaitlistID, PatientName, PatientPhone, Priority, CreatedAt FROM (
+                SELECT WaitlistID, PatientName, PatientPhone, Priority, CreatedAt
+                FROM Waitlist INDEXED BY idx_waitlist_doctor
+                WHERE Status = 'Waiting' AND DoctorID = ? AND DateFrom <= ? AND DateTo >= ?
+                ORDER BY Priority DESC, CreatedAt
+                LIMIT 1
+            )
+            UNION ALL
+            SELECT WaitlistID, PatientName, PatientPhone, Priority, CreatedAt FROM (
+                SELECT WaitlistID, PatientName, PatientPhone, Priority, CreatedAt
+                FROM Waitlist INDEXED BY idx_waitlist_specialty
+                WHERE Status = 'Waiting' AND Specialty = ? AND DoctorID IS NULL AND DateFrom <= ? AND DateTo >= ?
+                ORDER BY Priority DESC, CreatedAt
+                LIMIT 1
+            )
+            ORDER BY Priority DESC, CreatedAt
+            LIMIT 1
+        """, (doctor_id, date, date, specialty, date, date))
+        return cursor.fetchone()
+
+    def _assign_from_waitlist(self, cursor, schedule_id, slot_index=None, slot_count=1, events=None):
+        """
+        Mengisi jadwal (atau slot) yang baru kosong dengan pasien daftar tunggu terbaik (dalam transaksi pemanggil).
+        Mengembalikan nama pasien yang mendapat jadwal, atau None jika tidak ada yang cocok.
+        Event jurnal ditambahkan ke events; pemanggil meneruskannya setelah commit.
+        """
+        cursor.execute("""
+            SELECT s.DoctorID, d.Specialty, s.Date, s.StartTime, s.SlotMinutes
+            FROM Schedules s JOIN Doctors d ON d.DoctorID = s.DoctorID
+            WHERE s.ScheduleID = ? AND s.IsBooked = 0 AND s.IsBlocked = 0
+        """, (schedule_id,))
+        slot = cursor.fetchone()
+        if not slot:
+            return None
+        doctor_id, specialty, date, start_time, slot_minutes = slot
+        if slot_index is not None:
+            start_time = _slot_time(start_time, slot_minutes, slot_index)
+
+        candidate = self._find_waitlist_candidate(cursor, doctor_id, specialty, date)
+        if not candidate:
+            return None
+        waitlist_id, patient_name, patient_phone = candidate[:3]
+
+        booking_id = self._insert_booking(cursor, schedule_id, doctor_id, patient_name, patient_phone, date, start_time,
+                                          slot_index, slot_count)
+        if booking_id is None:
+            return None
+        cursor.execute(
+            "UPDATE Waitlist SET Status = 'Assigned', AssignedBookingID = ?, AssignedAt = ? WHERE WaitlistID = ?",
+            (booking_id, _now_str(), waitlist_id)
+        )
+        if events is not None:
+            events.append((EVENT_WAITLIST_ASSIGNED,
+                           [(booking_id, schedule_id, doctor_id, patient_name, patient_phone, date, start_time)],
+                           {"waitlist_id": waitlist_id}))
+        logging.info(f"Schedule {schedule_id} refilled from waitlist entry {waitlist_id} ({patient_name}), booking {booking_id}.")
+        return patient_name
+
+    def add_to_waitlist(self, patient_name, patient_phone, date_from, date_to, doctor_id=None, specialty=None, priority=0):
+        """
+        Mendaftarkan pasien ke daftar tunggu untuk dokter tertentu (doctor_id) atau
+        dokter mana saja dengan spesialisasi tertentu (specialty) dalam rentang tanggal.
+        """
+        if doctor_id is None and not specialty:
+            return False, "Pilih dokter atau spesialisasi untuk daftar tunggu."
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "INSERT INTO Waitlist (PatientName, PatientPhone, DoctorID, Specialty, DateFrom, DateTo, Priority, CreatedAt) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (patient_name, patient_phone, doctor_id, None if doctor_id is not None else specialty,
+                 date_from, date_to, priority, _now_str())
+            )
             conn.commit()
-            logging.info(f"Booking ID {booking_id} and associated Schedule ID {schedule_id} successfully deleted/updated.")
-            return True, f"Booking ID {booking_id} berhasil dihapus."
+            self._record_journal([(EVENT_WAITLISTED, [(None, None, doctor_id, patient_name, patient_phone, None, None)],
+                                   {"waitlist_id": cursor.lastrowid, "specialty": specialty,
+                                    "date_from": date_from, "date_to": date_to, "priority": priority})])
+            logging.info(f"Waitlist entry {cursor.lastrowid} added for {patient_name}.")
+            return True, "Pasien berhasil dimasukkan ke daftar tunggu."
         except Exception as e:
             conn.rollback()
-            logging.error(f"Error deleting booking ID {booking_id}: {e}")
-            return False, f"Gagal menghapus booking: {e}"
+            logging.error(f"Error adding {patient_name} to waitlist: {e}")
+            return False, f"Gagal menambahkan ke daftar tunggu: {e}"
         finally:
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+    def get_waitlist(self):
+        """Mengambil daftar tunggu yang masih aktif, urut prioritas lalu waktu mendaftar."""
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT w.WaitlistID, w.PatientName, w.PatientPhone, d.Name AS DoctorName,
+                       COALESCE(w.Specialty, d.Specialty) AS Specialty, w.DateFrom, w.DateTo, w.Priority
+                FROM Waitlist w LEFT JOIN Doctors d ON d.DoctorID = w.DoctorID
+                WHERE w.Status = 'Waiting'
+                ORDER BY w.Priority DESC, w.CreatedAt
+            """)
+            return cursor.fetchall()
+        except Exception as e:
+            logging.error(f"Error getting waitlist: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def remove_from_waitlist(self, waitlist_id):
+        """Mengeluarkan pasien dari daftar tunggu (riwayat tetap disimpan)."""
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("UPDATE Waitlist SET Status = 'Removed' WHERE WaitlistID = ? AND Status = 'Waiting'", (waitlist_id,))
+            conn.commit()
+            if cursor.rowcount == 0:
+                return False, "Data daftar tunggu tidak ditemukan."
+            return True, "Pasien dikeluarkan dari daftar tunggu."
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"Error removing waitlist entry {waitlist_id}: {e}")
+            return False, f"Gagal menghapus dari daftar tunggu: {e}"
+        finally:
+            conn.close()
+
+    def add_bookings(self, items):
+        """
+        Menambahkan beberapa booking sekaligus (mis. satu keluarga) dalam satu transaksi, semua-atau-tidak-sama-sekali.
+        items: list dict dengan key schedule_id, doctor_id, patient_name, patient_phone, booking_date, waktu_booking,
+        dan opsional slot_index/slot_count untuk shift yang dibagi slot (tanpa slot_index, slot diambil dari waktu_booking).
+        Mengembalikan (success, message, outcomes); outcomes berisi (index, ok, pesan) per item.
+        Ketersediaan semua jadwal diperiksa dengan satu query, lalu booking disisipkan dengan INSERT ... SELECT.
+        """
+        if not items:
+            return False, "Tidak ada booking yang diajukan.", []
+        conn = self.db_manager.get_connection()
+        conn.isolation_level = None # Transaksi dikontrol manual (BEGIN IMMEDIATE)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE") # Kunci tulis sejak awal agar hasil pengecekan tetap berlaku
+            cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS BulkBookingItems (
+                    ItemIndex INTEGER PRIMARY KEY, ScheduleID INTEGER, DoctorID INTEGER, PatientName TEXT,
+                    PatientPhone TEXT, BookingDate TEXT, BookingTime TEXT, SlotIndex INTEGER, SlotCount INTEGER,
+                    Mask INTEGER, PhoneKey TEXT
+                )
+            """)
+            cursor.execute("DELETE FROM temp.BulkBookingItems")
+            cursor.executemany(
+                "INSERT INTO temp.BulkBookingItems VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, ?)",
+                [(index, item["schedule_id"], item["doctor_id"], item["patient_name"], item.get("patient_phone"),
+                  item["booking_date"], item["waktu_booking"], item.get("slot_index"), item.get("slot_count", 1),
+                  phone_key(item.get("patient_phone")))
+                 for index, item in enumerate(items)]
+            )
+            # Shift tanpa slot dipesan utuh (sama seperti add_booking); slot_index dari pemanggil diabaikan
+            cursor.execute("""
+                UPDATE temp.BulkBookingItems SET SlotIndex = NULL, SlotCount = 1
+                WHERE ScheduleID IN (SELECT ScheduleID FROM Schedules WHERE SlotMinutes = 0)
+            """)
+            # Shift yang dibagi slot: tentukan slot dari jam booking (jika slot_index kosong), jam booking dari slot,
+            # dan bitmask slot yang dipakai. Jam yang tidak tepat di awal slot menghasilkan SlotIndex NULL.
+            cursor.execute("""
+                UPDATE temp.BulkBookingItems
+                SET SlotIndex = COALESCE(SlotIndex, (
+                        SELECT CASE WHEN offset >= 0 AND offset % s.SlotMinutes = 0 THEN offset / s.SlotMinutes END
+                        FROM (SELECT (strftime('%s', temp.BulkBookingItems.BookingTime) - strftime('%s', s.StartTime)) / 60 AS offset)
+                    ))
+                FROM Schedules s
+                WHERE s.ScheduleID = temp.BulkBookingItems.ScheduleID AND s.SlotMinutes > 0
+            """)
+            cursor.execute("""
+                UPDATE temp.BulkBookingItems
+                SET BookingTime = strftime('%H:%M', s.StartTime, '+' || (SlotIndex * s.SlotMinutes) || ' minutes'),
+                    Mask = ((1 << SlotCount) - 1) << SlotIndex
+                FROM Schedules s
+                WHERE s.ScheduleID = temp.BulkBookingItems.ScheduleID AND s.SlotMinutes > 0 AND SlotIndex IS NOT NULL
+            """)
+
+            cursor.execute("""
+                SELECT i.ItemIndex,
+                       CASE
+                           WHEN s.ScheduleID IS NULL THEN 'Jadwal tidak ditemukan.'
+                           WHEN s.DoctorID != i.DoctorID THEN 'Jadwal bukan milik dokter ini.'
+                           WHEN s.IsBlocked = 1 THEN 'Dokter berhalangan pada jadwal ini.'
+                           WHEN s.SlotMinutes = 0 AND s.IsBooked = 1 THEN 'Jadwal ini sudah terisi.'
+                           WHEN s.SlotMinutes = 0 AND (SELECT COUNT(*) FROM temp.BulkBookingItems d WHERE d.ScheduleID = i.ScheduleID) > 1
+                               THEN 'Jadwal dipilih lebih dari sekali dalam permintaan ini.'
+                           WHEN s.SlotMinutes > 0 AND i.SlotIndex IS NULL THEN 'Waktu booking tidak sesuai dengan slot jadwal.'
+                           WHEN s.SlotMinutes > 0 AND (i.SlotCount < 1 OR i.SlotIndex < 0 OR i.SlotIndex + i.SlotCount > s.SlotTotal)
+                               THEN 'Slot yang dipilih berada di luar jam praktik.'
+                           WHEN s.SlotMinutes > 0 AND (s.Occupancy & i.Mask) != 0 THEN 'Slot ini sudah terisi.'
+                           WHEN s.SlotMinutes > 0 AND EXISTS (
+                               SELECT 1 FROM temp.BulkBookingItems d
+                               WHERE d.ScheduleID = i.ScheduleID AND d.ItemIndex != i.ItemIndex AND (d.Mask & i.Mask) != 0
+                           ) THEN 'Slot dipilih lebih dari sekali dalam permintaan ini.'
+                       END AS Problem
+                FROM temp.BulkBookingItems i
+                LEFT JOIN Schedules s ON s.ScheduleID = i.ScheduleID
+                ORDER BY i.ItemIndex
+            """)
+            problems = cursor.fetchall()
+            if any(problem for _, problem in problems):
+                conn.rollback()
+                outcomes = [(index, False, problem or "Tidak disimpan karena item lain gagal.")
+                            for index, problem in problems]
+                return False, "Booking massal dibatalkan; tidak ada booking yang disimpan.", outcomes
+
+            if self.journal is not None:
+                cursor.execute("SELECT IFNULL(MAX(BookingID), 0) FROM Bookings")
+                last_booking_id = cursor.fetchone()[0]
+            # Satu upsert untuk semua pasien dalam permintaan; nama/nomor diambil dari item terakhir per nomor
+            cursor.execute("""
+                INSERT INTO Patients (Name, Phone, PhoneKey, CreatedAt, LastBookingDate, BookingCount)
+                SELECT latest.PatientName, latest.PatientPhone, g.PhoneKey, ?, g.LastBookingDate, g.Items
+                FROM (
+                    SELECT PhoneKey, MAX(ItemIndex) AS LatestIndex, MAX(BookingDate) AS LastBookingDate, COUNT(*) AS Items
+                    FROM temp.BulkBookingItems WHERE PhoneKey != '' GROUP BY PhoneKey
+                ) g
+                JOIN temp.BulkBookingItems latest ON latest.ItemIndex = g.LatestIndex
+                WHERE true
+                ON CONFLICT (PhoneKey) DO UPDATE SET
+                    Name = excluded.Name,
+                    Phone = excluded.Phone,
+                    BookingCount = BookingCount + excluded.BookingCount,
+                    LastBookingDate = MAX(IFNULL(LastBookingDate, ''), excluded.LastBookingDate)
+            """, (_now_str(),))
+            cursor.execute("""
+                INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, Status,
+                                      SlotIndex, SlotCount, CreatedAt, PatientID)
+                SELECT i.ScheduleID, i.DoctorID, i.PatientName, i.PatientPhone, i.BookingDate, i.BookingTime, ?,
+                       i.SlotIndex, CASE WHEN i.SlotIndex IS NULL THEN 1 ELSE i.SlotCount END, ?, p.PatientID
+                FROM temp.BulkBookingItems i LEFT JOIN Patients p ON p.PhoneKey = i.PhoneKey
+                ORDER BY i.ItemIndex
+            """, (STATUS_CONFIRMED, _now_str()))
+            # Bitmask slot dalam satu shift sudah dipastikan tidak tumpang tindih, jadi SUM sama dengan OR
+            cursor.execute("""
+                UPDATE Schedules
+                SET Occupancy = Occupancy | IFNULL((SELECT SUM(i.Mask) FROM temp.BulkBookingItems i
+                                                    WHERE i.ScheduleID = Schedules.ScheduleID), 0)
+                WHERE ScheduleID IN (SELECT ScheduleID FROM temp.BulkBookingItems)
+            """)
+            cursor.execute("""
+                UPDATE Schedules
+                SET IsBooked = CASE WHEN SlotMinutes = 0 THEN 1 ELSE Occupancy = (1 << SlotTotal) - 1 END
+                WHERE ScheduleID IN (SELECT ScheduleID FROM temp.BulkBookingItems)
+            """)
+            events = []
+            if self.journal is not None:
+                # BEGIN IMMEDIATE menahan penulis lain, jadi semua booking di atas ID terakhir adalah milik batch ini
+                cursor.execute(f"SELECT {JOURNAL_BOOKING_COLUMNS} FROM Bookings WHERE BookingID > ? ORDER BY BookingID",
+                               (last_booking_id,))
+                events.append((EVENT_BOOKED, cursor.fetchall(), {"bulk": True}))
+            conn.commit()
+            self._record_journal(events)
+            logging.info(f"Bulk booking added {len(items)} bookings.")
+            return True, f"{len(items)} booking berhasil ditambahkan!", [(index, True, "OK") for index in range(len(items))]
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"Error adding bulk bookings: {e}")
+            return False, f"Gagal menambahkan booking massal: {e}", []
+        finally:
+            conn.close()
+
+    def cancel_bookings(self, doctor_id, date_from, date_to, refill_waitlist=False):
+        """
+        Membatalkan semua booking aktif seorang dokter dalam rentang tanggal (mis. dokter sakit) dalam satu transaksi.
+        Secara default jadwal yang kosong TIDAK diisi dari daftar tunggu, karena biasanya dokter memang tidak praktik;
+        gunakan block_schedules untuk menutup jadwalnya.
+        Mengembalikan (success, message, outcomes); outcomes berisi (booking_id, ok, pesan).
+        """
+        conn = self.db_manager.get_connection()
+        conn.isolation_level = None
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS BulkCancelled (
+                    BookingID INTEGER PRIMARY KEY, ScheduleID INTEGER, SlotIndex INTEGER, SlotCount INTEGER
+                )
+            """)
+            cursor.execute("DELETE FROM temp.BulkCancelled")
+            cursor.execute(f"""
+                INSERT INTO temp.BulkCancelled (BookingID, ScheduleID, SlotIndex, SlotCount)
+                SELECT BookingID, ScheduleID, SlotIndex, SlotCount FROM Bookings
+                WHERE DoctorID = ? AND BookingDate BETWEEN ? AND ? AND Status = '{STATUS_CONFIRMED}'
+            """, (doctor_id, date_from, date_to))
+            cursor.execute(
+                "UPDATE Bookings SET Status = ?, StatusUpdatedAt = ? WHERE BookingID IN (SELECT BookingID FROM temp.BulkCancelled)",
+                (STATUS_CANCELLED, _now_str())
+            )
+            # Slot milik booking aktif tidak tumpang tindih, jadi SUM bitmask-nya sama dengan OR
+            cursor.execute("""
+                UPDATE Schedules
+                SET IsBooked = 0,
+                    Occupancy = Occupancy & ~IFNULL((SELECT SUM(((1 << c.SlotCount) - 1) << c.SlotIndex)
+                                                     FROM temp.BulkCancelled c
+                                                     WHERE c.ScheduleID = Schedules.ScheduleID AND c.SlotIndex IS NOT NULL), 0)
+                WHERE ScheduleID IN (SELECT ScheduleID FROM temp.BulkCancelled)
+            """)
+            cursor.execute("SELECT BookingID, ScheduleID, SlotIndex, SlotCount FROM temp.BulkCancelled ORDER BY BookingID")
+            cancelled = cursor.fetchall()
+
+            events = []
+            if self.journal is not None:
+                cursor.execute(f"""
+                    SELECT {JOURNAL_BOOKING_COLUMNS} FROM Bookings
+                    WHERE BookingID IN (SELECT BookingID FROM temp.BulkCancelled) ORDER BY BookingID
+                """)
+                events.append((STATUS_CANCELLED, cursor.fetchall(), {"bulk": True}))
+            outcomes = []
+            for booking_id, schedule_id, slot_index, slot_count in cancelled:
+                message = "Dibatalkan."
+                if refill_waitlist:
+                    assigned = self._assign_from_waitlist(cursor, schedule_id, slot_index, slot_count, events)
+                    if assigned:
+                        message += f" Jadwal diberikan ke {assigned}."
+                outcomes.append((booking_id, True, message))
+            conn.commit()
+            self._record_journal(events)
+            logging.info(f"Cancelled {len(cancelled)} bookings for doctor {doctor_id} between {date_from} and {date_to}.")
+            return True, f"{len(cancelled)} booking berhasil dibatalkan.", outcomes
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"Error cancelling bookings for doctor {doctor_id} between {date_from} and {date_to}: {e}")
+            return False, f"Gagal membatalkan booking: {e}", []
+        finally:
+            conn.close()
+
+    def block_schedules(self, doctor_id, date_from, date_to, blocked=True):
+        """
+        Menutup (blocked=True) atau membuka kembali (blocked=False) semua jadwal kosong seorang dokter
+        dalam rentang tanggal dengan satu UPDATE. Jadwal yang sudah terisi (termasuk shift yang sebagian
+        slotnya sudah dibooking) tidak diubah.
+        Mengembalikan (success, message, schedule_ids yang berubah).
+        """
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT ScheduleID FROM Schedules WHERE DoctorID = ? AND Date BETWEEN ? AND ? AND IsBooked = 0 AND Occupancy = 0 AND IsBlocked = ?",
+                (doctor_id, date_from, date_to, 0 if blocked else 1)
+            )
+            schedule_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(
+                "UPDATE Schedules SET IsBlocked = ? WHERE DoctorID = ? AND Date BETWEEN ? AND ? AND IsBooked = 0 AND Occupancy = 0 AND IsBlocked = ?",
+                (1 if blocked else 0, doctor_id, date_from, date_to, 0 if blocked else 1)
+            )
+            conn.commit()
+            action = "ditutup" if blocked else "dibuka kembali"
+            logging.info(f"{len(schedule_ids)} schedules for doctor {doctor_id} {'blocked' if blocked else 'unblocked'}.")
+            return True, f"{len(schedule_ids)} jadwal {action}.", schedule_ids
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"Error blocking schedules for doctor {doctor_id}: {e}")
+            return False, f"Gagal mengubah jadwal: {e}", []
+        finally:
+            conn.close()
+
+    def cancel_booking(self, booking_id):
+        """Membatalkan booking (riwayat tetap disimpan) dan mengosongkan kembali jadwalnya."""
+        return self._change_booking_status(booking_id, STATUS_CANCELLED, free_schedule=True)
+
+    def complete_booking(self, booking_id):
+        """Menandai booking sudah selesai dilayani."""
+        return self._change_booking_status(booking_id, STATUS_COMPLETED, free_schedule=False)
+
+    def mark_no_show(self, booking_id):
+        """Menandai pasien tidak datang pada jadwal booking."""
+        return self._change_booking_status(booking_id, STATUS_NO_SHOW, free_schedule=False)
+
+    def delete_booking(self, booking_id):
+        """Dipertahankan untuk kompatibilitas: booking kini dibatalkan (soft cancel), bukan dihapus."""
+        return self.cancel_booking(booking_id)
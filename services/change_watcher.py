@@ -0,0 +1,119 @@
+"""
+Deteksi perubahan dari meja lain agar tampilan ikut diperbarui tanpa muat ulang manual.
+
+ChangeWatcher berjalan di thread background dan memeriksa database setiap interval_seconds:
+    1. Lokal (db_manager diberikan): PRAGMA data_version pada satu koneksi yang tetap terbuka.
+       Nilainya hanya berubah jika koneksi lain melakukan commit, tanpa membaca tabel apa pun.
+    2. Jika berubah (atau dalam mode server, lewat booking_service.get_change_sequence), Seq terakhir
+       ChangeLog dibandingkan dengan Seq yang sudah dilihat; commit yang tidak menyentuh
+       Bookings/Schedules/Doctors (jurnal, outbox pengingat) berhenti di sini.
+    3. Hanya jika Seq bertambah, booking_service.get_changes(seq_terakhir) mengambil baris yang berubah
+       dan on_changes(ChangeSet) dipanggil dari thread watcher.
+
+Saat tidak ada perubahan, biaya per interval hanya satu PRAGMA (atau satu request ringan ke server).
+"""
+import logging
+import threading
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class ChangeWatcher:
+    def __init__(self, booking_service, on_changes, db_manager=None, interval_seconds=2.0):
+        self.booking_service = booking_service
+        self.on_changes = on_changes
+        self.db_manager = db_manager
+        self.interval_seconds = interval_seconds
+        self.last_seq = None
+        self._conn = None # Koneksi tetap untuk PRAGMA data_version; hanya dipakai thread pemanggil poll
+        self._data_version = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.polls = 0
+        self.sequence_checks = 0
+        self.change_sets = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        if self.last_seq is None:
+            # Dicatat sekarang (tepat setelah tampilan dimuat penuh) agar perubahan sebelum poll pertama tidak terlewat
+            self.last_seq = self.booking_service.get_change_sequence()
+        self._thread = threading.Thread(target=self._run, name="change-watcher", daemon=True)
+        self._thread.start()
+        logging.info(f"Change watcher started (every {self.interval_seconds}s).")
+
+    def close(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        else:
+            self._close_connection()
+
+    def metrics(self):
+        return {"polls": self.polls, "sequence_checks": self.sequence_checks, "change_sets": self.change_sets,
+                "last_seq": self.last_seq}
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval_seconds):
+                try:
+                    self.poll()
+                except Exception as e:
+                    # Database sibuk/server tidak terjangkau: dicoba lagi pada interval berikutnya
+                    logging.error(f"Change watcher poll failed: {e}")
+                    self._close_connection()
+        finally:
+            self._close_connection()
+
+    def _close_connection(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            self._data_version = None
+
+    def _database_changed(self):
+        """True jika koneksi lain melakukan commit sejak pemeriksaan terakhir (selalu True tanpa db_manager)."""
+        if self.db_manager is None:
+            return True
+        if self._conn is None:
+            self._conn = self.db_manager.get_connection()
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self._data_version
+        self._data_version = version
+        return changed
+
+    def _current_sequence(self):
+        self.sequence_checks += 1
+        if self._conn is not None:
+            row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'ChangeLog'").fetchone()
+            return row[0] if row else 0
+        return self.booking_service.get_change_sequence()
+
+    def poll(self):
+        """
+        Satu kali pemeriksaan; mengembalikan ChangeSet yang diteruskan ke on_changes, atau None.
+        Dipanggil oleh thread watcher (atau langsung, tanpa start(), dari satu thread saja).
+        """
+        self.polls += 1
+        if not self._database_changed():
+            return None
+        seq = self._current_sequence()
+        if seq is None:
+            return None
+        if self.last_seq is None:
+            self.last_seq = seq # Tanpa start(): pemeriksaan pertama hanya mencatat posisi
+            return None
+        if seq == self.last_seq:
+            return None
+        changes = self.booking_service.get_changes(self.last_seq)
+        if changes is None:
+            return None
+        self.last_seq = changes.seq
+        self.change_sets += 1
+        logging.debug(f"Change watcher: seq {changes.seq}, {len(changes.bookings)} bookings, "
+                      f"{len(changes.removed_booking_ids)} removed, doctors {changes.doctor_ids}, "
+                      f"complete={changes.complete}.")
+        self.on_changes(changes)
+        return changes
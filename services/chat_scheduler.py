@@ -0,0 +1,370 @@
+"""
+Antrean permintaan chatbot.
+
+Pesan pengguna tidak lagi diabaikan ketika jawaban sebelumnya belum datang. Semua pesan masuk
+ke antrean dan dikirim berurutan oleh satu thread, dengan aturan:
+    - Pesan susulan yang masuk dalam coalesce_seconds setelah pesan sebelumnya, selama pesan itu
+      belum dikirim, digabung (coalescing) menjadi satu permintaan.
+    - Jumlah permintaan ke model dibatasi requests_per_minute (jendela geser 60 detik).
+    - Error sementara (429/ResourceExhausted, 5xx, koneksi putus) dicoba ulang dengan
+      exponential backoff + jitter, selama belum melewati deadline permintaan.
+    - metrics() mengembalikan kedalaman antrean, jumlah retry, dan latensi.
+
+Model cukup memiliki method send(prompt, history) -> (teks_jawaban, history_baru), sehingga
+GeminiChatModel bisa diganti FakeChatModel untuk pengujian tanpa jaringan; FakeClock menggantikan
+jam monotonic agar jeda coalescing, batas per menit, backoff, dan deadline bisa diuji tanpa menunggu.
+"""
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Nama kelas error google.api_core yang bersifat sementara; dicocokkan lewat nama agar
+# modul ini tidak perlu mengimpor stack Gemini.
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "Aborted",
+}
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def is_retryable_error(error):
+    """True jika error kemungkinan hilang sendiri (rate limit, server sibuk, koneksi putus)."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and code in RETRYABLE_STATUS_CODES
+
+
+class MonotonicClock:
+    """Jam default scheduler: time.monotonic dan Condition.wait biasa."""
+
+    def now(self):
+        return time.monotonic()
+
+    def wait(self, condition, timeout=None):
+        """Menunggu notify pada condition (yang sedang dipegang) paling lama timeout detik."""
+        condition.wait(timeout)
+
+
+class ChatDeadlineExceeded(Exception):
+    """Permintaan tidak selesai sebelum deadline (termasuk waktu antre dan retry)."""
+
+
+class ChatRequest:
+    __slots__ = ("request_id", "messages", "submitted_at", "updated_at", "deadline", "on_result", "on_error",
+                 "attempts")
+
+    def __init__(self, request_id, message, now, deadline, on_result, on_error):
+        self.request_id = request_id
+        self.messages = [message]
+        self.submitted_at = now
+        self.updated_at = now
+        self.deadline = deadline
+        self.on_result = on_result
+        self.on_error = on_error
+        self.attempts = 0
+
+    @property
+    def text(self):
+        return "\n".join(self.messages)
+
+
+class ChatRequestScheduler:
+    """
+    Menjalankan permintaan chatbot satu per satu di thread background.
+
+    prompt_builder (opsional) mengubah teks pesan (yang mungkin sudah digabung) menjadi prompt
+    lengkap; dipanggil di thread scheduler tepat sebelum dikirim. Callback on_result(request_id,
+    text, history) dan on_error(request_id, message, error) juga dipanggil dari thread scheduler.
+    clock (default MonotonicClock) menentukan waktu sekarang dan cara menunggu.
+    """
+
+    def __init__(self, model, prompt_builder=None, history=None, requests_per_minute=15, max_retries=4,
+                 base_delay=1.0, max_delay=30.0, deadline_seconds=60.0, coalesce_seconds=0.5, clock=None):
+        self.model = model
+        self.clock = clock or MonotonicClock()
+        self.prompt_builder = prompt_builder
+        self.history = list(history) if history else []
+        self.requests_per_minute = requests_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline_seconds = deadline_seconds
+        self.coalesce_seconds = coalesce_seconds
+
+        self._queue = deque()
+        self._sent_times = deque() # waktu setiap panggilan model dalam 60 detik terakhir
+        self._condition = threading.Condition()
+        self._ids = itertools.count(1)
+        self._closed = False
+        self._in_flight = None
+        self._held_history = [] # giliran dari add_history selama ada permintaan yang sedang dikirim
+        self._latencies = deque(maxlen=500)
+        self._counters = {"submitted": 0, "coalesced": 0, "completed": 0, "failed": 0,
+                          "retries": 0, "rate_limit_waits": 0}
+        self._max_queue_depth = 0
+        self._thread = threading.Thread(target=self._run, name="chatbot-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, message, on_result=None, on_error=None):
+        """
+        Memasukkan pesan ke antrean dan mengembalikan request_id-nya. Jika permintaan terakhir
+        di antrean belum dikirim dan pesan terakhirnya masuk paling lama coalesce_seconds yang lalu,
+        pesan digabung ke permintaan itu (deadline-nya diperpanjang untuk pesan baru) dan
+        request_id-nya yang dikembalikan.
+        """
+        now = self.clock.now()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Chat scheduler sudah ditutup.")
+            self._counters["submitted"] += 1
+            if self._queue and now - self._queue[-1].updated_at <= self.coalesce_seconds:
+                request = self._queue[-1]
+                request.messages.append(message)
+                request.updated_at = now
+                # Pesan susulan mendapat batas waktu penuh, bukan sisa waktu pesan pertama
+                request.deadline = max(request.deadline, now + self.deadline_seconds)
+                # Callback terbaru yang dipakai; satu jawaban untuk semua pesan yang digabung
+                request.on_result = on_result or request.on_result
+                request.on_error = on_error or request.on_error
+                self._counters["coalesced"] += 1
+                logging.debug(f"Chat message coalesced into request {request.request_id} "
+                              f"({len(request.messages)} messages).")
+            else:
+                request = ChatRequest(next(self._ids), message, now, now + self.deadline_seconds, on_result, on_error)
+                self._queue.append(request)
+                self._max_queue_depth = max(self._max_queue_depth, self._queue_depth())
+            self._condition.notify_all()
+            return request.request_id
+
+    def add_history(self, entries):
+        """
+        Menambahkan giliran percakapan yang dijawab di luar scheduler (mis. jawaban lokal) ke history.
+        Selama ada permintaan yang sedang dikirim, giliran ditahan lalu ditambahkan setelah jawabannya.
+        """
+        with self._condition:
+            if self._in_flight:
+                self._held_history.extend(entries)
+            else:
+                self.history.extend(entries)
+
+    def _queue_depth(self):
+        return len(self._queue) + (1 if self._in_flight else 0)
+
+    def queue_depth(self):
+        """Jumlah permintaan yang menunggu ditambah yang sedang dikirim."""
+        with self._condition:
+            return self._queue_depth()
+
+    def metrics(self):
+        with self._condition:
+            latencies = sorted(self._latencies)
+            stats = dict(self._counters)
+            stats["queue_depth"] = self._queue_depth()
+            stats["max_queue_depth"] = self._max_queue_depth
+        if latencies:
+            stats["latency_p50_ms"] = latencies[len(latencies) // 2] * 1000
+            stats["latency_p95_ms"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+            stats["latency_max_ms"] = latencies[-1] * 1000
+        return stats
+
+    def close(self, timeout=None):
+        """Menghentikan thread; permintaan yang masih antre digagalkan."""
+        with self._condition:
+            self._closed = True
+            pending = list(self._queue)
+            self._queue.clear()
+            self._condition.notify_all()
+        for request in pending:
+            self._fail(request, "Chatbot dihentikan sebelum pesan terkirim.", None)
+        self._thread.join(timeout)
+
+    def _wait_until(self, wake_at):
+        """Menunggu sampai self.clock mencapai wake_at; False jika scheduler ditutup selama menunggu."""
+        with self._condition:
+            while not self._closed:
+                remaining = wake_at - self.clock.now()
+                if remaining <= 0:
+                    return True
+                self.clock.wait(self._condition, remaining)
+            return False
+
+    def _next_request(self):
+        with self._condition:
+            while True:
+                if self._closed:
+                    return None
+                if self._queue:
+                    head = self._queue[0]
+                    # Beri jeda singkat agar pesan susulan yang diketik beruntun ikut tergabung
+                    ready_at = head.updated_at + self.coalesce_seconds
+                    remaining = ready_at - self.clock.now()
+                    if remaining <= 0:
+                        self._in_flight = self._queue.popleft()
+                        return self._in_flight
+                    self.clock.wait(self._condition, remaining)
+                else:
+                    self.clock.wait(self._condition)
+
+    def _reserve_send_slot(self, request):
+        """Menunggu jatah requests_per_minute; False jika deadline lewat atau scheduler ditutup."""
+        while True:
+            with self._condition:
+                now = self.clock.now()
+                while self._sent_times and self._sent_times[0] <= now - 60:
+                    self._sent_times.popleft()
+                if len(self._sent_times) < self.requests_per_minute:
+                    self._sent_times.append(now)
+                    return True
+                wake_at = self._sent_times[0] + 60
+                self._counters["rate_limit_waits"] += 1
+            if wake_at > request.deadline:
+                return False
+            if not self._wait_until(wake_at):
+                return False
+
+    def _backoff_delay(self, attempt):
+        # "Full jitter": acak antara 0 dan batas eksponensial agar client tidak retry serempak
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _run(self):
+        while True:
+            request = self._next_request()
+            if request is None:
+                return
+            try:
+                self._process(request)
+            finally:
+                with self._condition:
+                    self._in_flight = None
+                    self.history.extend(self._held_history) # permintaan gagal: history model tidak berubah
+                    self._held_history.clear()
+
+    def _process(self, request):
+        prompt = self.prompt_builder(request.text) if self.prompt_builder else request.text
+        while True:
+            if self.clock.now() >= request.deadline or not self._reserve_send_slot(request):
+                self._fail(request, "Batas waktu permintaan chatbot terlewati. Silakan coba lagi.",
+                           ChatDeadlineExceeded(f"request {request.request_id} exceeded its deadline"))
+                return
+            request.attempts += 1
+            try:
+                text, history = self.model.send(prompt, self.history)
+            except Exception as e:
+                retry_allowed = is_retryable_error(e) and request.attempts <= self.max_retries
+                delay = self._backoff_delay(request.attempts - 1) if retry_allowed else 0
+                if retry_allowed and self.clock.now() + delay < request.deadline:
+                    with self._condition:
+                        self._counters["retries"] += 1
+                    logging.warning(f"Chat request {request.request_id} attempt {request.attempts} failed "
+                                    f"({type(e).__name__}: {e}); retrying in {delay:.2f}s.")
+                    if self._wait_until(self.clock.now() + delay):
+                        continue
+                self._fail(request, None, e)
+                return
+
+            latency = self.clock.now() - request.submitted_at
+            with self._condition:
+                self.history = list(history) + self._held_history
+                self._held_history.clear()
+                self._counters["completed"] += 1
+                self._latencies.append(latency)
+            logging.info(f"Chat request {request.request_id} answered in {latency * 1000:.0f} ms "
+                         f"after {request.attempts} attempt(s).")
+            if request.on_result:
+                request.on_result(request.request_id, text, self.history)
+            return
+
+    def _fail(self, request, message, error):
+        with self._condition:
+            self._counters["failed"] += 1
+        if message is None:
+            message = describe_chat_error(error)
+        logging.error(f"Chat request {request.request_id} failed after {request.attempts} attempt(s): {error}")
+        if request.on_error:
+            request.on_error(request.request_id, message, error)
+
+
+def describe_chat_error(error):
+    """Pesan error yang ditampilkan ke pengguna untuk setiap jenis kegagalan model."""
+    name = type(error).__name__
+    if name == "BlockedPromptException":
+        return f"Respons diblokir karena alasan keamanan. Harap coba lagi dengan pesan lain. Detail: {error}"
+    if is_retryable_error(error) and (name in ("ResourceExhausted", "TooManyRequests")
+                                      or getattr(error, "code", None) == 429):
+        return f"Layanan chatbot sedang sibuk (batas permintaan tercapai). Silakan coba beberapa saat lagi. Detail: {error}"
+    if isinstance(error, ConnectionError):
+        return f"Kesalahan koneksi jaringan. Pastikan Anda memiliki koneksi internet yang stabil. Detail: {error}"
+    if hasattr(error, "code") and hasattr(error, "message"):
+        return f"Kesalahan saat memanggil Gemini API. Pastikan API Key benar dan ada koneksi internet. Detail: {error}"
+    return f"Terjadi kesalahan tak terduga saat berinteraksi dengan Gemini API. Detail: {error}"
+
+
+class FakeRateLimitError(Exception):
+    """Tiruan error 429 dari Gemini API."""
+    code = 429
+
+
+class FakeServerError(Exception):
+    """Tiruan error 503 dari Gemini API."""
+    code = 503
+
+
+class FakeClock:
+    """
+    Jam tiruan untuk pengujian: waktu hanya maju lewat advance(). Penantian dengan timeout
+    memeriksa ulang jam setiap poll_seconds detik nyata, jadi scheduler lanjut segera setelah advance().
+    """
+
+    def __init__(self, start=1000.0, poll_seconds=0.001):
+        self._now = start
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+
+    def now(self):
+        with self._lock:
+            return self._now
+
+    def advance(self, seconds):
+        with self._lock:
+            self._now += seconds
+
+    def wait(self, condition, timeout=None):
+        condition.wait(None if timeout is None else self.poll_seconds)
+
+
+class FakeChatModel:
+    """
+    Model lokal untuk pengujian scheduler tanpa jaringan. Menjawab dengan mengulang prompt
+    setelah `latency` detik, dan melempar error sementara dengan peluang error_rate
+    (atau sesuai urutan di `errors`, jika diberikan).
+    """
+
+    def __init__(self, latency=0.05, error_rate=0.0, errors=None, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self._errors = deque(errors or [])
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def send(self, prompt, history):
+        with self._lock:
+            self.calls += 1
+            error = self._errors.popleft() if self._errors else None
+            if error is None and self.error_rate and self._random.random() < self.error_rate:
+                error = self._random.choice([FakeRateLimitError("429 Resource has been exhausted"),
+                                             FakeServerError("503 The model is overloaded")])
+        if self.latency:
+            time.sleep(self.latency)
+        if error is not None:
+            raise error
+        text = f"Jawaban untuk: {prompt}"
+        return text, list(history) + [{"role": "user", "parts": [prompt]}, {"role": "model", "parts": [text]}]
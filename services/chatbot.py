@@ -1,8 +1,9 @@
-import google.generativeai as genai
-from PyQt5.QtCore import QObject, pyqtSignal, QThread
+from PyQt5.QtCore import QObject, pyqtSignal
 import logging
-import time # Meskipun tidak digunakan untuk timeout, biarkan saja jika ada rencana lain
-import google.api_core.exceptions
+
+# google.generativeai dan google.api_core sengaja diimpor di dalam fungsi: keduanya berat
+# (protobuf, grpc, google.auth) dan baru dibutuhkan saat halaman chatbot pertama kali dipakai,
+# sehingga tidak memperlambat waktu buka aplikasi.
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -14,6 +15,8 @@ class GeminiChatbotService:
         if not api_key or not api_key.startswith("AIza"):
             logging.error("API Key for Gemini is missing or seems invalid.")
             return False
+        import google.generativeai as genai
+        import google.api_core.exceptions
         try:
             genai.configure(api_key=api_key)
             # Uji koneksi dengan mengambil instance model, bukan hanya list_models()
@@ -27,57 +30,42 @@ class GeminiChatbotService:
             logging.error(f"An unexpected error occurred during initial API key validation: {e}", exc_info=True)
             return False
 
-class GeminiChatbotWorker(QObject):
-    response_received = pyqtSignal(str, list)
-    error_occurred = pyqtSignal(str)
-    finished = pyqtSignal()
+class GeminiChatModel:
+    """
+    Adapter Gemini untuk ChatRequestScheduler: send(prompt, history) -> (teks, history_baru).
+    Model dibuat sekali di thread scheduler; error API diteruskan apa adanya agar scheduler
+    bisa memutuskan perlu retry atau tidak.
+    """
 
-    def __init__(self, api_key, user_message, chat_history=None, parent=None):
-        super().__init__(parent)
+    def __init__(self, api_key, model_name='gemini-1.5-flash'):
         self._api_key = api_key
-        self._user_message = user_message
-        self._chat_history = chat_history if chat_history is not None else []
+        self._model_name = model_name
         self._model = None
-        self._chat_session = None
-        logging.debug(f"GeminiChatbotWorker initialized for message: '{user_message[:50]}...'")
 
-    def run(self):
-        logging.debug("GeminiChatbotWorker run method started.")
-        try:
+    def send(self, prompt, history):
+        if self._model is None:
+            import google.generativeai as genai
             genai.configure(api_key=self._api_key)
-            
-            # Inisialisasi model di dalam thread untuk memastikan konteks yang benar
-            self._model = genai.GenerativeModel('gemini-1.5-flash') 
-            logging.debug("Gemini model initialized within worker thread.")
+            self._model = genai.GenerativeModel(self._model_name)
+            logging.debug("Gemini model initialized within chatbot scheduler thread.")
 
-            self._chat_session = self._model.start_chat(history=self._chat_history)
-            logging.info(f"Gemini chat session started/continued. History size: {len(self._chat_session.history)}")
+        chat_session = self._model.start_chat(history=history)
+        logging.debug(f"Sending message to Gemini (history size {len(history)}): '{prompt[:50]}...'")
+        response = chat_session.send_message(prompt)
+        logging.debug("Response received from Gemini API.")
+        return response.text, chat_session.history
 
-            logging.debug(f"Sending message to Gemini: '{self._user_message}'")
-            
-            # --- Perbaikan: Argumen 'timeout' dihapus dari send_message ---
-            response = self._chat_session.send_message(self._user_message) 
-            logging.debug(f"Response received from Gemini API.")
 
-            self.response_received.emit(response.text, self._chat_session.history)
-            logging.debug(f"Emitted response_received signal.")
+class ChatbotSignals(QObject):
+    """
+    Callback ChatRequestScheduler dipanggil dari thread scheduler; sinyal ini meneruskannya
+    ke thread GUI (koneksi antar-thread Qt otomatis memakai queued connection).
+    """
+    response_received = pyqtSignal(int, str, list)
+    error_occurred = pyqtSignal(int, str)
 
-        except genai.types.BlockedPromptException as e:
-            error_msg = f"Respons diblokir karena alasan keamanan. Harap coba lagi dengan pesan lain. Detail: {e}"
-            logging.warning(f"BlockedPromptException: {error_msg}")
-            self.error_occurred.emit(error_msg)
-        except google.api_core.exceptions.GoogleAPICallError as e:
-            error_msg = f"Kesalahan saat memanggil Gemini API. Pastikan API Key benar dan ada koneksi internet. Detail: {e}"
-            logging.error(f"GoogleAPICallError: {error_msg}", exc_info=True)
-            self.error_occurred.emit(error_msg)
-        except ConnectionError as e:
-            error_msg = f"Kesalahan koneksi jaringan. Pastikan Anda memiliki koneksi internet yang stabil. Detail: {e}"
-            logging.error(f"ConnectionError: {error_msg}", exc_info=True)
-            self.error_occurred.emit(error_msg)
-        except Exception as e:
-            error_msg = f"Terjadi kesalahan tak terduga saat berinteraksi dengan Gemini API. Detail: {e}"
-            logging.error(f"Unhandled exception in GeminiChatbotWorker: {error_msg}", exc_info=True)
-            self.error_occurred.emit(error_msg)
-        finally:
-            self.finished.emit()
-            logging.debug("GeminiChatbotWorker finished its run, emitting finished signal.")
\ No newline at end of file
+    def on_result(self, request_id, text, history):
+        self.response_received.emit(request_id, text, list(history))
+
+    def on_error(self, request_id, message, error):
+        self.error_occurred.emit(request_id, message)
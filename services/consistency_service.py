@@ -0,0 +1,288 @@
+"""
+Audit dan perbaikan konsistensi Schedules terhadap Bookings.
+
+IsBooked dan Occupancy adalah data turunan: nilainya seharusnya bisa dihitung ulang dari booking
+yang masih memegang jadwal (semua status kecuali Cancelled; booking Completed/NoShow tidak
+mengosongkan jadwal). Crash di tengah transaksi lama atau edit manual ke file database bisa membuat
+keduanya tidak cocok. Audit menghitung nilai seharusnya untuk semua jadwal dalam rentang tanggal
+dengan beberapa query berbasis himpunan (temp table + window function), bukan loop per baris.
+
+Temuan:
+    flag_mismatch             IsBooked/Occupancy tidak sesuai booking (bisa diperbaiki otomatis)
+    double_booked             lebih dari satu booking memegang jadwal/slot yang sama
+    slot_out_of_range         slot booking di luar shift, atau booking per-slot pada shift tanpa slot (dan sebaliknya)
+    blocked_with_booking      jadwal ditutup (IsBlocked) tetapi masih dipegang booking
+    orphan_booking            booking aktif yang jadwalnya tidak ada
+    booking_schedule_mismatch dokter/tanggal booking berbeda dengan jadwalnya
+    orphan_schedule           jadwal yang dokternya tidak ada
+
+Hanya flag_mismatch yang diperbaiki otomatis (nilai turunannya pasti); temuan lain menyangkut data
+pasien sehingga hanya dilaporkan. Jadwal yang sekaligus double_booked/slot_out_of_range tidak
+disentuh karena nilai seharusnya tidak bisa ditentukan.
+
+Menjalankan audit dari command line:
+    python -m services.consistency_service --db klinik_awan.db --from 2025-01-01 --to 2025-12-31 --repair
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseManager
+from services.booking_service import STATUS_CANCELLED
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+FINDING_KINDS = (
+    "flag_mismatch", "double_booked", "slot_out_of_range", "blocked_with_booking",
+    "orphan_booking", "booking_schedule_mismatch", "orphan_schedule",
+)
+
+# Kondisi per jadwal atas temp.AuditSchedules
+SCHEDULE_CONDITIONS = {
+    "double_booked": "(SlotMinutes = 0 AND Holders > 1) OR (SlotMinutes > 0 AND Overlap)",
+    "slot_out_of_range": "(SlotMinutes > 0 AND (WholeShift > 0 OR MinStart < 0 OR MaxEnd > SlotTotal)) "
+                         "OR (SlotMinutes = 0 AND Holders > WholeShift)",
+    "blocked_with_booking": "IsBlocked = 1 AND Holders > 0",
+    "flag_mismatch": "NOT Ambiguous AND (IsBooked != ExpectedBooked OR Occupancy != ExpectedOccupancy)",
+}
+
+
+def _date_bounds(cursor):
+    """Tanggal paling awal dan paling akhir di Schedules maupun Bookings (booking yatim bisa di luar rentang jadwal)."""
+    # Subquery MIN/MAX terpisah agar masing-masing cukup membaca ujung index tanggal
+    cursor.execute("""
+        SELECT MIN(first), MAX(last) FROM (
+            SELECT (SELECT MIN(Date) FROM Schedules) AS first, (SELECT MAX(Date) FROM Schedules) AS last
+            UNION ALL
+            SELECT (SELECT MIN(BookingDate) FROM Bookings), (SELECT MAX(BookingDate) FROM Bookings)
+        )
+    """)
+    return cursor.fetchone()
+
+
+class ConsistencyService:
+    def __init__(self, db_manager, chunk_days=31, pause_seconds=0.05, sample_size=20):
+        """
+        chunk_days/pause_seconds: ukuran rentang dan jeda antar rentang pada run_incremental,
+        agar audit di background tidak menahan penulis terlalu lama.
+        sample_size: jumlah ID contoh per jenis temuan yang disertakan di laporan.
+        """
+        self.db_manager = db_manager
+        self.chunk_days = chunk_days
+        self.pause_seconds = pause_seconds
+        self.sample_size = sample_size
+
+    def _build_audit_tables(self, cursor, date_from, date_to):
+        """Mengisi temp.AuditSchedules: keadaan tersimpan vs keadaan seharusnya untuk setiap jadwal dalam rentang."""
+        cursor.execute("DROP TABLE IF EXISTS temp.AuditHeld")
+        # Booking yang memegang jadwal, dikelompokkan per jadwal. Booking satu slot tumpang tindih
+        # hanya jika SlotIndex-nya sama, jadi cukup dibandingkan COUNT dengan COUNT(DISTINCT).
+        cursor.execute(f"""
+            CREATE TEMP TABLE AuditHeld AS
+            SELECT ScheduleID,
+                   COUNT(*) AS Holders,
+                   SUM(SlotIndex IS NULL) AS WholeShift,
+                   IFNULL(SUM(((1 << IFNULL(SlotCount, 1)) - 1) << SlotIndex), 0) AS Mask,
+                   COUNT(SlotIndex) != COUNT(DISTINCT SlotIndex) AS Overlap,
+                   MIN(SlotIndex) AS MinStart,
+                   MAX(SlotIndex + IFNULL(SlotCount, 1)) AS MaxEnd,
+                   MAX(IFNULL(SlotCount, 1)) AS MaxSlotCount
+            FROM Bookings
+            WHERE Status != '{STATUS_CANCELLED}'
+              AND ScheduleID IN (SELECT ScheduleID FROM Schedules WHERE Date BETWEEN ? AND ?)
+            GROUP BY ScheduleID
+        """, (date_from, date_to))
+        # Jadwal yang punya booking beberapa slot sekaligus (jarang): tumpang tindih sebagian dicek dengan
+        # membandingkan awal slot dengan akhir slot terjauh dari booking-booking sebelumnya (urut SlotIndex).
+        cursor.execute(f"""
+            UPDATE temp.AuditHeld SET Overlap = 1
+            WHERE ScheduleID IN (
+                SELECT ScheduleID FROM (
+                    SELECT ScheduleID,
+                           SlotIndex < MAX(SlotIndex + IFNULL(SlotCount, 1)) OVER (
+                               PARTITION BY ScheduleID ORDER BY SlotIndex
+                               ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                           ) AS Overlaps
+                    FROM Bookings
+                    WHERE Status != '{STATUS_CANCELLED}'
+                      AND ScheduleID IN (SELECT ScheduleID FROM temp.AuditHeld WHERE MaxSlotCount > 1 AND NOT Overlap)
+                )
+                WHERE Overlaps
+            )
+        """)
+        cursor.execute("DROP TABLE IF EXISTS temp.AuditSchedules")
+        cursor.execute(f"""
+            CREATE TEMP TABLE AuditSchedules AS
+            SELECT *,
+                   ({SCHEDULE_CONDITIONS["double_booked"]}) OR ({SCHEDULE_CONDITIONS["slot_out_of_range"]}) AS Ambiguous,
+                   CASE WHEN SlotMinutes > 0 THEN SlotTotal > 0 AND Mask = (1 << SlotTotal) - 1
+                        ELSE Holders > 0 END AS ExpectedBooked,
+                   CASE WHEN SlotMinutes > 0 THEN Mask ELSE 0 END AS ExpectedOccupancy
+            FROM (
+                SELECT s.ScheduleID, s.DoctorID, s.IsBooked, s.Occupancy, s.IsBlocked, s.SlotMinutes, s.SlotTotal,
+                       IFNULL(h.Holders, 0) AS Holders, IFNULL(h.WholeShift, 0) AS WholeShift,
+                       IFNULL(h.Mask, 0) AS Mask, IFNULL(h.Overlap, 0) AS Overlap,
+                       -- Tanpa booking per-slot, NULL di sini membuat Ambiguous NULL dan jadwal lolos dari flag_mismatch
+                       IFNULL(h.MinStart, 0) AS MinStart, IFNULL(h.MaxEnd, 0) AS MaxEnd
+                FROM Schedules s
+                LEFT JOIN temp.AuditHeld h ON h.ScheduleID = s.ScheduleID
+                WHERE s.Date BETWEEN ? AND ?
+            )
+        """, (date_from, date_to))
+
+    def _collect(self, cursor, query, params=()):
+        cursor.execute(query, params)
+        ids = [row[0] for row in cursor.fetchall()]
+        return len(ids), ids[:self.sample_size]
+
+    def audit(self, date_from=None, date_to=None, repair=False):
+        """
+        Mengaudit (dan jika repair=True memperbaiki flag_mismatch) semua jadwal dengan tanggal
+        date_from..date_to (default: seluruh isi database) dalam satu transaksi.
+        Mengembalikan dict laporan: jumlah per jenis temuan, contoh ID, jumlah yang diperbaiki, durasi.
+        """
+        started = time.perf_counter()
+        conn = self.db_manager.get_connection()
+        # isolation_level=None: transaksi dikontrol manual agar semua query melihat snapshot yang sama
+        conn.isolation_level = None
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE" if repair else "BEGIN")
+            if date_from is None or date_to is None:
+                first, last = _date_bounds(cursor)
+                date_from = date_from or first or date.today().isoformat()
+                date_to = date_to or last or date_from
+            self._build_audit_tables(cursor, date_from, date_to)
+
+            findings, samples = {}, {}
+            for kind, condition in SCHEDULE_CONDITIONS.items():
+                findings[kind], samples[kind] = self._collect(
+                    cursor, f"SELECT ScheduleID FROM temp.AuditSchedules WHERE {condition} ORDER BY ScheduleID")
+            findings["orphan_schedule"], samples["orphan_schedule"] = self._collect(cursor, """
+                SELECT a.ScheduleID FROM temp.AuditSchedules a
+                WHERE NOT EXISTS (SELECT 1 FROM Doctors d WHERE d.DoctorID = a.DoctorID)
+                ORDER BY a.ScheduleID
+            """)
+            # Sisi booking: dipilih berdasarkan tanggal booking karena jadwalnya mungkin tidak ada.
+            # Satu kali baca untuk kedua jenis temuan.
+            cursor.execute(f"""
+                SELECT b.BookingID, s.ScheduleID IS NULL FROM Bookings b
+                LEFT JOIN Schedules s ON s.ScheduleID = b.ScheduleID
+                WHERE b.BookingDate BETWEEN ? AND ? AND b.Status != '{STATUS_CANCELLED}'
+                  AND (s.ScheduleID IS NULL OR s.DoctorID != b.DoctorID OR s.Date != b.BookingDate)
+                ORDER BY b.BookingID
+            """, (date_from, date_to))
+            booking_rows = cursor.fetchall()
+            for kind, orphan in (("orphan_booking", 1), ("booking_schedule_mismatch", 0)):
+                ids = [booking_id for booking_id, is_orphan in booking_rows if is_orphan == orphan]
+                findings[kind], samples[kind] = len(ids), ids[:self.sample_size]
+
+            cursor.execute("SELECT COUNT(*), IFNULL(SUM(Holders), 0) FROM temp.AuditSchedules")
+            schedules_scanned, bookings_scanned = cursor.fetchone()
+
+            repaired = 0
+            if repair and findings["flag_mismatch"]:
+                cursor.execute(f"""
+                    UPDATE Schedules
+                    SET IsBooked = a.ExpectedBooked, Occupancy = a.ExpectedOccupancy
+                    FROM (SELECT ScheduleID, ExpectedBooked, ExpectedOccupancy FROM temp.AuditSchedules
+                          WHERE {SCHEDULE_CONDITIONS["flag_mismatch"]}) a
+                    WHERE Schedules.ScheduleID = a.ScheduleID
+                """)
+                repaired = cursor.rowcount
+            conn.commit()
+
+            report = {
+                "date_from": date_from,
+                "date_to": date_to,
+                "schedules_scanned": schedules_scanned,
+                "bookings_scanned": bookings_scanned,
+                "findings": {kind: findings[kind] for kind in FINDING_KINDS},
+                "samples": {kind: samples[kind] for kind in FINDING_KINDS if samples[kind]},
+                "repaired": repaired,
+                "elapsed_seconds": time.perf_counter() - started,
+            }
+            problems = {kind: count for kind, count in report["findings"].items() if count}
+            log = logging.warning if problems else logging.info
+            log(f"Consistency audit {date_from}..{date_to}: {schedules_scanned} schedules, "
+                f"{bookings_scanned} bookings, findings={problems or 'none'}, repaired={repaired}, "
+                f"elapsed={report['elapsed_seconds']:.2f}s")
+            return report
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            logging.error(f"Error auditing schedules between {date_from} and {date_to}: {e}")
+            raise
+        finally:
+            conn.close()
+
+    def run_incremental(self, date_from=None, date_to=None, repair=False):
+        """
+        Audit bertahap per rentang chunk_days (satu transaksi per rentang, jeda pause_seconds di antaranya)
+        untuk dijalankan di background. Mengembalikan laporan gabungan dengan format yang sama seperti audit.
+        """
+        started = time.perf_counter()
+        if date_from is None or date_to is None:
+            conn = self.db_manager.get_connection()
+            try:
+                first, last = _date_bounds(conn.cursor())
+            finally:
+                conn.close()
+            if first is None:
+                return self.audit(date.today().isoformat(), date.today().isoformat(), repair)
+            date_from = date_from or first
+            date_to = date_to or last
+
+        total = {"date_from": date_from, "date_to": date_to, "schedules_scanned": 0, "bookings_scanned": 0,
+                 "findings": dict.fromkeys(FINDING_KINDS, 0), "samples": {}, "repaired": 0, "chunks": 0}
+        chunk_start = date.fromisoformat(date_from)
+        end = date.fromisoformat(date_to)
+        while chunk_start <= end:
+            chunk_end = min(end, chunk_start + timedelta(days=self.chunk_days - 1))
+            report = self.audit(chunk_start.isoformat(), chunk_end.isoformat(), repair)
+            total["chunks"] += 1
+            for key in ("schedules_scanned", "bookings_scanned", "repaired"):
+                total[key] += report[key]
+            for kind, count in report["findings"].items():
+                total["findings"][kind] += count
+            for kind, ids in report["samples"].items():
+                sample = total["samples"].setdefault(kind, [])
+                sample.extend(ids[:self.sample_size - len(sample)])
+            chunk_start = chunk_end + timedelta(days=1)
+            if chunk_start <= end and self.pause_seconds:
+                time.sleep(self.pause_seconds) # Jeda agar penulis lain bisa mengambil lock
+        total["elapsed_seconds"] = time.perf_counter() - started
+        return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit konsistensi jadwal dan booking Klinik Awan")
+    parser.add_argument("--db", default="klinik_awan.db", help="Path file database SQLite")
+    parser.add_argument("--from", dest="date_from", default=None, help="Tanggal awal (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", default=None, help="Tanggal akhir (YYYY-MM-DD)")
+    parser.add_argument("--repair", action="store_true", help="Perbaiki IsBooked/Occupancy yang tidak sesuai")
+    parser.add_argument("--chunk-days", type=int, default=0,
+                        help="Audit bertahap per N hari (0 = satu transaksi untuk seluruh rentang)")
+    args = parser.parse_args()
+
+    service = ConsistencyService(DatabaseManager(args.db), chunk_days=args.chunk_days or 31)
+    if args.chunk_days:
+        report = service.run_incremental(args.date_from, args.date_to, repair=args.repair)
+    else:
+        report = service.audit(args.date_from, args.date_to, repair=args.repair)
+    print(f"Rentang {report['date_from']} s.d. {report['date_to']}: {report['schedules_scanned']} jadwal, "
+          f"{report['bookings_scanned']} booking, {report['elapsed_seconds']:.2f} detik")
+    for kind in FINDING_KINDS:
+        sample = report["samples"].get(kind)
+        print(f"  {kind:<26} {report['findings'][kind]:>8}" + (f"  contoh ID: {sample}" if sample else ""))
+    if args.repair:
+        print(f"Diperbaiki: {report['repaired']} jadwal")
+
+
+if __name__ == "__main__":
+    main()
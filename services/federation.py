@@ -0,0 +1,204 @@
+"""
+Federasi beberapa cabang klinik, masing-masing dengan file database SQLite sendiri (shard).
+
+Query gabungan (direktori dokter, jadwal tersedia, pencarian dan daftar booking) dikirim ke semua
+cabang secara paralel lewat thread pool, lalu hasil tiap cabang yang sudah terurut digabung dengan
+heapq.merge dan dipotong sesuai limit. SQLite melepas GIL selama query berjalan, jadi query ke
+cabang yang berbeda benar-benar berjalan bersamaan.
+
+Operasi tulis tidak pernah di-fan-out: selalu diarahkan ke BookingService milik cabang pemilik data.
+ID dokter/jadwal/booking hanya unik di dalam cabangnya, sehingga setiap baris hasil federasi membawa
+nama cabang (Branch*Record).
+
+Cabang yang gagal atau tidak menjawab dalam query_timeout_seconds tidak menggagalkan query gabungan,
+tetapi hasilnya (FederatedResult) mencatat cabang tersebut di failed_branches agar tampilan bisa
+memberi tahu bahwa hasilnya tidak lengkap. Setiap cabang menjalankan paling banyak satu query
+sekaligus: cabang yang query sebelumnya belum selesai dilewati (dan dicatat gagal), sehingga cabang
+yang macet tidak menghabiskan thread pool. Koneksi cabang memakai busy timeout dan query_timeout
+yang sama, jadi query yang macet di cabang tersebut akhirnya berhenti sendiri.
+"""
+import heapq
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import islice
+
+from database import DatabaseManager
+from services.booking_service import BookingService
+from services.records import BranchDoctorRecord, BranchScheduleRecord, BranchBookingRecord
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def _tagged(branch, rows, record_type):
+    return [record_type(branch, *row) for row in rows]
+
+
+class FederatedResult(list):
+    """
+    Baris hasil query gabungan (list biasa) ditambah failed_branches: dict nama_cabang -> alasan,
+    untuk cabang yang gagal atau timeout dan karena itu tidak ikut dalam hasil.
+    """
+
+    def __init__(self, rows=(), failed_branches=None):
+        super().__init__(rows)
+        self.failed_branches = dict(failed_branches or {})
+
+    @property
+    def complete(self):
+        return not self.failed_branches
+
+
+class FederatedBookingService:
+    def __init__(self, branch_databases, max_workers=None, archive_databases=None, query_timeout_seconds=10.0):
+        """
+        branch_databases: dict nama_cabang -> path database (mis. config.BRANCH_DATABASES).
+        archive_databases: dict opsional nama_cabang -> path database arsip cabang tersebut.
+        query_timeout_seconds: batas waktu menunggu semua cabang untuk satu query gabungan.
+        """
+        if not branch_databases:
+            raise ValueError("branch_databases must contain at least one branch")
+        archive_databases = archive_databases or {}
+        self.db_managers = {
+            branch: DatabaseManager(path, archive_db_name=archive_databases.get(branch),
+                                    timeout=query_timeout_seconds, query_timeout=query_timeout_seconds)
+            for branch, path in branch_databases.items()
+        }
+        # raise_errors: error database cabang harus sampai ke _fan_out, bukan menjadi list kosong
+        self.services = {branch: BookingService(db_manager, raise_errors=True)
+                         for branch, db_manager in self.db_managers.items()}
+        self.query_timeout_seconds = query_timeout_seconds
+        self._in_flight = {branch: threading.Semaphore(1) for branch in self.services}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or min(32, len(self.services)),
+                                        thread_name_prefix="branch-query")
+
+    @property
+    def branches(self):
+        return list(self.services)
+
+    def create_tables(self):
+        for db_manager in self.db_managers.values():
+            db_manager.create_tables()
+
+    def branch(self, branch):
+        """BookingService milik satu cabang; dipakai untuk semua operasi tulis."""
+        try:
+            return self.services[branch]
+        except KeyError:
+            raise KeyError(f"Unknown branch '{branch}'") from None
+
+    def _fan_out(self, call):
+        """
+        Menjalankan call(service) di semua cabang secara paralel.
+        Mengembalikan (dict cabang -> hasil, dict cabang -> alasan gagal). Cabang yang file databasenya
+        tidak ada, melempar error, masih menjalankan query sebelumnya, atau belum selesai setelah
+        query_timeout_seconds tidak ikut di hasil, sehingga satu file cabang yang bermasalah tidak
+        menggagalkan query gabungan; pemanggil meneruskannya ke FederatedResult.
+        """
+        futures, failed = {}, {}
+        for branch, service in self.services.items():
+            db_manager = self.db_managers[branch]
+            db_name = db_manager.db_name
+            if not db_manager.in_memory and not os.path.exists(db_name):
+                # sqlite3.connect akan membuat file kosong baru; cabang tanpa file dianggap gagal
+                failed[branch] = f"file database tidak ditemukan: {db_name}"
+                logging.error(f"Federated query skipped branch '{branch}': database file {db_name} not found.")
+                continue
+            in_flight = self._in_flight[branch]
+            if not in_flight.acquire(blocking=False):
+                failed[branch] = "query sebelumnya di cabang ini belum selesai"
+                logging.error(f"Federated query skipped branch '{branch}': previous query still running.")
+                continue
+            futures[branch] = self._pool.submit(self._run_branch_query, call, service, in_flight)
+        wait(futures.values(), timeout=self.query_timeout_seconds)
+        results = {}
+        for branch, future in futures.items():
+            if not future.done():
+                # Query yang sudah berjalan tidak bisa dibatalkan dari sini; ia dihentikan query_timeout
+                # koneksinya, dan sampai saat itu cabang ini dilewati oleh fan-out berikutnya.
+                failed[branch] = f"timeout setelah {self.query_timeout_seconds:g} detik"
+                logging.error(f"Federated query timed out on branch '{branch}' after {self.query_timeout_seconds}s.")
+                continue
+            try:
+                results[branch] = future.result()
+            except Exception as e:
+                failed[branch] = str(e)
+                logging.error(f"Federated query failed on branch '{branch}': {e}")
+        return results, failed
+
+    @staticmethod
+    def _run_branch_query(call, service, in_flight):
+        try:
+            return call(service)
+        finally:
+            in_flight.release()
+
+    @staticmethod
+    def _merge(per_branch, key, limit=None, reverse=False, failed_branches=None):
+        merged = heapq.merge(*per_branch, key=key, reverse=reverse)
+        return FederatedResult(islice(merged, limit) if limit else merged, failed_branches)
+
+    def get_all_doctors(self, specialty=None, limit=None):
+        """Direktori dokter gabungan semua cabang, urut nama lalu cabang."""
+        def query(service):
+            if specialty:
+                return service.get_doctors_by_specialty(specialty)
+            return service.get_all_doctors_with_specialty()
+
+        results, failed = self._fan_out(query)
+        per_branch = [
+            sorted(_tagged(branch, rows, BranchDoctorRecord), key=lambda d: (d.name, d.branch))
+            for branch, rows in results.items()
+        ]
+        return self._merge(per_branch, key=lambda d: (d.name, d.branch), limit=limit, failed_branches=failed)
+
+    def get_available_schedules(self, date, specialty=None, limit=None):
+        """Slot kosong semua cabang pada tanggal tertentu, urut jam mulai (yang paling awal lebih dulu)."""
+        results, failed = self._fan_out(lambda service: service.get_available_schedules(date, specialty, limit=limit))
+        per_branch = [_tagged(branch, rows, BranchScheduleRecord) for branch, rows in results.items()]
+        return self._merge(per_branch, key=lambda s: (s.start_time, s.branch, s.doctor_id), limit=limit,
+                           failed_branches=failed)
+
+    def search_bookings(self, query, limit=50):
+        """
+        Pencarian booking di semua cabang. Setiap cabang mengembalikan limit hasil paling relevan;
+        skor bm25 antar cabang tidak sebanding (statistik korpus berbeda), jadi hasil gabungan
+        diurutkan dari booking terbaru.
+        """
+        results, failed = self._fan_out(lambda service: service.search_bookings(query, limit=limit))
+        per_branch = [
+            sorted(_tagged(branch, rows, BranchBookingRecord), key=self._booking_key, reverse=True)
+            for branch, rows in results.items()
+        ]
+        return self._merge(per_branch, key=self._booking_key, limit=limit, reverse=True, failed_branches=failed)
+
+    def get_all_bookings(self, start_date=None, end_date=None, include_history=False, limit=None):
+        """Daftar booking gabungan; setiap cabang sudah mengurutkan dari yang terbaru, jadi cukup di-merge."""
+        results, failed = self._fan_out(
+            lambda service: service.get_all_bookings(start_date, end_date, include_history, limit))
+        per_branch = [_tagged(branch, rows, BranchBookingRecord) for branch, rows in results.items()]
+        return self._merge(per_branch, key=self._booking_key, limit=limit, reverse=True, failed_branches=failed)
+
+    @staticmethod
+    def _booking_key(booking):
+        return booking.booking_date, booking.booking_time
+
+    # Operasi tulis diarahkan ke cabang pemilik data
+    def add_booking(self, branch, *args, **kwargs):
+        return self.branch(branch).add_booking(*args, **kwargs)
+
+    def cancel_booking(self, branch, booking_id):
+        return self.branch(branch).cancel_booking(booking_id)
+
+    def complete_booking(self, branch, booking_id):
+        return self.branch(branch).complete_booking(booking_id)
+
+    def mark_no_show(self, branch, booking_id):
+        return self.branch(branch).mark_no_show(booking_id)
+
+    def add_to_waitlist(self, branch, *args, **kwargs):
+        return self.branch(branch).add_to_waitlist(*args, **kwargs)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
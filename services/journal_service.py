@@ -0,0 +1,323 @@
+"""
+Jurnal audit booking: siapa membuat, membatalkan, atau menyelesaikan booking apa dan kapan.
+
+BookingService memanggil record()/record_many() setelah transaksinya commit. Event hanya
+dimasukkan ke antrean dalam memori (tanpa I/O), lalu thread penulis mengambil semua event yang
+menumpuk dan menulisnya ke tabel BookingJournal dengan satu transaksi per batch (group commit).
+Dengan begitu latensi booking tidak bertambah satu commit (fsync) tambahan per event.
+
+Jaminan:
+    * Antrean dibatasi (max_queue). Jika penuh, record() menunggu paling lama put_timeout detik
+      lalu event dibuang, dihitung di metrics()['dropped'] dan dicatat di log ERROR.
+    * close() (dipanggil juga lewat atexit) menulis semua event yang sudah diterima sebelum
+      thread berhenti; flush() menunggu sampai event yang sudah diterima tersimpan.
+    * Gagal tulis (mis. database terkunci) dicoba ulang tanpa membuang batch. Hanya saat
+      penutupan, batch yang tetap gagal ditulis ke log ERROR dan dihitung sebagai 'lost'.
+
+Actor setiap event adalah actor JournalService (nama komputer), kecuali pemanggil menjalankan
+operasinya di dalam acting_as(actor): server booking memakainya agar event tercatat atas nama
+meja client yang meminta perubahan, bukan atas nama server.
+"""
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import queue
+import re
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from database import phone_key, phone_prefix_key
+from services.records import JournalRecord, record_factory
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+EVENT_BOOKED = "Booked"
+EVENT_CANCELLED = "Cancelled"
+EVENT_COMPLETED = "Completed"
+EVENT_NO_SHOW = "NoShow"
+EVENT_WAITLIST_ASSIGNED = "WaitlistAssigned"
+EVENT_WAITLISTED = "Waitlisted"
+
+# Urutan kolom booking yang diterima record_many; BookingService memakai konstanta ini di SELECT-nya
+JOURNAL_BOOKING_COLUMNS = "BookingID, ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime"
+
+INSERT_JOURNAL_SQL = f"""
+    INSERT INTO BookingJournal (EventAt, Event, {JOURNAL_BOOKING_COLUMNS}, Actor, Details)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_STOP = object()
+_current_actor = contextvars.ContextVar("journal_actor", default=None)
+
+
+def _now_str():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _journal_phone(phone):
+    """Nomor disimpan sebagai phone_key (sama dengan Patients.PhoneKey), agar '+62 812..' dan '0812..' sama."""
+    return phone_key(phone) if phone else phone
+
+
+@contextlib.contextmanager
+def acting_as(actor):
+    """Event yang dicatat di dalam blok ini (di thread/konteks yang sama) memakai actor ini."""
+    token = _current_actor.set(actor)
+    try:
+        yield
+    finally:
+        _current_actor.reset(token)
+
+
+class JournalService:
+    def __init__(self, db_manager, actor=None, max_queue=10000, batch_size=500, linger_seconds=0.2, put_timeout=0.5,
+                 retry_seconds=1.0):
+        """
+        actor: nama komputer/meja yang dicatat di setiap event (default: hostname).
+        max_queue: jumlah maksimum item (satu item = satu panggilan record/record_many) di antrean.
+        batch_size: jumlah event maksimum per transaksi tulis.
+        linger_seconds: setelah event pertama datang, penulis menunggu selama ini untuk mengumpulkan event lain,
+        agar commit jurnal (yang memegang kunci tulis database) jarang bersaing dengan commit booking.
+        """
+        self.db_manager = db_manager
+        self.actor = actor or socket.gethostname()
+        self.batch_size = batch_size
+        self.linger_seconds = linger_seconds
+        self.put_timeout = put_timeout
+        self.retry_seconds = retry_seconds
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self._counters = {"accepted": 0, "written": 0, "batches": 0, "max_batch": 0, "dropped": 0, "lost": 0}
+
+    # --- Mencatat event (dipanggil dari thread booking) ---
+
+    def record(self, event, booking_id=None, schedule_id=None, doctor_id=None, patient_name=None, patient_phone=None,
+               booking_date=None, booking_time=None, details=None):
+        """Mencatat satu event; kembali segera tanpa menyentuh database."""
+        return self.record_many(event, [(booking_id, schedule_id, doctor_id, patient_name, patient_phone,
+                                         booking_date, booking_time)], details)
+
+    def record_many(self, event, rows, details=None):
+        """
+        Mencatat event yang sama untuk banyak booking sekaligus (mis. pembatalan massal) sebagai satu item antrean.
+        rows: tuple dengan urutan JOURNAL_BOOKING_COLUMNS.
+        """
+        if not rows:
+            return True
+        event_at = _now_str()
+        details_json = json.dumps(details, ensure_ascii=False) if details else None
+        actor = _current_actor.get() or self.actor
+        entries = [(event_at, event, booking_id, schedule_id, doctor_id, patient_name, _journal_phone(patient_phone),
+                    booking_date, booking_time, actor, details_json)
+                   for booking_id, schedule_id, doctor_id, patient_name, patient_phone, booking_date, booking_time in rows]
+        if self._closed:
+            # Jurnal sedang/sudah ditutup: tulis langsung di thread pemanggil agar event tidak hilang
+            with self._condition:
+                self._counters["accepted"] += len(entries)
+            conn = self._write(entries, final=True)
+            if conn is not None:
+                conn.close()
+            return conn is not None
+        try:
+            self._queue.put(entries, timeout=self.put_timeout)
+        except queue.Full:
+            with self._condition:
+                self._counters["dropped"] += len(entries)
+            logging.error(f"Booking journal queue full, dropped {len(entries)} '{event}' events: {entries}")
+            return False
+        with self._condition:
+            self._counters["accepted"] += len(entries)
+        return True
+
+    # --- Thread penulis ---
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="booking-journal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        logging.info("Booking journal writer started.")
+
+    def flush(self, timeout=None):
+        """Menunggu sampai semua event yang sudah diterima tersimpan; False jika timeout habis lebih dulu."""
+        with self._condition:
+            target = self._counters["accepted"]
+            return self._condition.wait_for(
+                lambda: self._counters["written"] + self._counters["lost"] >= target, timeout)
+
+    def close(self, timeout=None):
+        """Menulis semua event yang tersisa di antrean lalu menghentikan thread penulis."""
+        if self._closed:
+            return True
+        # Sejak titik ini record() menulis langsung, jadi tidak ada event yang masuk antrean setelah _STOP
+        self._closed = True
+        if self._thread is None:
+            # Thread tidak pernah dijalankan: tulis isi antrean di thread pemanggil
+            conn = self._drain_remaining()
+            if conn is not None:
+                conn.close()
+            return True
+        atexit.unregister(self.close)
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logging.error("Booking journal writer is not draining its queue; close timed out.")
+            return False
+        self._thread.join(timeout)
+        flushed = not self._thread.is_alive()
+        if flushed:
+            logging.info(f"Booking journal closed: {self.metrics()}")
+        return flushed
+
+    def metrics(self):
+        with self._condition:
+            stats = dict(self._counters)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+    def _run(self):
+        conn = None
+        while True:
+            item = self._queue.get()
+            batch = []
+            stop = False
+            # Kumpulkan event yang datang dalam jendela linger_seconds menjadi satu transaksi (group commit)
+            deadline = time.monotonic() + self.linger_seconds
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.extend(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                conn = self._write(batch, final=stop, conn=conn)
+            if stop:
+                conn = self._drain_remaining(conn)
+                break
+        if conn is not None:
+            conn.close()
+
+    def _drain_remaining(self, conn=None):
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.extend(item)
+        if batch:
+            conn = self._write(batch, final=True, conn=conn)
+        return conn
+
+    def _write(self, entries, final=False, conn=None):
+        """
+        Menulis entries dalam satu transaksi. Mengembalikan koneksi yang bisa dipakai lagi oleh thread penulis
+        (None jika koneksi ditutup karena error). Gagal tulis dicoba ulang terus, kecuali saat penutupan (final)
+        yang hanya dicoba beberapa kali.
+        """
+        attempts = 0
+        while True:
+            try:
+                if conn is None:
+                    conn = self.db_manager.get_connection()
+                with conn:
+                    conn.executemany(INSERT_JOURNAL_SQL, entries)
+                with self._condition:
+                    self._counters["written"] += len(entries)
+                    self._counters["batches"] += 1
+                    self._counters["max_batch"] = max(self._counters["max_batch"], len(entries))
+                    self._condition.notify_all()
+                return conn
+            except (sqlite3.Error, AttributeError) as e: # AttributeError: get_connection gagal (None)
+                attempts += 1
+                logging.error(f"Error writing {len(entries)} booking journal events (attempt {attempts}): {e}")
+                if conn is not None:
+                    conn.close()
+                    conn = None
+                if final and attempts >= 3:
+                    logging.error(f"Booking journal events lost: {entries}")
+                    with self._condition:
+                        self._counters["lost"] += len(entries)
+                        self._condition.notify_all()
+                    return None
+                time.sleep(min(self.retry_seconds * attempts, 10))
+
+    # --- Query ---
+
+    def get_journal(self, patient=None, doctor_id=None, date_from=None, date_to=None, booking_id=None, event=None,
+                    limit=200):
+        """
+        Mengambil event jurnal terbaru dulu.
+        patient: awalan nomor telepon dalam format apa pun ('0812', '+62 812') atau awalan nama pasien
+        (tanpa beda huruf besar/kecil).
+        date_from/date_to (YYYY-MM-DD, inklusif) membatasi tanggal kejadian, bukan tanggal booking.
+        Event yang masih di antrean ditunggu sebentar agar perubahan terakhir ikut terbaca.
+        """
+        self.flush(timeout=1)
+        conditions = []
+        params = []
+        if patient:
+            key = phone_prefix_key(patient)
+            if key and not re.sub(r"[\d\s\-+.()]", "", patient):
+                # GLOB memakai idx_journal_phone (collation BINARY). Event lama menyimpan digit apa adanya
+                # ('62812..'); jurnal append-only tidak bisa dimigrasi, jadi bentuk itu ikut dicari.
+                if key.startswith("0"):
+                    conditions.append("(j.PatientPhone GLOB ? OR j.PatientPhone GLOB ?)")
+                    params.extend([key + "*", "62" + key[1:] + "*"])
+                else:
+                    conditions.append("j.PatientPhone GLOB ?")
+                    params.append(key + "*")
+            else:
+                # LIKE memakai idx_journal_name karena kolomnya NOCASE
+                conditions.append("j.PatientName LIKE ?")
+                params.append(re.sub(r"[%_]", "", patient.strip()) + "%")
+        if doctor_id is not None:
+            conditions.append("j.DoctorID = ?")
+            params.append(doctor_id)
+        if date_from:
+            conditions.append("j.EventAt >= ?")
+            params.append(date_from)
+        if date_to:
+            conditions.append("j.EventAt < date(?, '+1 day')")
+            params.append(date_to)
+        if booking_id is not None:
+            conditions.append("j.BookingID = ?")
+            params.append(booking_id)
+        if event:
+            conditions.append("j.Event = ?")
+            params.append(event)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = record_factory(JournalRecord)
+        try:
+            cursor.execute(f"""
+                SELECT j.JournalID, j.EventAt, j.Event, j.BookingID, j.ScheduleID, j.DoctorID, d.Name AS DoctorName,
+                       j.PatientName, j.PatientPhone, j.BookingDate, j.BookingTime, j.Actor, j.Details
+                FROM BookingJournal j
+                LEFT JOIN Doctors d ON d.DoctorID = j.DoctorID
+                {where}
+                ORDER BY j.EventAt DESC, j.JournalID DESC
+                LIMIT ?
+            """, params + [limit])
+            return cursor.fetchall()
+        except Exception as e:
+            logging.error(f"Error reading booking journal: {e}")
+            return []
+        finally:
+            conn.close()
@@ -0,0 +1,162 @@
+"""
+Jawaban lokal MediBot untuk pertanyaan terstruktur.
+
+Untuk intent yang datanya sudah ada di aplikasi (daftar dokter, dokter per spesialisasi/keluhan,
+info klinik, kemampuan chatbot) jawaban disusun langsung dari BookingService dengan template,
+tanpa round trip ke Gemini dan tetap berfungsi saat offline. Setiap intent diberi skor keyakinan;
+hanya jawaban dengan skor >= confidence_threshold yang dijawab lokal, sisanya (pertanyaan bebas)
+tetap diteruskan ke Gemini. Daftar spesialisasi di-cache (classify berjalan di thread GUI dan dalam
+mode server get_all_specialties adalah panggilan HTTP); panggil invalidate() saat data dokter berubah.
+"""
+import logging
+import re
+from collections import namedtuple
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+CLINIC_INFO = {
+    "address": "Jalan Merdeka No. 123, Semarang, Jawa Tengah.",
+    "phone": "(024) 12345678",
+    "hours": "Senin - Jumat, 08:00 - 20:00; Sabtu, 09:00 - 17:00; Minggu Tutup.",
+}
+
+CAPABILITIES = [
+    "Memberikan daftar semua dokter yang tersedia.",
+    "Merekomendasikan dokter berdasarkan keluhan atau spesialisasi (misalnya, untuk sakit gigi, sakit kepala, "
+    "demam, flu, batuk, pilek, atau terkait anak/bayi).",
+    "Menjawab pertanyaan terkait informasi umum klinik seperti alamat, nomor telepon, dan jam buka.",
+]
+
+# (frasa, bobot keyakinan). Frasa yang lebih spesifik diberi bobot lebih tinggi.
+INTENT_PHRASES = {
+    "doctor_list": [
+        ("daftar dokter", 0.95), ("dokter yang tersedia", 0.95), ("semua dokter", 0.9),
+        ("dokter apa saja", 0.9), ("dokter siapa", 0.9), ("ada dokter siapa", 0.9),
+    ],
+    "clinic_info": [
+        ("alamat klinik", 0.95), ("lokasi klinik", 0.95), ("info klinik", 0.95), ("kontak klinik", 0.95),
+        ("nomor telepon klinik", 0.95), ("jam buka klinik", 0.95), ("jam buka", 0.85), ("jam operasional", 0.85),
+        ("alamat", 0.75), ("klinik awan", 0.6),
+    ],
+    "capabilities": [
+        ("kamu bisa apa", 0.95), ("bisa apa", 0.9), ("tentang kamu", 0.9), ("tentang chatbot", 0.9),
+        ("kemampuan", 0.85), ("fitur", 0.75), ("fungsi", 0.75), ("apa saja", 0.5),
+    ],
+}
+
+# Keluhan -> spesialisasi (sama seperti logika RAG lama). Rekomendasi dari keluhan adalah tebakan,
+# jadi bobotnya di bawah permintaan spesialisasi yang eksplisit ("dokter gigi").
+SYMPTOM_SPECIALTIES = [
+    (("sakit gigi", "gigi"), "Gigi"),
+    (("sakit kepala", "demam", "flu", "batuk", "pilek"), "Umum"),
+    (("anak", "bayi"), "Anak"),
+]
+EXPLICIT_SPECIALTY_WEIGHT = 0.95
+SYMPTOM_WEIGHT = 0.8
+
+# Penanda pertanyaan bebas yang butuh penalaran (bukan sekadar menampilkan data)
+FREE_FORM_MARKERS = ("kenapa", "mengapa", "bagaimana", "apakah", "obat", "berapa lama", "sebaiknya",
+                     "harus", "boleh", "biaya", "harga", "bpjs", "asuransi", "bahaya")
+FREE_FORM_PENALTY = 0.3
+LONG_MESSAGE_WORDS = 15
+LONG_MESSAGE_PENALTY = 0.2
+
+LocalAnswer = namedtuple("LocalAnswer", "intent confidence text")
+
+
+def _contains(message_lower, words, phrase):
+    """Frasa satu kata dicocokkan per kata (agar 'anak' tidak cocok dengan 'kanak'), frasa lain per substring."""
+    return phrase in words if " " not in phrase else phrase in message_lower
+
+
+class LocalAnswerEngine:
+    def __init__(self, booking_service, confidence_threshold=0.7):
+        self.booking_service = booking_service
+        self.confidence_threshold = confidence_threshold
+        self._specialties = None
+
+    def invalidate(self):
+        """Membuang cache spesialisasi; dimuat ulang pada pesan berikutnya."""
+        self._specialties = None
+
+    def specialties(self):
+        if self._specialties is None:
+            self._specialties = self.booking_service.get_all_specialties()
+        return self._specialties
+
+    def classify(self, message):
+        """Mengembalikan (intent, confidence, specialty) terbaik; intent None jika tidak ada yang cocok."""
+        message_lower = message.lower()
+        words = set(re.findall(r"\w+", message_lower))
+        candidates = []
+
+        for intent, phrases in INTENT_PHRASES.items():
+            weight = max((w for phrase, w in phrases if _contains(message_lower, words, phrase)), default=0)
+            if weight:
+                candidates.append((weight, intent, None))
+
+        specialty_match = self._match_specialty(message_lower, words)
+        if specialty_match:
+            candidates.append((specialty_match[0], "doctors_by_specialty", specialty_match[1]))
+
+        if not candidates:
+            return None, 0.0, None
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        confidence, intent, specialty = candidates[0]
+        # "Daftar dokter gigi" -> yang dimaksud daftar dokter spesialis gigi
+        if intent == "doctor_list" and specialty_match:
+            intent, specialty = "doctors_by_specialty", specialty_match[1]
+
+        if any(_contains(message_lower, words, marker) for marker in FREE_FORM_MARKERS):
+            confidence -= FREE_FORM_PENALTY
+        if len(re.findall(r"\w+", message_lower)) > LONG_MESSAGE_WORDS:
+            confidence -= LONG_MESSAGE_PENALTY
+        return intent, max(confidence, 0.0), specialty
+
+    def _match_specialty(self, message_lower, words):
+        for specialty in self.specialties():
+            name = specialty.lower()
+            if f"dokter {name}" in message_lower or f"spesialis {name}" in message_lower or f"poli {name}" in message_lower:
+                return EXPLICIT_SPECIALTY_WEIGHT, specialty
+        for keywords, specialty in SYMPTOM_SPECIALTIES:
+            if any(_contains(message_lower, words, keyword) for keyword in keywords):
+                return SYMPTOM_WEIGHT, specialty
+        return None
+
+    def answer(self, message):
+        """LocalAnswer jika pertanyaan bisa dijawab lokal dengan cukup yakin, selain itu None (teruskan ke Gemini)."""
+        intent, confidence, specialty = self.classify(message)
+        if intent is None or confidence < self.confidence_threshold:
+            logging.debug(f"Local answer skipped (intent={intent}, confidence={confidence:.2f}).")
+            return None
+        text = getattr(self, f"_render_{intent}")(specialty)
+        logging.info(f"Answered chat message locally (intent={intent}, confidence={confidence:.2f}).")
+        return LocalAnswer(intent, confidence, text)
+
+    def _render_doctor_list(self, specialty):
+        doctors = self.booking_service.get_all_doctors_with_specialty()
+        if not doctors:
+            return "Maaf, saat ini tidak ada dokter yang terdaftar dalam sistem."
+        lines = ["Berikut daftar dokter yang tersedia di Klinik Awan:"]
+        lines += [f"- Nama: {doctor.name}, Spesialisasi: {doctor.specialty}" for doctor in doctors]
+        return "\n".join(lines)
+
+    def _render_doctors_by_specialty(self, specialty):
+        doctors = self.booking_service.get_doctors_by_specialty(specialty)
+        if not doctors:
+            return f"Maaf, saat ini tidak ada dokter spesialis {specialty} yang terdaftar dalam sistem."
+        lines = [f"Dokter {specialty} yang bisa Anda temui di Klinik Awan:"]
+        lines += [f"- Nama: {doctor.name}, Spesialisasi: {doctor.specialty}" for doctor in doctors]
+        lines.append("Silakan buat booking melalui halaman Daftar Dokter.")
+        return "\n".join(lines)
+
+    def _render_clinic_info(self, specialty):
+        return (f"Informasi Klinik Awan:\n- Alamat: {CLINIC_INFO['address']}\n"
+                f"- Nomor Telepon: {CLINIC_INFO['phone']}\n- Jam Buka: {CLINIC_INFO['hours']}")
+
+    def _render_capabilities(self, specialty):
+        lines = ["Saya MediBot, asisten virtual Klinik Awan. Saya bisa membantu Anda:"]
+        lines += [f"- {item}" for item in CAPABILITIES]
+        lines.append("Saya tidak dapat membuat booking atau mengubah jadwal secara langsung, "
+                     "tetapi dapat memandu Anda menemukan informasi dokter.")
+        return "\n".join(lines)
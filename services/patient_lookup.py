@@ -0,0 +1,81 @@
+import logging
+import re
+from collections import OrderedDict
+
+from database import phone_key, phone_prefix_key
+from services.booking_service import PATIENT_SUGGESTION_LIMIT
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class PatientLookup:
+    """
+    Saran pasien untuk autocomplete BookingDialog di atas booking_service.search_patients
+    (BookingService lokal atau RemoteBookingService).
+
+    Hasil per awalan disimpan di LRU kecil, sehingga menghapus/mengetik ulang huruf tidak memicu query lagi.
+    Jika hasil untuk awalan yang lebih pendek sudah lengkap (kurang dari limit), awalan yang lebih panjang
+    cukup disaring dari hasil itu tanpa query ke database/server.
+    """
+
+    def __init__(self, booking_service, limit=PATIENT_SUGGESTION_LIMIT, cache_size=256, min_chars=2):
+        self.booking_service = booking_service
+        self.limit = limit
+        self.cache_size = cache_size
+        self.min_chars = min_chars
+        self._cache = OrderedDict() # (mode, awalan ternormalisasi) -> list PatientRecord
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(text):
+        """Mode dan awalan ternormalisasi, sama seperti pencocokan di search_patients."""
+        if re.fullmatch(r"[\d\s\-+.()]+", text):
+            return "phone", phone_prefix_key(text)
+        return "name", re.sub(r"[%_]", "", text).casefold()
+
+    @staticmethod
+    def _matches(patient, mode, prefix):
+        if mode == "phone":
+            return phone_key(patient.phone).startswith(prefix)
+        return patient.name.casefold().startswith(prefix)
+
+    def suggest(self, text):
+        """Daftar PatientRecord yang cocok dengan awalan text (kosong jika text terlalu pendek)."""
+        text = (text or "").strip()
+        if len(text) < self.min_chars:
+            return []
+        mode, prefix = self._key(text)
+        if not prefix:
+            return []
+        cache_key = (mode, prefix)
+        if cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
+            self.hits += 1
+            return self._cache[cache_key]
+
+        for length in range(len(prefix) - 1, 0, -1):
+            shorter = self._cache.get((mode, prefix[:length]))
+            if shorter is not None and len(shorter) < self.limit:
+                # Hasil awalan pendek sudah memuat semua pasien yang cocok; cukup disaring
+                self.hits += 1
+                return self._store(cache_key, [p for p in shorter if self._matches(p, mode, prefix)])
+
+        self.misses += 1
+        try:
+            patients = self.booking_service.search_patients(text, limit=self.limit)
+        except Exception as e:
+            logging.error(f"Error looking up patients for '{text}': {e}")
+            return []
+        return self._store(cache_key, patients)
+
+    def _store(self, cache_key, patients):
+        self._cache[cache_key] = patients
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return patients
+
+    def invalidate(self):
+        """Dipanggil setelah booking baru/perubahan pasien agar saran berikutnya membaca data terbaru."""
+        self._cache.clear()
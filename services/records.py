@@ -0,0 +1,135 @@
+"""
+Tipe record ringkas untuk hasil query BookingService.
+
+Record adalah subclass namedtuple dengan __slots__ kosong, sehingga ukurannya di memori sama
+dengan tuple biasa, tetapi field bisa diakses dengan nama (doctor.name) dan tetap kompatibel
+dengan kode lama yang membongkar baris secara posisi.
+Kolom tanggal/jam disimpan sebagai string dari SQLite dan baru diubah ke date/time
+saat properti *_value diakses.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+def _parse_time(value):
+    return datetime.strptime(value, "%H:%M").time() if value else None
+
+
+class DoctorRecord(namedtuple("DoctorRecord", "doctor_id name specialty")):
+    __slots__ = ()
+
+
+class ScheduleRecord(namedtuple("ScheduleRecord", "schedule_id doctor_id date start_time end_time is_booked "
+                                                  "slot_index")):
+    """Satu jadwal yang bisa dibooking; slot_index None untuk shift tanpa slot (satu booking per shift)."""
+    __slots__ = ()
+
+    @property
+    def date_value(self):
+        return _parse_date(self.date)
+
+    @property
+    def start_time_value(self):
+        return _parse_time(self.start_time)
+
+    @property
+    def end_time_value(self):
+        return _parse_time(self.end_time)
+
+
+class BookingRecord(namedtuple("BookingRecord", "booking_id patient_name patient_phone doctor_name specialty "
+                                                "booking_date booking_time status")):
+    __slots__ = ()
+
+    @property
+    def booking_date_value(self):
+        return _parse_date(self.booking_date)
+
+    @property
+    def booking_time_value(self):
+        return _parse_time(self.booking_time)
+
+
+class PatientRecord(namedtuple("PatientRecord", "patient_id name phone booking_count last_booking_date")):
+    __slots__ = ()
+
+    @property
+    def last_booking_date_value(self):
+        return _parse_date(self.last_booking_date)
+
+
+class JournalRecord(namedtuple("JournalRecord", "journal_id event_at event booking_id schedule_id doctor_id doctor_name "
+                                                "patient_name patient_phone booking_date booking_time actor details")):
+    """Satu event jurnal audit booking (lihat JournalService.get_journal); details berupa teks JSON atau None."""
+    __slots__ = ()
+
+    @property
+    def event_at_value(self):
+        return datetime.strptime(self.event_at, "%Y-%m-%d %H:%M:%S") if self.event_at else None
+
+    @property
+    def booking_date_value(self):
+        return _parse_date(self.booking_date)
+
+
+class ChangeSet(namedtuple("ChangeSet", "seq complete bookings removed_booking_ids doctor_ids doctors_changed")):
+    """
+    Perubahan sejak Seq tertentu (lihat BookingService.get_changes). bookings berisi BookingRecord terbaru
+    dari booking yang berubah, removed_booking_ids booking yang sudah tidak ada (dihapus/diarsipkan),
+    doctor_ids dokter yang jadwalnya berubah. complete False berarti perubahannya terlalu banyak atau
+    sudah terpangkas dari ChangeLog, sehingga tampilan harus dimuat ulang penuh.
+    """
+    __slots__ = ()
+
+
+class BranchDoctorRecord(namedtuple("BranchDoctorRecord", ("branch",) + DoctorRecord._fields)):
+    """DoctorRecord dari salah satu cabang (hasil FederatedBookingService); ID hanya unik di dalam cabangnya."""
+    __slots__ = ()
+
+
+class BranchScheduleRecord(namedtuple("BranchScheduleRecord", ("branch",) + ScheduleRecord._fields)):
+    __slots__ = ()
+
+    date_value = ScheduleRecord.date_value
+    start_time_value = ScheduleRecord.start_time_value
+    end_time_value = ScheduleRecord.end_time_value
+
+
+class BranchBookingRecord(namedtuple("BranchBookingRecord", ("branch",) + BookingRecord._fields)):
+    __slots__ = ()
+
+    booking_date_value = BookingRecord.booking_date_value
+    booking_time_value = BookingRecord.booking_time_value
+
+
+def row_id(row):
+    """ID baris (field pertama) untuk semua bentuk row_factory: record, tuple, atau dict."""
+    return next(iter(row.values())) if isinstance(row, dict) else row[0]
+
+
+def record_factory(record_type):
+    """Membuat row_factory sqlite3 yang langsung membangun record_type dari setiap baris."""
+    make = record_type._make
+    return lambda cursor, row: make(row)
+
+
+def tuple_factory(record_type):
+    """Row factory bawaan sqlite3 (tuple biasa); dipakai jika record tidak diinginkan."""
+    return None
+
+
+def dict_factory(record_type):
+    """Row factory dict dengan nama field record sebagai key."""
+    fields = record_type._fields
+    return lambda cursor, row: dict(zip(fields, row))
+
+
+ROW_FACTORIES = {
+    "record": record_factory,
+    "tuple": tuple_factory,
+    "dict": dict_factory,
+}
@@ -0,0 +1,428 @@
+"""
+Pengingat janji temu lewat nomor telepon pasien (PatientPhone).
+
+Alur kerja ReminderService:
+    1. Pengingat yang akan jatuh tempo dalam horizon_hours diturunkan dari booking aktif dengan
+       query ber-index (idx_bookings_confirmed_date) dan disimpan di heap urut waktu jatuh tempo.
+    2. Thread background tidur sampai pengingat terdekat jatuh tempo, lalu menulis semua pengingat
+       yang sudah jatuh tempo ke tabel ReminderOutbox dalam satu transaksi per batch.
+    3. Isi outbox yang Pending diklaim (Status 'Sending' + ClaimedBy) dalam transaksi BEGIN IMMEDIATE,
+       baru dikirim lewat sender (pluggable), lalu statusnya diperbarui per batch. Beberapa meja boleh
+       menjalankan ReminderService pada database yang sama: setiap baris hanya diklaim oleh satu meja.
+       Klaim yang tidak selesai dalam claim_timeout_minutes (meja mati saat mengirim) dikembalikan ke Pending.
+
+Idempotensi: ReminderOutbox unik per (BookingID, Kind), jadi menurunkan ulang pengingat setelah
+restart tidak membuat duplikat. Setiap pesan membawa key "<BookingID>:<Kind>" yang dipakai sender
+untuk mengabaikan kiriman ulang (mis. aplikasi mati setelah pesan terkirim tetapi sebelum status
+Sent tersimpan). Booking yang dibatalkan sebelum pengingatnya terkirim ditandai Skipped.
+"""
+import heapq
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+ReminderKind = namedtuple("ReminderKind", "name minutes_before template")
+
+# Urut dari yang paling jauh sebelum janji temu. Pengingat yang terlewat (mis. booking dibuat
+# 3 jam sebelum janji) hanya dikirim jika pengingat berikutnya belum jatuh tempo.
+REMINDER_KINDS = (
+    ReminderKind("24h", 24 * 60,
+                 "Pengingat Klinik Awan: Anda memiliki janji temu dengan {doctor} pada {date} pukul {time}. "
+                 "Jika berhalangan, mohon batalkan agar jadwal bisa dipakai pasien lain."),
+    ReminderKind("2h", 2 * 60,
+                 "Pengingat Klinik Awan: janji temu Anda dengan {doctor} hari ini pukul {time}. "
+                 "Mohon datang 15 menit lebih awal."),
+)
+
+OutboxMessage = namedtuple("OutboxMessage", "outbox_id key phone text")
+
+
+class ReminderSender:
+    """
+    Antarmuka pengirim pengingat. Cukup override send(message); send_batch mengembalikan
+    dict outbox_id -> pesan error untuk pesan yang gagal (pesan lain dianggap terkirim).
+    """
+
+    def send(self, message):
+        raise NotImplementedError
+
+    def send_batch(self, messages):
+        failures = {}
+        for message in messages:
+            try:
+                self.send(message)
+            except Exception as e:
+                failures[message.outbox_id] = str(e)
+        return failures
+
+    def close(self):
+        pass
+
+
+class LoopbackReminderSender(ReminderSender):
+    """Pengirim dalam memori untuk pengujian dan benchmark; bisa disuruh gagal secara acak."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.delivered = {} # key -> OutboxMessage
+        self.duplicates = 0
+
+    def send(self, message):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise ConnectionError("loopback sender: simulated delivery failure")
+        with self._lock:
+            if message.key in self.delivered:
+                self.duplicates += 1
+                return
+            self.delivered[message.key] = message
+
+
+class FileReminderSender(ReminderSender):
+    """
+    Pengganti gateway SMS/WhatsApp: setiap pesan ditulis sebagai satu baris JSON ke file.
+    Satu batch ditulis dengan satu kali write + fsync; key yang sudah ada di file tidak ditulis ulang.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._keys = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._keys.add(json.loads(line)["key"])
+
+    def send_batch(self, messages):
+        fresh = [message for message in messages if message.key not in self._keys]
+        if not fresh:
+            return {}
+        sent_at = datetime.now().strftime(TIMESTAMP_FORMAT)
+        lines = "".join(
+            json.dumps({"key": m.key, "phone": m.phone, "text": m.text, "sent_at": sent_at}, ensure_ascii=False) + "\n"
+            for m in fresh
+        )
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logging.error(f"Error writing reminders to {self.path}: {e}")
+            return {message.outbox_id: str(e) for message in fresh}
+        self._keys.update(message.key for message in fresh)
+        return {}
+
+    def send(self, message):
+        failures = self.send_batch([message])
+        if failures:
+            raise OSError(failures[message.outbox_id])
+
+
+class ReminderService:
+    def __init__(self, db_manager, sender, kinds=REMINDER_KINDS, horizon_hours=24, refresh_seconds=300,
+                 batch_size=500, max_attempts=5, retry_minutes=5, clock=datetime.now, worker_id=None,
+                 claim_timeout_minutes=10):
+        """
+        horizon_hours: seberapa jauh ke depan pengingat dimuat ke heap.
+        refresh_seconds: interval menurunkan ulang pengingat dari Bookings (booking baru); wake() memaksa lebih cepat.
+        max_attempts/retry_minutes: pengiriman gagal dicoba lagi retry_minutes kemudian, lalu ditandai Failed.
+        worker_id: nama pengklaim outbox (default "<hostname>:<pid>").
+        claim_timeout_minutes: klaim 'Sending' yang lebih tua dari ini dianggap ditinggalkan dan dikirim ulang.
+        """
+        self.db_manager = db_manager
+        self.sender = sender
+        self.kinds = sorted(kinds, key=lambda kind: kind.minutes_before, reverse=True)
+        self.horizon_hours = horizon_hours
+        self.refresh_seconds = refresh_seconds
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_minutes = retry_minutes
+        self.clock = clock
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.claim_timeout_minutes = claim_timeout_minutes
+
+        self._heap = [] # (due_at, booking_id, kind, phone, text)
+        self._scheduled = set() # (booking_id, kind) yang sudah ada di heap
+        self._run_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._reload_requested = True
+        self._next_refresh = 0.0
+        self._thread = None
+        self._counters = {"loaded": 0, "written": 0, "sent": 0, "failed": 0, "skipped": 0}
+
+    # --- Menurunkan pengingat dari Bookings ---
+
+    def load_upcoming(self, now=None):
+        """Memuat pengingat yang jatuh tempo sebelum now + horizon_hours ke heap; mengembalikan jumlah yang baru dimuat."""
+        now = now or self.clock()
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        loaded = 0
+        try:
+            for position, kind in enumerate(self.kinds):
+                # Jendela pengiriman: sejak jatuh tempo sampai pengingat berikutnya (atau janji temu) tiba
+                next_minutes = self.kinds[position + 1].minutes_before if position + 1 < len(self.kinds) else 0
+                start_after = now + timedelta(minutes=next_minutes)
+                start_until = now + timedelta(hours=self.horizon_hours, minutes=kind.minutes_before)
+                cursor.execute("""
+                    SELECT b.BookingID, b.PatientPhone, b.BookingTime, d.Name,
+                           datetime(b.BookingDate || ' ' || b.BookingTime, ?) AS DueAt,
+                           strftime('%d-%m-%Y', b.BookingDate) AS DisplayDate
+                    FROM Bookings b
+                    JOIN Doctors d ON d.DoctorID = b.DoctorID
+                    WHERE b.Status = 'Confirmed'
+                      AND b.BookingDate BETWEEN ? AND ?
+                      AND b.BookingDate || ' ' || b.BookingTime > ?
+                      AND b.BookingDate || ' ' || b.BookingTime <= ?
+                      AND IFNULL(b.PatientPhone, '') != ''
+                      AND NOT EXISTS (SELECT 1 FROM ReminderOutbox o WHERE o.BookingID = b.BookingID AND o.Kind = ?)
+                """, (f"-{kind.minutes_before} minutes", start_after.strftime("%Y-%m-%d"), start_until.strftime("%Y-%m-%d"),
+                      start_after.strftime("%Y-%m-%d %H:%M"), start_until.strftime("%Y-%m-%d %H:%M"), kind.name))
+                for booking_id, phone, booking_time, doctor_name, due_at, display_date in cursor.fetchall():
+                    if (booking_id, kind.name) in self._scheduled:
+                        continue
+                    text = kind.template.format(doctor=doctor_name, date=display_date, time=booking_time)
+                    heapq.heappush(self._heap, (due_at, booking_id, kind.name, phone, text))
+                    self._scheduled.add((booking_id, kind.name))
+                    loaded += 1
+            if loaded:
+                logging.info(f"Loaded {loaded} upcoming reminders ({len(self._heap)} scheduled).")
+            return loaded
+        except Exception as e:
+            logging.error(f"Error loading upcoming reminders: {e}")
+            return loaded
+        finally:
+            conn.close()
+
+    # --- Menulis pengingat jatuh tempo ke outbox ---
+
+    def _pop_due(self, now):
+        due_before = now.strftime(TIMESTAMP_FORMAT)
+        batch = []
+        while self._heap and self._heap[0][0] <= due_before and len(batch) < self.batch_size:
+            entry = heapq.heappop(self._heap)
+            self._scheduled.discard((entry[1], entry[2]))
+            batch.append(entry)
+        return batch
+
+    def _write_outbox(self, batch, now):
+        """
+        Menulis satu batch pengingat ke ReminderOutbox dalam satu transaksi; booking yang sudah tidak aktif
+        dilewati. Mengembalikan jumlah baris yang ditulis, atau None jika gagal.
+        """
+        created_at = now.strftime(TIMESTAMP_FORMAT)
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        try:
+            before = conn.total_changes
+            cursor.executemany("""
+                INSERT OR IGNORE INTO ReminderOutbox (BookingID, Kind, PatientPhone, Message, DueAt, CreatedAt)
+                SELECT ?, ?, ?, ?, ?, ?
+                WHERE EXISTS (SELECT 1 FROM Bookings WHERE BookingID = ? AND Status = 'Confirmed')
+            """, [(booking_id, kind, phone, text, due_at, created_at, booking_id)
+                  for due_at, booking_id, kind, phone, text in batch])
+            conn.commit()
+            return conn.total_changes - before
+        except Exception as e:
+            conn.rollback()
+            # Dikembalikan ke heap agar dicoba lagi pada putaran berikutnya
+            for entry in batch:
+                if (entry[1], entry[2]) not in self._scheduled:
+                    heapq.heappush(self._heap, entry)
+                    self._scheduled.add((entry[1], entry[2]))
+            logging.error(f"Error writing {len(batch)} reminders to outbox: {e}")
+            return None
+        finally:
+            conn.close()
+
+    # --- Mengirim isi outbox ---
+
+    def _claim_pending(self, cursor, now):
+        """
+        Dalam satu transaksi tulis: mengembalikan klaim kedaluwarsa ke Pending, menandai Skipped pengingat
+        yang booking-nya sudah tidak aktif, lalu mengklaim satu batch Pending yang jatuh tempo untuk worker ini.
+        Mengembalikan (list OutboxMessage yang diklaim, jumlah skipped).
+        """
+        now_str = now.strftime(TIMESTAMP_FORMAT)
+        stale_before = (now - timedelta(minutes=self.claim_timeout_minutes)).strftime(TIMESTAMP_FORMAT)
+        cursor.execute("BEGIN IMMEDIATE") # Meja lain menunggu sampai klaim ini selesai, jadi tidak ada klaim ganda
+        try:
+            cursor.execute("""
+                UPDATE ReminderOutbox SET Status = 'Pending', ClaimedBy = NULL, ClaimedAt = NULL
+                WHERE Status = 'Sending' AND ClaimedAt <= ?
+            """, (stale_before,))
+            if cursor.rowcount:
+                logging.warning(f"Reclaimed {cursor.rowcount} reminders left in 'Sending' since before {stale_before}.")
+            # Booking dibatalkan/selesai setelah pengingatnya masuk outbox -> tidak dikirim
+            cursor.execute("""
+                UPDATE ReminderOutbox SET Status = 'Skipped'
+                WHERE Status = 'Pending' AND DueAt <= ?
+                  AND NOT EXISTS (SELECT 1 FROM Bookings b WHERE b.BookingID = ReminderOutbox.BookingID
+                                  AND b.Status = 'Confirmed')
+            """, (now_str,))
+            skipped = cursor.rowcount
+            cursor.execute("""
+                UPDATE ReminderOutbox SET Status = 'Sending', ClaimedBy = ?, ClaimedAt = ?
+                WHERE OutboxID IN (
+                    SELECT OutboxID FROM ReminderOutbox
+                    WHERE Status = 'Pending' AND DueAt <= ?
+                    ORDER BY DueAt
+                    LIMIT ?
+                )
+                RETURNING OutboxID, BookingID || ':' || Kind, PatientPhone, Message
+            """, (self.worker_id, now_str, now_str, self.batch_size))
+            messages = [OutboxMessage(*row) for row in cursor.fetchall()]
+            cursor.execute("COMMIT")
+            return messages, skipped
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def deliver_pending(self, now=None):
+        """Mengirim satu batch pengingat Pending yang sudah jatuh tempo. Mengembalikan (sent, failed, skipped)."""
+        now = now or self.clock()
+        now_str = now.strftime(TIMESTAMP_FORMAT)
+        conn = self.db_manager.get_connection()
+        conn.isolation_level = None # Transaksi dikontrol manual (BEGIN IMMEDIATE)
+        cursor = conn.cursor()
+        try:
+            messages, skipped = self._claim_pending(cursor, now)
+            if not messages:
+                return 0, 0, skipped
+
+            failures = self.sender.send_batch(messages)
+
+            # Hanya baris yang masih diklaim worker ini yang diperbarui (klaim bisa sudah diambil alih jika kedaluwarsa)
+            retry_at = (now + timedelta(minutes=self.retry_minutes)).strftime(TIMESTAMP_FORMAT)
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.executemany("""
+                UPDATE ReminderOutbox
+                SET Status = 'Sent', Attempts = Attempts + 1, SentAt = ?, LastError = NULL, ClaimedBy = NULL, ClaimedAt = NULL
+                WHERE OutboxID = ? AND Status = 'Sending' AND ClaimedBy = ?
+            """, [(now_str, message.outbox_id, self.worker_id) for message in messages
+                  if message.outbox_id not in failures])
+            cursor.executemany("""
+                UPDATE ReminderOutbox
+                SET Attempts = Attempts + 1, LastError = ?, DueAt = ?, ClaimedBy = NULL, ClaimedAt = NULL,
+                    Status = CASE WHEN Attempts + 1 >= ? THEN 'Failed' ELSE 'Pending' END
+                WHERE OutboxID = ? AND Status = 'Sending' AND ClaimedBy = ?
+            """, [(error, retry_at, self.max_attempts, outbox_id, self.worker_id) for outbox_id, error in failures.items()])
+            cursor.execute("COMMIT")
+            if failures:
+                logging.warning(f"{len(failures)} of {len(messages)} reminders failed to send; retrying at {retry_at}.")
+            return len(messages) - len(failures), len(failures), skipped
+        except Exception as e:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            logging.error(f"Error delivering reminders: {e}")
+            return 0, 0, 0
+        finally:
+            conn.close()
+
+    def run_once(self, now=None, reload=True):
+        """
+        Satu putaran lengkap: (opsional) muat ulang pengingat, tulis yang jatuh tempo ke outbox,
+        lalu kirim semua yang Pending. Mengembalikan dict statistik putaran ini.
+        """
+        with self._run_lock:
+            now = now or self.clock()
+            started = time.perf_counter()
+            stats = {"loaded": 0, "written": 0, "sent": 0, "failed": 0, "skipped": 0}
+            if reload:
+                stats["loaded"] = self.load_upcoming(now)
+            while True:
+                batch = self._pop_due(now)
+                if not batch:
+                    break
+                written = self._write_outbox(batch, now)
+                if written is None:
+                    break # Batch dikembalikan ke heap karena error; dicoba lagi putaran berikutnya
+                stats["written"] += written
+            while True:
+                sent, failed, skipped = self.deliver_pending(now)
+                stats["sent"] += sent
+                stats["failed"] += failed
+                stats["skipped"] += skipped
+                if sent + failed + skipped < self.batch_size:
+                    break
+            stats["elapsed_seconds"] = time.perf_counter() - started
+            with self._condition:
+                for key in ("loaded", "written", "sent", "failed", "skipped"):
+                    self._counters[key] += stats[key]
+            if stats["written"] or stats["sent"] or stats["failed"]:
+                logging.info(f"Reminder run: {stats}")
+            return stats
+
+    # --- Thread background ---
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+        logging.info("Reminder scheduler started.")
+
+    def wake(self):
+        """Meminta thread memuat ulang pengingat sekarang (mis. setelah booking baru dibuat)."""
+        with self._condition:
+            self._reload_requested = True
+            self._condition.notify_all()
+
+    def close(self, timeout=None):
+        """
+        Menghentikan thread. Pengingat yang masih di heap tidak hilang: belum ada di outbox,
+        jadi akan diturunkan ulang dari Bookings saat aplikasi dijalankan lagi.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.sender.close()
+
+    def metrics(self):
+        with self._condition:
+            stats = dict(self._counters)
+        stats["scheduled"] = len(self._heap)
+        return stats
+
+    def _seconds_until_next(self):
+        wait = max(0.0, self._next_refresh - time.monotonic())
+        if self._heap:
+            due_at = datetime.strptime(self._heap[0][0], TIMESTAMP_FORMAT)
+            wait = min(wait, max(0.0, (due_at - self.clock()).total_seconds()))
+        return wait
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                reload = self._reload_requested or time.monotonic() >= self._next_refresh
+                self._reload_requested = False
+                if reload:
+                    self._next_refresh = time.monotonic() + self.refresh_seconds
+            try:
+                self.run_once(reload=reload)
+            except Exception as e:
+                logging.error(f"Reminder scheduler run failed: {e}")
+            with self._condition:
+                if self._closed or self._reload_requested:
+                    continue
+                self._condition.wait(self._seconds_until_next())
@@ -0,0 +1,227 @@
+"""
+Snapshot data awal (seed) untuk test dan demo.
+
+Mengisi database lewat create_tables + insert_initial_data (atau booking satu per satu) lambat dan
+menyentuh disk. Modul ini membangun data seed deterministik sekali per ukuran, menyimpannya sebagai
+file SQLite di folder cache, lalu memuatnya ke DatabaseManager (biasanya ':memory:') dengan backup
+API dalam hitungan milidetik:
+
+    db_manager = memory_database("medium")
+    service = BookingService(db_manager)
+
+Nama file snapshot memuat sidik jari skema (hasil create_tables), versi generator, ukuran, dan
+tanggal mulai, sehingga snapshot lama otomatis dibangun ulang setelah skema berubah.
+Jadwal dimulai dari start_date (default hari ini) supaya jadwal kosong selalu ada di masa depan;
+hari-hari sebelum start_date berisi riwayat booking (Completed/NoShow/Cancelled).
+"""
+import argparse
+import hashlib
+import logging
+import os
+import random
+import tempfile
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from database import DatabaseManager, MEMORY_DATABASE
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Naikkan jika isi data seed berubah, agar snapshot di cache dibangun ulang
+SEED_VERSION = 2
+SLOT_MINUTES = 15
+DEFAULT_SNAPSHOT_DIR = os.path.join(tempfile.gettempdir(), "klinik_awan_seed")
+
+SeedSize = namedtuple("SeedSize", "doctors days history_days booked_ratio waitlist")
+
+SEED_SIZES = {
+    "small": SeedSize(doctors=5, days=14, history_days=7, booked_ratio=0.3, waitlist=10),
+    "medium": SeedSize(doctors=20, days=90, history_days=30, booked_ratio=0.4, waitlist=100),
+    "large": SeedSize(doctors=60, days=365, history_days=90, booked_ratio=0.5, waitlist=1000),
+}
+
+# Lima dokter pertama sama dengan data awal aplikasi (insert_initial_data)
+INITIAL_DOCTORS = [
+    ("dr. Budi Santoso", "Umum"),
+    ("drg. Citra Dewi", "Gigi"),
+    ("dr. Ana Maria", "Anak"),
+    ("dr. Surya Perkasa", "Umum"),
+    ("drg. Dewi Lestari", "Gigi"),
+]
+SHIFTS_BY_SPECIALTY = {
+    "Umum": [("09:00", "12:00"), ("14:00", "17:00")],
+    "Gigi": [("10:00", "13:00"), ("15:00", "18:00")],
+    "Anak": [("08:30", "11:30"), ("13:30", "16:30")],
+}
+FIRST_NAMES = ["Budi", "Siti", "Agus", "Dewi", "Rudi", "Ayu", "Andi", "Rina", "Joko", "Putri", "Eko", "Lestari",
+               "Hendra", "Wati", "Bayu", "Indah", "Fajar", "Maya", "Dimas", "Nur"]
+LAST_NAMES = ["Santoso", "Wijaya", "Saputra", "Lestari", "Pratama", "Hidayat", "Kusuma", "Setiawan", "Nugroho",
+              "Rahmawati", "Gunawan", "Siregar", "Harahap", "Susanto", "Wibowo"]
+
+_schema_fingerprint = None
+
+
+def schema_fingerprint():
+    """Hash skema hasil create_tables (dihitung sekali per proses di database memori)."""
+    global _schema_fingerprint
+    if _schema_fingerprint is None:
+        db_manager = DatabaseManager(MEMORY_DATABASE)
+        db_manager.create_tables()
+        conn = db_manager.get_connection()
+        try:
+            rows = conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+        finally:
+            conn.close()
+            db_manager.close_connection()
+        _schema_fingerprint = hashlib.sha1(repr(rows).encode()).hexdigest()[:12]
+    return _schema_fingerprint
+
+
+def _minutes(hhmm):
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _doctors(count):
+    doctors = list(INITIAL_DOCTORS[:count])
+    specialties = list(SHIFTS_BY_SPECIALTY)
+    for n in range(len(doctors), count):
+        title, specialty = ("drg.", "Gigi") if specialties[n % 3] == "Gigi" else ("dr.", specialties[n % 3])
+        doctors.append((f"{title} {FIRST_NAMES[n % len(FIRST_NAMES)]} {LAST_NAMES[n // len(FIRST_NAMES) % len(LAST_NAMES)]} {n}",
+                        specialty))
+    return doctors
+
+
+def build_seed(db_manager, size, start_date=None):
+    """
+    Mengisi database kosong (sudah create_tables) dengan data seed ukuran size secara deterministik.
+    Occupancy/IsBooked setiap jadwal konsisten dengan booking yang memegang slotnya.
+    Mengembalikan dict jumlah baris per tabel.
+    """
+    spec = SEED_SIZES[size]
+    start = start_date or date.today()
+    rng = random.Random(f"{size}-{SEED_VERSION}")
+    doctors = _doctors(spec.doctors)
+    patients = [(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"08{rng.randrange(10**9, 10**10)}")
+                for _ in range(max(50, spec.doctors * spec.days))]
+
+    schedules, bookings = [], []
+    for doctor_id, (_, specialty) in enumerate(doctors, start=1):
+        for offset in range(-spec.history_days, spec.days):
+            day = start + timedelta(days=offset)
+            day_str = day.isoformat()
+            for shift_start, shift_end in SHIFTS_BY_SPECIALTY[specialty]:
+                schedule_id = len(schedules) + 1
+                slot_total = (_minutes(shift_end) - _minutes(shift_start)) // SLOT_MINUTES
+                occupancy = 0
+                for index in range(slot_total):
+                    if rng.random() >= spec.booked_ratio:
+                        continue
+                    if offset < 0:
+                        status = rng.choice(("Completed", "Completed", "Completed", "NoShow", "Cancelled"))
+                    else:
+                        status = "Confirmed" if rng.random() < 0.9 else "Cancelled"
+                    if status != "Cancelled":
+                        occupancy |= 1 << index # Booking yang dibatalkan tidak memegang slot
+                    total = _minutes(shift_start) + index * SLOT_MINUTES
+                    created = datetime.combine(day - timedelta(days=rng.randrange(1, 15)), datetime.min.time())
+                    name, phone = rng.choice(patients)
+                    bookings.append((schedule_id, doctor_id, name, phone, day_str, f"{total // 60:02d}:{total % 60:02d}",
+                                     status, index, created.strftime("%Y-%m-%d 08:00:00"),
+                                     None if status == "Confirmed" else f"{day_str} {shift_end}:00"))
+                schedules.append((doctor_id, day_str, shift_start, shift_end,
+                                  int(occupancy == (1 << slot_total) - 1), SLOT_MINUTES, slot_total, occupancy))
+
+    waitlist = []
+    for _ in range(spec.waitlist):
+        name, phone = rng.choice(patients)
+        date_from = start + timedelta(days=rng.randrange(spec.days))
+        doctor_id = rng.randrange(1, len(doctors) + 1)
+        by_doctor = rng.random() < 0.5
+        waitlist.append((name, phone, doctor_id if by_doctor else None, None if by_doctor else doctors[doctor_id - 1][1],
+                         date_from.isoformat(), (date_from + timedelta(days=7)).isoformat(), rng.randrange(3),
+                         f"{start.isoformat()} 07:00:00"))
+
+    conn = db_manager.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany("INSERT INTO Doctors (Name, Specialty) VALUES (?, ?)", doctors)
+        cursor.executemany(
+            "INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked, SlotMinutes, SlotTotal, Occupancy) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", schedules)
+        cursor.executemany(
+            "INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, Status, "
+            "SlotIndex, CreatedAt, StatusUpdatedAt) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", bookings)
+        cursor.executemany(
+            "INSERT INTO Waitlist (PatientName, PatientPhone, DoctorID, Specialty, DateFrom, DateTo, Priority, CreatedAt) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", waitlist)
+        conn.commit()
+    finally:
+        conn.close()
+    patients, _ = db_manager.link_patients()
+    return {"patients": patients, "doctors": len(doctors), "schedules": len(schedules), "bookings": len(bookings), "waitlist": len(waitlist)}
+
+
+def snapshot_path(size, start_date=None, directory=None):
+    start = start_date or date.today()
+    name = f"seed-{size}-{start.isoformat()}-v{SEED_VERSION}-{schema_fingerprint()}.db"
+    return os.path.join(directory or DEFAULT_SNAPSHOT_DIR, name)
+
+
+def ensure_snapshot(size, start_date=None, directory=None):
+    """Mengembalikan path snapshot size; dibangun (di memori, lalu disalin ke file) jika belum ada di cache."""
+    if size not in SEED_SIZES:
+        raise ValueError(f"Unknown seed size '{size}', expected one of {sorted(SEED_SIZES)}")
+    path = snapshot_path(size, start_date, directory)
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    started = time.perf_counter()
+    db_manager = DatabaseManager(MEMORY_DATABASE)
+    try:
+        db_manager.create_tables()
+        counts = build_seed(db_manager, size, start_date)
+        # Ditulis ke file sementara lalu di-rename, agar proses lain tidak memuat snapshot setengah jadi
+        partial_path = f"{path}.{os.getpid()}.partial"
+        db_manager.save_snapshot(partial_path)
+        os.replace(partial_path, path)
+    finally:
+        db_manager.close_connection()
+    logging.info(f"Seed snapshot '{size}' built in {time.perf_counter() - started:.1f} s: {counts} -> {path}")
+    return path
+
+
+def load_seed(db_manager, size, start_date=None, directory=None):
+    """Mengganti isi db_manager dengan snapshot seed size (dibangun dulu jika belum ada di cache)."""
+    path = ensure_snapshot(size, start_date, directory)
+    db_manager.load_snapshot(path)
+    return path
+
+
+def memory_database(size=None, start_date=None, directory=None):
+    """
+    DatabaseManager ':memory:' baru yang siap dipakai: berisi snapshot seed size,
+    atau hanya tabel kosong jika size None.
+    """
+    db_manager = DatabaseManager(MEMORY_DATABASE)
+    if size:
+        load_seed(db_manager, size, start_date, directory)
+    else:
+        db_manager.create_tables()
+    return db_manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Membangun snapshot data seed untuk test dan demo")
+    parser.add_argument("sizes", nargs="*", default=list(SEED_SIZES), help="Ukuran: small, medium, large")
+    parser.add_argument("--dir", default=None, help=f"Folder cache snapshot (default: {DEFAULT_SNAPSHOT_DIR})")
+    parser.add_argument("--start-date", default=None, help="Tanggal mulai jadwal YYYY-MM-DD (default: hari ini)")
+    args = parser.parse_args()
+    start_date = date.fromisoformat(args.start_date) if args.start_date else None
+    for size in args.sizes:
+        print(ensure_snapshot(size, start_date, args.dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Profil waktu startup aplikasi.
+
+Mode dalam proses (python main.py --profile-startup):
+    MainWindow mencatat titik waktu (import selesai, jendela dibuat, first paint) lalu
+    mencetak laporannya. Tambahkan --exit-after-paint agar aplikasi langsung keluar
+    setelah jendela pertama kali tampil (berguna untuk pengukuran berulang).
+
+Laporan import (python -m services.startup_profile):
+    Menjalankan main.py dengan `-X importtime`, lalu meringkas modul dengan waktu import
+    kumulatif terbesar beserta waktu first paint.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+PROFILE_FLAG = "--profile-startup"
+EXIT_AFTER_PAINT_FLAG = "--exit-after-paint"
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+class StartupProfiler:
+    """Mencatat titik-titik waktu startup relatif terhadap saat profiler dibuat (seawal mungkin di main.py)."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._started = time.perf_counter()
+        self.marks = []
+
+    def mark(self, name):
+        if self.enabled:
+            self.marks.append((name, (time.perf_counter() - self._started) * 1000))
+
+    def report(self, stream=None):
+        """Mencetak durasi kumulatif dan selisih antar titik dalam milidetik."""
+        if not self.enabled:
+            return
+        stream = stream or sys.stderr
+        print("Startup profile (ms):", file=stream)
+        previous = 0.0
+        for name, elapsed in self.marks:
+            print(f"  {name:<24} {elapsed:9.1f}  (+{elapsed - previous:.1f})", file=stream)
+            previous = elapsed
+
+
+def parse_importtime(stderr_text):
+    """Mengembalikan list (modul, self_us, cumulative_us, depth) dari output `-X importtime`."""
+    entries = []
+    for line in stderr_text.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+
+def run_importtime_report(main_script, top=20, extra_args=()):
+    """Menjalankan main_script di subprocess dengan -X importtime dan mencetak ringkasan."""
+    command = [sys.executable, "-X", "importtime", main_script, PROFILE_FLAG, EXIT_AFTER_PAINT_FLAG, *extra_args]
+    result = subprocess.run(command, capture_output=True, text=True)
+    entries = parse_importtime(result.stderr)
+    if not entries:
+        print(result.stderr[-2000:])
+        return
+
+    # Hanya import tingkat atas (depth 0) agar waktu tidak dihitung ganda
+    top_level = [entry for entry in entries if entry[3] == 0]
+    total_us = sum(entry[2] for entry in top_level)
+    print(f"Total import time (top-level): {total_us / 1000:.1f} ms")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for module, self_us, cumulative_us, _ in sorted(entries, key=lambda e: e[2], reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {module}")
+
+    in_profile = False
+    for line in result.stderr.splitlines():
+        if line.startswith("Startup profile"):
+            in_profile = True
+        elif in_profile and not line.startswith("  "):
+            in_profile = False
+        if in_profile:
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Laporan waktu import dan first paint aplikasi")
+    parser.add_argument("--main", default=os.path.join(os.path.dirname(__file__), "..", "main.py"))
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    run_importtime_report(os.path.abspath(args.main), top=args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import logging
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.booking_service import BookingService
+from services.seed_snapshots import memory_database
+
+
+@pytest.fixture(autouse=True)
+def _quiet_logging():
+    # Modul layanan memakai logging DEBUG; di test cukup WARNING ke atas
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+@pytest.fixture
+def seeded_db(tmp_path):
+    """Database ':memory:' (shared cache) berisi snapshot seed 'small', dibuat ulang per test."""
+    db_manager = memory_database("small", directory=str(tmp_path.parent / "seed-cache"))
+    yield db_manager
+    db_manager.close_connection()
+
+
+@pytest.fixture
+def empty_db():
+    db_manager = memory_database()
+    yield db_manager
+    db_manager.close_connection()
+
+
+@pytest.fixture
+def whole_shift(empty_db):
+    """Satu dokter dengan shift lama tanpa slot (08:00-10:00) minggu depan: (service, schedule_id, tanggal)."""
+    service = BookingService(empty_db)
+    conn = empty_db.get_connection()
+    conn.execute("INSERT INTO Doctors (Name, Specialty) VALUES ('dr. Uji', 'Umum')")
+    conn.commit()
+    conn.close()
+    day = (date.today() + timedelta(days=7)).isoformat()
+    assert service.add_shift(1, day, "08:00", "10:00", slot_minutes=0)[0]
+    return service, service.get_doctor_schedules(1, day)[0].schedule_id, day
@@ -0,0 +1,69 @@
+import sqlite3
+import sys
+from datetime import date
+
+import pytest
+
+from database import DatabaseManager
+from services import archive_service
+from services.archive_service import ArchiveService
+from services.seed_snapshots import build_seed
+
+TODAY = date(2026, 3, 2)
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """Database file yang dibuat sebelum auto_vacuum diaktifkan, berisi booking seminggu terakhir."""
+    path = str(tmp_path / "klinik.db")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA auto_vacuum = NONE")
+    conn.execute("CREATE TABLE Doctors (DoctorID INTEGER PRIMARY KEY AUTOINCREMENT, Name TEXT NOT NULL, "
+                 "Specialty TEXT NOT NULL)")
+    conn.close()
+    db_manager = DatabaseManager(path, archive_db_name=str(tmp_path / "arsip.db"))
+    db_manager.create_tables()
+    build_seed(db_manager, "small", start_date=TODAY)
+    return db_manager
+
+
+def auto_vacuum_mode(db_manager):
+    conn = db_manager.get_connection()
+    try:
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_first_archive_run_converts_legacy_database_when_enabled(legacy_db):
+    assert auto_vacuum_mode(legacy_db) == 0
+    service = ArchiveService(legacy_db, retention_days=3, convert_auto_vacuum=True)
+
+    first = service.run_archive(today=TODAY)
+    second = service.run_archive(today=TODAY)
+
+    assert first["bookings_moved"] > 0 and first["auto_vacuum_converted"]
+    assert auto_vacuum_mode(legacy_db) == 2
+    assert not second["auto_vacuum_converted"]
+
+
+def test_archive_run_never_runs_full_vacuum_by_default(legacy_db, caplog):
+    service = ArchiveService(legacy_db, retention_days=3)
+
+    first = service.run_archive(today=TODAY)
+    stats = service.run_archive(today=TODAY)
+
+    assert first["bookings_moved"] > 0
+    assert not stats["auto_vacuum_converted"] and auto_vacuum_mode(legacy_db) == 0
+    assert sum("auto_vacuum is not INCREMENTAL" in record.message for record in caplog.records) == 1
+    assert service.enable_incremental_vacuum()
+    assert auto_vacuum_mode(legacy_db) == 2
+    assert not service.enable_incremental_vacuum()
+
+
+def test_admin_command_converts_legacy_database(legacy_db, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["archive_service", "--db", legacy_db.db_name, "--enable-incremental-vacuum"])
+
+    archive_service.main()
+
+    assert auto_vacuum_mode(legacy_db) == 2 and "INCREMENTAL" in capsys.readouterr().out
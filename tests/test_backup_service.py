@@ -0,0 +1,66 @@
+import os
+import sqlite3
+
+import pytest
+
+from database import DatabaseManager
+from services import backup_service
+from services.backup_service import BackupService
+from services.booking_service import BookingService
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / "klinik.db"))
+    db_manager.create_tables()
+    BookingService(db_manager).insert_initial_data()
+    return db_manager
+
+
+@pytest.fixture
+def busy_writer(file_db, monkeypatch):
+    """Setiap jeda antar langkah backup, meja lain menulis ke database sehingga salinan bertahap dimulai ulang."""
+    writes = []
+
+    def write_between_steps(seconds):
+        conn = file_db.get_connection()
+        conn.execute("UPDATE Doctors SET Specialty = Specialty || '' WHERE DoctorID = 1")
+        conn.commit()
+        conn.close()
+        writes.append(seconds)
+
+    monkeypatch.setattr(backup_service.time, "sleep", write_between_steps)
+    return writes
+
+
+def test_backup_writes_checked_snapshot(file_db, tmp_path):
+    service = BackupService(file_db, backup_dir=str(tmp_path / "backups"))
+
+    stats = service.run_backup()
+
+    assert stats["integrity"] == "ok" and stats["restarts"] == 0
+    assert service.list_snapshots() == [stats["path"]]
+    conn = sqlite3.connect(stats["path"])
+    assert conn.execute("SELECT COUNT(*) FROM Doctors").fetchone()[0] == 5
+    conn.close()
+
+
+def test_busy_database_without_wal_skips_backup_instead_of_locking(file_db, tmp_path, busy_writer):
+    service = BackupService(file_db, backup_dir=str(tmp_path / "backups"), pages_per_step=1, max_restarts=1)
+
+    stats = service.run_backup()
+
+    assert busy_writer and stats["skipped"] and stats["path"] is None and stats["restarts"] == 2
+    assert service.list_snapshots() == [] and os.listdir(tmp_path / "backups") == []
+
+
+def test_busy_database_in_wal_mode_falls_back_to_single_step_copy(file_db, tmp_path, busy_writer):
+    conn = file_db.get_connection()
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+    service = BackupService(file_db, backup_dir=str(tmp_path / "backups"), pages_per_step=1, max_restarts=1)
+
+    stats = service.run_backup()
+
+    assert busy_writer and not stats.get("skipped") and stats["restarts"] == 2
+    assert stats["integrity"] == "ok" and service.list_snapshots() == [stats["path"]]
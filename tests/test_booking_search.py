@@ -0,0 +1,15 @@
+from services.booking_service import BookingService
+
+
+def test_search_ranks_over_all_matches_not_only_the_newest(seeded_db):
+    conn = seeded_db.get_connection()
+    # Booking lama dengan nama pendek (bm25 terbaik), lalu banyak booking lebih baru yang kurang relevan
+    conn.executemany("INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, "
+                     "Status) VALUES (1, 1, ?, '0812777', '2020-01-06', '08:00', 'Completed')",
+                     [("Zelda",)] + [(f"Zelda Uji Pasien Dengan Nama Panjang {n}",) for n in range(60)])
+    conn.commit()
+    conn.close()
+
+    results = BookingService(seeded_db).search_bookings("zelda", limit=5)
+
+    assert len(results) == 5 and results[0].patient_name == "Zelda"
@@ -0,0 +1,219 @@
+import asyncio
+import http.client
+import json
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from services.booking_client import RemoteBookingService
+from services.booking_server import BookingServer, is_loopback
+from services.booking_service import BookingService
+
+
+@pytest.fixture
+def running_server(seeded_db):
+    server = BookingServer(seeded_db, port=0, reader_threads=2, journal_actor="server")
+    server.prepare_database()
+    ready = threading.Event()
+    loop = asyncio.new_event_loop()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    ready.wait()
+    yield server
+
+    async def shutdown():
+        server._server.close()
+        await server._server.wait_closed()
+        # Handler koneksi keep-alive yang masih menunggu request berikutnya
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=10)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+    server.close()
+
+
+def rpc(server, method_name, args, headers=None):
+    conn = http.client.HTTPConnection(server.host, server.port, timeout=10)
+    try:
+        conn.request("POST", f"/rpc/{method_name}", body=json.dumps({"args": args, "kwargs": {}}),
+                     headers={"Content-Type": "application/json", **(headers or {})})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def free_slot(service):
+    return service.get_available_schedules((date.today() + timedelta(days=1)).isoformat(), limit=1)[0]
+
+
+def test_replayed_write_returns_first_result_without_writing_twice(running_server, seeded_db):
+    service = BookingService(seeded_db)
+    waiting = len(service.get_waitlist())
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    args = ["Zelda Uji", "0812777", tomorrow, tomorrow, None, "Umum"]
+    headers = {"Idempotency-Key": "waitlist-1"}
+
+    first = rpc(running_server, "add_to_waitlist", args, headers)
+    second = rpc(running_server, "add_to_waitlist", args, headers)
+
+    assert first == second
+    assert first[1]["result"][0] is True
+    assert len(service.get_waitlist()) == waiting + 1
+    # Tanpa kunci yang sama, request dianggap operasi baru
+    rpc(running_server, "add_to_waitlist", args, {"Idempotency-Key": "waitlist-2"})
+    assert len(service.get_waitlist()) == waiting + 2
+
+
+def test_client_retry_after_lost_response_does_not_report_own_booking_as_taken(running_server, seeded_db,
+                                                                                  monkeypatch):
+    slot = free_slot(BookingService(seeded_db))
+    client = RemoteBookingService(f"http://127.0.0.1:{running_server.port}")
+    real_getresponse = http.client.HTTPConnection.getresponse
+    lost = []
+
+    def getresponse_losing_first(conn):
+        response = real_getresponse(conn)
+        if not lost:
+            # Server sudah memproses booking, tetapi koneksi putus sebelum respons terbaca
+            response.read()
+            lost.append(True)
+            raise ConnectionResetError("connection reset by peer")
+        return response
+
+    monkeypatch.setattr(http.client.HTTPConnection, "getresponse", getresponse_losing_first)
+    success, message = client.add_booking(slot.schedule_id, slot.doctor_id, "Zelda Uji", "0812777", slot.date,
+                                          slot.start_time, slot_index=slot.slot_index)
+    client.close()
+
+    assert lost and success, message
+    bookings = [b for b in BookingService(seeded_db).search_bookings("Zelda") if b.booking_date == slot.date]
+    assert len(bookings) == 1
+
+
+def test_unreachable_server_returns_local_failure_shapes():
+    client = RemoteBookingService("http://127.0.0.1:9", timeout=1) # Port discard: koneksi ditolak
+
+    success, message = client.add_booking(1, 1, "Zelda Uji", "0812777", "2026-01-05", "08:00")
+    assert success is False and "Server booking" in message
+    assert client.add_bookings([]) == (False, message, [])
+    assert client.get_all_bookings() == []
+    assert client.get_doctor_by_id(1) is None
+    assert client.get_changes(0) is None
+
+
+def test_server_error_is_reported_as_failed_write(running_server, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("database disk image is malformed")
+
+    monkeypatch.setattr(running_server.booking_service, "cancel_booking", broken)
+    client = RemoteBookingService(f"http://127.0.0.1:{running_server.port}")
+    success, message = client.cancel_booking(1)
+    client.close()
+    assert success is False and "Server booking" in message
+
+
+def test_token_is_required_for_rpc_but_not_health(running_server):
+    running_server.token = "rahasia"
+
+    assert rpc(running_server, "get_waitlist", [])[0] == 401
+    assert rpc(running_server, "get_waitlist", [], {"Authorization": "Bearer salah"})[0] == 401
+    assert rpc(running_server, "get_waitlist", [], {"Authorization": "Bearer rahasia"})[0] == 200
+    conn = http.client.HTTPConnection(running_server.host, running_server.port, timeout=10)
+    conn.request("GET", "/health")
+    assert conn.getresponse().status == 200
+    conn.close()
+
+    url = f"http://127.0.0.1:{running_server.port}"
+    assert RemoteBookingService(url, token="rahasia").get_doctor_names()
+    assert RemoteBookingService(url).get_doctor_names() == []
+
+
+def test_non_loopback_host_requires_token():
+    assert is_loopback("127.0.0.1") and is_loopback("::1") and is_loopback("localhost")
+    assert not is_loopback("0.0.0.0") and not is_loopback("192.168.1.10")
+
+
+def test_prepare_database_converts_whole_shifts_to_slots(empty_db, whole_shift):
+    service, schedule_id, day = whole_shift
+    assert service.add_booking(schedule_id, 1, "Zelda Uji", "0812777", day, "08:00")[0]
+    server = BookingServer(empty_db, journal_enabled=False)
+    try:
+        server.prepare_database()
+    finally:
+        server.close()
+
+    slots = service.get_doctor_schedules(1, day, include_booked=True)
+    assert len(slots) == 8 and [slot.is_booked for slot in slots] == [1] + [0] * 7
+
+    # Start berikutnya tidak mengubah shift tanpa slot yang ditambahkan setelah migrasi
+    assert service.add_shift(1, day, "13:00", "15:00", slot_minutes=0)[0]
+    server = BookingServer(empty_db, journal_enabled=False)
+    try:
+        server.prepare_database()
+    finally:
+        server.close()
+    assert [slot.slot_index for slot in service.get_doctor_schedules(1, day) if slot.start_time == "13:00"] == [None]
+
+
+def test_journal_records_the_calling_desk_not_the_server(running_server, seeded_db):
+    running_server.journal_service.start()
+    slot = free_slot(BookingService(seeded_db))
+    url = f"http://127.0.0.1:{running_server.port}"
+
+    assert RemoteBookingService(url, actor="meja-2").add_booking(
+        slot.schedule_id, slot.doctor_id, "Zelda Uji", "+62 812-777", slot.date, slot.start_time,
+        slot_index=slot.slot_index)[0]
+    # Client lama tanpa header X-Actor: dicatat atas nama server
+    assert rpc(running_server, "add_to_waitlist", ["Zelda Uji", "0812777", slot.date, slot.date, slot.doctor_id])[0] == 200
+
+    events = running_server.journal_service.get_journal(patient="Zelda")
+    assert sorted((event.event, event.actor) for event in events) == [("Booked", "meja-2"), ("Waitlisted", "server")]
+
+
+@pytest.mark.parametrize("audit_repair", [True, False])
+def test_maintenance_that_writes_runs_on_the_writer_thread(seeded_db, audit_repair):
+    server = BookingServer(seeded_db, port=0, journal_enabled=False, audit_interval_hours=24,
+                           audit_repair=audit_repair)
+    threads = {}
+
+    class Job:
+        def __init__(self, name):
+            self.name = name
+
+        def record(self, *args, **kwargs):
+            threads[self.name] = threading.current_thread().name
+
+        run_archive = run_backup = run_incremental = record
+
+    server.archive_service, server.backup_service, server.consistency_service = Job("archive"), Job("backup"), Job("audit")
+
+    async def run_until_every_job_ran():
+        serving = asyncio.create_task(server.serve_forever())
+        while len(threads) < 3:
+            await asyncio.sleep(0.01)
+        for task in [serving, *server._maintenance_tasks]:
+            task.cancel()
+        await asyncio.gather(serving, *server._maintenance_tasks, return_exceptions=True)
+
+    try:
+        asyncio.run(asyncio.wait_for(run_until_every_job_ran(), timeout=10))
+    finally:
+        server.close()
+
+    assert threads["archive"].startswith("booking-writer")
+    assert threads["audit"].startswith("booking-writer") == audit_repair
+    assert not threads["backup"].startswith("booking-writer") # Backup hanya membaca database booking
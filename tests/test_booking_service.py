@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+
+from services.booking_service import BookingService
+from services.consistency_service import ConsistencyService
+from services.seed_snapshots import memory_database
+
+
+def stored_slots(db_manager):
+    conn = db_manager.get_connection()
+    try:
+        return conn.execute("SELECT SlotIndex, SlotCount FROM Bookings ORDER BY BookingID").fetchall()
+    finally:
+        conn.close()
+
+
+def test_bulk_and_single_booking_ignore_slot_index_on_whole_shift(empty_db, whole_shift):
+    service, schedule_id, day = whole_shift
+    item = {"schedule_id": schedule_id, "doctor_id": 1, "patient_name": "Zelda Uji", "patient_phone": "0812777",
+            "booking_date": day, "waktu_booking": "08:00", "slot_index": 3, "slot_count": 2}
+
+    success, message, _ = service.add_bookings([item])
+
+    assert success, message
+    assert stored_slots(empty_db) == [(None, 1)]
+    service.cancel_booking(1)
+    assert service.add_booking(schedule_id, 1, "Zelda Uji", "0812777", day, "08:00", slot_index=3, slot_count=2)[0]
+    assert stored_slots(empty_db) == [(None, 1), (None, 1)]
+
+
+def test_slot_migration_keeps_every_held_booking_on_slot_zero(empty_db, whole_shift):
+    service, _, day = whole_shift
+    for start, end in (("10:00", "12:00"), ("13:00", "15:00"), ("15:00", "17:00")):
+        assert service.add_shift(1, day, start, end, slot_minutes=0)[0]
+    for shift in service.get_doctor_schedules(1, day):
+        assert service.add_booking(shift.schedule_id, 1, "Zelda Uji", "0812777", day, shift.start_time)[0]
+    assert service.complete_booking(2)[0] and service.mark_no_show(3)[0] and service.cancel_booking(4)[0]
+
+    success, message, converted = service.convert_schedules_to_slots(15, once=True)
+
+    assert success and converted == 4, message
+    assert stored_slots(empty_db) == [(0, 1), (0, 1), (0, 1), (None, 1)]
+    held = [slot.start_time for slot in service.get_doctor_schedules(1, day, include_booked=True) if slot.is_booked]
+    assert held == ["08:00", "10:00", "13:00"]
+    report = ConsistencyService(empty_db).audit()
+    assert not any(report["findings"].values()), report["findings"]
+
+
+def test_slot_migration_runs_once_per_database(empty_db, whole_shift):
+    service, _, day = whole_shift
+    assert service.convert_schedules_to_slots(15, once=True)[2] == 1
+    # Shift tanpa slot yang dibuat sengaja setelah migrasi tidak diubah pada start berikutnya
+    assert service.add_shift(1, day, "13:00", "15:00", slot_minutes=0)[0]
+
+    success, _, converted = service.convert_schedules_to_slots(15, once=True)
+
+    assert success and converted == 0
+    whole = [slot for slot in service.get_doctor_schedules(1, day) if slot.slot_index is None]
+    assert [(slot.start_time, slot.end_time) for slot in whole] == [("13:00", "15:00")]
+
+
+def tomorrow_slots(service, count):
+    return service.get_available_schedules((date.today() + timedelta(days=1)).isoformat(), limit=count)
+
+
+def book(service, slot, name="Zelda Uji", phone="0812777"):
+    return service.add_booking(slot.schedule_id, slot.doctor_id, name, phone, slot.date, slot.start_time,
+                               slot_index=slot.slot_index)
+
+
+def booking_id_of(service, name):
+    return next(b.booking_id for b in service.search_bookings(name) if b.status == "Confirmed")
+
+
+def test_seeded_memory_databases_are_isolated(seeded_db, tmp_path):
+    other = memory_database("small", directory=str(tmp_path.parent / "seed-cache"))
+    try:
+        service, other_service = BookingService(seeded_db), BookingService(other)
+        assert len(service.get_all_bookings()) == len(other_service.get_all_bookings()) > 0
+        assert book(service, tomorrow_slots(service, 1)[0])[0]
+        assert service.search_bookings("Zelda") and not other_service.search_bookings("Zelda")
+    finally:
+        other.close_connection()
+
+
+def test_booking_takes_slot_and_cancel_releases_it(seeded_db):
+    service = BookingService(seeded_db)
+    slot = tomorrow_slots(service, 1)[0]
+
+    assert book(service, slot)[0]
+    success, message = book(service, slot, name="Pasien Lain", phone="0813888")
+    assert not success and "sudah terisi" in message
+    assert slot not in tomorrow_slots(service, 50)
+
+    booking_id = booking_id_of(service, "Zelda")
+    assert service.cancel_booking(booking_id)[0]
+    assert slot in tomorrow_slots(service, 50)
+    assert not service.cancel_booking(booking_id)[0]
@@ -0,0 +1,24 @@
+from datetime import date, timedelta
+
+from services.booking_service import BookingService
+
+
+def tomorrow_slots(service, count):
+    return service.get_available_schedules((date.today() + timedelta(days=1)).isoformat(), limit=count)
+
+
+def test_bulk_booking_is_all_or_nothing(seeded_db):
+    service = BookingService(seeded_db)
+    first, second = tomorrow_slots(service, 2)
+    items = [{"schedule_id": slot.schedule_id, "doctor_id": slot.doctor_id, "patient_name": name,
+              "patient_phone": "0812777", "booking_date": slot.date, "waktu_booking": slot.start_time,
+              "slot_index": slot.slot_index}
+             for slot, name in ((first, "Zelda Uji"), (second, "Zelda Adik"), (first, "Zelda Kakak"))]
+
+    success, _, outcomes = service.add_bookings(items)
+
+    assert not success and [ok for _, ok, _ in outcomes] == [False, False, False]
+    assert not service.search_bookings("Zelda")
+    success, message, _ = service.add_bookings(items[:2])
+    assert success, message
+    assert len(service.search_bookings("Zelda")) == 2
@@ -0,0 +1,121 @@
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from database import CHANGE_LOG_PRUNE_EVERY, CHANGE_LOG_RETAIN, DatabaseManager
+from services.booking_service import BookingService
+from services.change_watcher import ChangeWatcher
+
+
+@pytest.fixture
+def desks(tmp_path):
+    """Dua meja depan pada file database yang sama, masing-masing dengan DatabaseManager dan koneksi sendiri."""
+    path = str(tmp_path / "klinik.db")
+    setup = DatabaseManager(path)
+    setup.create_tables()
+    conn = setup.get_connection()
+    conn.execute("INSERT INTO Doctors (Name, Specialty) VALUES ('dr. Uji', 'Umum')")
+    conn.commit()
+    conn.close()
+    day = (date.today() + timedelta(days=1)).isoformat()
+    this_desk, other_desk = BookingService(DatabaseManager(path)), BookingService(DatabaseManager(path))
+    assert other_desk.add_shift(1, day, "08:00", "10:00")[0]
+    return this_desk, other_desk, day
+
+
+def book(service, day, name, slot_index):
+    slot = next(s for s in service.get_doctor_schedules(1, day) if s.slot_index == slot_index)
+    assert service.add_booking(slot.schedule_id, 1, name, "0812777", day, slot.start_time, slot_index=slot_index)[0]
+    return service.search_bookings(name)[0].booking_id
+
+
+@pytest.fixture
+def watcher(desks):
+    this_desk = desks[0]
+    received = []
+    watcher = ChangeWatcher(this_desk, received.append, db_manager=this_desk.db_manager)
+    watcher.received = received
+    assert watcher.poll() is None # Poll pertama tanpa start() hanya mencatat posisi
+    yield watcher
+    watcher.close()
+
+
+def test_idle_poll_does_not_query_or_fire(watcher):
+    checks = watcher.sequence_checks
+
+    assert [watcher.poll() for _ in range(3)] == [None, None, None]
+
+    assert watcher.received == [] and watcher.sequence_checks == checks
+
+
+def test_changes_from_other_desk_are_reported_exactly(desks, watcher):
+    _, other_desk, day = desks
+    kept = book(other_desk, day, "Zelda Uji", 0)
+    cancelled = book(other_desk, day, "Yusuf Batal", 1)
+    assert other_desk.cancel_booking(cancelled)[0]
+
+    changes = watcher.poll()
+
+    assert watcher.received == [changes] and changes.complete
+    assert sorted(row.booking_id for row in changes.bookings) == sorted([kept, cancelled])
+    assert {row.booking_id: row.status for row in changes.bookings}[cancelled] == "Cancelled"
+    assert changes.removed_booking_ids == [] and changes.doctor_ids == [1]
+
+    conn = other_desk.db_manager.get_connection()
+    conn.execute("DELETE FROM Bookings WHERE BookingID = ?", (kept,)) # Seperti booking yang dipindah ke arsip
+    conn.commit()
+    conn.close()
+    changes = watcher.poll()
+    assert changes.bookings == [] and changes.removed_booking_ids == [kept]
+    assert watcher.poll() is None and len(watcher.received) == 2
+
+
+def test_commit_outside_watched_tables_does_not_fire(desks, watcher):
+    _, other_desk, day = desks
+    assert other_desk.add_to_waitlist("Yusuf Tunggu", "0814999", day, day, doctor_id=1)[0]
+
+    assert watcher.poll() is None
+
+    assert watcher.received == [] and watcher.sequence_checks == 2
+
+
+def test_background_thread_delivers_changes(desks):
+    this_desk, other_desk, day = desks
+    delivered = threading.Event()
+    received = []
+
+    def on_changes(changes):
+        received.append(changes)
+        delivered.set()
+
+    watcher = ChangeWatcher(this_desk, on_changes, db_manager=this_desk.db_manager, interval_seconds=0.01)
+    watcher.start()
+    try:
+        booking_id = book(other_desk, day, "Zelda Uji", 0)
+        assert delivered.wait(5)
+    finally:
+        watcher.close(timeout=5)
+    assert [row.booking_id for row in received[0].bookings] == [booking_id]
+
+
+def test_get_changes_asks_for_full_reload_when_it_cannot_answer_exactly(desks):
+    _, other_desk, day = desks
+    since = other_desk.get_change_sequence()
+    book(other_desk, day, "Zelda Uji", 0)
+    book(other_desk, day, "Yusuf Dua", 1)
+
+    assert other_desk.get_changes(since).complete
+    assert not other_desk.get_changes(since, limit=1).complete # Terlalu banyak perubahan
+    latest = other_desk.get_change_sequence()
+    assert not other_desk.get_changes(latest + 1).complete # Seq di depan database (file diganti)
+
+    conn = other_desk.db_manager.get_connection()
+    conn.executemany("INSERT INTO ChangeLog (TableName, KeyID, DoctorID) VALUES ('Doctors', 1, 1)",
+                     [()] * (CHANGE_LOG_RETAIN + CHANGE_LOG_PRUNE_EVERY))
+    conn.commit()
+    oldest, count = conn.execute("SELECT MIN(Seq), COUNT(*) FROM ChangeLog").fetchone()
+    conn.close()
+    assert count <= CHANGE_LOG_RETAIN + CHANGE_LOG_PRUNE_EVERY and oldest > since + 1
+    changes = other_desk.get_changes(since)
+    assert not changes.complete and changes.seq == other_desk.get_change_sequence()
@@ -0,0 +1,195 @@
+import threading
+import time
+
+import pytest
+
+from services.chat_scheduler import (ChatRequestScheduler, ChatDeadlineExceeded, FakeChatModel, FakeClock,
+                                     FakeRateLimitError, FakeServerError)
+
+
+class Outcomes:
+    """Mengumpulkan callback scheduler; wait(n) menunggu (waktu nyata) sampai n hasil/error masuk, True jika ya."""
+
+    def __init__(self):
+        self.results, self.errors = [], []
+        self._condition = threading.Condition()
+
+    def on_result(self, request_id, text, history):
+        with self._condition:
+            self.results.append((request_id, text))
+            self._condition.notify_all()
+
+    def on_error(self, request_id, message, error):
+        with self._condition:
+            self.errors.append((request_id, error))
+            self._condition.notify_all()
+
+    def wait(self, count, timeout=5):
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self.results) + len(self.errors) >= count, timeout)
+
+    def settle(self, clock, count, step, max_steps=200):
+        """Memajukan jam step detik sekali-sekali sampai count hasil/error masuk."""
+        for _ in range(max_steps):
+            with self._condition:
+                if self._condition.wait_for(lambda: len(self.results) + len(self.errors) >= count, 0.01):
+                    return
+            clock.advance(step)
+        pytest.fail(f"no outcome after advancing the clock {max_steps} times")
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def make_scheduler(clock):
+    schedulers = []
+
+    def make(model, **options):
+        options = {"coalesce_seconds": 0, "base_delay": 1.0, "max_delay": 1.0, "clock": clock, **options}
+        scheduler = ChatRequestScheduler(model, **options)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.close(timeout=5)
+
+
+def submit(scheduler, outcomes, message):
+    return scheduler.submit(message, on_result=outcomes.on_result, on_error=outcomes.on_error)
+
+
+def test_follow_up_messages_are_coalesced_into_one_request(make_scheduler, clock):
+    model, outcomes = FakeChatModel(latency=0), Outcomes()
+    scheduler = make_scheduler(model, coalesce_seconds=1.0)
+
+    ids = {submit(scheduler, outcomes, text) for text in ("jadwal dokter gigi", "besok", "yang pagi")}
+    clock.advance(1.0)
+    assert outcomes.wait(1)
+
+    assert len(ids) == 1 and model.calls == 1
+    assert outcomes.results == [(ids.pop(), "Jawaban untuk: jadwal dokter gigi\nbesok\nyang pagi")]
+    assert scheduler.metrics()["coalesced"] == 2
+
+
+def test_requests_wait_for_the_per_minute_budget(make_scheduler, clock):
+    model, outcomes = FakeChatModel(latency=0), Outcomes()
+    scheduler = make_scheduler(model, requests_per_minute=2, deadline_seconds=120)
+
+    for count, text in enumerate(("satu", "dua", "tiga"), start=1):
+        submit(scheduler, outcomes, text)
+        if count < 3:
+            assert outcomes.wait(count)
+    clock.advance(59)
+    assert not outcomes.wait(3, timeout=0.05)
+    assert model.calls == 2 and scheduler.metrics()["rate_limit_waits"] >= 1
+
+    clock.advance(1)
+    assert outcomes.wait(3)
+    assert model.calls == 3 and not outcomes.errors
+
+
+def test_request_fails_when_rate_limit_wait_would_pass_its_deadline(make_scheduler, clock):
+    model, outcomes = FakeChatModel(latency=0), Outcomes()
+    scheduler = make_scheduler(model, requests_per_minute=1, deadline_seconds=30)
+
+    submit(scheduler, outcomes, "satu")
+    assert outcomes.wait(1)
+    request_id = submit(scheduler, outcomes, "dua")
+    assert outcomes.wait(2)
+
+    assert model.calls == 1
+    assert [(rid, type(error)) for rid, error in outcomes.errors] == [(request_id, ChatDeadlineExceeded)]
+
+
+def test_request_expires_while_backing_off(make_scheduler, clock):
+    model = FakeChatModel(latency=0, errors=[FakeServerError("503")] * 10)
+    outcomes = Outcomes()
+    scheduler = make_scheduler(model, max_retries=10, deadline_seconds=3)
+
+    submit(scheduler, outcomes, "halo")
+    outcomes.settle(clock, 1, step=0.5)
+
+    assert not outcomes.results and model.calls < 10
+    assert isinstance(outcomes.errors[0][1], (ChatDeadlineExceeded, FakeServerError))
+
+
+def test_transient_errors_are_retried(make_scheduler, clock):
+    model = FakeChatModel(latency=0, errors=[FakeRateLimitError("429"), FakeServerError("503")])
+    outcomes = Outcomes()
+    scheduler = make_scheduler(model)
+
+    submit(scheduler, outcomes, "halo")
+    outcomes.settle(clock, 1, step=0.5)
+
+    assert outcomes.results and not outcomes.errors
+    assert model.calls == 3 and scheduler.metrics()["retries"] == 2
+
+
+@pytest.mark.parametrize("errors, max_retries, calls", [
+    ([ValueError("400 invalid argument")], 4, 1), # bukan error sementara: langsung gagal
+    ([FakeRateLimitError("429")] * 3, 2, 3), # jatah retry habis
+])
+def test_permanent_errors_and_exhausted_retries_fail(make_scheduler, clock, errors, max_retries, calls):
+    model, outcomes = FakeChatModel(latency=0, errors=errors), Outcomes()
+    scheduler = make_scheduler(model, max_retries=max_retries)
+
+    submit(scheduler, outcomes, "halo")
+    outcomes.settle(clock, 1, step=0.5)
+
+    assert not outcomes.results and model.calls == calls
+    assert outcomes.errors[0][1] is errors[-1]
+
+
+def test_only_rapid_follow_ups_are_coalesced(make_scheduler, clock):
+    model, outcomes = FakeChatModel(latency=0), Outcomes()
+    scheduler = make_scheduler(model, requests_per_minute=1, deadline_seconds=200, coalesce_seconds=1.0)
+    submit(scheduler, outcomes, "satu")
+    clock.advance(1)
+    assert outcomes.wait(1)
+
+    waiting = submit(scheduler, outcomes, "dua") # Antre menunggu jatah per menit
+    clock.advance(10)
+    later = submit(scheduler, outcomes, "tiga")
+    outcomes.settle(clock, 3, step=10)
+
+    assert waiting != later and model.calls == 3 and not outcomes.errors
+    assert [text for _, text in outcomes.results][1:] == ["Jawaban untuk: dua", "Jawaban untuk: tiga"]
+
+
+def test_coalesced_follow_up_gets_its_own_deadline(make_scheduler, clock):
+    model, outcomes = FakeChatModel(latency=0), Outcomes()
+    scheduler = make_scheduler(model, requests_per_minute=1, deadline_seconds=50, coalesce_seconds=30)
+    submit(scheduler, outcomes, "satu")
+    clock.advance(30)
+    assert outcomes.wait(1)
+
+    clock.advance(5)
+    first = submit(scheduler, outcomes, "jadwal dokter gigi") # Deadline awal: 50 detik lagi
+    clock.advance(25)
+    # Digabung 25 detik kemudian; tanpa perpanjangan, jatah per menit baru tersedia setelah deadline awal
+    assert submit(scheduler, outcomes, "yang besok") == first
+    outcomes.settle(clock, 2, step=5)
+
+    assert not outcomes.errors
+    assert outcomes.results[1] == (first, "Jawaban untuk: jadwal dokter gigi\nyang besok")
+
+
+def test_local_turns_join_history_after_the_request_in_flight(make_scheduler):
+    model, outcomes = FakeChatModel(latency=0.5), Outcomes()
+    scheduler = make_scheduler(model)
+    local_turns = [{"role": "user", "parts": ["daftar dokter"]}, {"role": "model", "parts": ["- dr. Budi"]}]
+    scheduler.add_history(local_turns)
+
+    submit(scheduler, outcomes, "halo")
+    while not model.calls: # Tunggu (waktu nyata) sampai "halo" sedang dikirim
+        time.sleep(0.01)
+    scheduler.add_history(local_turns)
+    assert scheduler.history == local_turns
+    assert outcomes.wait(1)
+
+    assert [turn["parts"][0] for turn in scheduler.history] == [
+        "daftar dokter", "- dr. Budi", "halo", "Jawaban untuk: halo", "daftar dokter", "- dr. Budi"]
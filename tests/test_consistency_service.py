@@ -0,0 +1,110 @@
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from services.consistency_service import FINDING_KINDS, ConsistencyService
+
+START = date(2026, 1, 5)
+
+# (ScheduleID, DoctorID, IsBooked, IsBlocked, SlotMinutes, SlotTotal, Occupancy); jadwal N pada minggu ke-N
+SCHEDULES = [
+    (1, 1, 1, 0, 0, 0, 0),        # shift penuh, booking sesuai
+    (2, 1, 0, 0, 15, 4, 0b0011),  # slot 0 (Completed) dan 1 (Confirmed), sesuai
+    (3, 1, 0, 0, 0, 0, 0),        # flag_mismatch: ada booking, IsBooked 0
+    (4, 1, 0, 0, 15, 4, 0b0100),  # flag_mismatch: bit slot yang bookingnya sudah dibatalkan
+    (5, 1, 1, 0, 0, 0, 0),        # double_booked: dua booking memegang shift penuh
+    (6, 1, 0, 0, 15, 4, 0b11000), # slot_out_of_range: slot 3-4 pada shift 4 slot
+    (7, 1, 0, 0, 15, 8, 0b0111),  # double_booked: slot 0-2 dan slot 2 tumpang tindih sebagian
+    (8, 1, 1, 1, 0, 0, 0),        # blocked_with_booking
+    (10, 1, 1, 0, 0, 0, 0),       # booking_schedule_mismatch: booking atas nama dokter lain
+    (11, 99, 0, 0, 0, 0, 0),      # orphan_schedule: dokter tidak ada
+]
+# (BookingID, ScheduleID, DoctorID, Status, SlotIndex, SlotCount); tanggal booking = tanggal jadwalnya
+BOOKINGS = [
+    (1, 1, 1, "Confirmed", None, 1),
+    (2, 2, 1, "Completed", 0, 1),
+    (3, 2, 1, "Confirmed", 1, 1),
+    (4, 3, 1, "Confirmed", None, 1),
+    (5, 4, 1, "Cancelled", 2, 1),
+    (6, 5, 1, "Confirmed", None, 1),
+    (7, 5, 1, "Completed", None, 1),
+    (8, 6, 1, "Confirmed", 3, 2),
+    (9, 7, 1, "Completed", 0, 3),
+    (10, 7, 1, "Confirmed", 2, 1),
+    (11, 8, 1, "Confirmed", None, 1),
+    (12, 999, 1, "Confirmed", None, 1),  # orphan_booking (minggu ke-9, jadwal 9 tidak ada)
+    (13, 10, 2, "Confirmed", None, 1),
+]
+EXPECTED = {
+    "flag_mismatch": 2, "double_booked": 2, "slot_out_of_range": 1, "blocked_with_booking": 1,
+    "orphan_booking": 1, "booking_schedule_mismatch": 1, "orphan_schedule": 1,
+}
+
+
+def week(schedule_id):
+    return (START + timedelta(weeks=schedule_id - 1)).isoformat()
+
+
+@pytest.fixture
+def audited_db(empty_db):
+    # Tanpa foreign key agar booking/jadwal yatim bisa dibuat, seperti hasil edit manual file database
+    conn = sqlite3.connect(empty_db._uri, uri=True)
+    conn.executemany("INSERT INTO Doctors (DoctorID, Name, Specialty) VALUES (?, ?, 'Umum')",
+                     [(1, "dr. Satu"), (2, "dr. Dua")])
+    conn.executemany(
+        "INSERT INTO Schedules (ScheduleID, DoctorID, Date, StartTime, EndTime, IsBooked, IsBlocked, SlotMinutes, "
+        "SlotTotal, Occupancy) VALUES (?, ?, ?, '08:00', '10:00', ?, ?, ?, ?, ?)",
+        [(schedule_id, doctor_id, week(schedule_id), *flags) for schedule_id, doctor_id, *flags in SCHEDULES])
+    conn.executemany(
+        "INSERT INTO Bookings (BookingID, ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime, "
+        "Status, SlotIndex, SlotCount) VALUES (?, ?, ?, 'Zelda Uji', '0812777', ?, '08:00', ?, ?, ?)",
+        [(booking_id, schedule_id, doctor_id, week(schedule_id if schedule_id < 999 else 9), status, slot_index, slot_count)
+         for booking_id, schedule_id, doctor_id, status, slot_index, slot_count in BOOKINGS])
+    conn.commit()
+    conn.close()
+    return empty_db
+
+
+def schedule_flags(db_manager):
+    conn = db_manager.get_connection()
+    try:
+        return {row[0]: row[1:] for row in conn.execute("SELECT ScheduleID, IsBooked, Occupancy FROM Schedules")}
+    finally:
+        conn.close()
+
+
+def test_audit_counts_each_finding_kind(audited_db):
+    report = ConsistencyService(audited_db).audit()
+
+    assert report["findings"] == EXPECTED
+    assert report["samples"]["flag_mismatch"] == [3, 4]
+    assert report["samples"]["double_booked"] == [5, 7]
+    assert report["samples"]["orphan_booking"] == [12] and report["samples"]["booking_schedule_mismatch"] == [13]
+    assert report["schedules_scanned"] == len(SCHEDULES) and report["repaired"] == 0
+
+
+def test_repair_fixes_only_flag_mismatch(audited_db):
+    before = schedule_flags(audited_db)
+
+    report = ConsistencyService(audited_db).audit(repair=True)
+
+    assert report["repaired"] == 2
+    after = schedule_flags(audited_db)
+    assert after[3] == (1, 0) and after[4] == (0, 0)
+    assert {key: value for key, value in after.items() if key not in (3, 4)} == \
+           {key: value for key, value in before.items() if key not in (3, 4)}
+    assert ConsistencyService(audited_db).audit()["findings"] == {**EXPECTED, "flag_mismatch": 0}
+
+
+def test_incremental_run_matches_single_pass(audited_db):
+    single = ConsistencyService(audited_db).audit(week(1), week(11))
+
+    incremental = ConsistencyService(audited_db, chunk_days=10, pause_seconds=0).run_incremental(
+        week(1), week(11))
+
+    assert incremental["chunks"] == 8
+    assert incremental["findings"] == single["findings"] == EXPECTED
+    for key in ("schedules_scanned", "bookings_scanned"):
+        assert incremental[key] == single[key]
+    assert set(incremental["samples"]) == {kind for kind in FINDING_KINDS if EXPECTED[kind]}
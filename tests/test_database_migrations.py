@@ -0,0 +1,96 @@
+import sqlite3
+
+from database import DatabaseManager
+
+# Skema Bookings/Schedules/Doctors versi awal aplikasi (sebelum soft-cancel, slot, dan registri pasien)
+BASELINE_SCHEMA = """
+    CREATE TABLE Doctors (
+        DoctorID INTEGER PRIMARY KEY AUTOINCREMENT,
+        Name TEXT NOT NULL,
+        Specialty TEXT NOT NULL
+    );
+    CREATE TABLE Schedules (
+        ScheduleID INTEGER PRIMARY KEY AUTOINCREMENT,
+        DoctorID INTEGER NOT NULL,
+        Date TEXT NOT NULL,
+        StartTime TEXT NOT NULL,
+        EndTime TEXT NOT NULL,
+        IsBooked INTEGER DEFAULT 0,
+        FOREIGN KEY (DoctorID) REFERENCES Doctors (DoctorID) ON DELETE CASCADE ON UPDATE CASCADE
+    );
+    CREATE TABLE Bookings (
+        BookingID INTEGER PRIMARY KEY AUTOINCREMENT,
+        ScheduleID INTEGER UNIQUE NOT NULL,
+        DoctorID INTEGER NOT NULL,
+        PatientName TEXT NOT NULL,
+        PatientPhone TEXT,
+        BookingDate TEXT NOT NULL,
+        BookingTime TEXT NOT NULL,
+        Status TEXT DEFAULT 'Confirmed',
+        FOREIGN KEY (ScheduleID) REFERENCES Schedules (ScheduleID) ON DELETE CASCADE ON UPDATE CASCADE,
+        FOREIGN KEY (DoctorID) REFERENCES Doctors (DoctorID) ON DELETE CASCADE ON UPDATE CASCADE
+    );
+    INSERT INTO Doctors (Name, Specialty) VALUES ('dr. Budi Santoso', 'Umum');
+    INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked) VALUES
+        (1, '2025-01-06', '09:00', '10:00', 1),
+        (1, '2025-01-06', '10:00', '11:00', 1),
+        (1, '2025-01-07', '09:00', '10:00', 1);
+    INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime) VALUES
+        (1, 1, 'Budi', '+62 812-1111', '2025-01-06', '09:00'),
+        (2, 1, 'Siti', '0813 2222', '2025-01-06', '10:00'),
+        (3, 1, 'Budi S.', '08121111', '2025-01-07', '09:00');
+"""
+
+
+def _table_columns(path, table):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[1:] for row in conn.execute(f"PRAGMA table_info({table})")]
+    finally:
+        conn.close()
+
+
+def test_upgrade_from_baseline_links_existing_bookings(tmp_path):
+    path = str(tmp_path / "baseline.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.close()
+
+    DatabaseManager(path).create_tables()
+
+    conn = sqlite3.connect(path)
+    bookings = conn.execute("SELECT BookingID, PatientID FROM Bookings ORDER BY BookingID").fetchall()
+    patients = conn.execute("SELECT PatientID, Name, PhoneKey, BookingCount FROM Patients ORDER BY PatientID").fetchall()
+    conn.close()
+    assert all(patient_id is not None for _, patient_id in bookings)
+    # '+62 812-1111' dan '08121111' adalah pasien yang sama; nama diambil dari booking terbaru
+    assert [(name, key, count) for _, name, key, count in patients] == [("Budi S.", "08121111", 2),
+                                                                      ("Siti", "08132222", 1)]
+    assert bookings[0][1] == bookings[2][1]
+
+
+def test_upgraded_schema_matches_fresh_schema(tmp_path):
+    upgraded, fresh = str(tmp_path / "upgraded.db"), str(tmp_path / "fresh.db")
+    conn = sqlite3.connect(upgraded)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.close()
+    DatabaseManager(upgraded).create_tables()
+    DatabaseManager(fresh).create_tables()
+    for table in ("Bookings", "Schedules", "Patients"):
+        assert _table_columns(upgraded, table) == _table_columns(fresh, table)
+
+
+def test_create_tables_is_idempotent_and_links_new_unlinked_rows(tmp_path):
+    path = str(tmp_path / "clinic.db")
+    db_manager = DatabaseManager(path)
+    db_manager.create_tables()
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO Doctors (Name, Specialty) VALUES ('dr. A', 'Umum')")
+    conn.execute("INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime) VALUES (1, '2025-01-06', '09:00', '12:00')")
+    conn.execute("INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime) "
+                 "VALUES (1, 1, 'Impor', '0899', '2025-01-06', '09:00')")
+    conn.commit()
+    db_manager.create_tables()
+    db_manager.create_tables()
+    assert conn.execute("SELECT PatientID, (SELECT BookingCount FROM Patients) FROM Bookings").fetchone() == (1, 1)
+    conn.close()
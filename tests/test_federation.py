@@ -0,0 +1,113 @@
+import sqlite3
+import threading
+
+import pytest
+
+from database import DatabaseManager
+from services.federation import FederatedBookingService
+
+
+@pytest.fixture
+def federation(tmp_path):
+    federation = FederatedBookingService({name: str(tmp_path / f"{name}.db") for name in ("pusat", "timur")},
+                                         query_timeout_seconds=0.5)
+    federation.create_tables()
+    for branch in federation.branches:
+        federation.branch(branch).insert_initial_data()
+    yield federation
+    federation.close()
+
+
+def test_all_branches_answered(federation):
+    doctors = federation.get_all_doctors()
+
+    assert doctors.complete and doctors.failed_branches == {}
+    assert {doctor.branch for doctor in doctors} == {"pusat", "timur"}
+
+
+def test_failed_branch_is_reported_with_partial_results(federation, monkeypatch):
+    def broken(*args, **kwargs):
+        raise OSError("disk I/O error")
+
+    monkeypatch.setattr(federation.branch("timur"), "get_all_doctors_with_specialty", broken)
+    doctors = federation.get_all_doctors()
+
+    assert not doctors.complete and doctors.failed_branches == {"timur": "disk I/O error"}
+    assert doctors and {doctor.branch for doctor in doctors} == {"pusat"}
+
+
+def test_slow_branch_times_out_instead_of_blocking(federation, monkeypatch):
+    release = threading.Event()
+
+    def hanging(*args, **kwargs):
+        release.wait(5)
+        return []
+
+    monkeypatch.setattr(federation.branch("pusat"), "search_bookings", hanging)
+    try:
+        results = federation.search_bookings("budi")
+    finally:
+        release.set()
+
+    assert list(results.failed_branches) == ["pusat"] and "timeout" in results.failed_branches["pusat"]
+
+
+def test_corrupt_branch_file_is_reported_as_failed(federation, tmp_path):
+    with open(tmp_path / "timur.db", "wb") as f:
+        f.write(b"bukan database sqlite " * 1000)
+
+    for results in (federation.get_all_doctors(), federation.get_all_doctors(specialty="Gigi"),
+                    federation.search_bookings("budi"), federation.get_all_bookings(),
+                    federation.get_available_schedules("2026-01-05")):
+        assert not results.complete and list(results.failed_branches) == ["timur"]
+        assert "not a database" in results.failed_branches["timur"]
+
+
+def test_missing_branch_file_is_reported_without_creating_it(federation, tmp_path):
+    (tmp_path / "timur.db").unlink()
+
+    doctors = federation.get_all_doctors()
+
+    assert list(doctors.failed_branches) == ["timur"] and "tidak ditemukan" in doctors.failed_branches["timur"]
+    assert {doctor.branch for doctor in doctors} == {"pusat"}
+    assert not (tmp_path / "timur.db").exists()
+
+
+def test_hung_branch_is_skipped_until_its_query_finishes(federation, monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def hanging(*args, **kwargs):
+        calls.append(True)
+        release.wait(5)
+        return []
+
+    monkeypatch.setattr(federation.branch("pusat"), "get_all_doctors_with_specialty", hanging)
+    try:
+        first = federation.get_all_doctors()
+        # Query pertama masih memegang satu worker; fan-out berikutnya tidak menambah worker untuk pusat
+        later = [federation.get_all_doctors() for _ in range(3)]
+    finally:
+        release.set()
+
+    assert "timeout" in first.failed_branches["pusat"]
+    for doctors in later:
+        assert "belum selesai" in doctors.failed_branches["pusat"]
+        assert doctors and {doctor.branch for doctor in doctors} == {"timur"}
+    assert len(calls) == 1
+    # Setelah query yang macet selesai, cabang pusat kembali ikut dalam fan-out
+    assert federation._in_flight["pusat"].acquire(timeout=5)
+    federation._in_flight["pusat"].release()
+    monkeypatch.undo()
+    assert federation.get_all_doctors().complete
+
+
+def test_query_timeout_interrupts_long_running_query(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / "lambat.db"), query_timeout=0.2)
+    conn = db_manager.get_connection()
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="interrupted"):
+            conn.execute("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+                         "SELECT count(*) FROM n").fetchone()
+    finally:
+        conn.close()
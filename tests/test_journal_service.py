@@ -0,0 +1,44 @@
+import pytest
+
+from services.journal_service import JournalService, acting_as
+
+
+@pytest.fixture
+def journal(empty_db):
+    journal = JournalService(empty_db, actor="meja-1", linger_seconds=0)
+    journal.start()
+    yield journal
+    journal.close()
+
+
+def record_booking(journal, name, phone):
+    journal.record("Booked", booking_id=1, schedule_id=1, doctor_id=1, patient_name=name, patient_phone=phone,
+                   booking_date="2026-03-02", booking_time="08:00")
+
+
+def test_phone_search_matches_any_format(journal, empty_db):
+    record_booking(journal, "Budi", "+62 812-1111")
+    record_booking(journal, "Siti", "0813 2222")
+    journal.close()
+    # Event dari versi sebelumnya menyimpan digit apa adanya (jurnal append-only, tidak dimigrasi)
+    conn = empty_db.get_connection()
+    conn.execute("INSERT INTO BookingJournal (EventAt, Event, PatientName, PatientPhone, Actor) "
+                 "VALUES ('2026-01-05 08:00:00', 'Booked', 'Budi Lama', '628121111', 'meja-lama')")
+    conn.commit()
+    conn.close()
+
+    names = lambda patient: sorted(event.patient_name for event in journal.get_journal(patient=patient))
+    assert names("0812") == ["Budi", "Budi Lama"]
+    assert names("+62 812") == ["Budi", "Budi Lama"]
+    assert names("62813") == ["Siti"]
+    assert names("0813-2222") == ["Siti"]
+    assert [event.patient_phone for event in journal.get_journal(patient="Budi")] == ["08121111", "628121111"]
+
+
+def test_acting_as_overrides_actor_only_inside_the_block(journal):
+    with acting_as("meja-2"):
+        record_booking(journal, "Budi", "0812")
+    record_booking(journal, "Siti", "0813")
+
+    assert sorted((e.patient_name, e.actor) for e in journal.get_journal()) == [("Budi", "meja-2"), ("Siti", "meja-1")]
+
@@ -0,0 +1,68 @@
+import pytest
+
+from services.local_answers import EXPLICIT_SPECIALTY_WEIGHT, FREE_FORM_PENALTY, SYMPTOM_WEIGHT, LocalAnswerEngine
+
+
+class Doctors:
+    """Pengganti BookingService yang menghitung panggilan get_all_specialties (HTTP dalam mode server)."""
+
+    def __init__(self, specialties=("Anak", "Gigi", "Umum")):
+        self.specialties = list(specialties)
+        self.specialty_calls = 0
+
+    def get_all_specialties(self):
+        self.specialty_calls += 1
+        return list(self.specialties)
+
+    def get_doctors_by_specialty(self, specialty):
+        return []
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("daftar dokter gigi", ("doctors_by_specialty", EXPLICIT_SPECIALTY_WEIGHT, "Gigi")),
+    ("Daftar dokter yang tersedia", ("doctor_list", 0.95, None)),
+    ("anak saya demam", ("doctors_by_specialty", SYMPTOM_WEIGHT, "Umum")),
+    ("jam buka klinik", ("clinic_info", 0.95, None)),
+    ("halo", (None, 0.0, None)),
+])
+def test_classify_picks_best_intent(message, expected):
+    intent, confidence, specialty = LocalAnswerEngine(Doctors()).classify(message)
+
+    assert (intent, specialty) == (expected[0], expected[2])
+    assert confidence == pytest.approx(expected[1])
+
+
+def test_free_form_question_is_penalised_below_threshold():
+    engine = LocalAnswerEngine(Doctors(), confidence_threshold=0.7)
+
+    intent, confidence, _ = engine.classify("apakah dokter gigi boleh mencabut gigi saat demam")
+
+    assert intent == "doctors_by_specialty"
+    assert confidence == pytest.approx(EXPLICIT_SPECIALTY_WEIGHT - FREE_FORM_PENALTY)
+    assert engine.answer("apakah dokter gigi boleh mencabut gigi saat demam") is None
+
+
+@pytest.mark.parametrize("threshold, answered", [(0.7, True), (0.85, False)])
+def test_threshold_decides_local_answer(threshold, answered):
+    engine = LocalAnswerEngine(Doctors(), confidence_threshold=threshold)
+
+    answer = engine.answer("sakit kepala sejak kemarin") # Tebakan dari keluhan: skor SYMPTOM_WEIGHT
+
+    assert (answer is not None) == answered
+    if answered:
+        assert answer.intent == "doctors_by_specialty" and "spesialis Umum" in answer.text
+
+
+def test_specialties_are_cached_until_invalidated():
+    doctors = Doctors()
+    engine = LocalAnswerEngine(doctors)
+    for message in ("daftar dokter gigi", "dokter anak", "poli mata"):
+        engine.classify(message)
+    assert doctors.specialty_calls == 1
+    assert engine.classify("poli mata")[0] is None
+
+    doctors.specialties.append("Mata")
+    engine.invalidate()
+
+    assert engine.classify("poli mata") == ("doctors_by_specialty", EXPLICIT_SPECIALTY_WEIGHT, "Mata")
+    assert doctors.specialty_calls == 2
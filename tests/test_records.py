@@ -0,0 +1,36 @@
+from datetime import date, timedelta
+
+import pytest
+
+from services.booking_service import BookingService
+from services.records import ROW_FACTORIES, BookingRecord, DoctorRecord, row_id
+
+
+def as_fields(row, record_type):
+    """Baris dalam bentuk apa pun (record, tuple, dict) sebagai dict nama field -> nilai."""
+    return row if isinstance(row, dict) else dict(zip(record_type._fields, row))
+
+
+@pytest.mark.parametrize("row_factory", sorted(ROW_FACTORIES))
+def test_queries_and_changes_work_with_every_row_factory(seeded_db, row_factory):
+    writer = BookingService(seeded_db)
+    service = BookingService(seeded_db, row_factory=row_factory)
+    since = service.get_change_sequence()
+    slot = writer.get_available_schedules((date.today() + timedelta(days=1)).isoformat(), limit=1)[0]
+    assert writer.add_booking(slot.schedule_id, slot.doctor_id, "Zelda Uji", "0812777", slot.date, slot.start_time,
+                              slot_index=slot.slot_index)[0]
+    booking_id = writer.search_bookings("Zelda")[0].booking_id
+    conn = seeded_db.get_connection()
+    conn.execute("DELETE FROM Bookings WHERE BookingID = 1") # Seperti booking yang dipindah ke arsip
+    conn.commit()
+    conn.close()
+
+    changes = service.get_changes(since)
+
+    assert changes is not None and changes.complete
+    assert [row_id(booking) for booking in changes.bookings] == [booking_id]
+    assert as_fields(changes.bookings[0], BookingRecord)["patient_name"] == "Zelda Uji"
+    assert changes.removed_booking_ids == [1]
+    doctor = service.get_doctor_by_id(slot.doctor_id)
+    assert row_id(doctor) == slot.doctor_id and as_fields(doctor, DoctorRecord)["doctor_id"] == slot.doctor_id
+    assert [row_id(booking) for booking in service.search_bookings("Zelda")] == [booking_id]
@@ -0,0 +1,82 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from database import DatabaseManager
+from services.reminder_service import ReminderService, LoopbackReminderSender, TIMESTAMP_FORMAT
+
+NOW = datetime(2026, 3, 2, 9, 0, 0)
+
+
+def _clinic_with_bookings(path, count):
+    """count booking besok pagi (pengingat H-1 sudah jatuh tempo pada NOW)."""
+    db_manager = DatabaseManager(path)
+    db_manager.create_tables()
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO Doctors (Name, Specialty) VALUES ('dr. A', 'Umum')")
+    day = (NOW + timedelta(days=1)).strftime("%Y-%m-%d")
+    for n in range(count):
+        conn.execute("INSERT INTO Schedules (DoctorID, Date, StartTime, EndTime, IsBooked) VALUES (1, ?, '08:00', '08:15', 1)",
+                     (day,))
+        conn.execute("INSERT INTO Bookings (ScheduleID, DoctorID, PatientName, PatientPhone, BookingDate, BookingTime) "
+                     "VALUES (?, 1, ?, '0812', ?, '08:00')", (n + 1, f"Pasien {n}", day))
+    conn.commit()
+    conn.close()
+    return db_manager
+
+
+def test_two_desks_deliver_each_reminder_once(tmp_path):
+    path = str(tmp_path / "clinic.db")
+    _clinic_with_bookings(path, 200)
+    senders = [LoopbackReminderSender(latency=0.001), LoopbackReminderSender(latency=0.001)]
+    services = [ReminderService(DatabaseManager(path), sender, batch_size=20, clock=lambda: NOW, worker_id=f"desk-{n}")
+                for n, sender in enumerate(senders)]
+    threads = [threading.Thread(target=service.run_once) for service in services]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    delivered = [set(sender.delivered) for sender in senders]
+    assert not delivered[0] & delivered[1]
+    assert len(delivered[0] | delivered[1]) == 200
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT Status, COUNT(*) FROM ReminderOutbox GROUP BY Status").fetchall() == [("Sent", 200)]
+    conn.close()
+
+
+def test_stale_claim_is_reclaimed_but_live_claim_is_not(tmp_path):
+    path = str(tmp_path / "clinic.db")
+    db_manager = _clinic_with_bookings(path, 2)
+    service = ReminderService(db_manager, LoopbackReminderSender(), clock=lambda: NOW, worker_id="desk-b",
+                              claim_timeout_minutes=10)
+    service.load_upcoming()
+    service._write_outbox(service._pop_due(NOW), NOW)
+    conn = sqlite3.connect(path)
+    stale_at = (NOW - timedelta(minutes=30)).strftime(TIMESTAMP_FORMAT)
+    live_at = (NOW - timedelta(minutes=1)).strftime(TIMESTAMP_FORMAT)
+    conn.execute("UPDATE ReminderOutbox SET Status = 'Sending', ClaimedBy = 'desk-a', ClaimedAt = ? WHERE BookingID = 1",
+                 (stale_at,))
+    conn.execute("UPDATE ReminderOutbox SET Status = 'Sending', ClaimedBy = 'desk-a', ClaimedAt = ? WHERE BookingID = 2",
+                 (live_at,))
+    conn.commit()
+
+    assert service.deliver_pending(NOW) == (1, 0, 0)
+    assert list(service.sender.delivered) == ["1:24h"]
+    assert conn.execute("SELECT BookingID, Status, ClaimedBy FROM ReminderOutbox ORDER BY BookingID").fetchall() == [
+        (1, "Sent", None), (2, "Sending", "desk-a")]
+    conn.close()
+
+
+def test_cancelled_booking_reminder_is_skipped(tmp_path):
+    path = str(tmp_path / "clinic.db")
+    db_manager = _clinic_with_bookings(path, 1)
+    service = ReminderService(db_manager, LoopbackReminderSender(), clock=lambda: NOW)
+    service.load_upcoming()
+    service._write_outbox(service._pop_due(NOW), NOW)
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE Bookings SET Status = 'Cancelled'")
+    conn.commit()
+    assert service.deliver_pending(NOW) == (0, 0, 1)
+    assert conn.execute("SELECT Status FROM ReminderOutbox").fetchone() == ("Skipped",)
+    conn.close()
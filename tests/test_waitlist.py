@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+from services.booking_service import BookingService
+
+
+def tomorrow_slots(service, count):
+    return service.get_available_schedules((date.today() + timedelta(days=1)).isoformat(), limit=count)
+
+
+def book(service, slot, name="Zelda Uji", phone="0812777"):
+    return service.add_booking(slot.schedule_id, slot.doctor_id, name, phone, slot.date, slot.start_time,
+                               slot_index=slot.slot_index)
+
+
+def booking_id_of(service, name):
+    return next(b.booking_id for b in service.search_bookings(name) if b.status == "Confirmed")
+
+
+def test_cancelled_slot_goes_to_best_waitlist_entry(seeded_db):
+    service = BookingService(seeded_db)
+    slot = tomorrow_slots(service, 1)[0]
+    assert book(service, slot)[0]
+    assert service.add_to_waitlist("Yusuf Tunggu", "0814999", slot.date, slot.date, doctor_id=slot.doctor_id,
+                                   priority=5)[0]
+    waiting = len(service.get_waitlist())
+
+    success, message = service.cancel_booking(booking_id_of(service, "Zelda"))
+
+    assert success and "Yusuf Tunggu" in message
+    assert len(service.get_waitlist()) == waiting - 1
+    assert [(b.booking_date, b.booking_time) for b in service.search_bookings("Yusuf")] == [(slot.date, slot.start_time)]
+    assert slot not in tomorrow_slots(service, 50)
+
+
+def test_waitlist_requires_target_and_can_be_removed(seeded_db):
+    service = BookingService(seeded_db)
+    day = (date.today() + timedelta(days=2)).isoformat()
+    assert not service.add_to_waitlist("Yusuf Tunggu", "0814999", day, day)[0]
+    assert service.add_to_waitlist("Yusuf Tunggu", "0814999", day, day, specialty="Gigi")[0]
+
+    entry = next(row for row in service.get_waitlist() if row[1] == "Yusuf Tunggu")
+    assert entry[4] == "Gigi"
+    assert service.remove_from_waitlist(entry[0])[0]
+    assert not service.remove_from_waitlist(entry[0])[0]
+    assert all(row[1] != "Yusuf Tunggu" for row in service.get_waitlist())